@@ -1,3 +1,2 @@
-from app.api.v1.endpoints import query, health
-
-__all__ = ['query', 'health']
+# Los módulos se importan según el perfil de despliegue (app/api/v1/router.py)
+__all__ = ['query', 'health', 'openrouter', 'anthropic', 'email', 'infractions']
@@ -1,15 +1,65 @@
 import logging
 import time
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from app.models import AnthropicRequest, AnthropicResponse
-from app.core.dependencies import get_anthropic_service, get_tool_manager
+from app.core.dependencies import get_anthropic_service, get_tool_manager, get_llm_gateway
 from app.core.config import settings
+from app.services.llm_gateway import LLMGatewayError
+from app.core.admission import AdmisionRechazada, cabeceras_reintento
+from app.utils.sse import SSE_HEADERS, SSE_MEDIA_TYPE, formatear_evento
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
+def _verificar_anthropic(anthropic_service) -> None:
+    """
+    Verifica que el cliente Anthropic esté configurado (tools y streaming).
+
+    Raises:
+        HTTPException 503: Si el servicio Anthropic no está disponible
+    """
+    if not anthropic_service.client:
+        raise HTTPException(
+            status_code=503,
+            detail="Servicio Anthropic no disponible. Verifica la configuración de ANTHROPIC_API_KEY"
+        )
+
+
+def _validar_solicitud(request: AnthropicRequest) -> None:
+    """
+    Verifica los campos obligatorios.
+
+    Raises:
+        HTTPException 400: Si los campos obligatorios están vacíos
+    """
+    if not request.pregunta or not request.pregunta.strip():
+        raise HTTPException(
+            status_code=400,
+            detail="El campo 'pregunta' no puede estar vacío"
+        )
+
+    if not request.context.system or not request.context.system.strip():
+        raise HTTPException(
+            status_code=400,
+            detail="El campo 'context.system' no puede estar vacío"
+        )
+
+    if not request.context.user or not request.context.user.strip():
+        raise HTTPException(
+            status_code=400,
+            detail="El campo 'context.user' no puede estar vacío"
+        )
+
+    if not request.intencion or not request.intencion.strip():
+        raise HTTPException(
+            status_code=400,
+            detail="El campo 'intencion' no puede estar vacío"
+        )
+
+
 @router.post("", response_model=AnthropicResponse)
 async def chat_anthropic(
     request: AnthropicRequest
@@ -21,6 +71,17 @@ async def chat_anthropic(
     estructurado, la pregunta del usuario, entidades detectadas y la intención.
     Es útil para casos de uso de NLU donde ya se ha procesado la entrada del usuario.
 
+    Sin tools, la llamada pasa por el gateway de LLM con la política "anthropic"
+    (LLM_ROUTING_POLICIES): si Claude falla, tiene el circuit breaker abierto o
+    tarda más que su p95, puede responder OpenRouter. `model_used` indica el
+    modelo que respondió. El flujo con tools siempre usa Claude.
+
+    Las llamadas al LLM pasan por el control de admisión: el flujo sin tools
+    tiene prioridad interactiva y el flujo con tools prioridad de fondo. Si
+    no obtienen turno antes de su deadline se responde 503 con `Retry-After`
+    en lugar de seguir esperando, para que el cliente reintente o use otro
+    servicio.
+
     El modelo y los parámetros están configurados en el sistema y no se pueden
     modificar por request individual.
 
@@ -60,40 +121,27 @@ async def chat_anthropic(
     start_time = time.time()
 
     try:
-        # Obtener servicio
+        # Obtener servicios
         anthropic_service = get_anthropic_service()
+        llm_gateway = get_llm_gateway()
+        _validar_solicitud(request)
 
-        # Verificar disponibilidad
-        if not anthropic_service.client:
+        if request.use_tools:
+            _verificar_anthropic(anthropic_service)
+        elif not llm_gateway.disponible("anthropic"):
             raise HTTPException(
                 status_code=503,
-                detail="Servicio Anthropic no disponible. Verifica la configuración de ANTHROPIC_API_KEY"
-            )
-
-        # Validar inputs
-        if not request.pregunta or not request.pregunta.strip():
-            raise HTTPException(
-                status_code=400,
-                detail="El campo 'pregunta' no puede estar vacío"
-            )
-
-        if not request.context.system or not request.context.system.strip():
-            raise HTTPException(
-                status_code=400,
-                detail="El campo 'context.system' no puede estar vacío"
-            )
-
-        if not request.context.user or not request.context.user.strip():
-            raise HTTPException(
-                status_code=400,
-                detail="El campo 'context.user' no puede estar vacío"
+                detail="Ningún proveedor LLM disponible. Verifica ANTHROPIC_API_KEY / OPENROUTER_API_KEY"
             )
 
-        if not request.intencion or not request.intencion.strip():
-            raise HTTPException(
-                status_code=400,
-                detail="El campo 'intencion' no puede estar vacío"
-            )
+        argumentos = dict(
+            system_context=request.context.system,
+            user_context=request.context.user,
+            pregunta=request.pregunta,
+            entidades=request.entidades,
+            intencion=request.intencion
+        )
+        model_used = settings.CLAUDE_MODEL
 
         logger.info(f"📨 Procesando consulta Anthropic Claude")
         logger.info(f"   Intención: {request.intencion}")
@@ -120,35 +168,22 @@ async def chat_anthropic(
 
             if not tool_definitions:
                 logger.warning("⚠️ No hay tools disponibles, usando flujo sin tools")
-                answer = anthropic_service.chat_with_context(
-                    system_context=request.context.system,
-                    user_context=request.context.user,
-                    pregunta=request.pregunta,
-                    entidades=request.entidades,
-                    intencion=request.intencion
-                )
+                answer = await anthropic_service.chat_with_context_async(**argumentos)
             else:
                 # Llamar a chat_with_tools
-                answer = anthropic_service.chat_with_tools(
-                    system_context=request.context.system,
-                    user_context=request.context.user,
-                    pregunta=request.pregunta,
-                    entidades=request.entidades,
-                    intencion=request.intencion,
+                answer = await anthropic_service.chat_with_tools_async(
+                    **argumentos,
                     tools=tool_definitions,
                     tool_manager=tool_manager,
                     max_iterations=5
                 )
         else:
-            # Flujo original sin tools
-            logger.info(f"💬 Usando flujo sin tools (comportamiento original)")
-            answer = anthropic_service.chat_with_context(
-                system_context=request.context.system,
-                user_context=request.context.user,
-                pregunta=request.pregunta,
-                entidades=request.entidades,
-                intencion=request.intencion
-            )
+            # Flujo sin tools a través del gateway (ruteo, breaker y hedging)
+            logger.info(f"💬 Usando flujo sin tools (gateway de LLM)")
+            respuesta = await llm_gateway.generar("anthropic", **argumentos)
+            answer = respuesta.texto
+            model_used = respuesta.modelo
+            logger.info(f"   Proveedor: {respuesta.proveedor} (intentos: {respuesta.intentos}, hedged: {respuesta.hedged})")
 
         processing_time = time.time() - start_time
 
@@ -156,15 +191,104 @@ async def chat_anthropic(
 
         return AnthropicResponse(
             answer=answer,
-            model_used='claude-3-5-haiku-20241022',
+            model_used=model_used,
             processing_time=processing_time
         )
 
     except HTTPException:
         raise
+    except AdmisionRechazada as e:
+        logger.warning(f"🚦 {e}. Respondiendo 503")
+        raise HTTPException(status_code=503, detail=str(e), headers=cabeceras_reintento())
+    except LLMGatewayError as e:
+        logger.error(f"❌ Ningún proveedor LLM respondió: {e}")
+        raise HTTPException(status_code=503, detail=str(e))
     except ValueError as e:
         logger.error(f"❌ Error de validación: {e}")
         raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.error(f"❌ Error procesando consulta Anthropic: {e}")
         raise HTTPException(status_code=500, detail=f"Error interno del servidor: {str(e)}")
+
+
+@router.post("/stream")
+async def chat_anthropic_stream(
+    request: AnthropicRequest
+):
+    """
+    Versión en streaming (Server-Sent Events) de la generación con Claude.
+
+    Acepta el mismo cuerpo que `POST /anthropic` y valida antes de abrir el
+    stream, por lo que los errores 400/503 se devuelven como respuestas HTTP
+    normales.
+
+    Eventos emitidos:
+        - tool: nombres de los tools que Claude ejecuta (solo con use_tools)
+        - token: fragmentos de la respuesta a medida que se generan
+        - done: modelo usado, tiempo total y tiempo al primer token
+        - error: si falla la generación después de iniciar el stream
+
+    Args:
+        request: AnthropicRequest (ver `POST /anthropic`)
+
+    Returns:
+        StreamingResponse con media type text/event-stream
+    """
+    start_time = time.time()
+
+    anthropic_service = get_anthropic_service()
+    _verificar_anthropic(anthropic_service)
+    _validar_solicitud(request)
+
+    tool_definitions = None
+    tool_manager = None
+    if request.use_tools:
+        tool_manager = get_tool_manager()
+        tool_definitions = tool_manager.get_tool_definitions(request.available_tools or None)
+
+    argumentos = dict(
+        system_context=request.context.system,
+        user_context=request.context.user,
+        pregunta=request.pregunta,
+        entidades=request.entidades,
+        intencion=request.intencion
+    )
+
+    async def eventos():
+        primer_token = None
+        try:
+            if tool_definitions:
+                generador = anthropic_service.chat_with_tools_stream(
+                    **argumentos,
+                    tools=tool_definitions,
+                    tool_manager=tool_manager,
+                    max_iterations=5
+                )
+            else:
+                generador = anthropic_service.chat_with_context_stream(**argumentos)
+
+            async for evento, datos in generador:
+                if evento == "token" and primer_token is None:
+                    primer_token = time.time() - start_time
+                yield formatear_evento(evento, datos)
+
+            processing_time = time.time() - start_time
+            logger.info(f"✅ Respuesta en streaming generada en {processing_time:.2f}s (primer token: {primer_token or 0:.2f}s)")
+            yield formatear_evento("done", {
+                "model_used": settings.CLAUDE_MODEL,
+                "processing_time": processing_time,
+                "time_to_first_token": primer_token
+            })
+
+        except AdmisionRechazada as e:
+            # El stream ya respondió 200: el rechazo llega como evento error
+            logger.warning(f"🚦 {e}. Respondiendo con evento error")
+            yield formatear_evento("error", {
+                "detail": str(e),
+                "retry_after": settings.LLM_ADMISSION_RETRY_AFTER_SECONDS
+            })
+        except Exception as e:
+            logger.error(f"❌ Error procesando consulta Anthropic en streaming: {e}")
+            yield formatear_evento("error", {"detail": f"Error interno del servidor: {str(e)}"})
+
+    return StreamingResponse(eventos(), media_type=SSE_MEDIA_TYPE, headers=SSE_HEADERS)
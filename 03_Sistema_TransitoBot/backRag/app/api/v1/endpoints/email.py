@@ -0,0 +1,47 @@
+import logging
+from fastapi import APIRouter, HTTPException
+from app.models import EmailStatusResponse
+from app.core.dependencies import get_email_outbox
+from app.services.email_outbox import ESTADO_PENDIENTE
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+@router.get("/{ticket}", response_model=EmailStatusResponse)
+async def get_email_status(ticket: str):
+    """
+    Consultar el estado de entrega de un email encolado por el tool `enviar_email`.
+
+    Args:
+        ticket: Ticket retornado por el tool al aceptar el email
+
+    Returns:
+        EmailStatusResponse con el estado (pendiente, enviando, enviado o fallido),
+        los intentos realizados y el último error
+
+    Raises:
+        HTTPException 503: Si la bandeja de salida está deshabilitada
+        HTTPException 404: Si el ticket no existe
+    """
+    email_outbox = get_email_outbox()
+    if email_outbox is None:
+        raise HTTPException(
+            status_code=503,
+            detail="La bandeja de salida de emails está deshabilitada (EMAIL_OUTBOX_ENABLED=False)"
+        )
+
+    try:
+        email = email_outbox.obtener(ticket)
+    except Exception as e:
+        logger.error(f"Error consultando email {ticket}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if email is None:
+        raise HTTPException(status_code=404, detail=f"No existe un email con ticket '{ticket}'")
+
+    if email["estado"] != ESTADO_PENDIENTE:
+        email["proximo_intento"] = None
+
+    return EmailStatusResponse(**email)
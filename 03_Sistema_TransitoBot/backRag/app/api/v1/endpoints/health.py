@@ -1,7 +1,25 @@
 import logging
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse
 from app.models import HealthResponse
-from app.core.dependencies import get_health_service, get_openrouter_service
+from app.core.dependencies import (
+    get_health_service,
+    get_openrouter_service,
+    get_db_repository,
+    get_semantic_cache,
+    get_reranker,
+    get_conversation_memory,
+    get_tool_result_cache,
+    get_email_outbox,
+    get_llm_gateway,
+    get_query_singleflight,
+    get_extractive_engine,
+    get_infraction_index
+)
+from app.core.admission import get_admission_controller
+from app.core.concurrency import run_blocking
+from app.core.warmup import esta_listo, get_estado
+from app.core.profiles import usa_recuperacion
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +33,19 @@ async def health_check():
     return health_service.check_health()
 
 
+@router.get("/ready")
+async def readiness_check():
+    """
+    Disponibilidad del worker que atiende la petición.
+
+    Responde 503 hasta que el arranque y las consultas de calentamiento
+    terminan, para que el balanceador no envíe tráfico a un worker frío.
+    """
+    if not esta_listo():
+        return JSONResponse(status_code=503, content=get_estado())
+    return get_estado()
+
+
 @router.get("/stats")
 async def get_database_stats():
     """Obtener estadísticas de la base de datos."""
@@ -28,6 +59,34 @@ async def get_database_stats():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/corpus")
+async def get_corpus_fingerprint():
+    """
+    Huella del corpus indexado.
+
+    Los artefactos generados a partir del corpus (p. ej. las respuestas
+    precalculadas del fallback de Rasa) guardan esta huella y la comparan
+    para detectar que quedaron obsoletos.
+    """
+    if not usa_recuperacion():
+        raise HTTPException(status_code=503, detail="El perfil de despliegue no incluye ChromaDB")
+
+    try:
+        db_repository = get_db_repository()
+        if db_repository.collection is None:
+            raise HTTPException(status_code=503, detail="ChromaDB no disponible. Ejecuta el script de setup primero")
+        return {
+            "fingerprint": await run_blocking(db_repository.corpus_fingerprint),
+            "total_articulos": db_repository.collection.count(),
+            "coleccion": db_repository.collection_name
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error calculando la huella del corpus: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/llm-status")
 async def get_llm_status():
     """Verificar el estado del servicio LLM (Claude)."""
@@ -48,3 +107,44 @@ async def get_openrouter_status():
     except Exception as e:
         logger.error(f"Error verificando estado de OpenRouter: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/cache")
+async def get_cache_stats():
+    """Obtener estadísticas de las cachés de embeddings y de respuestas."""
+    try:
+        embedding_cache = get_db_repository().embedding_cache if usa_recuperacion() else None
+        return {
+            "embeddings": embedding_cache.get_stats() if embedding_cache is not None else None,
+            "respuestas": get_semantic_cache().get_stats()
+        }
+    except Exception as e:
+        logger.error(f"Error obteniendo estadísticas de caché: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/metrics")
+async def get_metrics():
+    """Obtener métricas de rendimiento del pipeline de recuperación."""
+    try:
+        recuperacion = usa_recuperacion()
+        embedding_batcher = get_db_repository().embedding_batcher if recuperacion else None
+        reranker = get_reranker()
+        tool_result_cache = get_tool_result_cache()
+        email_outbox = get_email_outbox()
+        infraction_index = get_infraction_index()
+        return {
+            "micro_lotes_embeddings": embedding_batcher.get_stats() if embedding_batcher is not None else None,
+            "reranker": reranker.get_stats() if reranker is not None else None,
+            "memoria_conversacion": get_conversation_memory().get_stats(),
+            "cache_tools": tool_result_cache.get_stats() if tool_result_cache is not None else None,
+            "email_outbox": email_outbox.get_stats() if email_outbox is not None else None,
+            "llm_gateway": get_llm_gateway().get_stats(),
+            "coalescencia_consultas": get_query_singleflight().get_stats(),
+            "admision_llm": get_admission_controller().get_stats(),
+            "respuestas_extractivas": get_extractive_engine().get_stats() if recuperacion else None,
+            "indice_infracciones": infraction_index.get_stats() if infraction_index is not None else None
+        }
+    except Exception as e:
+        logger.error(f"Error obteniendo métricas: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
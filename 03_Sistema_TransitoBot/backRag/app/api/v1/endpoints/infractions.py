@@ -0,0 +1,57 @@
+import logging
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException
+from app.models import InfractionResponse
+from app.core.dependencies import get_infraction_index
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+def _obtener_indice():
+    infraction_index = get_infraction_index()
+    if infraction_index is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Índice de infracciones no disponible. Ejecuta el script de setup primero"
+        )
+    return infraction_index
+
+
+@router.get("", response_model=List[str])
+async def list_infractions(grupo: Optional[str] = None):
+    """
+    Listar los códigos de infracción del artículo 131.
+
+    Args:
+        grupo: Literal opcional ("A" a "F") para filtrar los códigos
+
+    Returns:
+        Lista de códigos normalizados ("C29", "C12A", ...)
+    """
+    return _obtener_indice().listar(grupo)
+
+
+@router.get("/{codigo}", response_model=InfractionResponse)
+async def get_infraction(codigo: str):
+    """
+    Consultar una infracción por código, sin búsqueda vectorial ni LLM.
+
+    La multa en pesos se calcula con SMLDV_VALOR.
+
+    Args:
+        codigo: Código de infracción en cualquier formato ("C29", "c.29", "C 29")
+
+    Returns:
+        InfractionResponse con descripción, multa y sanciones adicionales
+
+    Raises:
+        HTTPException 503: Si el índice no fue generado
+        HTTPException 404: Si el código no existe
+    """
+    infraccion = _obtener_indice().buscar(codigo)
+    if infraccion is None:
+        raise HTTPException(status_code=404, detail=f"No existe la infracción '{codigo}' en el artículo 131")
+
+    return InfractionResponse(**infraccion)
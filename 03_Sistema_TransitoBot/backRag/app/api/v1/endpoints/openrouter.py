@@ -2,8 +2,9 @@ import logging
 import time
 from fastapi import APIRouter, HTTPException
 from app.models import OpenRouterRequest, OpenRouterResponse
-from app.core.dependencies import get_openrouter_service
-from app.core.config import settings
+from app.core.dependencies import get_llm_gateway
+from app.services.llm_gateway import LLMGatewayError
+from app.core.admission import AdmisionRechazada, cabeceras_reintento
 
 logger = logging.getLogger(__name__)
 
@@ -22,7 +23,9 @@ async def chat_openrouter(
     Es útil para casos de uso de NLU donde ya se ha procesado la entrada del usuario.
 
     El modelo y los parámetros están configurados en el sistema y no se pueden
-    modificar por request individual.
+    modificar por request individual. La llamada pasa por el gateway de LLM con
+    la política "openrouter" (LLM_ROUTING_POLICIES), por lo que `model_used`
+    puede ser otro proveedor si OpenRouter no está disponible.
 
     Args:
         request: OpenRouterRequest con los siguientes campos:
@@ -41,7 +44,8 @@ async def chat_openrouter(
 
     Raises:
         HTTPException 400: Si los campos obligatorios están vacíos
-        HTTPException 503: Si el servicio OpenRouter no está disponible
+        HTTPException 503: Si el servicio OpenRouter no está disponible o la
+            llamada no obtuvo turno en el control de admisión (con Retry-After)
         HTTPException 500: Si hay un error al procesar la solicitud
 
     Example:
@@ -60,11 +64,11 @@ async def chat_openrouter(
     start_time = time.time()
 
     try:
-        # Obtener servicio
-        openrouter_service = get_openrouter_service()
+        # Obtener gateway
+        llm_gateway = get_llm_gateway()
 
         # Verificar disponibilidad
-        if not openrouter_service.client:
+        if not llm_gateway.disponible("openrouter"):
             raise HTTPException(
                 status_code=503,
                 detail="Servicio OpenRouter no disponible. Verifica la configuración de OPENROUTER_API_KEY"
@@ -100,7 +104,8 @@ async def chat_openrouter(
         logger.info(f"   Pregunta: {request.pregunta[:100]}...")
 
         # Generar respuesta
-        answer = openrouter_service.chat_with_context(
+        respuesta = await llm_gateway.generar(
+            "openrouter",
             system_context=request.context.system,
             user_context=request.context.user,
             pregunta=request.pregunta,
@@ -113,13 +118,19 @@ async def chat_openrouter(
         logger.info(f"✅ Respuesta generada en {processing_time:.2f}s")
 
         return OpenRouterResponse(
-            answer=answer,
-            model_used=settings.OPENROUTER_MODEL,
+            answer=respuesta.texto,
+            model_used=respuesta.modelo,
             processing_time=processing_time
         )
 
     except HTTPException:
         raise
+    except AdmisionRechazada as e:
+        logger.warning(f"🚦 {e}. Respondiendo 503")
+        raise HTTPException(status_code=503, detail=str(e), headers=cabeceras_reintento())
+    except LLMGatewayError as e:
+        logger.error(f"❌ Ningún proveedor LLM respondió: {e}")
+        raise HTTPException(status_code=503, detail=str(e))
     except ValueError as e:
         logger.error(f"❌ Error de validación: {e}")
         raise HTTPException(status_code=503, detail=str(e))
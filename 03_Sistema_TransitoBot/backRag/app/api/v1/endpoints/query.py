@@ -1,13 +1,90 @@
+import hashlib
+import json
 import logging
 import time
+from typing import Dict, List, Optional, Tuple
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from app.models import QueryRequest, QueryResponse
-from app.core.dependencies import get_search_service, get_response_service, get_db_repository
+from app.core.dependencies import (
+    get_search_service,
+    get_response_service,
+    get_db_repository,
+    get_semantic_cache,
+    get_conversation_memory,
+    get_query_singleflight
+)
+from app.core.config import settings
+from app.core.concurrency import run_blocking
+from app.core.admission import respuesta_degradada
+from app.utils.sse import SSE_HEADERS, SSE_MEDIA_TYPE, formatear_evento
+from app.utils.text_normalization import normalizar_texto
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+RESPUESTA_SIN_RESULTADOS = "Lo siento, no encontré información específica sobre tu consulta en el código de tránsito. ¿Podrías reformular tu pregunta?"
+
+
+async def _consultar_cache(
+    request: QueryRequest,
+    db_repository,
+    articulos: List[Dict]
+) -> Tuple[Optional[Tuple], Optional[Dict]]:
+    """
+    Consulta la caché semántica de respuestas.
+
+    Una respuesta que depende del historial del usuario no es reutilizable,
+    por lo que la caché solo se usa en el primer turno de cada sender_id.
+
+    Returns:
+        Tupla (clave para guardar la respuesta o None si no se usa la caché,
+        respuesta cacheada o None)
+    """
+    memoria = get_conversation_memory()
+    con_historial = bool(request.sender_id) and bool(memoria.obtener(request.sender_id))
+
+    if not settings.SEMANTIC_CACHE_ENABLED or request.bypass_cache or con_historial:
+        return None, None
+
+    query_embedding = await run_blocking(get_db_repository().encode_query, request.query)
+    numeros_articulos = [a['metadata']['numero_articulo'] for a in articulos]
+    clave = (query_embedding, numeros_articulos)
+
+    respuesta_cacheada = get_semantic_cache().buscar(*clave)
+    if respuesta_cacheada and request.sender_id:
+        memoria.registrar_intercambio(request.sender_id, request.query, respuesta_cacheada['answer'])
+
+    return clave, respuesta_cacheada
+
+
+def _clave_singleflight(request: QueryRequest) -> Tuple:
+    """
+    Clave de coalescencia: consulta normalizada, parámetros de resultados y
+    hash del historial del usuario (la respuesta depende de él).
+    """
+    historial = get_conversation_memory().obtener(request.sender_id) if request.sender_id else []
+    hash_contexto = hashlib.sha1(
+        json.dumps(historial, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    ).hexdigest() if historial else ""
+
+    return (
+        normalizar_texto(request.query),
+        request.max_results,
+        request.confidence_threshold,
+        request.bypass_cache,
+        hash_contexto
+    )
+
+
+def _verificar_base_datos(db_repository) -> None:
+    if not db_repository or not db_repository.collection:
+        raise HTTPException(
+            status_code=503,
+            detail="Base de datos no disponible. Ejecuta el script de setup primero"
+        )
+
 
 @router.post("", response_model=QueryResponse)
 async def query_transit_bot(
@@ -16,6 +93,20 @@ async def query_transit_bot(
     """
     Procesar consulta sobre normas de tránsito usando búsqueda vectorial y LLM.
 
+    Si una consulta semánticamente equivalente ya fue respondida con los mismos
+    artículos, se devuelve la respuesta cacheada sin llamar al LLM
+    (`cached=True`). Usa `bypass_cache=True` para forzar una respuesta nueva.
+    Con `sender_id` la respuesta tiene en cuenta los turnos previos del
+    usuario; en ese caso la caché solo se usa en el primer turno.
+
+    Consultas idénticas que llegan mientras otra está en proceso (misma
+    consulta normalizada, parámetros e historial) comparten su resultado en
+    lugar de repetir búsqueda y llamada al LLM (SINGLEFLIGHT_ENABLED).
+
+    Si la confianza de la recuperación supera EXTRACTIVE_FASTPATH_CONFIDENCE
+    (p. ej. una referencia directa a un artículo), la respuesta se arma con
+    las oraciones más relevantes de los artículos, citadas, sin llamar al LLM.
+
     Args:
         request: QueryRequest con la consulta del usuario
 
@@ -25,56 +116,189 @@ async def query_transit_bot(
     start_time = time.time()
 
     try:
-        # Obtener servicios
-        db_repository = get_db_repository()
-        search_service = get_search_service(db_repository)
-        response_service = get_response_service()
-
-        if not db_repository or not db_repository.collection:
-            raise HTTPException(
-                status_code=503,
-                detail="Base de datos no disponible. Ejecuta el script de setup primero"
-            )
+        if not settings.SINGLEFLIGHT_ENABLED:
+            return await _procesar_consulta(request, start_time)
 
-        # Realizar búsqueda híbrida
-        resultados = search_service.hybrid_search(
-            consulta=request.query,
-            n_resultados=request.max_results,
-            umbral_confianza=request.confidence_threshold
+        respuesta, compartida = await get_query_singleflight().ejecutar(
+            _clave_singleflight(request),
+            lambda: _procesar_consulta(request, start_time)
         )
 
-        if not resultados['articulos']:
-            # Si no hay resultados, devolver respuesta genérica
-            return QueryResponse(
-                answer="Lo siento, no encontré información específica sobre tu consulta en el código de tránsito. ¿Podrías reformular tu pregunta?",
-                confidence=0.0,
-                sources=[],
-                processing_time=time.time() - start_time
-            )
-
-        # Calcular confianza promedio
-        confianza_promedio = response_service.calculate_confidence(resultados['articulos'])
-
-        # Generar respuesta (con LLM o fallback)
-        respuesta = response_service.generate_response(
-            consulta=request.query,
-            articulos=resultados['articulos'],
-            confianza_promedio=confianza_promedio
-        )
+        # El cómputo compartido solo actualizó la memoria de quien lo lanzó
+        if compartida and request.sender_id:
+            get_conversation_memory().registrar_intercambio(request.sender_id, request.query, respuesta.answer)
 
-        # Convertir artículos a formato de fuentes
-        sources = response_service.format_sources(resultados['articulos'])
-        logger.info("Consulta procesada exitosamente")
-        logger.info(respuesta)
-        return QueryResponse(
-            answer=respuesta,
-            confidence=confianza_promedio,
-            sources=sources,
-            processing_time=time.time() - start_time
-        )
+        return respuesta.model_copy(update={"processing_time": time.time() - start_time})
 
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error procesando consulta: {e}")
         raise HTTPException(status_code=500, detail=f"Error interno del servidor: {str(e)}")
+
+
+async def _procesar_consulta(request: QueryRequest, start_time: float) -> QueryResponse:
+    """Pipeline de la consulta: búsqueda, caché semántica y generación."""
+    # Obtener servicios
+    db_repository = get_db_repository()
+    search_service = get_search_service(db_repository)
+    response_service = get_response_service()
+
+    _verificar_base_datos(db_repository)
+
+    # Realizar búsqueda híbrida (CPU/IO bloqueante, fuera del event loop)
+    resultados = await run_blocking(
+        search_service.hybrid_search,
+        consulta=request.query,
+        n_resultados=request.max_results,
+        umbral_confianza=request.confidence_threshold
+    )
+
+    if not resultados['articulos']:
+        # Si no hay resultados, devolver respuesta genérica
+        return QueryResponse(
+            answer=RESPUESTA_SIN_RESULTADOS,
+            confidence=0.0,
+            sources=[],
+            processing_time=time.time() - start_time
+        )
+
+    # Consultar la caché semántica antes de llamar al LLM
+    clave_cache, respuesta_cacheada = await _consultar_cache(request, db_repository, resultados['articulos'])
+    if respuesta_cacheada:
+        respuesta_cacheada.update(
+            cached=True,
+            processing_time=time.time() - start_time
+        )
+        return QueryResponse(**respuesta_cacheada)
+
+    # Calcular confianza promedio
+    confianza_promedio = response_service.calculate_confidence(resultados['articulos'])
+
+    # Generar respuesta (con LLM o fallback)
+    respuesta = await response_service.generate_response_async(
+        consulta=request.query,
+        articulos=resultados['articulos'],
+        confianza_promedio=confianza_promedio,
+        sender_id=request.sender_id
+    )
+
+    # Convertir artículos a formato de fuentes
+    sources = response_service.format_sources(resultados['articulos'])
+    logger.info("Consulta procesada exitosamente")
+    logger.info(respuesta)
+    query_response = QueryResponse(
+        answer=respuesta,
+        confidence=confianza_promedio,
+        sources=sources,
+        processing_time=time.time() - start_time
+    )
+
+    # Una respuesta que no generó el LLM (sin turno, error o sin API key) no se cachea
+    if clave_cache is not None and not respuesta_degradada():
+        get_semantic_cache().guardar(*clave_cache, query_response.model_dump())
+
+    return query_response
+
+
+@router.post("/stream")
+async def query_transit_bot_stream(
+    request: QueryRequest
+):
+    """
+    Versión en streaming (Server-Sent Events) de la consulta.
+
+    Eventos emitidos, en orden:
+        - sources: fuentes y confianza, apenas termina la recuperación
+        - token: fragmentos de la respuesta a medida que Claude los genera
+        - done: tiempo total, tiempo al primer token, confianza y si vino de caché
+        - error: si falla el procesamiento después de iniciar el stream
+
+    Args:
+        request: QueryRequest con la consulta del usuario
+
+    Returns:
+        StreamingResponse con media type text/event-stream
+    """
+    start_time = time.time()
+
+    db_repository = get_db_repository()
+    _verificar_base_datos(db_repository)
+    search_service = get_search_service(db_repository)
+    response_service = get_response_service()
+
+    async def eventos():
+        try:
+            resultados = await run_blocking(
+                search_service.hybrid_search,
+                consulta=request.query,
+                n_resultados=request.max_results,
+                umbral_confianza=request.confidence_threshold
+            )
+            articulos = resultados['articulos']
+            confianza_promedio = response_service.calculate_confidence(articulos)
+            sources = response_service.format_sources(articulos)
+
+            yield formatear_evento("sources", {
+                "sources": [source.model_dump() for source in sources],
+                "confidence": confianza_promedio,
+                "retrieval_time": time.time() - start_time
+            })
+
+            if not articulos:
+                yield formatear_evento("token", {"text": RESPUESTA_SIN_RESULTADOS})
+                yield formatear_evento("done", {
+                    "confidence": 0.0,
+                    "processing_time": time.time() - start_time,
+                    "time_to_first_token": time.time() - start_time,
+                    "cached": False
+                })
+                return
+
+            clave_cache, respuesta_cacheada = await _consultar_cache(request, db_repository, articulos)
+            if respuesta_cacheada:
+                yield formatear_evento("token", {"text": respuesta_cacheada['answer']})
+                yield formatear_evento("done", {
+                    "confidence": respuesta_cacheada['confidence'],
+                    "processing_time": time.time() - start_time,
+                    "time_to_first_token": time.time() - start_time,
+                    "cached": True
+                })
+                return
+
+            partes = []
+            primer_token = None
+            async for texto in response_service.generate_response_stream(
+                consulta=request.query,
+                articulos=articulos,
+                confianza_promedio=confianza_promedio,
+                sender_id=request.sender_id
+            ):
+                if primer_token is None:
+                    primer_token = time.time() - start_time
+                partes.append(texto)
+                yield formatear_evento("token", {"text": texto})
+
+            processing_time = time.time() - start_time
+            yield formatear_evento("done", {
+                "confidence": confianza_promedio,
+                "processing_time": processing_time,
+                "time_to_first_token": primer_token,
+                "cached": False
+            })
+            logger.info(f"✅ Consulta en streaming procesada (primer token: {primer_token or 0:.2f}s, total: {processing_time:.2f}s)")
+
+            if clave_cache is not None and not respuesta_degradada():
+                query_response = QueryResponse(
+                    answer="".join(partes).strip(),
+                    confidence=confianza_promedio,
+                    sources=sources,
+                    processing_time=processing_time
+                )
+                get_semantic_cache().guardar(*clave_cache, query_response.model_dump())
+
+        except Exception as e:
+            logger.error(f"Error procesando consulta en streaming: {e}")
+            yield formatear_evento("error", {"detail": f"Error interno del servidor: {str(e)}"})
+
+    return StreamingResponse(eventos(), media_type=SSE_MEDIA_TYPE, headers=SSE_HEADERS)
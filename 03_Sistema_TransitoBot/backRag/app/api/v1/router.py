@@ -1,10 +1,27 @@
+import importlib
+from typing import Optional
 from fastapi import APIRouter
-from app.api.v1.endpoints import query, health, openrouter, anthropic
+from app.core.profiles import routers_del_perfil
 
-api_router = APIRouter()
 
-# Incluir routers de endpoints
-api_router.include_router(health.router, prefix="/health", tags=["health"])
-api_router.include_router(query.router, prefix="/query", tags=["query"])
-api_router.include_router(openrouter.router, prefix="/openrouter", tags=["openrouter"])
-api_router.include_router(anthropic.router, prefix="/anthropic", tags=["anthropic"])
+def crear_api_router(perfil: Optional[str] = None) -> APIRouter:
+    """
+    Crea el router de la API con los endpoints del perfil de despliegue.
+
+    Solo se importan los módulos de los endpoints montados, de modo que un
+    perfil sin recuperación no carga el stack de embeddings.
+
+    Args:
+        perfil: Perfil de despliegue (por defecto APP_PROFILE)
+
+    Returns:
+        APIRouter con los routers del perfil
+    """
+    api_router = APIRouter()
+
+    # Cada módulo se monta con su nombre como prefijo y tag
+    for nombre in routers_del_perfil(perfil):
+        modulo = importlib.import_module(f"app.api.v1.endpoints.{nombre}")
+        api_router.include_router(modulo.router, prefix=f"/{nombre}", tags=[nombre])
+
+    return api_router
@@ -1,13 +1,25 @@
 from app.core.config import settings
 from app.core.logging_config import setup_logging
-from app.core.dependencies import (
-    get_db_repository,
-    get_llm_service,
-    get_search_service,
-    get_response_service,
-    get_health_service
+
+# Las dependencias se resuelven al accederlas: importarlas aquí crearía un
+# ciclo (app.services.* → app.core → dependencies → app.services.*)
+_DEPENDENCIAS = (
+    'get_db_repository',
+    'get_llm_service',
+    'get_search_service',
+    'get_response_service',
+    'get_health_service'
 )
 
+
+def __getattr__(nombre):
+    if nombre in _DEPENDENCIAS:
+        from app.core import dependencies
+
+        return getattr(dependencies, nombre)
+    raise AttributeError(f"module 'app.core' has no attribute '{nombre}'")
+
+
 __all__ = [
     'settings',
     'setup_logging',
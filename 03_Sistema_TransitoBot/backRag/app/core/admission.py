@@ -0,0 +1,298 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Clases de tráfico: menor valor = mayor prioridad
+PRIORIDAD_INTERACTIVA = 0  # /query y /anthropic sin tools
+PRIORIDAD_FONDO = 1  # Flujos con tools (búsqueda, email)
+
+NOMBRES_PRIORIDAD = {
+    PRIORIDAD_INTERACTIVA: "interactiva",
+    PRIORIDAD_FONDO: "fondo"
+}
+
+MOTIVO_COLA_LLENA = "cola_llena"
+MOTIVO_DEADLINE = "deadline"
+MOTIVO_DESPLAZADA = "desplazada"
+
+
+def cabeceras_reintento() -> Dict[str, str]:
+    """
+    Cabeceras de la respuesta 503 de los endpoints LLM cuando la llamada no
+    obtiene turno, para que el cliente reintente o cambie de servicio.
+    """
+    return {"Retry-After": str(settings.LLM_ADMISSION_RETRY_AFTER_SECONDS)}
+
+
+# Marca las respuestas del request en curso que no generó el LLM (sin turno,
+# error o sin API key) para no cachearlas
+_respuesta_degradada: ContextVar[bool] = ContextVar("respuesta_degradada", default=False)
+
+
+def marcar_respuesta_degradada() -> None:
+    """Indica que el request en curso respondió sin el LLM (no se cachea)."""
+    _respuesta_degradada.set(True)
+
+
+def respuesta_degradada() -> bool:
+    """True si el request en curso respondió sin el LLM."""
+    return _respuesta_degradada.get()
+
+
+class AdmisionRechazada(Exception):
+    """La llamada al LLM no fue admitida (cola llena, deadline o desplazada)."""
+
+    def __init__(self, motivo: str, prioridad: int, espera: float = 0.0):
+        self.motivo = motivo
+        self.prioridad = prioridad
+        self.espera = espera
+        super().__init__(
+            f"Llamada al LLM no admitida ({motivo}, prioridad {NOMBRES_PRIORIDAD.get(prioridad, prioridad)}, "
+            f"espera {espera:.2f}s)"
+        )
+
+
+class AdmissionController:
+    """
+    Control de admisión de llamadas al LLM.
+
+    Limita las llamadas simultáneas a `max_concurrencia`; las que exceden el
+    límite esperan en una cola acotada ordenada por prioridad (FIFO dentro
+    de cada clase), de modo que el tráfico interactivo pasa delante del de
+    fondo. Cada clase tiene un deadline de espera: al vencer se lanza
+    `AdmisionRechazada` para que el llamador responda en modo degradado (o
+    503 con Retry-After) en lugar de seguir esperando. Si la cola está llena, una llamada
+    interactiva desplaza a la última de fondo en espera.
+
+    El estado de la cola pertenece a un event loop (como un asyncio.Semaphore);
+    las estadísticas se conservan entre loops.
+    """
+
+    def __init__(
+        self,
+        max_concurrencia: int = 16,
+        max_cola: int = 64,
+        deadlines: Optional[Dict[int, Optional[float]]] = None,
+        ventana: int = 500
+    ):
+        """
+        Inicializa el controlador.
+
+        Args:
+            max_concurrencia: Llamadas al LLM simultáneas permitidas
+            max_cola: Llamadas que pueden esperar turno a la vez
+            deadlines: Espera máxima en cola por prioridad (None = sin límite)
+            ventana: Esperas recientes usadas para los percentiles
+        """
+        self.max_concurrencia = max(1, max_concurrencia)
+        self.max_cola = max(0, max_cola)
+        self.deadlines = deadlines or {}
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._en_curso = 0
+        # Entradas (prioridad, secuencia, turno, obligatoria)
+        self._cola: List[Tuple[int, int, asyncio.Future, bool]] = []
+        self._secuencia = itertools.count()
+
+        self.max_profundidad = 0
+        self._admitidas: Dict[int, int] = {}
+        self._encoladas: Dict[int, int] = {}
+        self._rechazos: Dict[int, Dict[str, int]] = {}
+        self._esperas: Dict[int, Deque[float]] = {}
+        self._ventana = ventana
+
+    def _vincular_loop(self) -> asyncio.AbstractEventLoop:
+        """Reinicia la cola si cambió el event loop (los futures no se pueden compartir)."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._en_curso = 0
+            self._cola = []
+        return loop
+
+    @property
+    def saturado(self) -> bool:
+        """True si hay llamadas esperando turno."""
+        return bool(self._cola)
+
+    @asynccontextmanager
+    async def admitir(self, prioridad: int = PRIORIDAD_INTERACTIVA, obligatoria: bool = False) -> AsyncIterator[None]:
+        """
+        Reserva un turno para llamar al LLM durante el bloque `async with`.
+
+        Args:
+            prioridad: PRIORIDAD_INTERACTIVA o PRIORIDAD_FONDO
+            obligatoria: Espera sin deadline y nunca se rechaza. Para
+                continuaciones de un flujo que ya tuvo efectos (p. ej. la
+                iteración posterior a ejecutar tools)
+
+        Raises:
+            AdmisionRechazada: Si la cola está llena o venció el deadline
+        """
+        await self._adquirir(prioridad, obligatoria)
+        try:
+            yield
+        finally:
+            self._liberar()
+
+    async def _adquirir(self, prioridad: int, obligatoria: bool) -> None:
+        loop = self._vincular_loop()
+
+        if self._en_curso < self.max_concurrencia and not self._cola:
+            self._en_curso += 1
+            self._registrar_admision(prioridad, 0.0)
+            return
+
+        if not obligatoria and len(self._cola) >= self.max_cola and not self._desplazar(prioridad):
+            self._registrar_rechazo(prioridad, MOTIVO_COLA_LLENA)
+            raise AdmisionRechazada(MOTIVO_COLA_LLENA, prioridad)
+
+        inicio = time.monotonic()
+        turno = loop.create_future()
+        entrada = (prioridad, next(self._secuencia), turno, obligatoria)
+        heapq.heappush(self._cola, entrada)
+        self._encoladas[prioridad] = self._encoladas.get(prioridad, 0) + 1
+        self.max_profundidad = max(self.max_profundidad, len(self._cola))
+
+        deadline = None if obligatoria else self.deadlines.get(prioridad)
+        try:
+            await asyncio.wait_for(turno, deadline)
+        except asyncio.TimeoutError:
+            # El turno pudo concederse justo cuando vencía el deadline
+            if not self._concedido(turno):
+                self._quitar(entrada)
+                espera = time.monotonic() - inicio
+                self._registrar_rechazo(prioridad, MOTIVO_DEADLINE)
+                logger.warning(f"⏳ Llamada al LLM ({NOMBRES_PRIORIDAD.get(prioridad)}) descartada tras {espera:.2f}s en cola")
+                raise AdmisionRechazada(MOTIVO_DEADLINE, prioridad, espera)
+        except asyncio.CancelledError:
+            # Si el turno ya se había concedido hay que devolverlo
+            if self._concedido(turno):
+                self._liberar()
+            else:
+                self._quitar(entrada)
+            raise
+
+        self._registrar_admision(prioridad, time.monotonic() - inicio)
+
+    @staticmethod
+    def _concedido(turno: asyncio.Future) -> bool:
+        return turno.done() and not turno.cancelled() and turno.exception() is None
+
+    def _desplazar(self, prioridad: int) -> bool:
+        """Expulsa de la cola la última llamada de menor prioridad que `prioridad`."""
+        candidatas = [
+            entrada for entrada in self._cola
+            if entrada[0] > prioridad and not entrada[3] and not entrada[2].done()
+        ]
+        if not candidatas:
+            return False
+
+        victima = max(candidatas)
+        self._quitar(victima)
+        self._registrar_rechazo(victima[0], MOTIVO_DESPLAZADA)
+        victima[2].set_exception(AdmisionRechazada(MOTIVO_DESPLAZADA, victima[0]))
+        return True
+
+    def _quitar(self, entrada: Tuple[int, int, asyncio.Future, bool]) -> None:
+        try:
+            self._cola.remove(entrada)
+        except ValueError:
+            return
+        heapq.heapify(self._cola)
+
+    def _liberar(self) -> None:
+        """Devuelve un turno y lo concede a la siguiente llamada en cola."""
+        self._en_curso = max(0, self._en_curso - 1)
+        while self._cola and self._en_curso < self.max_concurrencia:
+            turno = heapq.heappop(self._cola)[2]
+            if turno.done():
+                continue
+            self._en_curso += 1
+            turno.set_result(None)
+
+    def _registrar_admision(self, prioridad: int, espera: float) -> None:
+        self._admitidas[prioridad] = self._admitidas.get(prioridad, 0) + 1
+        esperas = self._esperas.get(prioridad)
+        if esperas is None:
+            esperas = self._esperas[prioridad] = deque(maxlen=self._ventana)
+        esperas.append(espera)
+
+    def _registrar_rechazo(self, prioridad: int, motivo: str) -> None:
+        rechazos = self._rechazos.setdefault(prioridad, {})
+        rechazos[motivo] = rechazos.get(motivo, 0) + 1
+
+    @staticmethod
+    def _percentil(valores: List[float], p: float) -> float:
+        if not valores:
+            return 0.0
+        ordenados = sorted(valores)
+        indice = min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))
+        return ordenados[indice]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retorna estadísticas de admisión.
+
+        Returns:
+            Dict con llamadas en curso, profundidad de la cola y, por
+            prioridad, admitidas, encoladas, rechazos por motivo y esperas
+            en cola (p50/p95/máx en ms)
+        """
+        por_prioridad = {}
+        for prioridad, nombre in NOMBRES_PRIORIDAD.items():
+            esperas = list(self._esperas.get(prioridad, ()))
+            rechazos = self._rechazos.get(prioridad, {})
+            por_prioridad[nombre] = {
+                "admitidas": self._admitidas.get(prioridad, 0),
+                "encoladas": self._encoladas.get(prioridad, 0),
+                "en_cola": sum(1 for entrada in self._cola if entrada[0] == prioridad),
+                "rechazos": dict(rechazos),
+                "rechazos_total": sum(rechazos.values()),
+                "deadline_segundos": self.deadlines.get(prioridad),
+                "espera_p50_ms": round(self._percentil(esperas, 50) * 1000, 2),
+                "espera_p95_ms": round(self._percentil(esperas, 95) * 1000, 2),
+                "espera_max_ms": round(max(esperas, default=0.0) * 1000, 2)
+            }
+
+        return {
+            "max_concurrencia": self.max_concurrencia,
+            "max_cola": self.max_cola,
+            "en_curso": self._en_curso,
+            "profundidad_cola": len(self._cola),
+            "max_profundidad_cola": self.max_profundidad,
+            "prioridades": por_prioridad
+        }
+
+
+_admission_controller: Optional[AdmissionController] = None
+
+
+def get_admission_controller() -> AdmissionController:
+    """Retorna el controlador de admisión de llamadas al LLM (uno por proceso)."""
+    global _admission_controller
+
+    if _admission_controller is None:
+        _admission_controller = AdmissionController(
+            max_concurrencia=settings.LLM_MAX_CONCURRENCY,
+            max_cola=settings.LLM_ADMISSION_MAX_QUEUE,
+            deadlines={
+                PRIORIDAD_INTERACTIVA: settings.LLM_ADMISSION_INTERACTIVE_DEADLINE_SECONDS,
+                PRIORIDAD_FONDO: settings.LLM_ADMISSION_BACKGROUND_DEADLINE_SECONDS
+            }
+        )
+        logger.info(
+            f"🚦 Control de admisión LLM: {settings.LLM_MAX_CONCURRENCY} en curso, "
+            f"cola de {settings.LLM_ADMISSION_MAX_QUEUE}"
+        )
+
+    return _admission_controller
@@ -0,0 +1,79 @@
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Pool acotado para trabajo bloqueante (embeddings, ChromaDB, BM25, tools)
+_retrieval_executor: Optional[ThreadPoolExecutor] = None
+
+# Pool acotado para ejecutar tools de un mismo turno en paralelo.
+# Es independiente del de recuperación: los tools se lanzan desde un hilo
+# de ese pool y compartirlo podría agotarlo.
+_tool_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_retrieval_executor() -> ThreadPoolExecutor:
+    """
+    Retorna el pool de hilos para trabajo bloqueante.
+    Se crea perezosamente para no heredar hilos a través de un fork.
+    """
+    global _retrieval_executor
+
+    if _retrieval_executor is None:
+        logger.info(f"Inicializando pool de recuperación ({settings.RETRIEVAL_MAX_WORKERS} hilos)...")
+        _retrieval_executor = ThreadPoolExecutor(
+            max_workers=settings.RETRIEVAL_MAX_WORKERS,
+            thread_name_prefix="retrieval"
+        )
+
+    return _retrieval_executor
+
+
+def get_tool_executor() -> ThreadPoolExecutor:
+    """Retorna el pool de hilos para tools (creado perezosamente)."""
+    global _tool_executor
+
+    if _tool_executor is None:
+        logger.info(f"Inicializando pool de tools ({settings.TOOL_MAX_WORKERS} hilos)...")
+        _tool_executor = ThreadPoolExecutor(
+            max_workers=settings.TOOL_MAX_WORKERS,
+            thread_name_prefix="tool"
+        )
+
+    return _tool_executor
+
+
+async def run_blocking(func: Callable, *args, **kwargs) -> Any:
+    """
+    Ejecuta una función bloqueante en el pool acotado sin bloquear el event loop.
+
+    Args:
+        func: Función síncrona a ejecutar
+        *args: Argumentos posicionales
+        **kwargs: Argumentos nombrados
+
+    Returns:
+        El valor retornado por la función
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_retrieval_executor(),
+        functools.partial(func, *args, **kwargs)
+    )
+
+
+def shutdown_executors() -> None:
+    """Libera los pools de hilos al cerrar la aplicación."""
+    global _retrieval_executor, _tool_executor
+
+    if _retrieval_executor is not None:
+        _retrieval_executor.shutdown(wait=False)
+        _retrieval_executor = None
+
+    if _tool_executor is not None:
+        _tool_executor.shutdown(wait=False)
+        _tool_executor = None
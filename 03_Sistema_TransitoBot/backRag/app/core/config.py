@@ -1,5 +1,6 @@
+from pydantic import field_validator
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Any, Dict, List
 import os
 
 
@@ -15,6 +16,11 @@ class Settings(BaseSettings):
     DESCRIPTION: str = "API para consultas sobre el Código Nacional de Tránsito de Colombia"
     API_V1_STR: str = "/api/v1"
 
+    # Perfil de despliegue: routers montados y componentes cargados al
+    # arrancar. "full" (todo), "rag" (/query e /infractions) o "llm-gateway"
+    # (/anthropic y /openrouter, sin modelo de embeddings ni ChromaDB)
+    APP_PROFILE: str = "full"
+
     # CORS
     CORS_ORIGINS: List[str] = [
         "http://localhost:5173",
@@ -25,7 +31,32 @@ class Settings(BaseSettings):
     # ChromaDB
     CHROMA_DB_PATH: str = os.path.join(BASE_DIR, "data", "chroma_db")
     EMBEDDING_MODEL: str = "paraphrase-multilingual-MiniLM-L12-v2"
+    # Runtime de embeddings: "torch" (SentenceTransformer) u "onnx" (int8 en CPU)
+    EMBEDDING_BACKEND: str = "torch"
+    ONNX_MODEL_DIR: str = os.path.join(BASE_DIR, "data", "models", "onnx-int8")
+    ONNX_NUM_THREADS: int = 0
+    ONNX_PARITY_TOLERANCE: float = 0.98
     COLLECTION_NAME: str = "codigo_transito_colombia"
+    # Backend de búsqueda vectorial: "chroma" (HNSW persistente), "numpy"
+    # (búsqueda exacta en memoria, cargada desde ChromaDB al arrancar) o
+    # "mmap" (búsqueda exacta sobre el almacén en disco mapeado en memoria,
+    # compartido por todos los workers; lo genera scripts/setup_database.py)
+    VECTOR_BACKEND: str = "chroma"
+    MMAP_STORE_PATH: str = os.path.join(BASE_DIR, "data", "mmap_store")
+    # float32 (más rápido) o float16 (mitad de disco y caché de páginas)
+    MMAP_STORE_DTYPE: str = "float32"
+
+    # Caché de embeddings de consultas
+    EMBEDDING_CACHE_SIZE: int = 5000
+    EMBEDDING_CACHE_PATH: str = os.path.join(BASE_DIR, "data", "cache", "query_embeddings.npz")
+    EMBEDDING_CACHE_PERSIST: bool = True
+    EMBEDDING_CACHE_FLUSH_EVERY: int = 100
+
+    # Micro-lotes de embeddings para consultas concurrentes
+    EMBEDDING_BATCH_ENABLED: bool = True
+    EMBEDDING_BATCH_MAX_SIZE: int = 32
+    EMBEDDING_BATCH_MAX_WAIT_MS: float = 5.0
+    EMBEDDING_BATCH_MAX_QUEUE: int = 256
 
     # LLM (Anthropic Claude)
     ANTHROPIC_API_KEY: str = os.getenv("ANTHROPIC_API_KEY", "")
@@ -40,14 +71,127 @@ class Settings(BaseSettings):
     OPENROUTER_MAX_TOKENS: int = 500
     OPENROUTER_TEMPERATURE: float = 0.1
 
+    # Gateway de LLM: política de ruteo por endpoint. Proveedores: anthropic,
+    # openrouter y stub (respuesta fija local, solo para pruebas). Con hedging,
+    # si el primario no responde dentro de su p95 se lanza el segundo.
+    LLM_ROUTING_POLICIES: Dict[str, Dict[str, Any]] = {
+        "anthropic": {"proveedores": ["anthropic", "openrouter"], "hedging": True, "timeout_segundos": 30.0},
+        "openrouter": {"proveedores": ["openrouter", "anthropic"], "hedging": False, "timeout_segundos": 30.0},
+        # Respuesta natural de /query sin streaming (el streaming usa Claude directo)
+        "query": {"proveedores": ["anthropic", "openrouter"], "hedging": False, "timeout_segundos": 30.0},
+        "default": {"proveedores": ["anthropic", "openrouter"], "hedging": False, "timeout_segundos": 30.0}
+    }
+    LLM_BREAKER_FAILURE_THRESHOLD: int = 5  # Fallos consecutivos que abren el circuito
+    LLM_BREAKER_COOLDOWN_SECONDS: float = 30.0
+    LLM_HEDGE_MIN_SAMPLES: int = 20  # Muestras antes de usar el p95 real
+    LLM_HEDGE_DEFAULT_DELAY_SECONDS: float = 3.0
+    LLM_STUB_LATENCY_SECONDS: float = 0.0
+    LLM_STUB_FAILURE_RATE: float = 0.0
+
     # Búsqueda
     DEFAULT_MAX_RESULTS: int = 3
     DEFAULT_CONFIDENCE_THRESHOLD: float = 0.4
     MIN_CONFIDENCE_THRESHOLD: float = 0.2
+    # Granularidad de la recuperación: "fragmento" (párrafos y parágrafos
+    # agrupados por artículo) o "articulo" (artículo completo)
+    RETRIEVAL_GRANULARITY: str = "fragmento"
+    FRAGMENTS_PER_ARTICLE: int = 2
+
+    # Respuestas extractivas sin LLM (/query): camino rápido cuando la
+    # confianza de la recuperación es muy alta y respuesta en modo degradado
+    EXTRACTIVE_FASTPATH_ENABLED: bool = True
+    EXTRACTIVE_FASTPATH_CONFIDENCE: float = 0.8
+    EXTRACTIVE_MIN_SCORE: float = 0.35  # Puntaje mínimo de la mejor oración
+    EXTRACTIVE_MAX_SENTENCES: int = 3
+    EXTRACTIVE_SEMANTIC_WEIGHT: float = 0.7  # Resto: cobertura de palabras clave
+    EXTRACTIVE_SENTENCE_CACHE_SIZE: int = 5000
+
+    # Tabla de infracciones del artículo 131 (tool consultar_infraccion)
+    INFRACTION_INDEX_PATH: str = os.path.join(BASE_DIR, "data", "infractions.npz")
+    # Valor en pesos del salario mínimo legal diario vigente (SMMLV / 30);
+    # actualizar cada año. 2025: 1.423.500 / 30
+    SMLDV_VALOR: float = 47450.0
+
+    # Caché semántica de respuestas (/query)
+    SEMANTIC_CACHE_ENABLED: bool = True
+    SEMANTIC_CACHE_THRESHOLD: float = 0.95
+    SEMANTIC_CACHE_TTL_SECONDS: int = 3600
+    SEMANTIC_CACHE_MAX_ENTRIES: int = 1000
+
+    # Coalescencia de consultas idénticas en vuelo (/query)
+    SINGLEFLIGHT_ENABLED: bool = True
+
+    # Caché de resultados de tools idempotentes (valores por defecto por tool)
+    TOOL_CACHE_ENABLED: bool = True
+    TOOL_CACHE_TTL_SECONDS: int = 600
+    TOOL_CACHE_MAX_ENTRIES: int = 512
+
+    # Memoria de conversación por sender_id
+    CONVERSATION_MEMORY_BACKEND: str = "memory"
+    CONVERSATION_MEMORY_WINDOW: int = 6  # Mensajes (3 intercambios) por sesión
+    CONVERSATION_MEMORY_TTL_SECONDS: int = 1800
+    CONVERSATION_MEMORY_MAX_SESSIONS: int = 10000
+    CONVERSATION_MEMORY_MAX_CHARS: int = 5_000_000
+
+    # Presupuestos de tokens de entrada por llamada al LLM
+    LLM_CONTEXT_BUDGET_TOKENS: int = 1500  # /query (artículos + historial)
+    ANTHROPIC_CONTEXT_BUDGET_TOKENS: int = 2500  # /anthropic (sistema + transcripción)
+    TOOL_RESULT_BUDGET_TOKENS: int = 1200  # Artículos devueltos por cada tool
+
+    # Reranking con cross-encoder (opcional)
+    RERANKER_ENABLED: bool = False
+    RERANKER_MODEL: str = "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1"
+    RERANKER_CANDIDATES: int = 10
+    RERANKER_BUDGET_MS: float = 300.0
+    RERANKER_CACHE_SIZE: int = 10000
+
+    # Envío de emails (tool enviar_email) con bandeja de salida asíncrona
+    EMAIL_SERVICE_URL: str = "http://appchat-apistool:8076/api/v1/email/send"
+    EMAIL_OUTBOX_ENABLED: bool = True
+    EMAIL_OUTBOX_PATH: str = os.path.join(BASE_DIR, "data", "outbox", "emails.db")
+    EMAIL_MAX_ATTEMPTS: int = 5
+    EMAIL_RETRY_BACKOFF_SECONDS: float = 2.0
+    EMAIL_RETRY_MAX_BACKOFF_SECONDS: float = 300.0
+    EMAIL_REQUEST_TIMEOUT_SECONDS: float = 10.0
+
+    # Concurrencia
+    RETRIEVAL_MAX_WORKERS: int = 8  # Hilos para búsqueda/embeddings
+    TOOL_MAX_WORKERS: int = 8  # Hilos para ejecutar tools en paralelo
+    LLM_MAX_CONCURRENCY: int = 16  # Llamadas simultáneas al LLM por worker
+    # Control de admisión: cola acotada por prioridad (interactiva antes que
+    # fondo) y espera máxima en cola antes de responder en modo degradado
+    LLM_ADMISSION_MAX_QUEUE: int = 64
+    LLM_ADMISSION_INTERACTIVE_DEADLINE_SECONDS: float = 2.0
+    LLM_ADMISSION_BACKGROUND_DEADLINE_SECONDS: float = 20.0
+    LLM_ADMISSION_RETRY_AFTER_SECONDS: int = 2  # Retry-After de las respuestas 503 por saturación
+    LLM_TIMEOUT_SECONDS: float = 60.0
+
+    # Servidor con precarga y fork (python run.py --preload): el proceso
+    # maestro carga modelo e índices una sola vez y los workers los
+    # comparten copy-on-write
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: int = 2
+
+    # Consultas de calentamiento antes de reportar /health/ready
+    WARMUP_ENABLED: bool = True
+    WARMUP_QUERIES: List[str] = [
+        "¿Cuál es el límite de velocidad en zona urbana?",
+        "¿Cuánto es la multa por no portar el SOAT?",
+        "artículo 131",
+    ]
 
     # Logging
     LOG_LEVEL: str = "INFO"
 
+    @field_validator("VECTOR_BACKEND")
+    @classmethod
+    def _validar_vector_backend(cls, valor: str) -> str:
+        # Un backend mal escrito debe impedir el arranque, no dejar la API sin colección
+        from app.repositories.vector_store import validar_backend_vectorial
+
+        return validar_backend_vectorial(valor)
+
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -1,15 +1,36 @@
 import logging
 from functools import lru_cache
-from typing import Generator
+from typing import Generator, Optional
 from app.core.config import settings
+from app.core.singleflight import SingleFlight
+from app.core.profiles import usa_recuperacion
 from app.repositories.chroma_repository import ChromaRepository
+from app.repositories.embedding_cache import EmbeddingCache
+from app.repositories.embedding_provider import crear_proveedor_embeddings
+from app.repositories.embedding_batcher import EmbeddingBatcher
 from app.services.llm_service import LLMService
+from app.services.extractive_answer import ExtractiveAnswerEngine
 from app.services.search_service import SearchService
+from app.services.keyword_index import KeywordIndex
+from app.services.semantic_cache import SemanticCache
+from app.services.reranker import CrossEncoderReranker
+from app.services.article_lookup import ArticleLookup
+from app.services.infraction_index import InfractionIndex
+from app.services.conversation_memory import ConversationMemory, crear_memoria_conversacion
 from app.services.response_service import ResponseService
 from app.services.health_service import HealthService
 from app.services.openrouter_service import OpenRouterService
 from app.services.anthropic_service import AnthropicService
 from app.services.tool_manager import ToolManager
+from app.services.tool_result_cache import ToolResultCache
+from app.services.email_outbox import EmailOutbox
+from app.services.llm_gateway import (
+    LLMGateway,
+    AnthropicProvider,
+    OpenRouterProvider,
+    StubProvider,
+    PoliticaRuteo
+)
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +39,17 @@ _db_repository: ChromaRepository = None
 _llm_service: LLMService = None
 _openrouter_service: OpenRouterService = None
 _anthropic_service: AnthropicService = None
+_keyword_index: KeywordIndex = None
+_semantic_cache: SemanticCache = None
+_reranker: CrossEncoderReranker = None
+_article_lookup: ArticleLookup = None
+_conversation_memory: ConversationMemory = None
+_tool_result_cache: ToolResultCache = None
+_email_outbox: EmailOutbox = None
+_llm_gateway: LLMGateway = None
+_query_singleflight: SingleFlight = None
+_extractive_engine: ExtractiveAnswerEngine = None
+_infraction_index: InfractionIndex = None
 
 
 def get_db_repository() -> ChromaRepository:
@@ -29,9 +61,34 @@ def get_db_repository() -> ChromaRepository:
 
     if _db_repository is None:
         logger.info("Inicializando ChromaRepository...")
+        embedding_provider = crear_proveedor_embeddings(
+            backend=settings.EMBEDDING_BACKEND,
+            model_name=settings.EMBEDDING_MODEL,
+            onnx_model_dir=settings.ONNX_MODEL_DIR,
+            onnx_num_threads=settings.ONNX_NUM_THREADS
+        )
+        embedding_batcher = None
+        if settings.EMBEDDING_BATCH_ENABLED:
+            embedding_batcher = EmbeddingBatcher(
+                embedding_provider,
+                max_batch_size=settings.EMBEDDING_BATCH_MAX_SIZE,
+                max_wait_ms=settings.EMBEDDING_BATCH_MAX_WAIT_MS,
+                max_queue=settings.EMBEDDING_BATCH_MAX_QUEUE
+            )
+        embedding_cache = EmbeddingCache(
+            model_name=embedding_provider.identificador,
+            max_entries=settings.EMBEDDING_CACHE_SIZE,
+            path=settings.EMBEDDING_CACHE_PATH if settings.EMBEDDING_CACHE_PERSIST else None,
+            flush_every=settings.EMBEDDING_CACHE_FLUSH_EVERY
+        )
         _db_repository = ChromaRepository(
             db_path=settings.CHROMA_DB_PATH,
-            model_name=settings.EMBEDDING_MODEL
+            model_name=settings.EMBEDDING_MODEL,
+            embedding_cache=embedding_cache,
+            vector_backend=settings.VECTOR_BACKEND,
+            embedding_provider=embedding_provider,
+            embedding_batcher=embedding_batcher,
+            mmap_store_path=settings.MMAP_STORE_PATH
         )
         # Intentar obtener la colección existente
         if not _db_repository.get_collection():
@@ -40,6 +97,26 @@ def get_db_repository() -> ChromaRepository:
     return _db_repository
 
 
+def get_conversation_memory() -> ConversationMemory:
+    """
+    Dependency para obtener la memoria de conversación por sender_id.
+    Implementa patrón Singleton.
+    """
+    global _conversation_memory
+
+    if _conversation_memory is None:
+        logger.info("Inicializando memoria de conversación...")
+        _conversation_memory = crear_memoria_conversacion(
+            settings.CONVERSATION_MEMORY_BACKEND,
+            ventana_mensajes=settings.CONVERSATION_MEMORY_WINDOW,
+            ttl_segundos=settings.CONVERSATION_MEMORY_TTL_SECONDS,
+            max_sesiones=settings.CONVERSATION_MEMORY_MAX_SESSIONS,
+            max_caracteres=settings.CONVERSATION_MEMORY_MAX_CHARS
+        )
+
+    return _conversation_memory
+
+
 def get_llm_service() -> LLMService:
     """
     Dependency para obtener el servicio LLM.
@@ -49,11 +126,36 @@ def get_llm_service() -> LLMService:
 
     if _llm_service is None:
         logger.info("Inicializando LLMService...")
-        _llm_service = LLMService(api_key=settings.ANTHROPIC_API_KEY)
+        _llm_service = LLMService(
+            api_key=settings.ANTHROPIC_API_KEY,
+            memoria=get_conversation_memory(),
+            extractor=get_extractive_engine() if usa_recuperacion() else None,
+            gateway=get_llm_gateway()
+        )
 
     return _llm_service
 
 
+def get_extractive_engine() -> ExtractiveAnswerEngine:
+    """
+    Dependency para obtener el motor de respuestas extractivas.
+    Implementa patrón Singleton.
+    """
+    global _extractive_engine
+
+    if _extractive_engine is None:
+        logger.info("Inicializando ExtractiveAnswerEngine...")
+        _extractive_engine = ExtractiveAnswerEngine(
+            db_repository=get_db_repository(),
+            max_oraciones=settings.EXTRACTIVE_MAX_SENTENCES,
+            puntaje_minimo=settings.EXTRACTIVE_MIN_SCORE,
+            peso_semantico=settings.EXTRACTIVE_SEMANTIC_WEIGHT,
+            cache_size=settings.EXTRACTIVE_SENTENCE_CACHE_SIZE
+        )
+
+    return _extractive_engine
+
+
 def get_openrouter_service() -> OpenRouterService:
     """
     Dependency para obtener el servicio OpenRouter.
@@ -82,6 +184,243 @@ def get_anthropic_service() -> AnthropicService:
     return _anthropic_service
 
 
+def _usar_fragmentos(db_repository: ChromaRepository) -> bool:
+    """Indica si la recuperación debe hacerse sobre la colección de fragmentos."""
+    return (
+        settings.RETRIEVAL_GRANULARITY == SearchService.GRANULARIDAD_FRAGMENTO
+        and db_repository.fragment_collection is not None
+    )
+
+
+def get_keyword_index(
+    db_repository: ChromaRepository = None
+) -> KeywordIndex:
+    """
+    Dependency para obtener el índice BM25 de palabras clave.
+    Implementa patrón Singleton: se construye una sola vez a partir de la
+    colección y se comparte entre todas las búsquedas.
+
+    Args:
+        db_repository: Repositorio de ChromaDB (inyectado)
+
+    Returns:
+        KeywordIndex construido o None si la colección no está disponible
+    """
+    global _keyword_index
+
+    if _keyword_index is None:
+        if db_repository is None:
+            db_repository = get_db_repository()
+
+        if not db_repository.collection:
+            return None
+
+        if _usar_fragmentos(db_repository):
+            logger.info("Construyendo índice BM25 de fragmentos...")
+            _keyword_index = KeywordIndex.desde_coleccion(db_repository.fragment_collection)
+        else:
+            logger.info("Construyendo índice BM25...")
+            _keyword_index = KeywordIndex.desde_coleccion(db_repository.collection)
+
+    return _keyword_index
+
+
+def get_article_lookup(
+    db_repository: ChromaRepository = None
+) -> ArticleLookup:
+    """
+    Dependency para obtener el índice por número de artículo.
+    Implementa patrón Singleton: reutiliza los documentos ya cargados por
+    el índice BM25, sin leer de nuevo la colección.
+
+    Args:
+        db_repository: Repositorio de ChromaDB (inyectado)
+
+    Returns:
+        ArticleLookup construido o None si la colección no está disponible
+    """
+    global _article_lookup
+
+    if _article_lookup is None:
+        if db_repository is None:
+            db_repository = get_db_repository()
+
+        keyword_index = get_keyword_index(db_repository)
+        if keyword_index is None:
+            return None
+
+        _article_lookup = ArticleLookup()
+        if _usar_fragmentos(db_repository):
+            # El índice BM25 es de fragmentos: leer los artículos completos
+            datos = db_repository.collection.get(include=['documents', 'metadatas'])
+            _article_lookup.construir(datos['documents'], datos['metadatas'], datos.get('ids'))
+        else:
+            _article_lookup.construir(
+                keyword_index.documentos,
+                keyword_index.metadatas,
+                keyword_index.ids
+            )
+
+    return _article_lookup
+
+
+def get_infraction_index() -> Optional[InfractionIndex]:
+    """
+    Dependency para obtener el índice de infracciones (código → multa → sanciones).
+    Implementa patrón Singleton: se carga una sola vez desde el archivo que
+    genera scripts/setup_database.py.
+
+    Returns:
+        InfractionIndex o None si el archivo no existe
+    """
+    global _infraction_index
+
+    if _infraction_index is None:
+        _infraction_index = InfractionIndex.cargar(
+            settings.INFRACTION_INDEX_PATH,
+            valor_smldv=settings.SMLDV_VALOR
+        )
+
+    return _infraction_index
+
+
+def get_semantic_cache() -> SemanticCache:
+    """
+    Dependency para obtener la caché semántica de respuestas.
+    Implementa patrón Singleton.
+    """
+    global _semantic_cache
+
+    if _semantic_cache is None:
+        logger.info("Inicializando SemanticCache...")
+        _semantic_cache = SemanticCache(
+            umbral_similitud=settings.SEMANTIC_CACHE_THRESHOLD,
+            ttl_segundos=settings.SEMANTIC_CACHE_TTL_SECONDS,
+            max_entradas=settings.SEMANTIC_CACHE_MAX_ENTRIES
+        )
+
+    return _semantic_cache
+
+
+def get_tool_result_cache() -> Optional[ToolResultCache]:
+    """
+    Dependency para obtener la caché de resultados de tools.
+    Implementa patrón Singleton.
+
+    Returns:
+        ToolResultCache o None si está deshabilitada
+    """
+    global _tool_result_cache
+
+    if not settings.TOOL_CACHE_ENABLED:
+        return None
+
+    if _tool_result_cache is None:
+        logger.info("Inicializando ToolResultCache...")
+        _tool_result_cache = ToolResultCache(
+            ttl_segundos=settings.TOOL_CACHE_TTL_SECONDS,
+            max_entradas=settings.TOOL_CACHE_MAX_ENTRIES
+        )
+
+    return _tool_result_cache
+
+
+def get_email_outbox() -> Optional[EmailOutbox]:
+    """
+    Dependency para obtener la bandeja de salida de emails.
+    Implementa patrón Singleton.
+
+    Returns:
+        EmailOutbox o None si está deshabilitada (envío síncrono)
+    """
+    global _email_outbox
+
+    if not settings.EMAIL_OUTBOX_ENABLED:
+        return None
+
+    if _email_outbox is None:
+        logger.info("Inicializando EmailOutbox...")
+        _email_outbox = EmailOutbox(
+            db_path=settings.EMAIL_OUTBOX_PATH,
+            email_service_url=settings.EMAIL_SERVICE_URL,
+            max_intentos=settings.EMAIL_MAX_ATTEMPTS,
+            backoff_segundos=settings.EMAIL_RETRY_BACKOFF_SECONDS,
+            backoff_max_segundos=settings.EMAIL_RETRY_MAX_BACKOFF_SECONDS,
+            timeout_segundos=settings.EMAIL_REQUEST_TIMEOUT_SECONDS
+        )
+
+    return _email_outbox
+
+
+def get_query_singleflight() -> SingleFlight:
+    """
+    Dependency para obtener el coalescedor de consultas de /query.
+    Implementa patrón Singleton.
+    """
+    global _query_singleflight
+
+    if _query_singleflight is None:
+        _query_singleflight = SingleFlight()
+
+    return _query_singleflight
+
+
+def get_llm_gateway() -> LLMGateway:
+    """
+    Dependency para obtener el gateway unificado de LLM.
+    Implementa patrón Singleton.
+    """
+    global _llm_gateway
+
+    if _llm_gateway is None:
+        logger.info("Inicializando LLMGateway...")
+        _llm_gateway = LLMGateway(
+            proveedores=[
+                AnthropicProvider(get_anthropic_service()),
+                OpenRouterProvider(get_openrouter_service(), modelo=settings.OPENROUTER_MODEL),
+                StubProvider(
+                    latencia_segundos=settings.LLM_STUB_LATENCY_SECONDS,
+                    tasa_fallos=settings.LLM_STUB_FAILURE_RATE
+                )
+            ],
+            politicas={
+                endpoint: PoliticaRuteo(**politica)
+                for endpoint, politica in settings.LLM_ROUTING_POLICIES.items()
+            },
+            umbral_fallos=settings.LLM_BREAKER_FAILURE_THRESHOLD,
+            enfriamiento_segundos=settings.LLM_BREAKER_COOLDOWN_SECONDS,
+            hedge_min_muestras=settings.LLM_HEDGE_MIN_SAMPLES,
+            hedge_retardo_por_defecto=settings.LLM_HEDGE_DEFAULT_DELAY_SECONDS
+        )
+
+    return _llm_gateway
+
+
+def get_reranker() -> Optional[CrossEncoderReranker]:
+    """
+    Dependency para obtener el reranker con cross-encoder.
+    Implementa patrón Singleton.
+
+    Returns:
+        CrossEncoderReranker o None si está deshabilitado
+    """
+    global _reranker
+
+    if not settings.RERANKER_ENABLED:
+        return None
+
+    if _reranker is None:
+        logger.info("Inicializando CrossEncoderReranker...")
+        _reranker = CrossEncoderReranker(
+            model_name=settings.RERANKER_MODEL,
+            max_candidatos=settings.RERANKER_CANDIDATES,
+            presupuesto_ms=settings.RERANKER_BUDGET_MS,
+            cache_size=settings.RERANKER_CACHE_SIZE
+        )
+
+    return _reranker
+
+
 def get_search_service(
     db_repository: ChromaRepository = None
 ) -> SearchService:
@@ -94,7 +433,17 @@ def get_search_service(
     if db_repository is None:
         db_repository = get_db_repository()
 
-    return SearchService(db_manager=db_repository)
+    return SearchService(
+        db_manager=db_repository,
+        keyword_index=get_keyword_index(db_repository),
+        reranker=get_reranker(),
+        article_lookup=get_article_lookup(db_repository),
+        granularidad=(
+            SearchService.GRANULARIDAD_FRAGMENTO if _usar_fragmentos(db_repository)
+            else SearchService.GRANULARIDAD_ARTICULO
+        ),
+        max_fragmentos_por_articulo=settings.FRAGMENTS_PER_ARTICLE
+    )
 
 
 def get_response_service(
@@ -123,7 +472,8 @@ def get_health_service(
         db_repository: Repositorio de ChromaDB (inyectado)
         llm_service: Servicio LLM (inyectado)
     """
-    if db_repository is None:
+    recuperacion = usa_recuperacion()
+    if db_repository is None and recuperacion:
         db_repository = get_db_repository()
 
     if llm_service is None:
@@ -131,7 +481,8 @@ def get_health_service(
 
     return HealthService(
         db_manager=db_repository,
-        llm_service=llm_service
+        llm_service=llm_service,
+        base_datos_habilitada=recuperacion
     )
 
 
@@ -147,15 +498,32 @@ def get_tool_manager(
         search_service: Servicio de búsqueda (inyectado)
 
     Returns:
-        ToolManager inicializado con las dependencias necesarias
+        ToolManager inicializado con las dependencias necesarias. En perfiles
+        sin recuperación no incluye el tool de búsqueda.
     """
-    if db_repository is None:
-        db_repository = get_db_repository()
+    if usa_recuperacion():
+        if db_repository is None:
+            db_repository = get_db_repository()
 
-    if search_service is None:
-        search_service = get_search_service(db_repository)
+        if search_service is None:
+            search_service = get_search_service(db_repository)
 
     return ToolManager(
         db_repository=db_repository,
-        search_service=search_service
+        search_service=search_service,
+        result_cache=get_tool_result_cache(),
+        email_outbox=get_email_outbox(),
+        infraction_index=get_infraction_index()
     )
+
+
+def reiniciar_tras_fork() -> None:
+    """
+    Recrea en un worker recién creado los recursos que no se heredan del
+    proceso maestro (pools de hilos nativos del runtime de embeddings).
+
+    El resto de singletons (modelo, colecciones, índices) se comparten
+    copy-on-write; los pools de hilos de Python se crean perezosamente.
+    """
+    if _db_repository is not None:
+        _db_repository.embedding_model.reiniciar_tras_fork()
@@ -0,0 +1,169 @@
+import gc
+import logging
+import os
+import random
+import signal
+import socket
+import time
+from typing import Set
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Espera antes de reemplazar un worker caído, para no entrar en un bucle de
+# reinicios si falla al arrancar
+ESPERA_REINICIO_SEGUNDOS = 1.0
+
+
+def precargar():
+    """
+    Carga la aplicación, el modelo y los índices en el proceso maestro.
+
+    Sigue la receta de `gc.freeze`: el GC se desactiva durante la carga (no
+    deja huecos en páginas que luego se copiarían) y al final se congelan
+    todos los objetos, para que las colecciones de los workers no escriban
+    sus cabeceras y las páginas se mantengan compartidas.
+
+    Returns:
+        Instancia de FastAPI lista para servirse en los workers
+    """
+    from app.main import app
+    from app.core.dependencies import (
+        get_db_repository,
+        get_keyword_index,
+        get_article_lookup,
+        get_infraction_index,
+        get_extractive_engine
+    )
+    from app.core.warmup import calentar, marcar_precargado
+    from app.core.profiles import usa_recuperacion
+    from app.repositories.vector_store import VECTOR_BACKEND_CHROMA
+
+    gc.disable()
+    inicio = time.perf_counter()
+
+    recuperacion = usa_recuperacion()
+    if recuperacion and settings.VECTOR_BACKEND == VECTOR_BACKEND_CHROMA:
+        # El cliente de ChromaDB (SQLite) no puede heredarse entre procesos
+        logger.warning(
+            "⚠️ VECTOR_BACKEND=chroma: cada worker abre su propio repositorio. "
+            "Usa 'numpy' o 'mmap' para precargar el modelo y los índices en el maestro"
+        )
+    elif recuperacion:
+        db_repository = get_db_repository()
+        db_repository.embedding_model.preparar_precarga()
+        if db_repository.collection is not None:
+            get_keyword_index(db_repository)
+            get_article_lookup(db_repository)
+            get_extractive_engine()
+        if settings.WARMUP_ENABLED:
+            calentar(sin_hilos=True)
+        # Los workers lo heredan y no repiten el calentamiento
+        marcar_precargado()
+
+    get_infraction_index()
+    gc.freeze()
+    logger.info(
+        f"📦 Precarga completa en {time.perf_counter() - inicio:.1f}s "
+        f"({gc.get_freeze_count()} objetos congelados)"
+    )
+    return app
+
+
+def _crear_socket(host: str, port: int) -> socket.socket:
+    """Abre el socket de escucha que comparten todos los workers."""
+    familia = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(familia, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _iniciar_worker(app, sock: socket.socket) -> int:
+    """
+    Crea un worker con fork y sirve la aplicación con uvicorn.
+
+    Returns:
+        PID del worker (solo en el proceso maestro)
+    """
+    pid = os.fork()
+    if pid:
+        return pid
+
+    codigo = 0
+    try:
+        # Grupo propio: Ctrl+C llega solo al maestro, que lo reenvía una vez
+        os.setpgid(0, 0)
+        for senal in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(senal, signal.SIG_DFL)
+        gc.enable()
+        random.seed()
+
+        from app.core.dependencies import reiniciar_tras_fork
+        import uvicorn
+
+        reiniciar_tras_fork()
+        logger.info(f"👷 Worker {os.getpid()} iniciado")
+
+        config = uvicorn.Config(app, log_level=settings.LOG_LEVEL.lower())
+        uvicorn.Server(config).run(sockets=[sock])
+    except BaseException as e:
+        logger.error(f"❌ Worker {os.getpid()} terminó con error: {e}")
+        codigo = 1
+    finally:
+        os._exit(codigo)
+
+
+def servir(host: str, port: int, workers: int) -> None:
+    """
+    Precarga la aplicación y la sirve con `workers` procesos hijos.
+
+    El maestro no atiende peticiones: reemplaza los workers que terminan
+    inesperadamente y, al recibir SIGTERM o SIGINT, lo reenvía a todos y
+    espera su cierre ordenado.
+
+    Args:
+        host: Interfaz de escucha
+        port: Puerto de escucha
+        workers: Número de workers
+    """
+    app = precargar()
+    sock = _crear_socket(host, port)
+    logger.info(f"🚀 Maestro {os.getpid()} escuchando en {host}:{port} con {workers} workers")
+
+    hijos: Set[int] = set()
+    deteniendo = False
+
+    def _detener(senal, frame):
+        nonlocal deteniendo
+        deteniendo = True
+        for pid in list(hijos):
+            try:
+                os.kill(pid, senal)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, _detener)
+    signal.signal(signal.SIGINT, _detener)
+
+    for _ in range(workers):
+        hijos.add(_iniciar_worker(app, sock))
+
+    while hijos:
+        try:
+            pid, estado = os.waitpid(-1, 0)
+        except ChildProcessError:
+            break
+        hijos.discard(pid)
+        if deteniendo:
+            continue
+
+        logger.warning(f"⚠️ Worker {pid} terminó (código {os.waitstatus_to_exitcode(estado)}), reemplazándolo")
+        time.sleep(ESPERA_REINICIO_SEGUNDOS)
+        if not deteniendo:
+            hijos.add(_iniciar_worker(app, sock))
+
+    sock.close()
+    logger.info("🔄 Todos los workers terminaron")
@@ -0,0 +1,49 @@
+from typing import Dict, Optional, Tuple
+from app.core.config import settings
+
+# Perfiles de despliegue (APP_PROFILE)
+PERFIL_COMPLETO = "full"
+PERFIL_RAG = "rag"
+PERFIL_LLM_GATEWAY = "llm-gateway"
+
+# Routers montados por perfil (módulos de app.api.v1.endpoints)
+ROUTERS_POR_PERFIL: Dict[str, Tuple[str, ...]] = {
+    PERFIL_COMPLETO: ("health", "query", "openrouter", "anthropic", "email", "infractions"),
+    PERFIL_RAG: ("health", "query", "infractions"),
+    PERFIL_LLM_GATEWAY: ("health", "anthropic", "openrouter"),
+}
+
+# Perfiles que cargan el modelo de embeddings y la colección. Sin ellos,
+# /anthropic se sirve sin el tool de búsqueda y /health no consulta ChromaDB.
+PERFILES_CON_RECUPERACION = {PERFIL_COMPLETO, PERFIL_RAG}
+
+
+def get_perfil(perfil: Optional[str] = None) -> str:
+    """
+    Perfil de despliegue activo.
+
+    Args:
+        perfil: Perfil a validar (por defecto APP_PROFILE)
+
+    Returns:
+        Nombre del perfil
+
+    Raises:
+        ValueError: Si el perfil no existe
+    """
+    perfil = perfil or settings.APP_PROFILE
+    if perfil not in ROUTERS_POR_PERFIL:
+        raise ValueError(
+            f"APP_PROFILE desconocido: '{perfil}'. Opciones: {', '.join(ROUTERS_POR_PERFIL)}"
+        )
+    return perfil
+
+
+def routers_del_perfil(perfil: Optional[str] = None) -> Tuple[str, ...]:
+    """Routers que monta el perfil."""
+    return ROUTERS_POR_PERFIL[get_perfil(perfil)]
+
+
+def usa_recuperacion(perfil: Optional[str] = None) -> bool:
+    """Indica si el perfil carga el modelo de embeddings y los índices."""
+    return get_perfil(perfil) in PERFILES_CON_RECUPERACION
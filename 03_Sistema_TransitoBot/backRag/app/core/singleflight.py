@@ -0,0 +1,76 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Coalescencia de cómputos idénticos en vuelo (patrón single-flight).
+
+    La primera llamada con una clave lanza el cómputo como tarea; las que
+    llegan con la misma clave mientras sigue en curso esperan esa misma
+    tarea y reciben su resultado (o su excepción). Cada llamador espera con
+    `asyncio.shield`, así la desconexión de un cliente no cancela el cómputo
+    de los demás. La clave se libera al terminar: no es una caché.
+    """
+
+    def __init__(self):
+        self._en_vuelo: Dict[Hashable, asyncio.Task] = {}
+        self.lideres = 0
+        self.coalescidas = 0
+
+    async def ejecutar(
+        self,
+        clave: Hashable,
+        fabrica: Callable[[], Awaitable[Any]]
+    ) -> Tuple[Any, bool]:
+        """
+        Ejecuta el cómputo o se une al que ya está en vuelo con la misma clave.
+
+        Args:
+            clave: Clave normalizada del cómputo
+            fabrica: Función sin argumentos que retorna el awaitable a ejecutar
+
+        Returns:
+            Tupla (resultado, compartido) donde compartido es True si el
+            resultado provino de un cómputo lanzado por otro llamador
+        """
+        loop = asyncio.get_running_loop()
+        tarea = self._en_vuelo.get(clave)
+
+        # Una tarea de otro event loop no se puede esperar desde este
+        if tarea is not None and tarea.get_loop() is loop:
+            self.coalescidas += 1
+            logger.info(f"🔗 Consulta coalescida con un cómputo en vuelo ({len(self._en_vuelo)} en vuelo)")
+            return await asyncio.shield(tarea), True
+
+        tarea = loop.create_task(fabrica())
+        self._en_vuelo[clave] = tarea
+        self.lideres += 1
+        tarea.add_done_callback(lambda _: self._liberar(clave, tarea))
+
+        return await asyncio.shield(tarea), False
+
+    def _liberar(self, clave: Hashable, tarea: asyncio.Task) -> None:
+        if self._en_vuelo.get(clave) is tarea:
+            del self._en_vuelo[clave]
+        # Evita el aviso "exception was never retrieved" si todos se desconectaron
+        if not tarea.cancelled():
+            tarea.exception()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retorna estadísticas de coalescencia.
+
+        Returns:
+            Dict con cómputos lanzados, llamadas coalescidas y en vuelo
+        """
+        total = self.lideres + self.coalescidas
+        return {
+            "computos": self.lideres,
+            "coalescidas": self.coalescidas,
+            "en_vuelo": len(self._en_vuelo),
+            "tasa_coalescencia": round(self.coalescidas / total, 4) if total else 0.0
+        }
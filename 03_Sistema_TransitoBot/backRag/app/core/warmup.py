@@ -0,0 +1,98 @@
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Estado de disponibilidad del proceso (cada worker reporta el suyo)
+_estado: Dict[str, Any] = {
+    "listo": False,
+    "precargado": False,
+    "consultas_calentamiento": 0,
+    "duracion_calentamiento_ms": None,
+}
+
+
+def calentar(consultas: Optional[List[str]] = None, sin_hilos: bool = False) -> int:
+    """
+    Ejecuta consultas de calentamiento sobre la búsqueda híbrida.
+
+    Fuerza la carga perezosa de lo que la primera petición real pagaría:
+    pesos del modelo en memoria, índices BM25 y de artículos, y los pools
+    de hilos del runtime de embeddings.
+
+    Args:
+        consultas: Consultas a ejecutar (por defecto WARMUP_QUERIES)
+        sin_hilos: Calentar sin crear hilos (proceso maestro antes del fork):
+            se omiten el planificador de micro-lotes y el hilo del reranker
+
+    Returns:
+        Número de consultas ejecutadas
+    """
+    from app.core.dependencies import get_db_repository, get_search_service
+
+    consultas = settings.WARMUP_QUERIES if consultas is None else consultas
+    db_repository = get_db_repository()
+    if db_repository.collection is None or not consultas:
+        return 0
+
+    inicio = time.perf_counter()
+    search_service = get_search_service(db_repository)
+    batcher = db_repository.embedding_batcher
+    reranker = search_service.reranker
+    if sin_hilos:
+        db_repository.embedding_batcher = None
+        search_service.reranker = None
+        if reranker is not None:
+            reranker.precargar()
+
+    try:
+        # Codificación directa: las consultas siguientes pueden salir de la
+        # caché de embeddings sin tocar el modelo
+        db_repository.embedding_model.encode(consultas[:1])
+        for consulta in consultas:
+            search_service.hybrid_search(consulta, n_resultados=3, umbral_confianza=0.0)
+    finally:
+        db_repository.embedding_batcher = batcher
+        search_service.reranker = reranker
+
+    duracion_ms = (time.perf_counter() - inicio) * 1000
+    _estado["consultas_calentamiento"] += len(consultas)
+    _estado["duracion_calentamiento_ms"] = round(duracion_ms, 1)
+    logger.info(f"🔥 Calentamiento: {len(consultas)} consultas en {duracion_ms:.0f} ms (pid {os.getpid()})")
+    return len(consultas)
+
+
+def marcar_precargado() -> None:
+    """
+    Registra que el modelo y los índices quedaron cargados y calentados en el
+    proceso maestro; los workers creados con fork heredan el estado.
+    """
+    _estado["precargado"] = True
+
+
+def esta_precargado() -> bool:
+    """Indica si el proceso heredó del maestro el modelo ya calentado."""
+    return _estado["precargado"]
+
+
+def marcar_listo() -> None:
+    """Marca el proceso como listo para recibir tráfico."""
+    _estado["listo"] = True
+
+
+def esta_listo() -> bool:
+    """Indica si el proceso terminó el arranque y el calentamiento."""
+    return _estado["listo"]
+
+
+def get_estado() -> Dict[str, Any]:
+    """
+    Estado de disponibilidad del proceso.
+
+    Returns:
+        Dict con listo, precargado, pid y métricas del calentamiento
+    """
+    return {**_estado, "pid": os.getpid()}
@@ -1,37 +1,107 @@
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
 from app.core.logging_config import setup_logging
-from app.core.dependencies import get_db_repository
-from app.api.v1.router import api_router
+from app.core.dependencies import (
+    get_db_repository,
+    get_keyword_index,
+    get_article_lookup,
+    get_email_outbox,
+    get_infraction_index
+)
+from app.core.concurrency import run_blocking, shutdown_executors
+from app.core.warmup import calentar, esta_precargado, marcar_listo
+from app.core.profiles import get_perfil, usa_recuperacion
+from app.api.v1.router import crear_api_router
 
 # Configurar logging
 logger = setup_logging()
 
 
+async def _calentar_y_marcar_listo() -> None:
+    """Ejecuta el calentamiento fuera del event loop y luego marca el worker como listo."""
+    try:
+        await run_blocking(calentar)
+    except Exception as e:
+        logger.error(f"❌ Error en el calentamiento: {e}")
+    finally:
+        marcar_listo()
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Gestiona el ciclo de vida de la aplicación."""
     # Startup
-    logger.info("🚀 Iniciando TránsitoBot API...")
+    logger.info(f"🚀 Iniciando TránsitoBot API (perfil '{get_perfil()}')...")
+    recuperacion = usa_recuperacion()
+
+    # Inicializar ChromaDB (solo en perfiles con recuperación)
+    if recuperacion:
+        try:
+            db_repository = get_db_repository()
+            if db_repository.get_collection():
+                logger.info("✅ ChromaDB conectado exitosamente")
+                get_keyword_index(db_repository)
+                get_article_lookup(db_repository)
+                logger.info("✅ Índices de palabras clave y de artículos listos")
+            else:
+                logger.warning("⚠️ ChromaDB no encontrado. Ejecuta el script de setup primero")
+        except Exception as e:
+            logger.error(f"❌ Error conectando ChromaDB: {e}")
+
+    # Tabla de infracciones (consultar_infraccion y /infractions)
+    try:
+        if get_infraction_index() is not None:
+            logger.info("✅ Índice de infracciones listo")
+    except Exception as e:
+        logger.error(f"❌ Error cargando índice de infracciones: {e}")
 
-    # Inicializar ChromaDB
+    # Worker de entrega de emails en segundo plano
     try:
-        db_repository = get_db_repository()
-        if db_repository.get_collection():
-            logger.info("✅ ChromaDB conectado exitosamente")
-        else:
-            logger.warning("⚠️ ChromaDB no encontrado. Ejecuta el script de setup primero")
+        email_outbox = get_email_outbox()
+        if email_outbox is not None:
+            email_outbox.iniciar()
     except Exception as e:
-        logger.error(f"❌ Error conectando ChromaDB: {e}")
+        logger.error(f"❌ Error iniciando la bandeja de emails: {e}")
+
+    # Consultas de calentamiento en segundo plano: el servidor ya acepta
+    # conexiones y /health/ready responde 503 hasta que terminan. Los workers
+    # de --preload heredan el modelo calentado en el maestro y no las repiten.
+    calentamiento = None
+    if recuperacion and settings.WARMUP_ENABLED and not esta_precargado():
+        calentamiento = asyncio.create_task(_calentar_y_marcar_listo())
+    else:
+        marcar_listo()
 
     yield  # Aquí la aplicación está corriendo
 
     # Shutdown
     logger.info("🔄 Cerrando aplicación...")
 
+    if calentamiento is not None and not calentamiento.done():
+        calentamiento.cancel()
+
+    # Persistir caché de embeddings de consultas
+    if recuperacion:
+        try:
+            db_repository = get_db_repository()
+            if db_repository.embedding_cache is not None:
+                db_repository.embedding_cache.guardar()
+        except Exception as e:
+            logger.error(f"❌ Error guardando caché de embeddings: {e}")
+
+    try:
+        email_outbox = get_email_outbox()
+        if email_outbox is not None:
+            email_outbox.detener()
+    except Exception as e:
+        logger.error(f"❌ Error deteniendo la bandeja de emails: {e}")
+
+    shutdown_executors()
+
 
 def create_app() -> FastAPI:
     """
@@ -57,7 +127,7 @@ def create_app() -> FastAPI:
     )
 
     # Incluir routers
-    app.include_router(api_router, prefix=settings.API_V1_STR)
+    app.include_router(crear_api_router(), prefix=settings.API_V1_STR)
 
     # Endpoint root
     @app.get("/")
@@ -6,6 +6,8 @@ class QueryRequest(BaseModel):
     query: str
     max_results: Optional[int] = 3
     confidence_threshold: Optional[float] = 0.4  # Umbral m�s bajo por defecto
+    bypass_cache: bool = False  # Ignorar la caché semántica de respuestas
+    sender_id: Optional[str] = None  # Usuario, para mantener el historial de conversación
 
 
 class Source(BaseModel):
@@ -21,6 +23,7 @@ class QueryResponse(BaseModel):
     confidence: float
     sources: List[Source]
     processing_time: float
+    cached: bool = False  # True si la respuesta proviene de la caché semántica
 
 
 class HealthResponse(BaseModel):
@@ -61,3 +64,26 @@ class AnthropicResponse(BaseModel):
     answer: str
     model_used: str
     processing_time: float
+
+
+class EmailStatusResponse(BaseModel):
+    ticket: str
+    to_email: str
+    motivo: str
+    estado: str  # pendiente | enviando | enviado | fallido
+    intentos: int
+    proximo_intento: Optional[float] = None  # Epoch del próximo reintento (si está pendiente)
+    creado: float
+    actualizado: float
+    ultimo_error: Optional[str] = None
+
+
+class InfractionResponse(BaseModel):
+    codigo: str
+    descripcion: str
+    multa_smldv: int  # 0 si la multa se remite a otro artículo
+    multa_pesos: Optional[int] = None  # multa_smldv * SMLDV_VALOR
+    sanciones_adicionales: List[str] = []
+    detalle_sanciones: List[str] = []
+    articulo: str
+    articulo_remision: Optional[str] = None  # Artículo con la multa (p. ej. 152, embriaguez)
@@ -1,3 +1,6 @@
 from app.repositories.chroma_repository import ChromaRepository
+from app.repositories.embedding_cache import EmbeddingCache
+from app.repositories.vector_store import NumpyCollection
+from app.repositories.mmap_store import MmapCollection
 
-__all__ = ['ChromaRepository']
+__all__ = ['ChromaRepository', 'EmbeddingCache', 'NumpyCollection', 'MmapCollection']
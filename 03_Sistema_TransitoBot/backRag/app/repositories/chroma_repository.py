@@ -1,8 +1,18 @@
-import chromadb
+import hashlib
 import os
 import logging
 from typing import List, Dict, Optional
-from sentence_transformers import SentenceTransformer
+from app.repositories.embedding_cache import EmbeddingCache
+from app.repositories.embedding_provider import EmbeddingProvider, SentenceTransformerProvider
+from app.repositories.embedding_batcher import EmbeddingBatcher
+from app.repositories.vector_store import (
+    VECTOR_BACKEND_CHROMA,
+    VECTOR_BACKEND_MMAP,
+    crear_coleccion_vectorial,
+    validar_backend_vectorial
+)
+from app.repositories.mmap_store import MmapCollection, exportar_coleccion
+from app.utils.fragments import agrupar_fragmentos
 
 logger = logging.getLogger(__name__)
 
@@ -13,7 +23,12 @@ class ChromaRepository:
     def __init__(
         self,
         db_path: str = "./data/chroma_db",
-        model_name: str = "paraphrase-multilingual-MiniLM-L12-v2"
+        model_name: str = "paraphrase-multilingual-MiniLM-L12-v2",
+        embedding_cache: Optional[EmbeddingCache] = None,
+        vector_backend: str = VECTOR_BACKEND_CHROMA,
+        embedding_provider: Optional[EmbeddingProvider] = None,
+        embedding_batcher: Optional[EmbeddingBatcher] = None,
+        mmap_store_path: Optional[str] = None
     ):
         """
         Inicializa el repositorio de ChromaDB.
@@ -21,24 +36,51 @@ class ChromaRepository:
         Args:
             db_path: Ruta donde se guardará la base de datos local
             model_name: Modelo de embeddings a usar
+            embedding_cache: Caché de embeddings de consultas (opcional)
+            vector_backend: Backend de búsqueda vectorial ("chroma", "numpy"
+                o "mmap")
+            embedding_provider: Proveedor de embeddings. Si no se proporciona,
+                se usa SentenceTransformer (torch) con model_name.
+            embedding_batcher: Planificador de micro-lotes para las consultas
+                (opcional). Sin él, cada consulta se codifica por separado.
+            mmap_store_path: Directorio del almacén mapeado en memoria que
+                escribe scripts/setup_database.py (backend "mmap"). Por
+                defecto, mmap_store junto a db_path.
         """
         self.db_path = db_path
         self.model_name = model_name
+        self.vector_backend = validar_backend_vectorial(vector_backend)
+        self.mmap_store_path = mmap_store_path or os.path.join(os.path.dirname(os.path.abspath(db_path)), "mmap_store")
 
         # Crear directorio si no existe
         os.makedirs(db_path, exist_ok=True)
 
-        # Inicializar ChromaDB (persistente en disco)
-        self.client = chromadb.PersistentClient(path=db_path)
+        # Inicializar ChromaDB (persistente en disco). El backend mmap solo
+        # lee el almacén en disco y no necesita el cliente (ni importar chromadb).
+        self.client = None
+        if vector_backend != VECTOR_BACKEND_MMAP:
+            import chromadb
+
+            self.client = chromadb.PersistentClient(path=db_path)
 
         # Cargar modelo de embeddings
-        logger.info(f"Cargando modelo de embeddings: {model_name}")
-        self.embedding_model = SentenceTransformer(model_name)
+        self.embedding_model = embedding_provider or SentenceTransformerProvider(model_name)
+        self.embedding_batcher = embedding_batcher
+
+        # Caché de embeddings de consultas (se invalida si cambia el modelo o el runtime)
+        self.embedding_cache = embedding_cache
+        identificador = self.embedding_model.identificador
+        if self.embedding_cache is not None and self.embedding_cache.model_name != identificador:
+            self.embedding_cache.invalidar(identificador)
 
         # Nombre de la colección
         self.collection_name = "codigo_transito_colombia"
         self.collection = None
 
+        # Colección de fragmentos (párrafos y parágrafos) enlazados a su artículo
+        self.fragment_collection_name = f"{self.collection_name}_fragmentos"
+        self.fragment_collection = None
+
     def get_collection(self) -> bool:
         """
         Obtiene la colección existente.
@@ -46,13 +88,107 @@ class ChromaRepository:
         Returns:
             True si la colección existe, False en caso contrario
         """
+        if self.vector_backend == VECTOR_BACKEND_MMAP:
+            return self._abrir_almacen_mmap()
+
         try:
-            self.collection = self.client.get_collection(self.collection_name)
-            return True
+            self.collection = crear_coleccion_vectorial(
+                self.vector_backend,
+                self.client.get_collection(self.collection_name)
+            )
         except Exception as e:
             logger.warning(f"Colección '{self.collection_name}' no existe: {e}")
             return False
 
+        try:
+            self.fragment_collection = crear_coleccion_vectorial(
+                self.vector_backend,
+                self.client.get_collection(self.fragment_collection_name)
+            )
+        except Exception:
+            logger.warning(
+                f"Colección de fragmentos '{self.fragment_collection_name}' no existe; "
+                "la búsqueda se hará a nivel de artículo"
+            )
+            self.fragment_collection = None
+
+        return True
+
+    def _abrir_almacen_mmap(self) -> bool:
+        """
+        Abre las colecciones de artículos y fragmentos desde el almacén mmap.
+
+        Un almacén generado con otro modelo o con otra dimensión no se abre:
+        sus vectores no son comparables con los de las consultas.
+        """
+        try:
+            self.collection = MmapCollection(os.path.join(self.mmap_store_path, self.collection_name))
+        except Exception as e:
+            logger.warning(f"Almacén mmap de '{self.collection_name}' no disponible: {e}")
+            return False
+
+        error = self._validar_almacen_mmap(self.collection)
+        if error:
+            logger.error(f"❌ Almacén mmap de '{self.collection_name}' rechazado: {error}. Regenéralo con scripts/setup_database.py")
+            self.collection = None
+            return False
+
+        try:
+            self.fragment_collection = MmapCollection(os.path.join(self.mmap_store_path, self.fragment_collection_name))
+        except Exception:
+            logger.warning(
+                f"Almacén mmap de fragmentos '{self.fragment_collection_name}' no existe; "
+                "la búsqueda se hará a nivel de artículo"
+            )
+            self.fragment_collection = None
+        else:
+            error = self._validar_almacen_mmap(self.fragment_collection)
+            if error:
+                logger.warning(
+                    f"⚠️ Almacén mmap de fragmentos rechazado: {error}; la búsqueda se hará a nivel de artículo"
+                )
+                self.fragment_collection = None
+
+        return True
+
+    def _validar_almacen_mmap(self, coleccion: MmapCollection) -> Optional[str]:
+        """
+        Comprueba que el almacén se generó con el modelo de las consultas.
+
+        Returns:
+            Descripción de la incompatibilidad o None si es compatible
+        """
+        identificador = self.embedding_model.identificador
+        if coleccion.modelo and coleccion.modelo != identificador:
+            return f"se generó con '{coleccion.modelo}' y las consultas usan '{identificador}'"
+
+        # Desde los metadatos del modelo: una inferencia aquí arrancaría los
+        # pools de hilos del runtime en el maestro antes del fork
+        dimension = self.embedding_model.dimension
+        if coleccion.dimension and dimension and coleccion.dimension != dimension:
+            return f"tiene dimensión {coleccion.dimension} y el modelo genera {dimension}"
+
+        return None
+
+    def export_mmap_store(self, dtype: str = "float32") -> None:
+        """
+        Exporta las colecciones actuales al almacén mapeado en memoria.
+
+        Args:
+            dtype: Tipo de los embeddings en disco ("float16" o "float32")
+        """
+        identificador = self.embedding_model.identificador
+        exportar_coleccion(
+            self.collection, os.path.join(self.mmap_store_path, self.collection_name), dtype, identificador
+        )
+        if self.fragment_collection is not None:
+            exportar_coleccion(
+                self.fragment_collection,
+                os.path.join(self.mmap_store_path, self.fragment_collection_name),
+                dtype,
+                identificador
+            )
+
     def create_collection(self, recreate: bool = False) -> bool:
         """
         Crea la colección en ChromaDB.
@@ -63,6 +199,10 @@ class ChromaRepository:
         Returns:
             True si se creó correctamente, False en caso contrario
         """
+        if self.client is None:
+            logger.error("El backend mmap es de solo lectura: usa VECTOR_BACKEND=chroma para crear colecciones")
+            return False
+
         try:
             if recreate:
                 try:
@@ -72,13 +212,16 @@ class ChromaRepository:
                     pass
 
             # Crear colección con función de embedding personalizada
-            self.collection = self.client.create_collection(
-                name=self.collection_name,
-                embedding_function=None,
-                metadata={
-                    "description": "Código Nacional de Tránsito Terrestre de Colombia",
-                    "hnsw:space": "cosine"
-                }
+            self.collection = crear_coleccion_vectorial(
+                self.vector_backend,
+                self.client.create_collection(
+                    name=self.collection_name,
+                    embedding_function=None,
+                    metadata={
+                        "description": "Código Nacional de Tránsito Terrestre de Colombia",
+                        "hnsw:space": "cosine"
+                    }
+                )
             )
 
             logger.info(f"Colección '{self.collection_name}' creada exitosamente")
@@ -88,6 +231,72 @@ class ChromaRepository:
             logger.error(f"Error creando colección: {e}")
             return False
 
+    def create_fragment_collection(self, recreate: bool = False) -> bool:
+        """
+        Crea la colección de fragmentos (párrafos y parágrafos).
+
+        Args:
+            recreate: Si True, elimina la colección existente y crea una nueva
+
+        Returns:
+            True si se creó correctamente, False en caso contrario
+        """
+        if self.client is None:
+            logger.error("El backend mmap es de solo lectura: usa VECTOR_BACKEND=chroma para crear colecciones")
+            return False
+
+        try:
+            if recreate:
+                try:
+                    self.client.delete_collection(self.fragment_collection_name)
+                    logger.info(f"Colección '{self.fragment_collection_name}' eliminada")
+                except Exception:
+                    pass
+
+            self.fragment_collection = crear_coleccion_vectorial(
+                self.vector_backend,
+                self.client.create_collection(
+                    name=self.fragment_collection_name,
+                    embedding_function=None,
+                    metadata={
+                        "description": "Fragmentos de artículos del Código Nacional de Tránsito",
+                        "hnsw:space": "cosine"
+                    }
+                )
+            )
+
+            logger.info(f"Colección '{self.fragment_collection_name}' creada exitosamente")
+            return True
+
+        except Exception as e:
+            logger.error(f"Error creando colección de fragmentos: {e}")
+            return False
+
+    def encode_query(self, consulta: str) -> List[float]:
+        """
+        Genera el embedding de una consulta, reutilizando la caché si existe.
+
+        Args:
+            consulta: Pregunta del usuario
+
+        Returns:
+            Embedding de la consulta
+        """
+        if self.embedding_cache is not None:
+            vector = self.embedding_cache.get(consulta)
+            if vector is not None:
+                return vector.tolist()
+
+        if self.embedding_batcher is not None:
+            vector = self.embedding_batcher.encode(consulta)
+        else:
+            vector = self.embedding_model.encode([consulta])[0]
+
+        if self.embedding_cache is not None:
+            self.embedding_cache.put(consulta, vector)
+
+        return vector.tolist()
+
     def search_articles(
         self,
         consulta: str,
@@ -108,7 +317,7 @@ class ChromaRepository:
         logger.info(f"Buscando: '{consulta}'")
 
         # Generar embedding de la consulta
-        query_embedding = self.embedding_model.encode([consulta]).tolist()
+        query_embedding = [self.encode_query(consulta)]
 
         # Buscar en ChromaDB
         resultados = self.collection.query(
@@ -130,6 +339,7 @@ class ChromaRepository:
 
             if similitud >= umbral_confianza:
                 articulo = {
+                    'id': resultados['ids'][0][i],
                     'documento': documento,
                     'metadata': metadata,
                     'similitud': similitud,
@@ -149,6 +359,69 @@ class ChromaRepository:
             'tiempo_busqueda': 0.1
         }
 
+    def search_fragments(
+        self,
+        consulta: str,
+        n_resultados: int = 3,
+        umbral_confianza: float = 0.7,
+        max_fragmentos_por_articulo: int = 2
+    ) -> Dict:
+        """
+        Busca sobre los fragmentos y agrupa los coincidentes por artículo.
+
+        Cada artículo retornado contiene en 'documento' solo los fragmentos
+        que coincidieron, junto con los metadatos del artículo padre. Si la
+        colección de fragmentos no existe, se busca a nivel de artículo.
+
+        Args:
+            consulta: Pregunta del usuario
+            n_resultados: Número máximo de artículos
+            umbral_confianza: Umbral mínimo de similitud
+            max_fragmentos_por_articulo: Máximo de fragmentos por artículo
+
+        Returns:
+            Diccionario con resultados de la búsqueda
+        """
+        if self.fragment_collection is None:
+            return self.search_articles(consulta, n_resultados, umbral_confianza)
+
+        logger.info(f"Buscando fragmentos: '{consulta}'")
+
+        resultados = self.fragment_collection.query(
+            query_embeddings=[self.encode_query(consulta)],
+            n_results=n_resultados * max_fragmentos_por_articulo * 2,
+            include=['documents', 'metadatas', 'distances']
+        )
+
+        fragmentos = []
+        for i, (documento, metadata, distancia) in enumerate(zip(
+            resultados['documents'][0],
+            resultados['metadatas'][0],
+            resultados['distances'][0]
+        )):
+            similitud = 1 - distancia
+            if similitud >= umbral_confianza:
+                fragmentos.append({
+                    'id': resultados['ids'][0][i],
+                    'documento': documento,
+                    'metadata': metadata,
+                    'similitud': similitud,
+                    'ranking': i + 1
+                })
+
+        articulos_encontrados = agrupar_fragmentos(fragmentos, max_fragmentos_por_articulo)[:n_resultados]
+
+        logger.info(
+            f"Encontrados {len(fragmentos)} fragmentos en {len(articulos_encontrados)} artículos relevantes"
+        )
+
+        return {
+            'consulta': consulta,
+            'total_encontrados': len(articulos_encontrados),
+            'articulos': articulos_encontrados,
+            'tiempo_busqueda': 0.1
+        }
+
     def get_stats(self) -> Dict:
         """
         Obtiene estadísticas de la base de datos.
@@ -158,21 +431,49 @@ class ChromaRepository:
         """
         try:
             count = self.collection.count()
-            return {
+            stats = {
                 'total_articulos': count,
                 'coleccion': self.collection_name,
-                'modelo_embeddings': self.model_name,
+                'total_fragmentos': self.fragment_collection.count() if self.fragment_collection is not None else 0,
+                'modelo_embeddings': self.embedding_model.identificador,
+                'backend_vectorial': self.vector_backend,
                 'ruta_db': self.db_path
             }
+            if self.embedding_cache is not None:
+                stats['cache_embeddings'] = self.embedding_cache.get_stats()
+            if self.embedding_batcher is not None:
+                stats['micro_lotes_embeddings'] = self.embedding_batcher.get_stats()
+            return stats
         except Exception as e:
             logger.error(f"Error obteniendo estadísticas: {e}")
             return {}
 
+    def corpus_fingerprint(self) -> str:
+        """
+        Huella del corpus indexado: sha256 de los IDs y textos de los artículos.
+
+        Cambia cuando se re-ejecuta el setup con otro texto de la ley, lo que
+        permite detectar artefactos derivados del corpus (p. ej. respuestas
+        precalculadas) que quedaron obsoletos.
+
+        Returns:
+            Huella hexadecimal
+        """
+        datos = self.collection.get(include=['documents'])
+        huella = hashlib.sha256()
+        for id_documento, documento in sorted(zip(datos['ids'], datos['documents'])):
+            huella.update(id_documento.encode('utf-8'))
+            huella.update(b'\0')
+            huella.update(hashlib.sha256((documento or '').encode('utf-8')).digest())
+        return huella.hexdigest()
+
     def add_documents(
         self,
         documents: List[str],
         metadatas: List[Dict],
-        ids: List[str]
+        ids: List[str],
+        embedding_texts: Optional[List[str]] = None,
+        fragmentos: bool = False
     ) -> bool:
         """
         Añade documentos a la colección.
@@ -181,20 +482,25 @@ class ChromaRepository:
             documents: Lista de textos de documentos
             metadatas: Lista de metadatos
             ids: Lista de IDs únicos
+            embedding_texts: Textos a vectorizar, si difieren de los documentos
+                almacenados (p. ej. fragmento precedido del encabezado del artículo)
+            fragmentos: Si True, se añaden a la colección de fragmentos
 
         Returns:
             True si se añadieron correctamente
         """
+        collection = self.fragment_collection if fragmentos else self.collection
+
         try:
             logger.info("Generando embeddings...")
             embeddings = self.embedding_model.encode(
-                documents,
+                embedding_texts or documents,
                 show_progress_bar=True,
                 batch_size=32
             ).tolist()
 
             logger.info("Almacenando en ChromaDB...")
-            self.collection.add(
+            collection.add(
                 embeddings=embeddings,
                 documents=documents,
                 metadatas=metadatas,
@@ -217,6 +523,16 @@ class ChromaRepository:
         """Alias para search_articles (compatibilidad)."""
         return self.search_articles(consulta, n_resultados, umbral_confianza)
 
+    def buscar_fragmentos(
+        self,
+        consulta: str,
+        n_resultados: int = 3,
+        umbral_confianza: float = 0.7,
+        max_fragmentos_por_articulo: int = 2
+    ) -> Dict:
+        """Alias para search_fragments (compatibilidad)."""
+        return self.search_fragments(consulta, n_resultados, umbral_confianza, max_fragmentos_por_articulo)
+
     def obtener_estadisticas_db(self) -> Dict:
         """Alias para get_stats (compatibilidad)."""
         return self.get_stats()
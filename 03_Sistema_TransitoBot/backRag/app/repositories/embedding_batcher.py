@@ -0,0 +1,151 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingBatcher:
+    """
+    Planificador de micro-lotes para codificar consultas concurrentes.
+
+    Cada llamada a `encode` encola el texto con un Future y espera su
+    vector. Un hilo de fondo agrupa las solicitudes que llegan hasta
+    completar `max_batch_size` o hasta que pasen `max_wait_ms` desde la
+    primera, y las codifica en un único forward pass del modelo.
+
+    El hilo se inicia perezosamente en la primera solicitud, de modo que la
+    instancia puede crearse antes de un fork sin heredar hilos muertos.
+    """
+
+    def __init__(
+        self,
+        embedding_model,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        max_queue: int = 256
+    ):
+        """
+        Inicializa el planificador.
+
+        Args:
+            embedding_model: Proveedor de embeddings con método `encode`
+            max_batch_size: Tamaño máximo de cada lote
+            max_wait_ms: Espera máxima para completar un lote (milisegundos)
+            max_queue: Profundidad máxima de la cola; si se llena, la
+                consulta se codifica directamente sin esperar al lote
+        """
+        self.embedding_model = embedding_model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._cola: "queue.Queue[Tuple[str, Future, float]]" = queue.Queue(maxsize=max_queue)
+        self._hilo = None
+        self._lock = threading.Lock()
+
+        # Métricas
+        self._lotes = 0
+        self._solicitudes = 0
+        self._directas = 0
+        self._tamano_maximo = 0
+        self._espera_total = 0.0
+        self._profundidad_maxima = 0
+
+    def _asegurar_hilo(self) -> None:
+        if self._hilo is not None and self._hilo.is_alive():
+            return
+        with self._lock:
+            if self._hilo is None or not self._hilo.is_alive():
+                self._hilo = threading.Thread(
+                    target=self._procesar,
+                    name="embedding-batcher",
+                    daemon=True
+                )
+                self._hilo.start()
+
+    def encode(self, texto: str) -> np.ndarray:
+        """
+        Codifica un texto agrupándolo con otras solicitudes concurrentes.
+
+        Args:
+            texto: Texto a codificar
+
+        Returns:
+            Embedding del texto
+        """
+        self._asegurar_hilo()
+        futuro: Future = Future()
+
+        try:
+            self._cola.put_nowait((texto, futuro, time.perf_counter()))
+        except queue.Full:
+            with self._lock:
+                self._directas += 1
+            logger.warning("⚠️ Cola de embeddings llena, codificando sin micro-lote")
+            return self.embedding_model.encode([texto])[0]
+
+        with self._lock:
+            self._profundidad_maxima = max(self._profundidad_maxima, self._cola.qsize())
+
+        return futuro.result()
+
+    def _recolectar_lote(self) -> List[Tuple[str, Future, float]]:
+        """Bloquea hasta la primera solicitud y agrupa las que lleguen a tiempo."""
+        lote = [self._cola.get()]
+        limite = time.perf_counter() + self.max_wait
+
+        while len(lote) < self.max_batch_size:
+            restante = limite - time.perf_counter()
+            if restante <= 0:
+                break
+            try:
+                lote.append(self._cola.get(timeout=restante))
+            except queue.Empty:
+                break
+
+        return lote
+
+    def _procesar(self) -> None:
+        while True:
+            lote = self._recolectar_lote()
+            textos = [texto for texto, _, _ in lote]
+            inicio = time.perf_counter()
+
+            try:
+                vectores = self.embedding_model.encode(textos, batch_size=len(textos))
+                for (_, futuro, _), vector in zip(lote, vectores):
+                    futuro.set_result(vector)
+            except Exception as e:
+                logger.error(f"❌ Error codificando lote de embeddings: {e}")
+                for _, futuro, _ in lote:
+                    futuro.set_exception(e)
+
+            with self._lock:
+                self._lotes += 1
+                self._solicitudes += len(lote)
+                self._tamano_maximo = max(self._tamano_maximo, len(lote))
+                self._espera_total += sum(inicio - encolado for _, _, encolado in lote)
+
+    def get_stats(self) -> Dict:
+        """
+        Obtiene métricas del planificador.
+
+        Returns:
+            Diccionario con tamaño de lote, tiempos de espera y profundidad de cola
+        """
+        with self._lock:
+            return {
+                'lotes': self._lotes,
+                'solicitudes': self._solicitudes,
+                'solicitudes_directas': self._directas,
+                'tamano_promedio_lote': (self._solicitudes / self._lotes) if self._lotes else 0.0,
+                'tamano_maximo_lote': self._tamano_maximo,
+                'espera_promedio_ms': (self._espera_total / self._solicitudes * 1000) if self._solicitudes else 0.0,
+                'profundidad_cola': self._cola.qsize(),
+                'profundidad_maxima_cola': self._profundidad_maxima,
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000
+            }
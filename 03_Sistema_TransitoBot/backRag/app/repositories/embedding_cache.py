@@ -0,0 +1,211 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+import numpy as np
+from app.utils.text_normalization import normalizar_texto
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """
+    Caché LRU acotada de embeddings de consultas.
+
+    La clave es el texto normalizado (minúsculas, sin tildes y con espacios
+    colapsados), de modo que variantes triviales de la misma pregunta
+    comparten el embedding. Opcionalmente se persiste en disco (.npz) para
+    sobrevivir a reinicios; el archivo guarda el nombre del modelo y se
+    descarta si no coincide con el modelo actual.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        max_entries: int = 5000,
+        path: Optional[str] = None,
+        flush_every: int = 100
+    ):
+        """
+        Inicializa la caché.
+
+        Args:
+            model_name: Modelo de embeddings con el que se generan los vectores
+            max_entries: Número máximo de entradas antes de desalojar (LRU)
+            path: Ruta del archivo .npz de persistencia. None la desactiva.
+            flush_every: Cada cuántas inserciones nuevas se guarda en disco
+        """
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.path = path
+        self.flush_every = flush_every
+
+        self._entradas: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._pendientes = 0
+        self.hits = 0
+        self.misses = 0
+
+        if self.path:
+            self._cargar()
+
+    @staticmethod
+    def normalizar_clave(texto: str) -> str:
+        """Normaliza el texto de la consulta para usarlo como clave."""
+        return normalizar_texto(texto)
+
+    def get(self, texto: str) -> Optional[np.ndarray]:
+        """
+        Obtiene el embedding de una consulta si está en caché.
+
+        Args:
+            texto: Texto de la consulta (sin normalizar)
+
+        Returns:
+            Vector float32 o None si no está en caché
+        """
+        clave = self.normalizar_clave(texto)
+
+        with self._lock:
+            vector = self._entradas.get(clave)
+            if vector is None:
+                self.misses += 1
+                return None
+
+            self._entradas.move_to_end(clave)
+            self.hits += 1
+            return vector
+
+    def put(self, texto: str, vector) -> None:
+        """
+        Guarda el embedding de una consulta.
+
+        Args:
+            texto: Texto de la consulta (sin normalizar)
+            vector: Embedding de la consulta
+        """
+        clave = self.normalizar_clave(texto)
+        vector = np.asarray(vector, dtype=np.float32)
+
+        with self._lock:
+            self._entradas[clave] = vector
+            self._entradas.move_to_end(clave)
+
+            while len(self._entradas) > self.max_entries:
+                self._entradas.popitem(last=False)
+
+            self._pendientes += 1
+            debe_guardar = self.path and self._pendientes >= self.flush_every
+
+        if debe_guardar:
+            self.guardar()
+
+    def invalidar(self, model_name: Optional[str] = None) -> None:
+        """
+        Vacía la caché. Si se indica un modelo nuevo, se adopta como actual.
+
+        Args:
+            model_name: Nuevo modelo de embeddings (opcional)
+        """
+        with self._lock:
+            self._entradas.clear()
+            self._pendientes = 0
+            if model_name:
+                self.model_name = model_name
+
+        logger.info(f"🧹 Caché de embeddings invalidada (modelo: {self.model_name})")
+
+    def guardar(self) -> bool:
+        """
+        Persiste la caché en disco.
+
+        Returns:
+            True si se guardó correctamente
+        """
+        if not self.path:
+            return False
+
+        with self._lock:
+            claves = list(self._entradas.keys())
+            vectores = list(self._entradas.values())
+            self._pendientes = 0
+
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            matriz = np.vstack(vectores) if vectores else np.zeros((0, 0), dtype=np.float32)
+            # Claves como bloque UTF-8 con offsets: el archivo se carga sin pickle
+            codificadas = [clave.encode('utf-8') for clave in claves]
+            offsets = np.zeros(len(codificadas) + 1, dtype=np.int64)
+            offsets[1:] = np.cumsum([len(c) for c in codificadas])
+            # Temporal por proceso: varios workers pueden guardar a la vez
+            temporal = f"{self.path}.{os.getpid()}.tmp.npz"
+            np.savez(
+                temporal,
+                model_name=np.array(self.model_name),
+                claves=np.frombuffer(b''.join(codificadas), dtype=np.uint8),
+                claves_offsets=offsets,
+                vectores=matriz
+            )
+            os.replace(temporal, self.path)
+            logger.info(f"💾 Caché de embeddings guardada: {len(claves)} entradas")
+            return True
+        except Exception as e:
+            logger.error(f"Error guardando caché de embeddings: {e}")
+            return False
+
+    def _cargar(self) -> None:
+        """Carga la caché desde disco si existe y corresponde al modelo actual."""
+        if not os.path.exists(self.path):
+            return
+
+        try:
+            with np.load(self.path, allow_pickle=False) as datos:
+                if 'claves_offsets' not in datos.files:
+                    logger.info("Caché de embeddings descartada: formato anterior")
+                    return
+
+                modelo_guardado = str(datos['model_name'])
+                if modelo_guardado != self.model_name:
+                    logger.info(
+                        f"Caché de embeddings descartada: generada con '{modelo_guardado}', "
+                        f"modelo actual '{self.model_name}'"
+                    )
+                    return
+
+                blob = datos['claves'].tobytes()
+                offsets = datos['claves_offsets']
+                claves = [
+                    blob[inicio:fin].decode('utf-8')
+                    for inicio, fin in zip(offsets[:-1], offsets[1:])
+                ]
+                vectores = datos['vectores'].astype(np.float32)
+
+            for clave, vector in list(zip(claves, vectores))[-self.max_entries:]:
+                self._entradas[clave] = vector
+
+            logger.info(f"📂 Caché de embeddings cargada: {len(self._entradas)} entradas")
+        except Exception as e:
+            logger.warning(f"No se pudo cargar la caché de embeddings: {e}")
+
+    def get_stats(self) -> Dict:
+        """
+        Obtiene estadísticas de uso de la caché.
+
+        Returns:
+            Diccionario con entradas, hits, misses y tasa de aciertos
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entradas': len(self._entradas),
+                'capacidad': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'tasa_aciertos': (self.hits / total) if total else 0.0,
+                'modelo': self.model_name,
+                'persistente': bool(self.path)
+            }
+
+    def __len__(self) -> int:
+        return len(self._entradas)
@@ -0,0 +1,301 @@
+import logging
+import os
+from abc import ABC, abstractmethod
+from typing import List, Dict, Optional
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Backends de embeddings soportados
+EMBEDDING_BACKEND_TORCH = "torch"
+EMBEDDING_BACKEND_ONNX = "onnx"
+
+
+class EmbeddingProvider(ABC):
+    """
+    Interfaz común para los proveedores de embeddings.
+
+    Tanto la ingesta (`add_documents`) como la codificación de consultas
+    pasan por esta interfaz, que replica la firma de
+    `SentenceTransformer.encode` usada en el repositorio.
+    """
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+
+    @property
+    @abstractmethod
+    def identificador(self) -> str:
+        """Identifica modelo y runtime; cambia si cambian los vectores generados."""
+        pass
+
+    @property
+    def dimension(self) -> Optional[int]:
+        """
+        Dimensión de los vectores según los metadatos del modelo, sin
+        ejecutar inferencia (None si no se conoce).
+        """
+        return None
+
+    @abstractmethod
+    def encode(
+        self,
+        sentences: List[str],
+        batch_size: int = 32,
+        show_progress_bar: bool = False
+    ) -> np.ndarray:
+        """
+        Genera embeddings para una lista de textos.
+
+        Args:
+            sentences: Textos a codificar
+            batch_size: Tamaño de lote
+            show_progress_bar: Mostrar barra de progreso (si el runtime la soporta)
+
+        Returns:
+            Matriz float32 de forma (len(sentences), dimension)
+        """
+        pass
+
+    def preparar_precarga(self) -> None:
+        """
+        Prepara el runtime para cargarse en el proceso maestro antes del fork.
+
+        Los pools de hilos nativos no sobreviven al fork: el maestro debe
+        calentar el modelo sin crearlos (ver `app/core/prefork.py`).
+        """
+        pass
+
+    def reiniciar_tras_fork(self) -> None:
+        """Recrea en el worker los recursos del runtime que no se heredan."""
+        pass
+
+
+class SentenceTransformerProvider(EmbeddingProvider):
+    """Proveedor basado en SentenceTransformer (PyTorch)."""
+
+    def __init__(self, model_name: str):
+        super().__init__(model_name)
+        from sentence_transformers import SentenceTransformer
+
+        logger.info(f"Cargando modelo de embeddings (torch): {model_name}")
+        self.model = SentenceTransformer(model_name)
+        self._hilos_torch = None
+
+    @property
+    def identificador(self) -> str:
+        return self.model_name
+
+    @property
+    def dimension(self) -> Optional[int]:
+        return self.model.get_sentence_embedding_dimension()
+
+    def preparar_precarga(self) -> None:
+        # Con un solo hilo torch no arranca el pool de OpenMP, que quedaría
+        # inservible (y bloquearía) en los procesos hijos
+        import torch
+
+        self._hilos_torch = torch.get_num_threads()
+        torch.set_num_threads(1)
+
+    def reiniciar_tras_fork(self) -> None:
+        if self._hilos_torch is not None:
+            import torch
+
+            torch.set_num_threads(self._hilos_torch)
+
+    def encode(
+        self,
+        sentences: List[str],
+        batch_size: int = 32,
+        show_progress_bar: bool = False
+    ) -> np.ndarray:
+        return np.asarray(
+            self.model.encode(
+                sentences,
+                batch_size=batch_size,
+                show_progress_bar=show_progress_bar
+            ),
+            dtype=np.float32
+        )
+
+
+class OnnxEmbeddingProvider(EmbeddingProvider):
+    """
+    Proveedor que ejecuta una exportación ONNX cuantizada (int8) del modelo
+    con onnxruntime en CPU.
+
+    El directorio del modelo se genera con `scripts/export_onnx.py` y
+    contiene `model_int8.onnx` junto con los archivos del tokenizer. El
+    pooling (promedio enmascarado por atención) replica el de
+    paraphrase-multilingual-MiniLM-L12-v2.
+    """
+
+    MODEL_FILENAME = "model_int8.onnx"
+
+    def __init__(self, model_name: str, model_dir: str, num_threads: int = 0, max_length: int = 128):
+        """
+        Inicializa la sesión de inferencia.
+
+        Args:
+            model_name: Nombre del modelo original
+            model_dir: Directorio con el modelo ONNX y el tokenizer
+            num_threads: Hilos intra-op de onnxruntime (0 = automático)
+            max_length: Longitud máxima en tokens
+        """
+        super().__init__(model_name)
+        from transformers import AutoTokenizer
+
+        model_path = os.path.join(model_dir, self.MODEL_FILENAME)
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(
+                f"No se encontró el modelo ONNX en '{model_path}'. Ejecuta scripts/export_onnx.py primero"
+            )
+
+        logger.info(f"Cargando modelo de embeddings (onnx int8): {model_path}")
+        self.model_dir = model_dir
+        self.model_path = model_path
+        self.num_threads = num_threads
+        self.session = self._crear_sesion(num_threads)
+        self._sesiones_heredadas = []
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.max_length = max_length
+        self._entradas = {entrada.name for entrada in self.session.get_inputs()}
+
+    def _crear_sesion(self, num_threads: int):
+        import onnxruntime
+
+        opciones = onnxruntime.SessionOptions()
+        if num_threads:
+            opciones.intra_op_num_threads = num_threads
+        return onnxruntime.InferenceSession(
+            self.model_path,
+            sess_options=opciones,
+            providers=["CPUExecutionProvider"]
+        )
+
+    @property
+    def identificador(self) -> str:
+        return f"{self.model_name}:onnx-int8"
+
+    @property
+    def dimension(self) -> Optional[int]:
+        # La salida es (lote, tokens, dimensión); el pooling conserva la última
+        ultima = self.session.get_outputs()[0].shape[-1]
+        if isinstance(ultima, int):
+            return ultima
+
+        ruta_config = os.path.join(self.model_dir, "config.json")
+        if os.path.exists(ruta_config):
+            import json
+
+            with open(ruta_config, encoding="utf-8") as f:
+                return json.load(f).get("hidden_size")
+        return None
+
+    def preparar_precarga(self) -> None:
+        # Sesión de un hilo (sin pool intra-op) para calentar en el maestro
+        self.session = self._crear_sesion(1)
+
+    def reiniciar_tras_fork(self) -> None:
+        # La sesión heredada no se destruye: su destructor esperaría hilos
+        # que solo existen en el proceso maestro
+        self._sesiones_heredadas.append(self.session)
+        self.session = self._crear_sesion(self.num_threads)
+
+    def encode(
+        self,
+        sentences: List[str],
+        batch_size: int = 32,
+        show_progress_bar: bool = False
+    ) -> np.ndarray:
+        lotes = []
+
+        for inicio in range(0, len(sentences), batch_size):
+            lote = sentences[inicio:inicio + batch_size]
+            tokens = self.tokenizer(
+                lote,
+                padding=True,
+                truncation=True,
+                max_length=self.max_length,
+                return_tensors="np"
+            )
+            entradas = {
+                nombre: valor.astype(np.int64)
+                for nombre, valor in tokens.items()
+                if nombre in self._entradas
+            }
+            salida = self.session.run(None, entradas)[0]
+
+            # Mean pooling enmascarado
+            mascara = tokens["attention_mask"][..., None].astype(np.float32)
+            suma = (salida * mascara).sum(axis=1)
+            lotes.append(suma / np.clip(mascara.sum(axis=1), 1e-9, None))
+
+        if not lotes:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        return np.vstack(lotes).astype(np.float32)
+
+
+def crear_proveedor_embeddings(
+    backend: str,
+    model_name: str,
+    onnx_model_dir: str = "",
+    onnx_num_threads: int = 0
+) -> EmbeddingProvider:
+    """
+    Crea el proveedor de embeddings configurado.
+
+    Args:
+        backend: "torch" o "onnx"
+        model_name: Nombre del modelo de embeddings
+        onnx_model_dir: Directorio del modelo ONNX (solo backend onnx)
+        onnx_num_threads: Hilos de onnxruntime (solo backend onnx)
+
+    Returns:
+        EmbeddingProvider inicializado
+
+    Raises:
+        ValueError: Si el backend no es soportado
+    """
+    if backend == EMBEDDING_BACKEND_TORCH:
+        return SentenceTransformerProvider(model_name)
+    if backend == EMBEDDING_BACKEND_ONNX:
+        return OnnxEmbeddingProvider(model_name, onnx_model_dir, num_threads=onnx_num_threads)
+
+    raise ValueError(f"Backend de embeddings no soportado: '{backend}'")
+
+
+def verificar_paridad(
+    referencia: EmbeddingProvider,
+    candidato: EmbeddingProvider,
+    textos: List[str],
+    tolerancia: float = 0.98
+) -> Dict:
+    """
+    Compara los vectores de dos proveedores sobre los mismos textos.
+
+    Args:
+        referencia: Proveedor de referencia (torch)
+        candidato: Proveedor a validar (onnx cuantizado)
+        textos: Textos de prueba
+        tolerancia: Similitud coseno mínima aceptada por texto
+
+    Returns:
+        Dict con similitud mínima, promedio y si se cumple la tolerancia
+    """
+    a = referencia.encode(textos)
+    b = candidato.encode(textos)
+
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    similitudes = (a * b).sum(axis=1)
+
+    return {
+        'similitud_minima': float(similitudes.min()),
+        'similitud_promedio': float(similitudes.mean()),
+        'tolerancia': tolerancia,
+        'cumple': bool(similitudes.min() >= tolerancia),
+        'textos': len(textos)
+    }
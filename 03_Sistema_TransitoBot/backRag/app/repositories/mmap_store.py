@@ -0,0 +1,323 @@
+import json
+import logging
+import os
+import shutil
+import time
+from typing import Any, Dict, List, Optional
+import numpy as np
+from app.repositories.vector_store import VectorCollection
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 1
+MANIFIESTO = "manifest.json"
+
+# Filas por bloque al calcular similitudes con embeddings float16: evita
+# convertir la matriz completa a float32 en cada consulta
+FILAS_POR_BLOQUE = 4096
+
+TIPO_ENTERO = "int"
+TIPO_REAL = "float"
+TIPO_TEXTO = "str"
+TIPO_JSON = "json"
+
+
+def _guardar_textos(directorio: str, nombre: str, textos: List[str]) -> None:
+    """Guarda textos como un bloque UTF-8 contiguo más sus offsets (n + 1)."""
+    codificados = [texto.encode('utf-8') for texto in textos]
+    offsets = np.zeros(len(codificados) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(c) for c in codificados])
+    np.save(os.path.join(directorio, f"{nombre}.npy"), np.frombuffer(b''.join(codificados), dtype=np.uint8))
+    np.save(os.path.join(directorio, f"{nombre}_offsets.npy"), offsets)
+
+
+def _tipo_columna(valores: List[Any]) -> str:
+    if all(isinstance(v, int) and not isinstance(v, bool) for v in valores):
+        return TIPO_ENTERO
+    if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in valores):
+        return TIPO_REAL
+    if all(isinstance(v, str) for v in valores):
+        return TIPO_TEXTO
+    return TIPO_JSON
+
+
+def escribir_almacen(
+    directorio: str,
+    ids: List[str],
+    documentos: List[str],
+    metadatas: List[Dict],
+    embeddings,
+    dtype: str = "float32",
+    modelo: str = ""
+) -> None:
+    """
+    Escribe una colección en el formato del almacén mapeado en memoria.
+
+    Archivos (todos .npy, legibles con `np.load(mmap_mode='r')`):
+        - embeddings.npy: matriz contigua (n, dim) normalizada, float16 o float32
+        - documentos.npy / documentos_offsets.npy: textos UTF-8 y sus offsets
+        - ids.npy / ids_offsets.npy: IDs, mismo formato
+        - meta_<n>.npy: una columna por clave de metadatos (int64, float64,
+          o texto/JSON con su archivo de offsets); el manifiesto mapea
+          cada clave a su archivo
+        - manifest.json: esquema, dimensiones, tipos de columnas y modelo
+
+    Se escribe en un directorio temporal que luego reemplaza al anterior:
+    los workers que ya tenían mapeados los archivos viejos los conservan
+    hasta reabrir el almacén.
+
+    Args:
+        directorio: Directorio destino de la colección
+        ids: IDs de los documentos
+        documentos: Textos
+        metadatas: Metadatos de cada documento
+        embeddings: Embeddings (n, dim)
+        dtype: "float32" o "float16" (mitad de disco y memoria, similitud más lenta)
+        modelo: Identificador del modelo de embeddings
+    """
+    if dtype not in ("float16", "float32"):
+        raise ValueError(f"dtype no soportado para el almacén mmap: '{dtype}'")
+
+    temporal = f"{directorio}.tmp-{os.getpid()}"
+    shutil.rmtree(temporal, ignore_errors=True)
+    os.makedirs(temporal)
+
+    matriz = np.asarray(embeddings, dtype=np.float32).reshape(len(ids), -1) if ids else np.zeros((0, 0), dtype=np.float32)
+    normas = np.linalg.norm(matriz, axis=1, keepdims=True)
+    normas[normas == 0] = 1.0
+    np.save(os.path.join(temporal, "embeddings.npy"), np.ascontiguousarray(matriz / normas, dtype=dtype))
+
+    _guardar_textos(temporal, "documentos", [d or '' for d in documentos])
+    _guardar_textos(temporal, "ids", ids)
+
+    claves = list(dict.fromkeys(clave for metadata in metadatas for clave in (metadata or {})))
+    columnas = {}
+    for posicion, clave in enumerate(claves):
+        valores = [(metadata or {}).get(clave) for metadata in metadatas]
+        tipo = _tipo_columna(valores)
+        nombre = f"meta_{posicion}"
+        if tipo == TIPO_ENTERO:
+            np.save(os.path.join(temporal, f"{nombre}.npy"), np.array(valores, dtype=np.int64))
+        elif tipo == TIPO_REAL:
+            np.save(os.path.join(temporal, f"{nombre}.npy"), np.array(valores, dtype=np.float64))
+        elif tipo == TIPO_TEXTO:
+            _guardar_textos(temporal, nombre, valores)
+        else:
+            _guardar_textos(temporal, nombre, [json.dumps(v, ensure_ascii=False) for v in valores])
+        columnas[clave] = {"archivo": nombre, "tipo": tipo}
+
+    with open(os.path.join(temporal, MANIFIESTO), "w", encoding="utf-8") as f:
+        json.dump({
+            "schema_version": SCHEMA_VERSION,
+            "total": len(ids),
+            "dimension": int(matriz.shape[1]) if matriz.size else 0,
+            "dtype": dtype,
+            "modelo": modelo,
+            "columnas": columnas,
+            "creado": time.time()
+        }, f, ensure_ascii=False, indent=1)
+
+    anterior = f"{directorio}.old-{os.getpid()}"
+    if os.path.exists(directorio):
+        os.replace(directorio, anterior)
+    os.replace(temporal, directorio)
+    shutil.rmtree(anterior, ignore_errors=True)
+
+    logger.info(f"💾 Almacén mmap escrito en {directorio}: {len(ids)} documentos ({dtype})")
+
+
+def exportar_coleccion(coleccion, directorio: str, dtype: str = "float32", modelo: str = "") -> None:
+    """
+    Exporta una colección de ChromaDB (u otra VectorCollection) al almacén mmap.
+
+    Args:
+        coleccion: Colección con documentos, metadatos y embeddings
+        directorio: Directorio destino
+        dtype: Tipo de los embeddings en disco
+        modelo: Identificador del modelo de embeddings
+    """
+    datos = coleccion.get(include=['documents', 'metadatas', 'embeddings'])
+    escribir_almacen(
+        directorio,
+        list(datos['ids']),
+        list(datos['documents']),
+        list(datos['metadatas']),
+        datos['embeddings'],
+        dtype=dtype,
+        modelo=modelo
+    )
+
+
+class _Textos:
+    """Acceso por posición a un bloque de textos mapeado en memoria."""
+
+    def __init__(self, directorio: str, nombre: str):
+        self.bloque = np.load(os.path.join(directorio, f"{nombre}.npy"), mmap_mode='r')
+        self.offsets = np.load(os.path.join(directorio, f"{nombre}_offsets.npy"), mmap_mode='r')
+
+    def __getitem__(self, posicion: int) -> str:
+        inicio, fin = int(self.offsets[posicion]), int(self.offsets[posicion + 1])
+        return self.bloque[inicio:fin].tobytes().decode('utf-8')
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+
+class MmapCollection(VectorCollection):
+    """
+    Colección de solo lectura sobre el almacén mapeado en memoria.
+
+    Embeddings, textos y columnas de metadatos se abren con
+    `np.load(mmap_mode='r')`: no se copian al heap del proceso sino que se
+    leen desde la caché de páginas del sistema operativo, compartida por
+    todos los workers de uvicorn (y por los contenedores que monten el
+    mismo volumen). Cada worker solo mantiene el dict id → posición.
+
+    La búsqueda es exacta, como `NumpyCollection`: producto matriz-vector
+    sobre los embeddings normalizados y `argpartition`. Las distancias
+    siguen la convención de Chroma (1 - similitud).
+    """
+
+    def __init__(self, directorio: str):
+        """
+        Abre el almacén.
+
+        Args:
+            directorio: Directorio escrito por `escribir_almacen`
+
+        Raises:
+            FileNotFoundError: Si el almacén no existe
+            ValueError: Si el esquema no es compatible
+        """
+        ruta_manifiesto = os.path.join(directorio, MANIFIESTO)
+        if not os.path.exists(ruta_manifiesto):
+            raise FileNotFoundError(f"Almacén mmap no encontrado en {directorio}")
+
+        with open(ruta_manifiesto, "r", encoding="utf-8") as f:
+            self.manifiesto = json.load(f)
+        if self.manifiesto.get("schema_version") != SCHEMA_VERSION:
+            raise ValueError(
+                f"Almacén mmap con esquema {self.manifiesto.get('schema_version')}, se esperaba {SCHEMA_VERSION}"
+            )
+
+        self.directorio = directorio
+        self.embeddings = np.load(os.path.join(directorio, "embeddings.npy"), mmap_mode='r')
+        self.documentos = _Textos(directorio, "documentos")
+        self._ids = _Textos(directorio, "ids")
+
+        self._columnas = {}
+        for clave, columna in self.manifiesto["columnas"].items():
+            if columna["tipo"] in (TIPO_ENTERO, TIPO_REAL):
+                self._columnas[clave] = (columna["tipo"], np.load(
+                    os.path.join(directorio, f"{columna['archivo']}.npy"), mmap_mode='r'
+                ))
+            else:
+                self._columnas[clave] = (columna["tipo"], _Textos(directorio, columna["archivo"]))
+
+        self.ids: List[str] = [self._ids[p] for p in range(len(self._ids))]
+        self._posiciones: Dict[str, int] = {id_documento: p for p, id_documento in enumerate(self.ids)}
+
+        logger.info(
+            f"🗺️ Almacén mmap abierto: {self.count()} documentos, dim {self.manifiesto['dimension']} "
+            f"({self.manifiesto['dtype']}) desde {directorio}"
+        )
+
+    @property
+    def modelo(self) -> str:
+        return self.manifiesto.get("modelo", "")
+
+    @property
+    def dimension(self) -> int:
+        return int(self.manifiesto.get("dimension", 0))
+
+    def _metadata(self, posicion: int) -> Dict:
+        metadata = {}
+        for clave, (tipo, columna) in self._columnas.items():
+            if tipo == TIPO_ENTERO:
+                metadata[clave] = int(columna[posicion])
+            elif tipo == TIPO_REAL:
+                metadata[clave] = float(columna[posicion])
+            elif tipo == TIPO_TEXTO:
+                metadata[clave] = columna[posicion]
+            else:
+                valor = json.loads(columna[posicion])
+                if valor is not None:
+                    metadata[clave] = valor
+        return metadata
+
+    def _similitudes(self, consulta: np.ndarray) -> np.ndarray:
+        if self.embeddings.dtype == np.float32:
+            return self.embeddings @ consulta
+
+        similitudes = np.empty(len(self.embeddings), dtype=np.float32)
+        for inicio in range(0, len(self.embeddings), FILAS_POR_BLOQUE):
+            bloque = self.embeddings[inicio:inicio + FILAS_POR_BLOQUE]
+            similitudes[inicio:inicio + len(bloque)] = bloque.astype(np.float32) @ consulta
+        return similitudes
+
+    def count(self) -> int:
+        return len(self.ids)
+
+    def get(self, ids: Optional[List[str]] = None, include: Optional[List[str]] = None) -> Dict:
+        include = include or ['documents', 'metadatas']
+
+        if ids is None:
+            posiciones = list(range(self.count()))
+        else:
+            posiciones = [self._posiciones[i] for i in ids if i in self._posiciones]
+
+        resultado = {'ids': [self.ids[p] for p in posiciones]}
+        if 'documents' in include:
+            resultado['documents'] = [self.documentos[p] for p in posiciones]
+        if 'metadatas' in include:
+            resultado['metadatas'] = [self._metadata(p) for p in posiciones]
+        if 'embeddings' in include:
+            resultado['embeddings'] = np.asarray(self.embeddings[posiciones], dtype=np.float32).tolist()
+        return resultado
+
+    def query(
+        self,
+        query_embeddings: List[List[float]],
+        n_results: int = 10,
+        include: Optional[List[str]] = None
+    ) -> Dict:
+        include = include or ['documents', 'metadatas', 'distances']
+        consultas = np.asarray(query_embeddings, dtype=np.float32)
+        normas = np.linalg.norm(consultas, axis=1, keepdims=True)
+        normas[normas == 0] = 1.0
+        consultas = consultas / normas
+
+        resultado = {'ids': [], 'documents': [], 'metadatas': [], 'distances': []}
+        total = self.count()
+        k = min(n_results, total)
+
+        for consulta in consultas:
+            if k == 0:
+                posiciones = np.empty(0, dtype=np.int64)
+                similitudes = np.empty(0, dtype=np.float32)
+            else:
+                similitudes = self._similitudes(consulta)
+                if k < total:
+                    candidatos = np.argpartition(-similitudes, k - 1)[:k]
+                else:
+                    candidatos = np.arange(total)
+                posiciones = candidatos[np.argsort(-similitudes[candidatos])]
+                similitudes = similitudes[posiciones]
+
+            resultado['ids'].append([self.ids[p] for p in posiciones])
+            resultado['documents'].append([self.documentos[p] for p in posiciones])
+            resultado['metadatas'].append([self._metadata(p) for p in posiciones])
+            resultado['distances'].append((1.0 - similitudes).tolist())
+
+        return {clave: valor for clave, valor in resultado.items() if clave == 'ids' or clave in include}
+
+    def add(
+        self,
+        embeddings: List[List[float]],
+        documents: List[str],
+        metadatas: List[Dict],
+        ids: List[str]
+    ) -> None:
+        raise NotImplementedError(
+            "El almacén mmap es de solo lectura: regenerarlo con scripts/setup_database.py"
+        )
@@ -0,0 +1,236 @@
+import logging
+from abc import ABC, abstractmethod
+from typing import List, Dict, Optional
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Backends vectoriales soportados
+VECTOR_BACKEND_CHROMA = "chroma"
+VECTOR_BACKEND_NUMPY = "numpy"
+# Almacén en disco mapeado en memoria (ver app/repositories/mmap_store.py)
+VECTOR_BACKEND_MMAP = "mmap"
+
+BACKENDS_VECTORIALES = (VECTOR_BACKEND_CHROMA, VECTOR_BACKEND_NUMPY, VECTOR_BACKEND_MMAP)
+
+
+def validar_backend_vectorial(backend: str) -> str:
+    """
+    Verifica que el backend vectorial sea soportado.
+
+    Raises:
+        ValueError: Si el backend no es soportado
+    """
+    if backend not in BACKENDS_VECTORIALES:
+        raise ValueError(
+            f"Backend vectorial no soportado: '{backend}'. Opciones: {', '.join(BACKENDS_VECTORIALES)}"
+        )
+    return backend
+
+
+class VectorCollection(ABC):
+    """
+    Interfaz mínima de colección vectorial usada por el repositorio.
+
+    Replica el subconjunto de la API de colecciones de ChromaDB que usa la
+    aplicación (`count`, `get`, `query`, `add`), de modo que un backend
+    alternativo puede sustituir a la colección de Chroma sin cambiar a
+    quienes la consumen.
+    """
+
+    @abstractmethod
+    def count(self) -> int:
+        """Número de documentos en la colección."""
+        pass
+
+    @abstractmethod
+    def get(self, ids: Optional[List[str]] = None, include: Optional[List[str]] = None) -> Dict:
+        """Retorna documentos en el formato de `Collection.get` de ChromaDB."""
+        pass
+
+    @abstractmethod
+    def query(
+        self,
+        query_embeddings: List[List[float]],
+        n_results: int = 10,
+        include: Optional[List[str]] = None
+    ) -> Dict:
+        """Retorna los vecinos más cercanos en el formato de `Collection.query`."""
+        pass
+
+    @abstractmethod
+    def add(
+        self,
+        embeddings: List[List[float]],
+        documents: List[str],
+        metadatas: List[Dict],
+        ids: List[str]
+    ) -> None:
+        """Añade documentos a la colección."""
+        pass
+
+
+class NumpyCollection(VectorCollection):
+    """
+    Colección en memoria con búsqueda exacta por similitud coseno.
+
+    Pensada para corpus pequeños como el código de tránsito (unos cientos de
+    artículos): los embeddings se guardan normalizados en una matriz float32
+    contigua y cada consulta se resuelve con un producto matriz-vector y un
+    `argpartition`, sin índices HNSW ni accesos a SQLite. Las distancias
+    devueltas siguen la convención de Chroma con `hnsw:space = cosine`
+    (distancia = 1 - similitud).
+
+    Si se proporciona una colección de respaldo, las inserciones también se
+    escriben en ella para mantener la persistencia en disco.
+    """
+
+    def __init__(self, respaldo=None):
+        """
+        Inicializa una colección vacía.
+
+        Args:
+            respaldo: Colección persistente (ChromaDB) a la que se replican
+                las inserciones (opcional)
+        """
+        self.respaldo = respaldo
+        self.ids: List[str] = []
+        self.documentos = np.empty(0, dtype=object)
+        self.metadatas: List[Dict] = []
+        self.embeddings = np.zeros((0, 0), dtype=np.float32)
+        self._posiciones: Dict[str, int] = {}
+
+    @classmethod
+    def desde_coleccion(cls, coleccion) -> "NumpyCollection":
+        """
+        Carga en memoria todos los documentos y embeddings de una colección.
+
+        Args:
+            coleccion: Colección de ChromaDB (se usa también como respaldo)
+
+        Returns:
+            NumpyCollection con los datos cargados
+        """
+        numpy_collection = cls(respaldo=coleccion)
+        datos = coleccion.get(include=['documents', 'metadatas', 'embeddings'])
+        if datos['ids']:
+            numpy_collection._agregar_en_memoria(
+                datos['embeddings'], datos['documents'], datos['metadatas'], datos['ids']
+            )
+
+        logger.info(f"🧮 Colección cargada en memoria: {numpy_collection.count()} documentos")
+        return numpy_collection
+
+    @staticmethod
+    def _normalizar_filas(matriz: np.ndarray) -> np.ndarray:
+        normas = np.linalg.norm(matriz, axis=1, keepdims=True)
+        normas[normas == 0] = 1.0
+        return matriz / normas
+
+    def _agregar_en_memoria(self, embeddings, documents, metadatas, ids) -> None:
+        nuevos = self._normalizar_filas(np.asarray(embeddings, dtype=np.float32))
+
+        if self.embeddings.size:
+            self.embeddings = np.ascontiguousarray(np.vstack([self.embeddings, nuevos]))
+        else:
+            self.embeddings = np.ascontiguousarray(nuevos)
+
+        nuevos_documentos = np.empty(len(documents), dtype=object)
+        nuevos_documentos[:] = documents
+        self.documentos = np.concatenate([self.documentos, nuevos_documentos])
+
+        for id_documento in ids:
+            self._posiciones[id_documento] = len(self.ids)
+            self.ids.append(id_documento)
+        self.metadatas.extend(metadatas)
+
+    def count(self) -> int:
+        return len(self.ids)
+
+    def get(self, ids: Optional[List[str]] = None, include: Optional[List[str]] = None) -> Dict:
+        include = include or ['documents', 'metadatas']
+
+        if ids is None:
+            posiciones = list(range(len(self.ids)))
+        else:
+            posiciones = [self._posiciones[i] for i in ids if i in self._posiciones]
+
+        resultado = {'ids': [self.ids[p] for p in posiciones]}
+        if 'documents' in include:
+            resultado['documents'] = [self.documentos[p] for p in posiciones]
+        if 'metadatas' in include:
+            resultado['metadatas'] = [self.metadatas[p] for p in posiciones]
+        if 'embeddings' in include:
+            resultado['embeddings'] = self.embeddings[posiciones].tolist()
+        return resultado
+
+    def query(
+        self,
+        query_embeddings: List[List[float]],
+        n_results: int = 10,
+        include: Optional[List[str]] = None
+    ) -> Dict:
+        include = include or ['documents', 'metadatas', 'distances']
+        consultas = self._normalizar_filas(np.asarray(query_embeddings, dtype=np.float32))
+
+        resultado = {'ids': [], 'documents': [], 'metadatas': [], 'distances': []}
+        total = self.count()
+        k = min(n_results, total)
+
+        for consulta in consultas:
+            if k == 0:
+                posiciones = np.empty(0, dtype=np.int64)
+                similitudes = np.empty(0, dtype=np.float32)
+            else:
+                similitudes = self.embeddings @ consulta
+                if k < total:
+                    candidatos = np.argpartition(-similitudes, k - 1)[:k]
+                else:
+                    candidatos = np.arange(total)
+                posiciones = candidatos[np.argsort(-similitudes[candidatos])]
+                similitudes = similitudes[posiciones]
+
+            resultado['ids'].append([self.ids[p] for p in posiciones])
+            resultado['documents'].append(self.documentos[posiciones].tolist())
+            resultado['metadatas'].append([self.metadatas[p] for p in posiciones])
+            resultado['distances'].append((1.0 - similitudes).tolist())
+
+        return {clave: valor for clave, valor in resultado.items() if clave == 'ids' or clave in include}
+
+    def add(
+        self,
+        embeddings: List[List[float]],
+        documents: List[str],
+        metadatas: List[Dict],
+        ids: List[str]
+    ) -> None:
+        if self.respaldo is not None:
+            self.respaldo.add(
+                embeddings=embeddings,
+                documents=documents,
+                metadatas=metadatas,
+                ids=ids
+            )
+        self._agregar_en_memoria(embeddings, documents, metadatas, ids)
+
+
+def crear_coleccion_vectorial(backend: str, coleccion_chroma):
+    """
+    Envuelve la colección de ChromaDB según el backend configurado.
+
+    Args:
+        backend: Nombre del backend ("chroma" o "numpy")
+        coleccion_chroma: Colección persistente de ChromaDB
+
+    Returns:
+        Colección a usar para búsquedas
+
+    Raises:
+        ValueError: Si el backend no es soportado
+    """
+    if backend == VECTOR_BACKEND_CHROMA:
+        return coleccion_chroma
+    if backend == VECTOR_BACKEND_NUMPY:
+        return NumpyCollection.desde_coleccion(coleccion_chroma)
+
+    raise ValueError(f"Backend vectorial no soportado: '{backend}'")
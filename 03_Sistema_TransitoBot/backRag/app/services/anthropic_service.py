@@ -1,12 +1,17 @@
 import os
 import logging
 import json
-from typing import Dict, Optional, List, Any
-from anthropic import Anthropic
+from typing import Dict, Optional, List, Any, Tuple, AsyncIterator
 from app.core.config import settings
+from app.core.concurrency import run_blocking
+from app.core.admission import AdmisionRechazada, PRIORIDAD_FONDO, get_admission_controller
+from app.services.context_builder import ContextBuilder, transcripcion_a_turnos
 
 logger = logging.getLogger(__name__)
 
+# Instrucciones antepuestas al contexto de sistema en el loop con tools
+INSTRUCCIONES_TOOLS = "Genera un correo profesional de máximo 150 tokens. No excedas ese límite \n\n "
+
 
 class AnthropicService:
     """Servicio para generar respuestas usando Anthropic Claude."""
@@ -19,18 +24,118 @@ class AnthropicService:
             api_key: Clave API de Anthropic. Si no se proporciona, se busca en variables de entorno.
         """
         self.api_key = api_key or settings.ANTHROPIC_API_KEY
+        self.context_builder = ContextBuilder(settings.ANTHROPIC_CONTEXT_BUDGET_TOKENS)
+        self.tool_result_builder = ContextBuilder(settings.TOOL_RESULT_BUDGET_TOKENS)
 
         if not self.api_key:
             logger.warning("⚠️ No se encontró ANTHROPIC_API_KEY. El servicio no estará disponible.")
             self.client = None
+            self.async_client = None
         else:
             try:
+                # El SDK se importa solo si hay API key: su import es lento
+                from anthropic import Anthropic, AsyncAnthropic
+
                 logger.info("🔑 Inicializando cliente Anthropic")
-                self.client = Anthropic(api_key='sk-ant-REDACTED')
+                self.client = Anthropic(api_key=self.api_key)
+                self.async_client = AsyncAnthropic(
+                    api_key=self.api_key,
+                    timeout=settings.LLM_TIMEOUT_SECONDS
+                )
                 logger.info(f"✅ Cliente Anthropic inicializado con modelo: {settings.CLAUDE_MODEL}")
             except Exception as e:
                 logger.error(f"❌ Error inicializando Anthropic: {e}")
                 self.client = None
+                self.async_client = None
+
+    @staticmethod
+    def _construir_mensaje_usuario(pregunta: str, entidades: List[dict], intencion: str) -> str:
+        """Construye el mensaje del usuario con pregunta, entidades e intención."""
+        user_message = f"Pregunta: {pregunta}\n"
+        if entidades:
+            user_message += f"Entidades detectadas: {entidades}\n"
+        user_message += f"Intención: {intencion}"
+        return user_message
+
+    def _construir_mensajes(
+        self,
+        system_context: str,
+        user_context: str,
+        pregunta: str,
+        entidades: List[dict],
+        intencion: str,
+        instrucciones: str = ""
+    ) -> Tuple[str, str]:
+        """
+        Construye el mensaje de sistema y el del usuario dentro del presupuesto.
+
+        El contexto del usuario (transcripción "Usuario:/Bot:" enviada por
+        Rasa) se trata como historial: se conservan los turnos más recientes
+        que quepan en ANTHROPIC_CONTEXT_BUDGET_TOKENS.
+
+        Returns:
+            Tupla (system_message, user_message)
+        """
+        contexto = self.context_builder.construir(
+            system=f"{instrucciones}{system_context}",
+            pregunta=self._construir_mensaje_usuario(pregunta, entidades, intencion),
+            turnos=transcripcion_a_turnos(user_context)
+        )
+        historial = "\n".join(turno['content'] for turno in contexto.turnos)
+        system_message = f"{contexto.system}\n\nContexto del usuario: {historial}"
+        return system_message, contexto.pregunta
+
+    def _ajustar_resultado_tool(self, tool_result: Any) -> Any:
+        """Recorta los artículos de un resultado de tool a TOOL_RESULT_BUDGET_TOKENS."""
+        if isinstance(tool_result, dict) and isinstance(tool_result.get("articulos"), list):
+            articulos = self.tool_result_builder.ajustar_articulos(tool_result["articulos"])
+            return {**tool_result, "articulos": articulos}
+        return tool_result
+
+    @staticmethod
+    def _extraer_texto(response) -> str:
+        """Retorna el primer bloque de texto de una respuesta de Claude."""
+        for block in response.content:
+            if hasattr(block, 'type') and block.type == "text":
+                return block.text
+        return ""
+
+    def _ejecutar_tools(self, response, tool_manager) -> List[Dict[str, Any]]:
+        """
+        Ejecuta los bloques tool_use de una respuesta de Claude.
+
+        Las llamadas independientes se ejecutan en paralelo (ver
+        `ToolManager.execute_tools`).
+
+        Args:
+            response: Respuesta de Claude con stop_reason == "tool_use"
+            tool_manager: Instancia de ToolManager
+
+        Returns:
+            Lista de bloques tool_result en el orden de los tool_use
+        """
+        bloques = [
+            block for block in response.content
+            if hasattr(block, 'type') and block.type == "tool_use"
+        ]
+
+        for block in bloques:
+            logger.info(f"   🔨 Tool: {block.name}")
+            logger.info(f"   📝 Input: {block.input}")
+
+        resultados = tool_manager.execute_tools(
+            [(block.name, block.input) for block in bloques]
+        )
+
+        # Agregar resultados (artículos dentro del presupuesto) en el orden de los tool_use
+        return [
+            {
+                "type": "tool_result",
+                "tool_use_id": block.id,
+                "content": json.dumps(self._ajustar_resultado_tool(tool_result), ensure_ascii=False)
+            }
+            for block, tool_result in zip(bloques, resultados)
+        ]
 
     def chat_with_context(
         self,
@@ -68,14 +173,10 @@ class AnthropicService:
             logger.info(f"   Pregunta: {pregunta[:100]}...")
             logger.info(f"   Entidades: {len(entidades)} detectadas")
 
-            # Construir mensaje del sistema completo
-            system_message = f"{system_context}\n\nContexto del usuario: {user_context}"
-
-            # Construir mensaje del usuario con metadatos
-            user_message = f"Pregunta: {pregunta}\n"
-            if entidades:
-                user_message += f"Entidades detectadas: {entidades}\n"
-            user_message += f"Intención: {intencion}"
+            # Construir mensajes de sistema y usuario dentro del presupuesto de tokens
+            system_message, user_message = self._construir_mensajes(
+                system_context, user_context, pregunta, entidades, intencion
+            )
 
             response = self.client.messages.create(
                 model='claude-haiku-4-5',
@@ -153,16 +254,12 @@ class AnthropicService:
             logger.info(f"   Intención: {intencion}")
             logger.info(f"   Pregunta: {pregunta[:100]}...")
 
-            # Construir mensaje del sistema completo
-            system_message = f"Genera un correo profesional de máximo 150 tokens. No excedas ese límite \n\n {system_context}\n\nContexto del usuario: {user_context}"
-            logger.info("///////"*50)
+            # Construir mensajes de sistema y usuario dentro del presupuesto de tokens
+            system_message, user_message = self._construir_mensajes(
+                system_context, user_context, pregunta, entidades, intencion,
+                instrucciones=INSTRUCCIONES_TOOLS
+            )
             logger.info(f"     system_message : {  system_message }...")
-            logger.info("///////"*50)
-            # Construir mensaje del usuario con metadatos
-            user_message = f"Pregunta: {pregunta}\n"
-            if entidades:
-                user_message += f"Entidades detectadas: {entidades}\n"
-            user_message += f"Intención: {intencion}"
 
             # Inicializar conversación
             messages = [{"role": "user", "content": user_message}]
@@ -187,11 +284,7 @@ class AnthropicService:
                 if response.stop_reason == "end_turn":
                     # Claude terminó sin usar tools
                     # Buscar el texto en los content blocks
-                    text_response = ""
-                    for block in response.content:
-                        if hasattr(block, 'type') and block.type == "text":
-                            text_response = block.text
-                            break
+                    text_response = self._extraer_texto(response)
 
                     logger.info(f"✅ Respuesta final generada sin tools (iteración {iteration + 1})")
                     return text_response
@@ -207,37 +300,7 @@ class AnthropicService:
                     })
 
                     # Procesar cada tool_use en la respuesta
-                    tool_results = []
-                    for block in response.content:
-                        if hasattr(block, 'type') and block.type == "tool_use":
-                            tool_name = block.name
-                            tool_input = block.input
-                            tool_use_id = block.id
-
-                            logger.info(f"   🔨 Tool: {tool_name}")
-                            logger.info(f"   📝 Input: {tool_input}")
-
-                            # Ejecutar tool
-                            try:
-                                tool_result = tool_manager.execute_tool(
-                                    tool_name=tool_name,
-                                    tool_input=tool_input
-                                )
-                                logger.info(f"   ✅ Tool ejecutado exitosamente")
-
-                            except Exception as e:
-                                logger.error(f"   ❌ Error ejecutando tool: {e}")
-                                tool_result = {
-                                    "success": False,
-                                    "error": str(e)
-                                }
-
-                            # Agregar resultado a la lista
-                            tool_results.append({
-                                "type": "tool_result",
-                                "tool_use_id": tool_use_id,
-                                "content": json.dumps(tool_result, ensure_ascii=False)
-                            })
+                    tool_results = self._ejecutar_tools(response, tool_manager)
 
                     # Agregar tool_results a messages
                     messages.append({
@@ -250,11 +313,7 @@ class AnthropicService:
                 elif response.stop_reason == "max_tokens":
                     logger.warning(f"⚠️ Se alcanzó el límite de tokens")
                     # Intentar extraer texto de la respuesta
-                    text_response = ""
-                    for block in response.content:
-                        if hasattr(block, 'type') and block.type == "text":
-                            text_response = block.text
-                            break
+                    text_response = self._extraer_texto(response)
 
                     if text_response:
                         return text_response
@@ -272,3 +331,339 @@ class AnthropicService:
         except Exception as e:
             logger.error(f"❌ Error generando respuesta con tools: {e}")
             raise Exception(f"Error al procesar la solicitud con tools: {str(e)}")
+
+    async def chat_with_context_async(
+        self,
+        system_context: str,
+        user_context: str,
+        pregunta: str,
+        entidades: List[dict],
+        intencion: str
+    ) -> str:
+        """
+        Versión asíncrona de `chat_with_context`.
+
+        Usa el cliente AsyncAnthropic para no bloquear el event loop mientras
+        se espera a Claude. La llamada pasa por el control de admisión
+        (prioridad interactiva).
+
+        Raises:
+            ValueError: Si el servicio no está disponible
+            AdmisionRechazada: Si la llamada no obtuvo turno a tiempo
+            Exception: Si hay un error en la generación
+        """
+        if not self.async_client:
+            raise ValueError("El servicio Anthropic no está disponible. Verifica la configuración de la API key.")
+
+        try:
+            logger.info(f"📤 Enviando consulta a Anthropic Claude (async)")
+            logger.info(f"   Intención: {intencion}")
+            logger.info(f"   Pregunta: {pregunta[:100]}...")
+
+            system_message, user_message = self._construir_mensajes(
+                system_context, user_context, pregunta, entidades, intencion
+            )
+
+            async with get_admission_controller().admitir():
+                response = await self.async_client.messages.create(
+                    model='claude-haiku-4-5',
+                    max_tokens=settings.CLAUDE_MAX_TOKENS,
+                    temperature=settings.CLAUDE_TEMPERATURE,
+                    system=system_message,
+                    messages=[
+                        {"role": "user", "content": user_message}
+                    ]
+                )
+
+            answer = response.content[0].text
+            logger.info(f"✅ Respuesta generada exitosamente: {len(answer)} caracteres")
+
+            return answer
+
+        except AdmisionRechazada:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Error generando respuesta con Anthropic: {e}")
+            raise Exception(f"Error al procesar la solicitud: {str(e)}")
+
+    async def chat_with_messages_async(
+        self,
+        system: str,
+        messages: List[dict],
+        max_tokens: int,
+        temperature: float
+    ) -> str:
+        """
+        Genera una respuesta para un prompt ya armado (usado por /query a
+        través del gateway). Pasa por el control de admisión.
+
+        Args:
+            system: Instrucciones del sistema (puede ser vacío)
+            messages: Mensajes user/assistant en formato Anthropic
+            max_tokens: Tokens máximos de la respuesta
+            temperature: Temperatura de generación
+
+        Raises:
+            ValueError: Si el servicio no está disponible
+            AdmisionRechazada: Si la llamada no obtuvo turno a tiempo
+            Exception: Si hay un error en la generación
+        """
+        if not self.async_client:
+            raise ValueError("El servicio Anthropic no está disponible. Verifica la configuración de la API key.")
+
+        parametros = dict(model='claude-haiku-4-5', max_tokens=max_tokens, temperature=temperature, messages=messages)
+        if system:
+            parametros["system"] = system
+
+        try:
+            async with get_admission_controller().admitir():
+                response = await self.async_client.messages.create(**parametros)
+
+            return response.content[0].text
+
+        except AdmisionRechazada:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Error generando respuesta con Anthropic: {e}")
+            raise Exception(f"Error al procesar la solicitud: {str(e)}")
+
+    async def chat_with_tools_async(
+        self,
+        system_context: str,
+        user_context: str,
+        pregunta: str,
+        entidades: List[dict],
+        intencion: str,
+        tools: List[Dict[str, Any]],
+        tool_manager,
+        max_iterations: int = 5
+    ) -> str:
+        """
+        Versión asíncrona de `chat_with_tools`.
+
+        Las llamadas a Claude usan AsyncAnthropic y la ejecución de tools
+        (búsqueda, email) se delega al pool de hilos acotado.
+
+        Raises:
+            ValueError: Si el servicio no está disponible
+            AdmisionRechazada: Si la llamada no obtuvo turno a tiempo
+            Exception: Si hay un error en la generación
+        """
+        if not self.async_client:
+            raise ValueError("El servicio Anthropic no está disponible. Verifica la configuración de la API key.")
+
+        try:
+            logger.info(f"🔧 Iniciando chat con tools habilitados (async)")
+            logger.info(f"   Tools disponibles: {[tool['name'] for tool in tools]}")
+            logger.info(f"   Intención: {intencion}")
+
+            system_message, user_message = self._construir_mensajes(
+                system_context, user_context, pregunta, entidades, intencion,
+                instrucciones=INSTRUCCIONES_TOOLS
+            )
+            messages = [{"role": "user", "content": user_message}]
+
+            for iteration in range(max_iterations):
+                logger.info(f"🔄 Iteración {iteration + 1}/{max_iterations}")
+
+                # Tras ejecutar tools (p. ej. un email encolado) el flujo ya no
+                # se descarta: las iteraciones siguientes esperan su turno
+                async with get_admission_controller().admitir(PRIORIDAD_FONDO, obligatoria=iteration > 0):
+                    response = await self.async_client.messages.create(
+                        model='claude-haiku-4-5',
+                        max_tokens=settings.CLAUDE_MAX_TOKENS,
+                        temperature=settings.CLAUDE_TEMPERATURE,
+                        system=system_message,
+                        messages=messages,
+                        tools=tools
+                    )
+
+                logger.info(f"📥 Stop reason: {response.stop_reason}")
+
+                if response.stop_reason == "end_turn":
+                    logger.info(f"✅ Respuesta final generada sin tools (iteración {iteration + 1})")
+                    return self._extraer_texto(response)
+
+                elif response.stop_reason == "tool_use":
+                    messages.append({
+                        "role": "assistant",
+                        "content": response.content
+                    })
+
+                    tool_results = await run_blocking(self._ejecutar_tools, response, tool_manager)
+
+                    messages.append({
+                        "role": "user",
+                        "content": tool_results
+                    })
+
+                elif response.stop_reason == "max_tokens":
+                    logger.warning(f"⚠️ Se alcanzó el límite de tokens")
+                    text_response = self._extraer_texto(response)
+
+                    if text_response:
+                        return text_response
+                    else:
+                        return "Lo siento, la respuesta fue muy larga. Por favor, intenta con una pregunta más específica."
+
+                else:
+                    logger.warning(f"⚠️ Stop reason inesperado: {response.stop_reason}")
+                    break
+
+            logger.warning(f"⚠️ Se alcanzó el máximo de iteraciones ({max_iterations})")
+            return "Lo siento, no pude procesar tu consulta completamente. Por favor, intenta reformularla."
+
+        except AdmisionRechazada:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Error generando respuesta con tools: {e}")
+            raise Exception(f"Error al procesar la solicitud con tools: {str(e)}")
+
+    async def chat_with_context_stream(
+        self,
+        system_context: str,
+        user_context: str,
+        pregunta: str,
+        entidades: List[dict],
+        intencion: str
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Versión en streaming de `chat_with_context_async`.
+
+        Yields:
+            Tuplas (evento, datos) con evento "token" y datos {"text": ...}
+
+        Raises:
+            ValueError: Si el servicio no está disponible
+            AdmisionRechazada: Si la llamada no obtuvo turno a tiempo
+            Exception: Si hay un error en la generación
+        """
+        if not self.async_client:
+            raise ValueError("El servicio Anthropic no está disponible. Verifica la configuración de la API key.")
+
+        try:
+            logger.info(f"📤 Enviando consulta a Anthropic Claude (stream)")
+            logger.info(f"   Intención: {intencion}")
+            logger.info(f"   Pregunta: {pregunta[:100]}...")
+
+            system_message, user_message = self._construir_mensajes(
+                system_context, user_context, pregunta, entidades, intencion
+            )
+
+            async with get_admission_controller().admitir():
+                async with self.async_client.messages.stream(
+                    model='claude-haiku-4-5',
+                    max_tokens=settings.CLAUDE_MAX_TOKENS,
+                    temperature=settings.CLAUDE_TEMPERATURE,
+                    system=system_message,
+                    messages=[
+                        {"role": "user", "content": user_message}
+                    ]
+                ) as stream:
+                    async for texto in stream.text_stream:
+                        yield "token", {"text": texto}
+
+        except AdmisionRechazada:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Error generando respuesta con Anthropic: {e}")
+            raise Exception(f"Error al procesar la solicitud: {str(e)}")
+
+    async def chat_with_tools_stream(
+        self,
+        system_context: str,
+        user_context: str,
+        pregunta: str,
+        entidades: List[dict],
+        intencion: str,
+        tools: List[Dict[str, Any]],
+        tool_manager,
+        max_iterations: int = 5
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Versión en streaming de `chat_with_tools_async`.
+
+        El texto de cada iteración se emite a medida que llega. Cuando Claude
+        pide tools se emite un evento "tool" con sus nombres antes de
+        ejecutarlos y continuar el loop.
+
+        Yields:
+            Tuplas (evento, datos): ("token", {"text"}) o ("tool", {"tools"})
+
+        Raises:
+            ValueError: Si el servicio no está disponible
+            AdmisionRechazada: Si la llamada no obtuvo turno a tiempo
+            Exception: Si hay un error en la generación
+        """
+        if not self.async_client:
+            raise ValueError("El servicio Anthropic no está disponible. Verifica la configuración de la API key.")
+
+        try:
+            logger.info(f"🔧 Iniciando chat con tools habilitados (stream)")
+            logger.info(f"   Tools disponibles: {[tool['name'] for tool in tools]}")
+            logger.info(f"   Intención: {intencion}")
+
+            system_message, user_message = self._construir_mensajes(
+                system_context, user_context, pregunta, entidades, intencion,
+                instrucciones=INSTRUCCIONES_TOOLS
+            )
+            messages = [{"role": "user", "content": user_message}]
+
+            for iteration in range(max_iterations):
+                logger.info(f"🔄 Iteración {iteration + 1}/{max_iterations}")
+
+                emitido = False
+                async with get_admission_controller().admitir(PRIORIDAD_FONDO, obligatoria=iteration > 0):
+                    async with self.async_client.messages.stream(
+                        model='claude-haiku-4-5',
+                        max_tokens=settings.CLAUDE_MAX_TOKENS,
+                        temperature=settings.CLAUDE_TEMPERATURE,
+                        system=system_message,
+                        messages=messages,
+                        tools=tools
+                    ) as stream:
+                        async for texto in stream.text_stream:
+                            emitido = True
+                            yield "token", {"text": texto}
+                        response = await stream.get_final_message()
+
+                logger.info(f"📥 Stop reason: {response.stop_reason}")
+
+                if response.stop_reason == "end_turn":
+                    logger.info(f"✅ Respuesta final generada (iteración {iteration + 1})")
+                    return
+
+                elif response.stop_reason == "tool_use":
+                    nombres = [block.name for block in response.content if block.type == "tool_use"]
+                    yield "tool", {"tools": nombres}
+
+                    messages.append({
+                        "role": "assistant",
+                        "content": response.content
+                    })
+
+                    tool_results = await run_blocking(self._ejecutar_tools, response, tool_manager)
+
+                    messages.append({
+                        "role": "user",
+                        "content": tool_results
+                    })
+
+                elif response.stop_reason == "max_tokens":
+                    logger.warning(f"⚠️ Se alcanzó el límite de tokens")
+                    if not emitido:
+                        yield "token", {"text": "Lo siento, la respuesta fue muy larga. Por favor, intenta con una pregunta más específica."}
+                    return
+
+                else:
+                    logger.warning(f"⚠️ Stop reason inesperado: {response.stop_reason}")
+                    break
+
+            logger.warning(f"⚠️ Se alcanzó el máximo de iteraciones ({max_iterations})")
+            yield "token", {"text": "Lo siento, no pude procesar tu consulta completamente. Por favor, intenta reformularla."}
+
+        except AdmisionRechazada:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Error generando respuesta con tools: {e}")
+            raise Exception(f"Error al procesar la solicitud con tools: {str(e)}")
@@ -0,0 +1,130 @@
+import logging
+import re
+from typing import List, Dict, Optional, Tuple
+from app.utils.text_normalization import quitar_tildes, tokenizar
+
+logger = logging.getLogger(__name__)
+
+# Mismos encabezados que `ProcesadorCodigoTransito._segmentar_por_articulos`
+# ("Artículo 123°", "ARTÍCULO 123.", "Art. 123"), aplicados sobre el texto
+# sin tildes y ampliados a listas ("artículos 131 y 135", "arts. 2, 3").
+_PATRON_REFERENCIA = re.compile(
+    r'\bart(?:iculos?\b|s?\.)\s*(?:n(?:o|ro|um)?\.?\s*)?'
+    r'(\d+[°º]?(?:\s*(?:,|y|e|o)\s*\d+[°º]?)*)\.?',
+    re.IGNORECASE
+)
+_PATRON_NUMERO = re.compile(r'\d+')
+
+# Palabras que acompañan a la referencia sin aportar al tema de la consulta
+_PALABRAS_RELLENO = frozenset({
+    'dice', 'decir', 'establece', 'explica', 'explicame', 'significa',
+    'contenido', 'texto', 'consiste', 'trata', 'habla', 'cita', 'codigo',
+    'transito', 'ley', 'nacional', 'numero', 'muestrame', 'leer', 'completo'
+})
+
+
+def normalizar_numero(numero: str) -> str:
+    """Reduce un número de artículo ('131°', '131.') a sus dígitos."""
+    return ''.join(_PATRON_NUMERO.findall(str(numero)))
+
+
+class ArticleLookup:
+    """
+    Resolución directa de referencias explícitas a artículos.
+
+    Mantiene en memoria un índice numero_articulo -> documento y reconoce
+    en la consulta menciones como "qué dice el artículo 131" o "art. 152",
+    que se resuelven sin pasar por embeddings ni búsqueda vectorial.
+    """
+
+    def __init__(self):
+        self._articulos: Dict[str, Dict] = {}
+
+    def construir(
+        self,
+        documentos: List[str],
+        metadatas: List[Dict],
+        ids: Optional[List[str]] = None
+    ) -> None:
+        """
+        (Re)construye el índice por número de artículo.
+
+        Args:
+            documentos: Textos de los artículos
+            metadatas: Metadatos de cada artículo (con 'numero_articulo')
+            ids: IDs de los artículos (opcional)
+        """
+        articulos = {}
+        for posicion, (documento, metadata) in enumerate(zip(documentos, metadatas)):
+            numero = normalizar_numero((metadata or {}).get('numero_articulo', ''))
+            if numero and numero not in articulos:
+                articulos[numero] = {
+                    'id': ids[posicion] if ids else f"articulo_{numero}",
+                    'documento': documento,
+                    'metadata': metadata
+                }
+
+        self._articulos = articulos
+        logger.info(f"🔢 Índice por número de artículo construido: {len(articulos)} artículos")
+
+    @property
+    def total_articulos(self) -> int:
+        return len(self._articulos)
+
+    def analizar(self, consulta: str) -> Tuple[List[str], str]:
+        """
+        Extrae las referencias a artículos de la consulta.
+
+        Args:
+            consulta: Query del usuario
+
+        Returns:
+            Tupla (números referenciados en orden de aparición, resto de la
+            consulta sin las referencias)
+        """
+        texto = quitar_tildes(consulta)
+        # Sin ligaduras la posición de cada carácter se conserva y el resto
+        # puede recortarse de la consulta original (con tildes)
+        original = consulta if len(texto) == len(consulta) else texto
+        numeros = []
+        partes = []
+        cursor = 0
+
+        for match in _PATRON_REFERENCIA.finditer(texto):
+            for numero in _PATRON_NUMERO.findall(match.group(1)):
+                numero = str(int(numero))
+                if numero not in numeros:
+                    numeros.append(numero)
+            partes.append(original[cursor:match.start()])
+            cursor = match.end()
+
+        partes.append(original[cursor:])
+        resto = ' '.join(' '.join(partes).split())
+        return numeros, resto
+
+    @staticmethod
+    def tiene_tema(texto: str) -> bool:
+        """Indica si el texto conserva términos útiles para una búsqueda semántica."""
+        return any(token not in _PALABRAS_RELLENO for token in tokenizar(texto))
+
+    def resolver(self, numeros: List[str]) -> List[Dict]:
+        """
+        Obtiene los artículos referenciados que existen en el índice.
+
+        Args:
+            numeros: Números de artículo normalizados
+
+        Returns:
+            Lista de artículos con similitud 1.0 en el orden solicitado
+        """
+        encontrados = []
+        for numero in numeros:
+            articulo = self._articulos.get(numero)
+            if articulo is not None:
+                encontrados.append({
+                    **articulo,
+                    'similitud': 1.0,
+                    'tipo': 'referencia',
+                    'ranking': len(encontrados) + 1
+                })
+        return encontrados
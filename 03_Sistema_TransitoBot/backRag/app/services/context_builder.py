@@ -0,0 +1,263 @@
+import logging
+import math
+import re
+from dataclasses import dataclass, field
+from typing import List, Dict, Any
+
+logger = logging.getLogger(__name__)
+
+# Palabras y signos de puntuación, como aproximación local al tokenizer
+_PATRON_PIEZA = re.compile(r"\w+|[^\w\s]")
+# Fin de oración (o de línea) donde se puede recortar sin cortar una frase
+_PATRON_ORACION = re.compile(r"(?<=[.;:!?])\s+|\n+")
+# Caracteres por token en palabras largas (tokenizers BPE en español)
+CARACTERES_POR_TOKEN = 4
+MARCA_RECORTE = " [...]"
+
+
+def contar_tokens(texto: str) -> int:
+    """
+    Aproxima el número de tokens de un texto sin llamar a la API.
+
+    Cada signo de puntuación cuenta como un token y cada palabra como
+    ceil(longitud / 4), lo que sobreestima ligeramente a los tokenizers
+    BPE para texto en español.
+
+    Args:
+        texto: Texto a medir
+
+    Returns:
+        Número aproximado de tokens
+    """
+    if not texto:
+        return 0
+    return sum(
+        math.ceil(len(pieza) / CARACTERES_POR_TOKEN) if pieza[0].isalnum() or pieza[0] == '_' else 1
+        for pieza in _PATRON_PIEZA.findall(texto)
+    )
+
+
+def recortar_a_tokens(texto: str, max_tokens: int) -> str:
+    """
+    Recorta un texto al presupuesto respetando los límites de oración.
+
+    Se conservan las oraciones iniciales completas que quepan. Si ni la
+    primera cabe, se recorta por palabras.
+
+    Args:
+        texto: Texto original
+        max_tokens: Tokens máximos
+
+    Returns:
+        Texto recortado (con marca de recorte si se eliminó contenido)
+    """
+    if max_tokens <= 0:
+        return ""
+    if contar_tokens(texto) <= max_tokens:
+        return texto
+
+    disponible = max_tokens - contar_tokens(MARCA_RECORTE)
+    if disponible <= 0:
+        return ""
+
+    fin = 0
+    usados = 0
+    for match in _PATRON_ORACION.finditer(texto + "\n"):
+        oracion = texto[fin:match.start()]
+        costo = contar_tokens(oracion)
+        if usados + costo > disponible:
+            break
+        usados += costo
+        fin = match.end()
+
+    if fin:
+        return texto[:fin].rstrip() + MARCA_RECORTE
+
+    # La primera oración no cabe: recortar por palabras
+    palabras = []
+    for palabra in texto.split():
+        costo = contar_tokens(palabra)
+        if usados + costo > disponible:
+            break
+        palabras.append(palabra)
+        usados += costo
+
+    return (' '.join(palabras) + MARCA_RECORTE) if palabras else ""
+
+
+@dataclass
+class ContextoConstruido:
+    """Resultado del ensamblado de contexto."""
+    system: str
+    pregunta: str
+    fragmentos: List[str]
+    turnos: List[Dict[str, Any]]
+    presupuesto: int
+    tokens_por_seccion: Dict[str, int] = field(default_factory=dict)
+    fragmentos_descartados: int = 0
+    turnos_descartados: int = 0
+
+    @property
+    def tokens_usados(self) -> int:
+        return sum(self.tokens_por_seccion.values())
+
+
+class ContextBuilder:
+    """
+    Ensambla el contexto de una llamada al LLM dentro de un presupuesto de tokens.
+
+    Prioridad: prompt de sistema, pregunta, fragmentos mejor rankeados,
+    turnos recientes y, por último, turnos antiguos. Lo que no cabe se
+    recorta en límites de oración o se descarta.
+    """
+
+    def __init__(self, presupuesto_tokens: int):
+        """
+        Inicializa el constructor.
+
+        Args:
+            presupuesto_tokens: Tokens máximos de entrada por llamada
+        """
+        self.presupuesto_tokens = presupuesto_tokens
+
+    def construir(
+        self,
+        system: str = "",
+        pregunta: str = "",
+        fragmentos: List[str] = (),
+        turnos: List[Dict[str, Any]] = ()
+    ) -> ContextoConstruido:
+        """
+        Selecciona y recorta las piezas del contexto.
+
+        Args:
+            system: Prompt de sistema
+            pregunta: Mensaje actual del usuario (siempre se incluye)
+            fragmentos: Fragmentos recuperados, del más al menos relevante
+            turnos: Mensajes previos {"role", "content"} en orden cronológico
+
+        Returns:
+            ContextoConstruido con las piezas seleccionadas y el conteo de tokens
+        """
+        restante = self.presupuesto_tokens
+
+        system = recortar_a_tokens(system, restante)
+        tokens_system = contar_tokens(system)
+        restante -= tokens_system
+
+        pregunta = recortar_a_tokens(pregunta, restante)
+        tokens_pregunta = contar_tokens(pregunta)
+        restante -= tokens_pregunta
+
+        # Fragmentos en orden de ranking
+        seleccionados = []
+        tokens_fragmentos = 0
+        for fragmento in fragmentos:
+            recortado = recortar_a_tokens(fragmento, restante)
+            if not recortado:
+                break
+            costo = contar_tokens(recortado)
+            seleccionados.append(recortado)
+            tokens_fragmentos += costo
+            restante -= costo
+
+        # Turnos del más reciente al más antiguo
+        turnos_seleccionados = []
+        tokens_turnos = 0
+        for turno in reversed(list(turnos)):
+            contenido = turno.get('content', '')
+            if not isinstance(contenido, str):
+                continue
+            recortado = recortar_a_tokens(contenido, restante)
+            if not recortado:
+                break
+            costo = contar_tokens(recortado)
+            turnos_seleccionados.insert(0, {**turno, 'content': recortado})
+            tokens_turnos += costo
+            restante -= costo
+
+        # La API de mensajes exige empezar con un mensaje del usuario
+        while turnos_seleccionados and turnos_seleccionados[0].get('role') == 'assistant':
+            tokens_turnos -= contar_tokens(turnos_seleccionados.pop(0)['content'])
+
+        contexto = ContextoConstruido(
+            system=system,
+            pregunta=pregunta,
+            fragmentos=seleccionados,
+            turnos=turnos_seleccionados,
+            presupuesto=self.presupuesto_tokens,
+            tokens_por_seccion={
+                'system': tokens_system,
+                'pregunta': tokens_pregunta,
+                'fragmentos': tokens_fragmentos,
+                'historial': tokens_turnos
+            },
+            fragmentos_descartados=len(fragmentos) - len(seleccionados),
+            turnos_descartados=len(turnos) - len(turnos_seleccionados)
+        )
+
+        logger.info(
+            f"🧮 Contexto: {contexto.tokens_usados}/{self.presupuesto_tokens} tokens "
+            f"{contexto.tokens_por_seccion} "
+            f"(descartados: {contexto.fragmentos_descartados} fragmentos, "
+            f"{contexto.turnos_descartados} turnos)"
+        )
+
+        return contexto
+
+    def ajustar_articulos(
+        self,
+        articulos: List[Dict[str, Any]],
+        clave_contenido: str = 'contenido'
+    ) -> List[Dict[str, Any]]:
+        """
+        Reparte el presupuesto entre artículos (p. ej. resultados de un tool).
+
+        Los artículos se procesan en orden de ranking; cada uno se recorta en
+        límites de oración y los que ya no caben se descartan.
+
+        Args:
+            articulos: Artículos del más al menos relevante
+            clave_contenido: Clave del texto a recortar
+
+        Returns:
+            Lista de artículos con el contenido ajustado
+        """
+        restante = self.presupuesto_tokens
+        ajustados = []
+
+        for articulo in articulos:
+            texto = articulo.get(clave_contenido) or ""
+            otros = contar_tokens(str({k: v for k, v in articulo.items() if k != clave_contenido}))
+            recortado = recortar_a_tokens(texto, restante - otros)
+            if texto and not recortado:
+                break
+            ajustados.append({**articulo, clave_contenido: recortado})
+            restante -= otros + contar_tokens(recortado)
+
+        return ajustados
+
+
+def transcripcion_a_turnos(transcripcion: str) -> List[Dict[str, Any]]:
+    """
+    Convierte una transcripción "Usuario: ... / Bot: ..." en turnos.
+
+    Las líneas que no empiezan con un prefijo se agregan al turno anterior.
+
+    Args:
+        transcripcion: Historial en texto, en orden cronológico
+
+    Returns:
+        Lista de turnos {"role", "content"} (el contenido conserva el prefijo)
+    """
+    turnos = []
+    for linea in (transcripcion or "").split('\n'):
+        if linea.startswith('Usuario:'):
+            turnos.append({'role': 'user', 'content': linea})
+        elif linea.startswith('Bot:'):
+            turnos.append({'role': 'assistant', 'content': linea})
+        elif turnos:
+            turnos[-1]['content'] += '\n' + linea
+        elif linea.strip():
+            turnos.append({'role': 'user', 'content': linea})
+    return turnos
@@ -0,0 +1,220 @@
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from typing import List, Dict
+
+logger = logging.getLogger(__name__)
+
+# Backends de memoria de conversación soportados
+MEMORY_BACKEND_IN_MEMORY = "memory"
+
+
+class ConversationMemory(ABC):
+    """
+    Interfaz de la memoria de conversación por usuario (sender_id).
+
+    Cada sesión guarda los últimos mensajes en el formato de la API de
+    mensajes ({"role": ..., "content": ...}). Un almacén compartido entre
+    réplicas (p. ej. Redis) debe implementar esta misma interfaz.
+    """
+
+    @abstractmethod
+    def obtener(self, sender_id: str) -> List[Dict[str, str]]:
+        """
+        Obtiene la ventana de mensajes de la sesión.
+
+        Args:
+            sender_id: Identificador del usuario
+
+        Returns:
+            Lista de mensajes (vacía si la sesión no existe o expiró),
+            empezando siempre por un mensaje del usuario
+        """
+        pass
+
+    @abstractmethod
+    def registrar_intercambio(self, sender_id: str, pregunta: str, respuesta: str) -> None:
+        """
+        Agrega una pregunta del usuario y la respuesta del asistente.
+
+        Args:
+            sender_id: Identificador del usuario
+            pregunta: Mensaje del usuario
+            respuesta: Respuesta generada
+        """
+        pass
+
+    @abstractmethod
+    def limpiar(self, sender_id: str) -> None:
+        """Elimina la sesión de un usuario."""
+        pass
+
+    @abstractmethod
+    def get_stats(self) -> Dict:
+        """Obtiene estadísticas de la memoria."""
+        pass
+
+
+class _Sesion:
+    """Mensajes de un usuario con su tamaño acumulado y último acceso."""
+
+    __slots__ = ('mensajes', 'caracteres', 'ultimo_acceso')
+
+    def __init__(self, ventana: int):
+        self.mensajes: deque = deque(maxlen=ventana)
+        self.caracteres = 0
+        self.ultimo_acceso = time.monotonic()
+
+
+class InMemoryConversationMemory(ConversationMemory):
+    """
+    Memoria de conversación acotada en el proceso.
+
+    - Ventana: cada sesión conserva los últimos `ventana_mensajes` mensajes.
+    - TTL: las sesiones sin actividad durante `ttl_segundos` expiran.
+    - LRU: si se supera `max_sesiones` o el total de caracteres
+      `max_caracteres`, se desalojan las sesiones menos recientes.
+    """
+
+    def __init__(
+        self,
+        ventana_mensajes: int = 6,
+        ttl_segundos: int = 1800,
+        max_sesiones: int = 10000,
+        max_caracteres: int = 5_000_000
+    ):
+        """
+        Inicializa la memoria.
+
+        Args:
+            ventana_mensajes: Mensajes conservados por sesión
+            ttl_segundos: Inactividad máxima antes de expirar una sesión
+            max_sesiones: Número máximo de sesiones
+            max_caracteres: Tope global de caracteres almacenados
+        """
+        self.ventana_mensajes = ventana_mensajes
+        self.ttl_segundos = ttl_segundos
+        self.max_sesiones = max_sesiones
+        self.max_caracteres = max_caracteres
+
+        self._sesiones: "OrderedDict[str, _Sesion]" = OrderedDict()
+        self._caracteres = 0
+        self._lock = threading.Lock()
+
+        # Métricas
+        self.aciertos = 0
+        self.fallos = 0
+        self.expiradas = 0
+        self.desalojadas = 0
+
+    def _expirada(self, sesion: _Sesion, ahora: float) -> bool:
+        return ahora - sesion.ultimo_acceso > self.ttl_segundos
+
+    def _eliminar(self, sender_id: str) -> None:
+        sesion = self._sesiones.pop(sender_id, None)
+        if sesion is not None:
+            self._caracteres -= sesion.caracteres
+
+    def _purgar(self, ahora: float) -> None:
+        """Elimina sesiones expiradas y aplica los topes (las más antiguas van primero)."""
+        while self._sesiones:
+            sender_id, sesion = next(iter(self._sesiones.items()))
+            if self._expirada(sesion, ahora):
+                self.expiradas += 1
+            elif len(self._sesiones) > self.max_sesiones or self._caracteres > self.max_caracteres:
+                self.desalojadas += 1
+            else:
+                break
+            self._eliminar(sender_id)
+
+    def obtener(self, sender_id: str) -> List[Dict[str, str]]:
+        ahora = time.monotonic()
+
+        with self._lock:
+            sesion = self._sesiones.get(sender_id)
+            if sesion is not None and self._expirada(sesion, ahora):
+                self._eliminar(sender_id)
+                self.expiradas += 1
+                sesion = None
+
+            if sesion is None:
+                self.fallos += 1
+                return []
+
+            self.aciertos += 1
+            sesion.ultimo_acceso = ahora
+            self._sesiones.move_to_end(sender_id)
+            mensajes = list(sesion.mensajes)
+
+        # La API exige que la conversación empiece con un mensaje del usuario
+        while mensajes and mensajes[0]['role'] != 'user':
+            mensajes.pop(0)
+
+        return mensajes
+
+    def registrar_intercambio(self, sender_id: str, pregunta: str, respuesta: str) -> None:
+        ahora = time.monotonic()
+
+        with self._lock:
+            sesion = self._sesiones.get(sender_id)
+            if sesion is None or self._expirada(sesion, ahora):
+                self._eliminar(sender_id)
+                sesion = _Sesion(self.ventana_mensajes)
+                self._sesiones[sender_id] = sesion
+
+            for rol, contenido in (('user', pregunta), ('assistant', respuesta)):
+                if len(sesion.mensajes) == sesion.mensajes.maxlen:
+                    descartado = sesion.mensajes[0]['content']
+                    sesion.caracteres -= len(descartado)
+                    self._caracteres -= len(descartado)
+                sesion.mensajes.append({'role': rol, 'content': contenido})
+                sesion.caracteres += len(contenido)
+                self._caracteres += len(contenido)
+
+            sesion.ultimo_acceso = ahora
+            self._sesiones.move_to_end(sender_id)
+            self._purgar(ahora)
+
+    def limpiar(self, sender_id: str) -> None:
+        with self._lock:
+            self._eliminar(sender_id)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                'backend': MEMORY_BACKEND_IN_MEMORY,
+                'sesiones': len(self._sesiones),
+                'max_sesiones': self.max_sesiones,
+                'caracteres': self._caracteres,
+                'max_caracteres': self.max_caracteres,
+                'ventana_mensajes': self.ventana_mensajes,
+                'ttl_segundos': self.ttl_segundos,
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'tasa_aciertos': (self.aciertos / consultas) if consultas else 0.0,
+                'expiradas': self.expiradas,
+                'desalojadas': self.desalojadas
+            }
+
+
+def crear_memoria_conversacion(backend: str, **kwargs) -> ConversationMemory:
+    """
+    Crea la memoria de conversación configurada.
+
+    Args:
+        backend: Backend de memoria ("memory")
+        **kwargs: Parámetros de la implementación
+
+    Returns:
+        ConversationMemory inicializada
+
+    Raises:
+        ValueError: Si el backend no es soportado
+    """
+    if backend == MEMORY_BACKEND_IN_MEMORY:
+        return InMemoryConversationMemory(**kwargs)
+
+    raise ValueError(f"Backend de memoria de conversación no soportado: '{backend}'")
@@ -0,0 +1,360 @@
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, Optional
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+ESTADO_PENDIENTE = "pendiente"
+ESTADO_ENVIANDO = "enviando"
+ESTADO_ENVIADO = "enviado"
+ESTADO_FALLIDO = "fallido"
+
+# Códigos 4xx que sí vale la pena reintentar
+_CODIGOS_REINTENTABLES = {408, 409, 425, 429}
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS emails (
+    ticket TEXT PRIMARY KEY,
+    to_email TEXT NOT NULL,
+    motivo TEXT NOT NULL,
+    mensaje TEXT NOT NULL,
+    estado TEXT NOT NULL,
+    intentos INTEGER NOT NULL DEFAULT 0,
+    proximo_intento REAL NOT NULL,
+    creado REAL NOT NULL,
+    actualizado REAL NOT NULL,
+    ultimo_error TEXT,
+    propietario TEXT,
+    lease_hasta REAL
+);
+CREATE INDEX IF NOT EXISTS idx_emails_pendientes ON emails (estado, proximo_intento);
+"""
+
+# Columnas agregadas después de la primera versión del esquema
+_COLUMNAS_NUEVAS = {"propietario": "TEXT", "lease_hasta": "REAL"}
+
+
+class EmailOutbox:
+    """
+    Bandeja de salida de emails persistida en SQLite.
+
+    `encolar` guarda el email y retorna un ticket de inmediato; un hilo en
+    segundo plano lo entrega al servicio de email con una sesión HTTP
+    reutilizable, reintentos con backoff exponencial y el ticket como
+    cabecera `Idempotency-Key`, de modo que un reintento tras un corte no
+    duplica el envío. Varias instancias (workers de uvicorn) pueden
+    compartir el mismo archivo: cada email se reclama de forma atómica con
+    un propietario y un lease; si la instancia muere a mitad del envío, el
+    email se vuelve a reclamar cuando su lease vence.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        email_service_url: str,
+        max_intentos: int = 5,
+        backoff_segundos: float = 2.0,
+        backoff_max_segundos: float = 300.0,
+        timeout_segundos: float = 10.0,
+        intervalo_sondeo: float = 1.0,
+        lease_segundos: Optional[float] = None
+    ):
+        """
+        Inicializa la bandeja de salida.
+
+        Args:
+            db_path: Ruta del archivo SQLite
+            email_service_url: URL del servicio de envío de emails
+            max_intentos: Intentos de entrega antes de marcar el email como fallido
+            backoff_segundos: Espera base entre reintentos (se duplica en cada intento)
+            backoff_max_segundos: Espera máxima entre reintentos
+            timeout_segundos: Timeout de cada petición al servicio de email
+            intervalo_sondeo: Cada cuánto revisa el worker si hay emails pendientes
+            lease_segundos: Tiempo que un email reclamado queda reservado para esta
+                instancia (por defecto el triple del timeout, mínimo 30s)
+        """
+        self.db_path = db_path
+        self.email_service_url = email_service_url
+        self.max_intentos = max_intentos
+        self.backoff_segundos = backoff_segundos
+        self.backoff_max_segundos = backoff_max_segundos
+        self.timeout_segundos = timeout_segundos
+        self.intervalo_sondeo = intervalo_sondeo
+        self.lease_segundos = lease_segundos or max(30.0, timeout_segundos * 3)
+        self._propietario = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+        directorio = os.path.dirname(db_path)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+
+        self._conexion = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conexion.row_factory = sqlite3.Row
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.executescript(_ESQUEMA)
+        self._migrar()
+        self._lock = threading.Lock()
+
+        self._session: Optional[requests.Session] = None
+        self._hilo: Optional[threading.Thread] = None
+        self._detener = threading.Event()
+        self._hay_trabajo = threading.Event()
+        self.entregados = 0
+        self.reintentos = 0
+        self.fallidos = 0
+
+    def _migrar(self) -> None:
+        """Agrega a un archivo existente las columnas que le falten."""
+        existentes = {fila["name"] for fila in self._conexion.execute("PRAGMA table_info(emails)")}
+        for columna, tipo in _COLUMNAS_NUEVAS.items():
+            if columna not in existentes:
+                try:
+                    self._conexion.execute(f"ALTER TABLE emails ADD COLUMN {columna} {tipo}")
+                except sqlite3.OperationalError:
+                    # Otro proceso la agregó al mismo tiempo
+                    pass
+
+    def _crear_sesion(self) -> requests.Session:
+        """Crea la sesión HTTP con pool de conexiones reutilizables."""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def encolar(self, to_email: str, motivo: str, mensaje: str) -> Dict[str, Any]:
+        """
+        Guarda un email para entrega en segundo plano.
+
+        Args:
+            to_email: Destinatario
+            motivo: Asunto
+            mensaje: Cuerpo del email
+
+        Returns:
+            Dict con el estado inicial del email (incluye el ticket)
+        """
+        ahora = time.time()
+        ticket = uuid.uuid4().hex
+
+        with self._lock:
+            self._conexion.execute(
+                "INSERT INTO emails (ticket, to_email, motivo, mensaje, estado, proximo_intento, creado, actualizado) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (ticket, to_email, motivo, mensaje, ESTADO_PENDIENTE, ahora, ahora, ahora)
+            )
+
+        logger.info(f"📥 Email a '{to_email}' encolado (ticket {ticket})")
+        self._hay_trabajo.set()
+
+        return self.obtener(ticket)
+
+    def obtener(self, ticket: str) -> Optional[Dict[str, Any]]:
+        """
+        Consulta el estado de un email.
+
+        Args:
+            ticket: Ticket retornado por `encolar`
+
+        Returns:
+            Dict con el estado del email o None si no existe
+        """
+        with self._lock:
+            fila = self._conexion.execute(
+                "SELECT ticket, to_email, motivo, estado, intentos, proximo_intento, creado, actualizado, ultimo_error "
+                "FROM emails WHERE ticket = ?",
+                (ticket,)
+            ).fetchone()
+
+        return dict(fila) if fila is not None else None
+
+    def iniciar(self) -> None:
+        """Inicia el worker de entrega (idempotente)."""
+        if self._hilo is not None and self._hilo.is_alive():
+            return
+
+        self._detener.clear()
+        self._session = self._crear_sesion()
+        self._hilo = threading.Thread(target=self._procesar, name="email-outbox", daemon=True)
+        self._hilo.start()
+        logger.info(f"📮 Worker de email iniciado ({self.db_path})")
+
+    def detener(self, timeout: float = 5.0) -> None:
+        """Detiene el worker y cierra la sesión HTTP."""
+        self._detener.set()
+        self._hay_trabajo.set()
+        if self._hilo is not None:
+            self._hilo.join(timeout)
+            self._hilo = None
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    def _reclamar_siguiente(self) -> Optional[sqlite3.Row]:
+        """
+        Reclama para esta instancia el próximo email vencido y lo retorna.
+
+        Además de los pendientes, reclama los que quedaron 'enviando' con el
+        lease vencido (su instancia murió a mitad del envío): la clave de
+        idempotencia evita duplicados al reintentarlos. Los que otra
+        instancia viva está enviando no se tocan.
+        """
+        with self._lock:
+            while True:
+                ahora = time.time()
+                fila = self._conexion.execute(
+                    "SELECT * FROM emails "
+                    "WHERE (estado = ? AND proximo_intento <= ?) OR (estado = ? AND lease_hasta <= ?) "
+                    "ORDER BY proximo_intento LIMIT 1",
+                    (ESTADO_PENDIENTE, ahora, ESTADO_ENVIANDO, ahora)
+                ).fetchone()
+                if fila is None:
+                    return None
+
+                # Otro proceso pudo reclamarlo entre el SELECT y el UPDATE
+                reclamado = self._conexion.execute(
+                    "UPDATE emails SET estado = ?, propietario = ?, lease_hasta = ?, actualizado = ? "
+                    "WHERE ticket = ? AND estado = ? AND lease_hasta IS ?",
+                    (ESTADO_ENVIANDO, self._propietario, ahora + self.lease_segundos, ahora,
+                     fila["ticket"], fila["estado"], fila["lease_hasta"])
+                ).rowcount
+                if reclamado:
+                    if fila["estado"] == ESTADO_ENVIANDO:
+                        logger.warning(
+                            f"⚠️ Email {fila['ticket']} recuperado: el lease de '{fila['propietario']}' venció"
+                        )
+                    return fila
+
+    def _actualizar(self, ticket: str, **campos) -> bool:
+        """
+        Registra el resultado de un envío y libera el lease.
+
+        Returns:
+            False si el email ya no pertenece a esta instancia (su lease
+            venció y otra lo reclamó), en cuyo caso no se modifica
+        """
+        campos.update(propietario=None, lease_hasta=None, actualizado=time.time())
+        asignaciones = ", ".join(f"{campo} = ?" for campo in campos)
+        with self._lock:
+            actualizados = self._conexion.execute(
+                f"UPDATE emails SET {asignaciones} WHERE ticket = ? AND propietario = ?",
+                (*campos.values(), ticket, self._propietario)
+            ).rowcount
+        if not actualizados:
+            logger.warning(f"⚠️ Email {ticket} reclamado por otra instancia, resultado descartado")
+        return bool(actualizados)
+
+    def _procesar(self) -> None:
+        """Loop del worker: entrega los emails vencidos hasta que se detenga."""
+        while not self._detener.is_set():
+            try:
+                fila = self._reclamar_siguiente()
+            except Exception as e:
+                logger.error(f"❌ Error leyendo la bandeja de emails: {e}")
+                fila = None
+
+            if fila is None:
+                self._hay_trabajo.wait(self.intervalo_sondeo)
+                self._hay_trabajo.clear()
+                continue
+
+            try:
+                self._entregar(fila)
+            except Exception as e:
+                # Errores de SQLite o la sesión cerrada por `detener`: el email
+                # se reprograma; si tampoco se puede, lo recupera el lease
+                logger.error(f"❌ Error inesperado entregando el email {fila['ticket']}: {e}", exc_info=True)
+                try:
+                    self._registrar_fallo(fila, fila["intentos"] + 1, f"{type(e).__name__}: {e}", True)
+                except Exception as error_registro:
+                    logger.error(f"❌ No se pudo reprogramar el email {fila['ticket']}: {error_registro}")
+
+    def _entregar(self, fila: sqlite3.Row) -> None:
+        """Envía un email y registra el resultado (reintento, éxito o fallo)."""
+        ticket = fila["ticket"]
+        intentos = fila["intentos"] + 1
+        reintentable = True
+
+        try:
+            response = self._session.post(
+                self.email_service_url,
+                json={
+                    "to_email": fila["to_email"],
+                    "motivo": fila["motivo"],
+                    "mensaje": fila["mensaje"]
+                },
+                headers={"Content-Type": "application/json", "Idempotency-Key": ticket},
+                timeout=self.timeout_segundos
+            )
+
+            if 200 <= response.status_code < 300:
+                # El servicio responde 200 con success=false cuando no pudo
+                # entregar (p. ej. el servidor SMTP no respondió)
+                try:
+                    datos = response.json()
+                except ValueError:
+                    datos = None
+                if not isinstance(datos, dict) or datos.get("success", True) is not False:
+                    if self._actualizar(ticket, estado=ESTADO_ENVIADO, intentos=intentos, ultimo_error=None):
+                        self.entregados += 1
+                        logger.info(f"✅ Email {ticket} entregado a '{fila['to_email']}' (intento {intentos})")
+                    return
+
+                detalle = datos.get("message") or datos.get("detail") or response.text[:300]
+                error = f"Status code {response.status_code} con success=false: {detalle}"
+            else:
+                error = f"Status code {response.status_code}: {response.text[:300]}"
+                reintentable = response.status_code >= 500 or response.status_code in _CODIGOS_REINTENTABLES
+
+        except requests.RequestException as e:
+            error = f"{type(e).__name__}: {e}"
+
+        self._registrar_fallo(fila, intentos, error, reintentable)
+
+    def _registrar_fallo(self, fila: sqlite3.Row, intentos: int, error: str, reintentable: bool) -> None:
+        """Reprograma el email con backoff o lo marca como fallido."""
+        ticket = fila["ticket"]
+
+        if not reintentable or intentos >= self.max_intentos:
+            if self._actualizar(ticket, estado=ESTADO_FALLIDO, intentos=intentos, ultimo_error=error):
+                self.fallidos += 1
+                logger.error(f"❌ Email {ticket} marcado como fallido tras {intentos} intento(s): {error}")
+            return
+
+        espera = min(self.backoff_max_segundos, self.backoff_segundos * 2 ** (intentos - 1))
+        espera *= random.uniform(0.8, 1.2)
+        if self._actualizar(
+            ticket,
+            estado=ESTADO_PENDIENTE,
+            intentos=intentos,
+            proximo_intento=time.time() + espera,
+            ultimo_error=error
+        ):
+            self.reintentos += 1
+            logger.warning(f"⚠️ Email {ticket} falló (intento {intentos}), reintento en {espera:.1f}s: {error}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retorna estadísticas de la bandeja de salida.
+
+        Returns:
+            Dict con emails por estado y contadores de este proceso
+        """
+        with self._lock:
+            filas = self._conexion.execute(
+                "SELECT estado, COUNT(*) AS total FROM emails GROUP BY estado"
+            ).fetchall()
+
+        return {
+            "por_estado": {fila["estado"]: fila["total"] for fila in filas},
+            "entregados": self.entregados,
+            "reintentos": self.reintentos,
+            "fallidos": self.fallidos,
+            "worker_activo": self._hilo is not None and self._hilo.is_alive()
+        }
@@ -0,0 +1,291 @@
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+import numpy as np
+from app.utils.fines import extraer_multas, formatear_multa
+from app.utils.fragments import SEPARADOR_OMISION
+from app.utils.text_normalization import tokenizar
+
+logger = logging.getLogger(__name__)
+
+# Mismo corte por oraciones que `ProcesadorCodigoTransito._dividir_por_oraciones`,
+# más saltos de línea (numerales y literales de la ley van en líneas propias)
+_PATRON_ORACION = re.compile(r'(?<=[.;:])\s+|\n+')
+_PATRON_ESPACIOS = re.compile(r'\s+')
+
+MIN_CARACTERES_ORACION = 25
+MAX_CARACTERES_ORACION = 400
+
+# Términos de la consulta que indican que se pregunta por el monto de la multa
+TERMINOS_MULTA = frozenset({
+    'multa', 'multas', 'sancion', 'sanciones', 'sancionado', 'valor', 'cuanto',
+    'cuesta', 'pagar', 'pago', 'costo', 'comparendo', 'smldv', 'salarios'
+})
+BONO_MULTA = 0.15
+
+
+@dataclass
+class RespuestaExtractiva:
+    """Respuesta armada con oraciones de los artículos recuperados."""
+    texto: str
+    puntaje: float
+    oraciones: List[Dict[str, Any]] = field(default_factory=list)
+    multas: List[Dict[str, Any]] = field(default_factory=list)
+    articulos_citados: List[str] = field(default_factory=list)
+
+
+class ExtractiveAnswerEngine:
+    """
+    Motor de respuestas extractivas (sin LLM).
+
+    Divide en oraciones los fragmentos recuperados y puntúa cada una contra
+    la consulta combinando la similitud coseno de sus embeddings (el mismo
+    modelo de la búsqueda) con la cobertura de palabras clave de la
+    consulta. Las mejores oraciones se presentan en el orden del artículo,
+    citando su número, y los montos de multa en salarios mínimos se
+    extraen con patrones. Los embeddings de oraciones se cachean: el
+    corpus es fijo, así que tras el calentamiento una respuesta cuesta
+    milisegundos.
+    """
+
+    def __init__(
+        self,
+        db_repository=None,
+        max_oraciones: int = 3,
+        puntaje_minimo: float = 0.35,
+        peso_semantico: float = 0.7,
+        cache_size: int = 5000
+    ):
+        """
+        Inicializa el motor.
+
+        Args:
+            db_repository: Repositorio con el modelo de embeddings y la caché
+                de embeddings de consultas. Sin él se puntúa solo por
+                palabras clave.
+            max_oraciones: Oraciones máximas en la respuesta
+            puntaje_minimo: Puntaje de la mejor oración por debajo del cual
+                no se arma respuesta
+            peso_semantico: Peso de la similitud de embeddings (el resto es
+                cobertura de palabras clave)
+            cache_size: Embeddings de oraciones cacheados
+        """
+        self.db_repository = db_repository
+        self.max_oraciones = max_oraciones
+        self.puntaje_minimo = puntaje_minimo
+        self.peso_semantico = peso_semantico if db_repository is not None else 0.0
+        self.cache_size = cache_size
+
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Métricas
+        self.respuestas: Dict[str, int] = {}
+        self.descartadas = 0
+        self.oraciones_cacheadas = 0
+        self.oraciones_codificadas = 0
+        self._latencia_total = 0.0
+        self._invocaciones = 0
+
+    @staticmethod
+    def dividir_oraciones(texto: str) -> List[str]:
+        """
+        Divide un texto en oraciones limpias.
+
+        Descarta las muy cortas (encabezados, literales sueltos) y recorta
+        las muy largas.
+        """
+        oraciones = []
+        for parte in _PATRON_ORACION.split(texto.replace(SEPARADOR_OMISION, "\n")):
+            oracion = _PATRON_ESPACIOS.sub(' ', parte).strip()
+            if len(oracion) < MIN_CARACTERES_ORACION or oracion == "[...]":
+                continue
+            if len(oracion) > MAX_CARACTERES_ORACION:
+                oracion = oracion[:MAX_CARACTERES_ORACION].rsplit(' ', 1)[0] + "..."
+            oraciones.append(oracion)
+        return oraciones
+
+    def _codificar_oraciones(self, oraciones: List[str]) -> np.ndarray:
+        """Embeddings normalizados de las oraciones, reutilizando la caché."""
+        vectores: List[Optional[np.ndarray]] = [None] * len(oraciones)
+        pendientes = []
+
+        with self._lock:
+            for i, oracion in enumerate(oraciones):
+                vector = self._cache.get(oracion)
+                if vector is None:
+                    pendientes.append(i)
+                else:
+                    self._cache.move_to_end(oracion)
+                    vectores[i] = vector
+            self.oraciones_cacheadas += len(oraciones) - len(pendientes)
+
+        if pendientes:
+            nuevos = self.db_repository.embedding_model.encode([oraciones[i] for i in pendientes])
+            normas = np.linalg.norm(nuevos, axis=1, keepdims=True)
+            nuevos = nuevos / np.maximum(normas, 1e-12)
+
+            with self._lock:
+                self.oraciones_codificadas += len(pendientes)
+                for i, vector in zip(pendientes, nuevos):
+                    vectores[i] = vector
+                    self._cache[oraciones[i]] = vector
+                    self._cache.move_to_end(oraciones[i])
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        return np.vstack(vectores)
+
+    def _similitudes(self, consulta: str, oraciones: List[str]) -> np.ndarray:
+        """Similitud coseno consulta-oración en [0, 1]."""
+        if self.peso_semantico <= 0:
+            return np.zeros(len(oraciones), dtype=np.float32)
+
+        vector_consulta = np.asarray(self.db_repository.encode_query(consulta), dtype=np.float32)
+        vector_consulta = vector_consulta / max(float(np.linalg.norm(vector_consulta)), 1e-12)
+        similitudes = self._codificar_oraciones(oraciones) @ vector_consulta
+        return np.clip(similitudes, 0.0, 1.0)
+
+    @staticmethod
+    def _cobertura(terminos_consulta: set, oracion: str) -> float:
+        """Fracción de los términos de la consulta presentes en la oración."""
+        if not terminos_consulta:
+            return 0.0
+        return len(terminos_consulta & set(tokenizar(oracion))) / len(terminos_consulta)
+
+    def responder(
+        self,
+        consulta: str,
+        articulos: List[Dict],
+        modo: str = "basico"
+    ) -> Optional[RespuestaExtractiva]:
+        """
+        Arma una respuesta extractiva citada.
+
+        Args:
+            consulta: Pregunta del usuario
+            articulos: Artículos recuperados (con 'documento', 'metadata' y
+                'similitud'), en orden de relevancia
+            modo: Motivo de la respuesta para las métricas ("rapido",
+                "degradado", "basico")
+
+        Returns:
+            RespuestaExtractiva o None si ninguna oración alcanza el puntaje mínimo
+        """
+        inicio = time.perf_counter()
+
+        candidatas = []
+        for posicion, articulo in enumerate(articulos):
+            numero = str(articulo['metadata'].get('numero_articulo', '?'))
+            # En la ley el monto suele ir en el encabezado del literal ("C. Será
+            # sancionado con multa equivalente a quince (15) smldv...") y no en
+            # cada infracción: cada oración hereda el último monto anterior
+            multas_contexto: List[Dict] = []
+            for orden, oracion in enumerate(self.dividir_oraciones(articulo['documento'])):
+                multas = extraer_multas(oracion)
+                candidatas.append({
+                    'texto': oracion,
+                    'articulo': numero,
+                    'posicion': posicion,
+                    'orden': orden,
+                    'similitud_articulo': float(articulo.get('similitud', 0.0)),
+                    'multas': multas,
+                    'multas_contexto': multas or multas_contexto
+                })
+                if multas:
+                    multas_contexto = multas
+
+        if not candidatas:
+            self._registrar(None, modo, inicio)
+            return None
+
+        terminos = set(tokenizar(consulta))
+        pregunta_multa = bool(terminos & TERMINOS_MULTA)
+        similitudes = self._similitudes(consulta, [c['texto'] for c in candidatas])
+
+        for candidata, similitud in zip(candidatas, similitudes):
+            puntaje = (
+                self.peso_semantico * float(similitud)
+                + (1 - self.peso_semantico) * self._cobertura(terminos, candidata['texto'])
+            )
+            if pregunta_multa and candidata['multas_contexto']:
+                puntaje += BONO_MULTA
+            # Desempate a favor de los artículos mejor recuperados
+            candidata['puntaje'] = puntaje * (0.75 + 0.25 * candidata['similitud_articulo'])
+
+        elegidas = sorted(candidatas, key=lambda c: c['puntaje'], reverse=True)[:self.max_oraciones]
+        mejor = elegidas[0]['puntaje']
+        if mejor < self.puntaje_minimo:
+            self._registrar(None, modo, inicio)
+            return None
+
+        # Se descartan oraciones muy por debajo de la mejor para no rellenar
+        elegidas = [c for c in elegidas if c['puntaje'] >= mejor * 0.6]
+        elegidas.sort(key=lambda c: (c['posicion'], c['orden']))
+
+        respuesta = self._armar(elegidas, mejor, pregunta_multa)
+        self._registrar(respuesta, modo, inicio)
+        return respuesta
+
+    def _armar(self, elegidas: List[Dict], puntaje: float, pregunta_multa: bool) -> RespuestaExtractiva:
+        """Redacta la respuesta: oraciones con su cita y resumen de la multa."""
+        articulos_citados = list(dict.fromkeys(c['articulo'] for c in elegidas))
+
+        lineas = ["Según el Código Nacional de Tránsito (Ley 769 de 2002):", ""]
+        for candidata in elegidas:
+            lineas.append(f"• {candidata['texto']} (Art. {candidata['articulo']})")
+
+        multas = []
+        vistas = set()
+        for candidata in elegidas:
+            for multa in candidata['multas_contexto']:
+                clave = (multa['cantidad'], multa['unidad'], candidata['articulo'])
+                if clave not in vistas:
+                    vistas.add(clave)
+                    multas.append({**multa, 'articulo': candidata['articulo']})
+
+        if multas and pregunta_multa:
+            montos = ", ".join(f"{formatear_multa(m)} (Art. {m['articulo']})" for m in multas)
+            lineas.extend(["", f"💰 **Multa:** {montos}"])
+
+        lineas.extend(["", f"📋 Fuente: {', '.join(f'Artículo {n}' for n in articulos_citados)}"])
+
+        return RespuestaExtractiva(
+            texto="\n".join(lineas),
+            puntaje=puntaje,
+            oraciones=[{k: c[k] for k in ('texto', 'articulo', 'puntaje')} for c in elegidas],
+            multas=multas,
+            articulos_citados=articulos_citados
+        )
+
+    def _registrar(self, respuesta: Optional[RespuestaExtractiva], modo: str, inicio: float) -> None:
+        with self._lock:
+            self._invocaciones += 1
+            self._latencia_total += time.perf_counter() - inicio
+            if respuesta is None:
+                self.descartadas += 1
+            else:
+                self.respuestas[modo] = self.respuestas.get(modo, 0) + 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retorna estadísticas del motor.
+
+        Returns:
+            Dict con respuestas por modo, descartadas, uso de la caché de
+            oraciones y latencia promedio
+        """
+        with self._lock:
+            return {
+                "respuestas": dict(self.respuestas),
+                "descartadas": self.descartadas,
+                "oraciones_cacheadas": self.oraciones_cacheadas,
+                "oraciones_codificadas": self.oraciones_codificadas,
+                "cache_entradas": len(self._cache),
+                "latencia_promedio_ms": round(self._latencia_total / self._invocaciones * 1000, 2)
+                if self._invocaciones else 0.0
+            }
@@ -8,16 +8,19 @@ logger = logging.getLogger(__name__)
 class HealthService:
     """Servicio para health checks y monitoreo del sistema."""
 
-    def __init__(self, db_manager, llm_service):
+    def __init__(self, db_manager, llm_service, base_datos_habilitada: bool = True):
         """
         Inicializa el servicio de health.
 
         Args:
             db_manager: Instancia de ChromaDBManager
             llm_service: Instancia de LLMService
+            base_datos_habilitada: False en perfiles sin recuperación, donde
+                la ausencia de ChromaDB no degrada el servicio
         """
         self.db_manager = db_manager
         self.llm_service = llm_service
+        self.base_datos_habilitada = base_datos_habilitada
 
     def check_health(self) -> HealthResponse:
         """
@@ -26,6 +29,13 @@ class HealthService:
         Returns:
             HealthResponse con el estado del sistema
         """
+        if not self.base_datos_habilitada:
+            return HealthResponse(
+                status="healthy",
+                version="1.0.0",
+                database_status="disabled"
+            )
+
         try:
             if self.db_manager and self.db_manager.collection:
                 stats = self.db_manager.obtener_estadisticas_db()
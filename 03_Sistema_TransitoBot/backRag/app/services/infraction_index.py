@@ -0,0 +1,297 @@
+import logging
+import os
+import re
+from typing import Any, Dict, List, Optional
+import numpy as np
+from app.utils.text_normalization import quitar_tildes
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 1
+
+# Sanciones adicionales a la multa, guardadas como bits
+SANCION_INMOVILIZACION = 1
+SANCION_SUSPENSION_LICENCIA = 2
+SANCION_CANCELACION_LICENCIA = 4
+SANCION_RETENCION_LICENCIA = 8
+
+NOMBRES_SANCION = {
+    SANCION_INMOVILIZACION: "inmovilización del vehículo",
+    SANCION_SUSPENSION_LICENCIA: "suspensión de la licencia de conducción",
+    SANCION_CANCELACION_LICENCIA: "cancelación de la licencia de conducción",
+    SANCION_RETENCION_LICENCIA: "retención de la licencia de conducción",
+}
+
+_PATRONES_SANCION = (
+    (SANCION_INMOVILIZACION, re.compile(r'inmoviliza', re.IGNORECASE)),
+    (SANCION_SUSPENSION_LICENCIA, re.compile(r'suspend|suspensi', re.IGNORECASE)),
+    (SANCION_CANCELACION_LICENCIA, re.compile(r'cancela', re.IGNORECASE)),
+    (SANCION_RETENCION_LICENCIA, re.compile(r'retendr|retenci', re.IGNORECASE)),
+)
+
+_PATRON_CODIGO_NORMALIZADO = re.compile(r'^([A-F])0*(\d{0,2})([A-Z]?)$')
+
+# Menciones de códigos en texto libre: "C14", "c.29", "C-29", "C 29". En
+# minúscula se exige el código pegado para no leer "a 1 año" como A1.
+_PATRON_CODIGO_TEXTO = re.compile(r'\b(?:([A-F])\s?[.\-]?\s?|([a-f])[.\-]?)(\d{1,2})\b')
+
+
+def normalizar_codigo(codigo: str) -> Optional[str]:
+    """
+    Normaliza un código de infracción ("c. 29", "C.12 A", "C029" → "C29", "C12A").
+
+    Returns:
+        Código normalizado o None si no tiene forma de código
+    """
+    compacto = re.sub(r'[^A-Z0-9]', '', quitar_tildes(str(codigo)).upper())
+    match = _PATRON_CODIGO_NORMALIZADO.match(compacto)
+    if not match:
+        return None
+    letra, numero, sufijo = match.groups()
+    return f"{letra}{int(numero) if numero else ''}{sufijo}"
+
+
+def banderas_sanciones(sanciones: List[str]) -> int:
+    """Bits SANCION_* presentes en los textos de sanciones adicionales."""
+    banderas = 0
+    for bandera, patron in _PATRONES_SANCION:
+        if any(patron.search(texto) for texto in sanciones):
+            banderas |= bandera
+    return banderas
+
+
+def _blob(textos: List[str]):
+    """Concatena textos UTF-8 en un solo arreglo de bytes con sus offsets."""
+    codificados = [texto.encode('utf-8') for texto in textos]
+    offsets = np.zeros(len(codificados) + 1, dtype=np.int32)
+    offsets[1:] = np.cumsum([len(c) for c in codificados])
+    return np.frombuffer(b''.join(codificados), dtype=np.uint8), offsets
+
+
+class InfractionIndex:
+    """
+    Tabla de infracciones del Código de Tránsito indexada por código.
+
+    La genera el pipeline de ingesta (`ProcesadorCodigoTransito.extraer_infracciones`)
+    y se guarda en columnas en un .npz: códigos, multa en SMLDV y bits de
+    sanciones como arreglos numéricos, y descripciones y sanciones como un
+    bloque UTF-8 con offsets (sin pickle). Al cargar se arma un dict
+    código → fila, así que cada consulta es O(1). La multa en pesos se
+    calcula localmente con el valor configurado del SMLDV.
+    """
+
+    def __init__(
+        self,
+        codigos: np.ndarray,
+        multa_smldv: np.ndarray,
+        sanciones_bits: np.ndarray,
+        articulos: np.ndarray,
+        remisiones: np.ndarray,
+        descripciones: np.ndarray,
+        descripciones_offsets: np.ndarray,
+        sanciones: np.ndarray,
+        sanciones_offsets: np.ndarray,
+        valor_smldv: float = 0.0
+    ):
+        """
+        Inicializa el índice a partir de sus columnas.
+
+        Args:
+            valor_smldv: Valor en pesos del salario mínimo diario (SMLDV)
+                usado para calcular la multa en pesos (0 la omite)
+        """
+        self.codigos = codigos
+        self.multa_smldv = multa_smldv
+        self.sanciones_bits = sanciones_bits
+        self.articulos = articulos
+        self.remisiones = remisiones
+        self._descripciones = descripciones.tobytes()
+        self._descripciones_offsets = descripciones_offsets
+        self._sanciones = sanciones.tobytes()
+        self._sanciones_offsets = sanciones_offsets
+        self.valor_smldv = valor_smldv
+
+        self._filas: Dict[str, int] = {str(codigo): fila for fila, codigo in enumerate(codigos)}
+
+        # Métricas
+        self.consultas = 0
+        self.encontradas = 0
+
+    @classmethod
+    def desde_registros(cls, registros: List[Dict[str, Any]], valor_smldv: float = 0.0) -> "InfractionIndex":
+        """
+        Construye el índice desde las infracciones extraídas en la ingesta.
+
+        Args:
+            registros: Dicts con 'codigo', 'descripcion', 'multa_smldv',
+                'sanciones' (lista de textos), 'articulo' y 'articulo_remision'
+            valor_smldv: Valor en pesos del SMLDV
+
+        Returns:
+            InfractionIndex construido
+        """
+        registros = [r for r in registros if normalizar_codigo(r['codigo'])]
+        descripciones, descripciones_offsets = _blob([r['descripcion'] for r in registros])
+        sanciones, sanciones_offsets = _blob(['\n'.join(r.get('sanciones') or []) for r in registros])
+
+        return cls(
+            codigos=np.array([normalizar_codigo(r['codigo']) for r in registros], dtype='<U5'),
+            multa_smldv=np.array([int(r.get('multa_smldv') or 0) for r in registros], dtype=np.uint16),
+            sanciones_bits=np.array([banderas_sanciones(r.get('sanciones') or []) for r in registros], dtype=np.uint8),
+            articulos=np.array([str(r.get('articulo') or '') for r in registros], dtype='<U6'),
+            remisiones=np.array([str(r.get('articulo_remision') or '') for r in registros], dtype='<U6'),
+            descripciones=descripciones,
+            descripciones_offsets=descripciones_offsets,
+            sanciones=sanciones,
+            sanciones_offsets=sanciones_offsets,
+            valor_smldv=valor_smldv
+        )
+
+    @classmethod
+    def cargar(cls, path: str, valor_smldv: float = 0.0) -> Optional["InfractionIndex"]:
+        """
+        Carga el índice desde su archivo .npz.
+
+        Args:
+            path: Ruta del archivo generado por scripts/setup_database.py
+            valor_smldv: Valor en pesos del SMLDV
+
+        Returns:
+            InfractionIndex o None si el archivo no existe o no es compatible
+        """
+        if not os.path.exists(path):
+            logger.warning(f"⚠️ Índice de infracciones no encontrado en {path}. Ejecuta el script de setup")
+            return None
+
+        try:
+            with np.load(path, allow_pickle=False) as datos:
+                if int(datos['schema_version']) != SCHEMA_VERSION:
+                    logger.warning(f"⚠️ Índice de infracciones con esquema {int(datos['schema_version'])}, se esperaba {SCHEMA_VERSION}")
+                    return None
+                indice = cls(
+                    codigos=datos['codigos'],
+                    multa_smldv=datos['multa_smldv'],
+                    sanciones_bits=datos['sanciones_bits'],
+                    articulos=datos['articulos'],
+                    remisiones=datos['remisiones'],
+                    descripciones=datos['descripciones'],
+                    descripciones_offsets=datos['descripciones_offsets'],
+                    sanciones=datos['sanciones'],
+                    sanciones_offsets=datos['sanciones_offsets'],
+                    valor_smldv=valor_smldv
+                )
+        except Exception as e:
+            logger.error(f"❌ Error cargando índice de infracciones: {e}")
+            return None
+
+        logger.info(f"🚦 Índice de infracciones cargado: {len(indice)} códigos")
+        return indice
+
+    def guardar(self, path: str) -> None:
+        """Guarda el índice en columnas (.npz comprimido, escritura atómica)."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        temporal = f"{path}.tmp.npz"
+        np.savez_compressed(
+            temporal,
+            schema_version=np.array(SCHEMA_VERSION),
+            codigos=self.codigos,
+            multa_smldv=self.multa_smldv,
+            sanciones_bits=self.sanciones_bits,
+            articulos=self.articulos,
+            remisiones=self.remisiones,
+            descripciones=np.frombuffer(self._descripciones, dtype=np.uint8),
+            descripciones_offsets=self._descripciones_offsets,
+            sanciones=np.frombuffer(self._sanciones, dtype=np.uint8),
+            sanciones_offsets=self._sanciones_offsets
+        )
+        os.replace(temporal, path)
+        logger.info(f"💾 Índice de infracciones guardado en {path} ({len(self)} códigos)")
+
+    def __len__(self) -> int:
+        return len(self.codigos)
+
+    def __contains__(self, codigo: str) -> bool:
+        return normalizar_codigo(codigo) in self._filas
+
+    def _fila(self, fila: int) -> Dict[str, Any]:
+        inicio, fin = self._descripciones_offsets[fila], self._descripciones_offsets[fila + 1]
+        descripcion = self._descripciones[inicio:fin].decode('utf-8')
+        inicio, fin = self._sanciones_offsets[fila], self._sanciones_offsets[fila + 1]
+        sanciones = self._sanciones[inicio:fin].decode('utf-8')
+
+        multa_smldv = int(self.multa_smldv[fila])
+        bits = int(self.sanciones_bits[fila])
+        infraccion = {
+            'codigo': str(self.codigos[fila]),
+            'descripcion': descripcion,
+            'multa_smldv': multa_smldv,
+            'multa_pesos': round(multa_smldv * self.valor_smldv) if multa_smldv and self.valor_smldv else None,
+            'sanciones_adicionales': [nombre for bit, nombre in NOMBRES_SANCION.items() if bits & bit],
+            'detalle_sanciones': sanciones.split('\n') if sanciones else [],
+            'articulo': str(self.articulos[fila]),
+        }
+        if self.remisiones[fila]:
+            infraccion['articulo_remision'] = str(self.remisiones[fila])
+        return infraccion
+
+    def buscar(self, codigo: str) -> Optional[Dict[str, Any]]:
+        """
+        Busca una infracción por código.
+
+        Args:
+            codigo: Código en cualquier formato ("C29", "c.29", "C. 29")
+
+        Returns:
+            Dict con codigo, descripcion, multa_smldv, multa_pesos (None si
+            no hay valor de SMLDV o la multa se remite a otro artículo),
+            sanciones_adicionales, detalle_sanciones, articulo y, si aplica,
+            articulo_remision. None si el código no existe.
+        """
+        self.consultas += 1
+        fila = self._filas.get(normalizar_codigo(codigo) or '')
+        if fila is None:
+            return None
+        self.encontradas += 1
+        return self._fila(fila)
+
+    def buscar_en_texto(self, texto: str) -> List[Dict[str, Any]]:
+        """
+        Resuelve los códigos de infracción mencionados en un texto libre.
+
+        Args:
+            texto: Consulta del usuario ("¿cuánto es la multa C14?")
+
+        Returns:
+            Infracciones encontradas, sin repetir, en orden de aparición
+        """
+        resultados = []
+        vistos = set()
+        for match in _PATRON_CODIGO_TEXTO.finditer(texto or ''):
+            codigo = f"{(match.group(1) or match.group(2)).upper()}{int(match.group(3))}"
+            if codigo in vistos or codigo not in self._filas:
+                continue
+            vistos.add(codigo)
+            infraccion = self.buscar(codigo)
+            if infraccion:
+                resultados.append(infraccion)
+        return resultados
+
+    def listar(self, grupo: Optional[str] = None) -> List[str]:
+        """Códigos disponibles, opcionalmente solo los de un literal ("C")."""
+        if grupo:
+            return [str(c) for c in self.codigos if str(c).startswith(grupo.upper())]
+        return [str(c) for c in self.codigos]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retorna estadísticas del índice.
+
+        Returns:
+            Dict con total de códigos, valor del SMLDV y consultas atendidas
+        """
+        return {
+            "codigos": len(self),
+            "valor_smldv": self.valor_smldv,
+            "consultas": self.consultas,
+            "encontradas": self.encontradas
+        }
@@ -0,0 +1,161 @@
+import heapq
+import logging
+import math
+from collections import defaultdict
+from typing import List, Dict, Optional, Tuple
+from app.utils.text_normalization import tokenizar
+
+logger = logging.getLogger(__name__)
+
+
+class KeywordIndex:
+    """
+    Índice invertido con puntuación BM25 sobre los artículos del código.
+
+    Se construye una sola vez (al arrancar la API o tras la ingesta) y
+    permite buscar sin recorrer la colección completa: el costo de cada
+    búsqueda depende de las listas de postings de los términos consultados,
+    no del tamaño del corpus.
+
+    Escala de puntajes: `buscar` devuelve en 'similitud' el puntaje BM25
+    dividido por el máximo alcanzable para la consulta, es decir,
+    sum(peso * idf * (k1 + 1)) sobre los términos de la consulta presentes
+    en el vocabulario (el límite de BM25 cuando la frecuencia tiende a
+    infinito). El resultado queda en [0, 1]: un artículo que contiene todos
+    los términos una vez ronda 1 / (k1 + 1) y se acerca a 1 a medida que
+    los repite, lo que lo hace comparable con la similitud coseno.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        """
+        Inicializa un índice vacío.
+
+        Args:
+            k1: Saturación de la frecuencia de término
+            b: Peso de la normalización por longitud del documento
+        """
+        self.k1 = k1
+        self.b = b
+        self.ids: List[str] = []
+        self.documentos: List[str] = []
+        self.metadatas: List[Dict] = []
+        self._postings: Dict[str, List[Tuple[int, int]]] = {}
+        self._idf: Dict[str, float] = {}
+        self._longitudes: List[int] = []
+        self._longitud_promedio: float = 0.0
+
+    @classmethod
+    def desde_coleccion(cls, collection, **kwargs) -> "KeywordIndex":
+        """
+        Construye el índice leyendo una única vez todos los documentos de
+        una colección de ChromaDB.
+
+        Args:
+            collection: Colección de ChromaDB (o compatible)
+
+        Returns:
+            KeywordIndex construido
+        """
+        indice = cls(**kwargs)
+        datos = collection.get(include=['documents', 'metadatas'])
+        indice.construir(datos['documents'], datos['metadatas'], datos.get('ids'))
+        return indice
+
+    def construir(
+        self,
+        documentos: List[str],
+        metadatas: List[Dict],
+        ids: Optional[List[str]] = None
+    ) -> None:
+        """
+        (Re)construye el índice invertido.
+
+        Args:
+            documentos: Textos de los artículos
+            metadatas: Metadatos de cada artículo
+            ids: IDs de los artículos (opcional)
+        """
+        self.documentos = list(documentos)
+        self.metadatas = list(metadatas)
+        self.ids = list(ids) if ids else [str(i) for i in range(len(documentos))]
+
+        postings = defaultdict(list)
+        longitudes = []
+
+        for indice_doc, documento in enumerate(self.documentos):
+            tokens = tokenizar(documento)
+            longitudes.append(len(tokens))
+
+            frecuencias = defaultdict(int)
+            for token in tokens:
+                frecuencias[token] += 1
+
+            for token, frecuencia in frecuencias.items():
+                postings[token].append((indice_doc, frecuencia))
+
+        total_docs = len(self.documentos)
+        self._postings = dict(postings)
+        self._longitudes = longitudes
+        self._longitud_promedio = (sum(longitudes) / total_docs) if total_docs else 0.0
+        self._idf = {
+            termino: math.log(1 + (total_docs - len(lista) + 0.5) / (len(lista) + 0.5))
+            for termino, lista in self._postings.items()
+        }
+
+        logger.info(
+            f"🔎 Índice BM25 construido: {total_docs} documentos, "
+            f"{len(self._postings)} términos"
+        )
+
+    @property
+    def total_documentos(self) -> int:
+        return len(self.documentos)
+
+    def buscar(self, terminos: Dict[str, float], n_resultados: int) -> List[Dict]:
+        """
+        Busca los documentos con mayor puntaje BM25.
+
+        Args:
+            terminos: Términos ya tokenizados con su peso (1.0 para los de la
+                consulta, menor para los sinónimos)
+            n_resultados: Número máximo de resultados
+
+        Returns:
+            Lista de artículos con 'similitud' normalizada en [0, 1]
+        """
+        if not self._postings or not terminos:
+            return []
+
+        puntajes = defaultdict(float)
+        puntaje_maximo = 0.0
+
+        for termino, peso in terminos.items():
+            lista = self._postings.get(termino)
+            if not lista:
+                continue
+
+            idf = self._idf[termino]
+            puntaje_maximo += peso * idf * (self.k1 + 1)
+
+            for indice_doc, frecuencia in lista:
+                norma = self.k1 * (
+                    1 - self.b + self.b * self._longitudes[indice_doc] / self._longitud_promedio
+                )
+                puntajes[indice_doc] += peso * idf * frecuencia * (self.k1 + 1) / (frecuencia + norma)
+
+        if not puntajes:
+            return []
+
+        mejores = heapq.nlargest(n_resultados, puntajes.items(), key=lambda item: item[1])
+
+        return [
+            {
+                'id': self.ids[indice_doc],
+                'documento': self.documentos[indice_doc],
+                'metadata': self.metadatas[indice_doc],
+                'similitud': min(puntaje / puntaje_maximo, 1.0),
+                'tipo': 'keyword',
+                'ranking': posicion + 1
+            }
+            for posicion, (indice_doc, puntaje) in enumerate(mejores)
+        ]
@@ -0,0 +1,529 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from app.core.admission import AdmisionRechazada, get_admission_controller
+
+logger = logging.getLogger(__name__)
+
+ESTADO_CERRADO = "cerrado"
+ESTADO_ABIERTO = "abierto"
+ESTADO_SEMIABIERTO = "semiabierto"
+
+
+class LLMGatewayError(Exception):
+    """Ningún proveedor de la política pudo responder."""
+
+
+class LLMProvider(ABC):
+    """
+    Proveedor de LLM detrás del gateway.
+
+    Todos los proveedores reciben el mismo contexto estructurado (system,
+    user, pregunta, entidades, intención), o un prompt ya armado (system y
+    mensajes, como /query), y retornan el texto de la respuesta.
+    """
+
+    nombre: str = ""
+    modelo: str = ""
+
+    @property
+    def disponible(self) -> bool:
+        """True si el proveedor está configurado (p. ej. tiene API key)."""
+        return True
+
+    @abstractmethod
+    async def generar(
+        self,
+        system_context: str,
+        user_context: str,
+        pregunta: str,
+        entidades: List[dict],
+        intencion: str
+    ) -> str:
+        """Genera la respuesta para el contexto dado."""
+
+    @abstractmethod
+    async def generar_mensajes(
+        self,
+        system: str,
+        messages: List[dict],
+        max_tokens: int,
+        temperature: float
+    ) -> str:
+        """Genera la respuesta para un prompt ya armado (mensajes user/assistant)."""
+
+
+class AnthropicProvider(LLMProvider):
+    """Proveedor respaldado por AnthropicService."""
+
+    nombre = "anthropic"
+    modelo = "claude-haiku-4-5"
+
+    def __init__(self, service):
+        self.service = service
+
+    @property
+    def disponible(self) -> bool:
+        return self.service is not None and self.service.async_client is not None
+
+    async def generar(self, **kwargs) -> str:
+        return await self.service.chat_with_context_async(**kwargs)
+
+    async def generar_mensajes(self, **kwargs) -> str:
+        return await self.service.chat_with_messages_async(**kwargs)
+
+
+class OpenRouterProvider(LLMProvider):
+    """Proveedor respaldado por OpenRouterService."""
+
+    nombre = "openrouter"
+
+    def __init__(self, service, modelo: str):
+        self.service = service
+        self.modelo = modelo
+
+    @property
+    def disponible(self) -> bool:
+        return self.service is not None and self.service.async_client is not None
+
+    async def generar(self, **kwargs) -> str:
+        return await self.service.chat_with_context_async(**kwargs)
+
+    async def generar_mensajes(self, **kwargs) -> str:
+        return await self.service.chat_with_messages_async(**kwargs)
+
+
+class StubProvider(LLMProvider):
+    """
+    Proveedor local para pruebas de ruteo, hedging y circuit breakers.
+
+    No llama a ninguna API: espera `latencia_segundos` y retorna una
+    respuesta fija, o falla con probabilidad `tasa_fallos`.
+    """
+
+    def __init__(
+        self,
+        nombre: str = "stub",
+        respuesta: str = "Respuesta de prueba",
+        latencia_segundos: float = 0.0,
+        tasa_fallos: float = 0.0
+    ):
+        self.nombre = nombre
+        self.modelo = nombre
+        self.respuesta = respuesta
+        self.latencia_segundos = latencia_segundos
+        self.tasa_fallos = tasa_fallos
+
+    async def generar(self, **kwargs) -> str:
+        if self.latencia_segundos > 0:
+            await asyncio.sleep(self.latencia_segundos)
+        if self.tasa_fallos and random.random() < self.tasa_fallos:
+            raise RuntimeError(f"Fallo simulado en {self.nombre}")
+        return self.respuesta
+
+    async def generar_mensajes(self, **kwargs) -> str:
+        return await self.generar(**kwargs)
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker por proveedor.
+
+    Tras `umbral_fallos` fallos consecutivos se abre y rechaza llamadas
+    durante `enfriamiento_segundos`; luego deja pasar una llamada de prueba
+    (semiabierto) que lo cierra si tiene éxito o lo reabre si falla.
+    """
+
+    def __init__(self, umbral_fallos: int = 5, enfriamiento_segundos: float = 30.0):
+        self.umbral_fallos = umbral_fallos
+        self.enfriamiento_segundos = enfriamiento_segundos
+        self.estado = ESTADO_CERRADO
+        self.fallos_consecutivos = 0
+        self._abierto_hasta = 0.0
+        self._prueba_en_curso = False
+        self._lock = threading.Lock()
+
+    @property
+    def rechaza(self) -> bool:
+        """True si hoy rechazaría una llamada (sin reservar la prueba)."""
+        with self._lock:
+            if self.estado == ESTADO_ABIERTO:
+                return time.monotonic() < self._abierto_hasta
+            return self.estado == ESTADO_SEMIABIERTO and self._prueba_en_curso
+
+    def permite(self) -> bool:
+        """Indica si se puede llamar al proveedor (reserva la prueba si está semiabierto)."""
+        with self._lock:
+            if self.estado == ESTADO_ABIERTO and time.monotonic() >= self._abierto_hasta:
+                self.estado = ESTADO_SEMIABIERTO
+                self._prueba_en_curso = False
+
+            if self.estado == ESTADO_CERRADO:
+                return True
+            if self.estado == ESTADO_SEMIABIERTO and not self._prueba_en_curso:
+                self._prueba_en_curso = True
+                return True
+            return False
+
+    def registrar_exito(self) -> None:
+        with self._lock:
+            self.estado = ESTADO_CERRADO
+            self.fallos_consecutivos = 0
+            self._prueba_en_curso = False
+
+    def registrar_fallo(self) -> None:
+        with self._lock:
+            self.fallos_consecutivos += 1
+            if self.estado == ESTADO_SEMIABIERTO or self.fallos_consecutivos >= self.umbral_fallos:
+                self.estado = ESTADO_ABIERTO
+                self._abierto_hasta = time.monotonic() + self.enfriamiento_segundos
+            self._prueba_en_curso = False
+
+    def liberar(self) -> None:
+        """Libera la prueba reservada si la llamada se canceló sin resultado."""
+        with self._lock:
+            self._prueba_en_curso = False
+
+
+class LatencyTracker:
+    """Ventana deslizante de latencias exitosas de un proveedor."""
+
+    def __init__(self, ventana: int = 200):
+        self._latencias = deque(maxlen=ventana)
+        self._lock = threading.Lock()
+
+    def registrar(self, segundos: float) -> None:
+        with self._lock:
+            self._latencias.append(segundos)
+
+    @property
+    def muestras(self) -> int:
+        return len(self._latencias)
+
+    def percentil(self, p: float) -> Optional[float]:
+        """Percentil p (0-100) de la ventana o None si está vacía."""
+        with self._lock:
+            if not self._latencias:
+                return None
+            ordenadas = sorted(self._latencias)
+        indice = min(len(ordenadas) - 1, int(round(p / 100 * (len(ordenadas) - 1))))
+        return ordenadas[indice]
+
+
+# Llamada a un proveedor: recibe el proveedor y retorna el texto
+_Llamada = Callable[[LLMProvider], Awaitable[str]]
+
+
+@dataclass
+class PoliticaRuteo:
+    """
+    Política de ruteo de un endpoint.
+
+    Attributes:
+        proveedores: Proveedores en orden de preferencia (primario primero)
+        hedging: Si True, lanza el secundario cuando el primario supera su p95
+        timeout_segundos: Timeout de cada llamada a un proveedor
+    """
+    proveedores: List[str]
+    hedging: bool = False
+    timeout_segundos: float = 30.0
+
+
+@dataclass
+class RespuestaGateway:
+    """Respuesta del gateway con el proveedor que la generó."""
+    texto: str
+    proveedor: str
+    modelo: str
+    latencia: float
+    hedged: bool = False
+    intentos: List[str] = field(default_factory=list)
+
+
+@dataclass
+class _EstadoProveedor:
+    proveedor: LLMProvider
+    breaker: CircuitBreaker
+    latencias: LatencyTracker
+    exitos: int = 0
+    fallos: int = 0
+    rechazos: int = 0
+
+
+class LLMGateway:
+    """
+    Gateway unificado de LLM con ruteo por endpoint.
+
+    Para cada llamada toma la política del endpoint, descarta proveedores no
+    configurados o con el circuit breaker abierto y llama al primario. Si
+    falla, pasa al siguiente. Con hedging, si el primario no respondió
+    dentro de su p95 se lanza el secundario en paralelo y se usa la primera
+    respuesta exitosa (la otra se cancela).
+    """
+
+    def __init__(
+        self,
+        proveedores: List[LLMProvider],
+        politicas: Dict[str, PoliticaRuteo],
+        umbral_fallos: int = 5,
+        enfriamiento_segundos: float = 30.0,
+        hedge_min_muestras: int = 20,
+        hedge_retardo_por_defecto: float = 3.0
+    ):
+        """
+        Inicializa el gateway.
+
+        Args:
+            proveedores: Proveedores registrados (por nombre)
+            politicas: Política de ruteo por endpoint ("default" como respaldo)
+            umbral_fallos: Fallos consecutivos que abren el circuit breaker
+            enfriamiento_segundos: Tiempo que el breaker permanece abierto
+            hedge_min_muestras: Muestras necesarias para confiar en el p95
+            hedge_retardo_por_defecto: Espera antes del hedge sin p95 confiable
+        """
+        self._proveedores = {
+            proveedor.nombre: _EstadoProveedor(
+                proveedor=proveedor,
+                breaker=CircuitBreaker(umbral_fallos, enfriamiento_segundos),
+                latencias=LatencyTracker()
+            )
+            for proveedor in proveedores
+        }
+        self.politicas = politicas
+        self.hedge_min_muestras = hedge_min_muestras
+        self.hedge_retardo_por_defecto = hedge_retardo_por_defecto
+        self.hedges_lanzados = 0
+        self.hedges_ganados = 0
+
+    def politica(self, endpoint: str) -> PoliticaRuteo:
+        """Retorna la política del endpoint o la de "default"."""
+        politica = self.politicas.get(endpoint) or self.politicas.get("default")
+        if politica is None:
+            raise LLMGatewayError(f"No hay política de ruteo para '{endpoint}'")
+        return politica
+
+    def disponible(self, endpoint: str) -> bool:
+        """True si algún proveedor de la política está configurado."""
+        return any(
+            nombre in self._proveedores and self._proveedores[nombre].proveedor.disponible
+            for nombre in self.politica(endpoint).proveedores
+        )
+
+    def _retardo_hedge(self, estado: _EstadoProveedor, politica: PoliticaRuteo) -> float:
+        """Espera antes de lanzar el secundario: p95 del primario (o el valor por defecto)."""
+        p95 = estado.latencias.percentil(95) if estado.latencias.muestras >= self.hedge_min_muestras else None
+        retardo = p95 if p95 is not None else self.hedge_retardo_por_defecto
+        return min(retardo, politica.timeout_segundos)
+
+    async def _llamar(self, estado: _EstadoProveedor, politica: PoliticaRuteo, llamada: _Llamada) -> RespuestaGateway:
+        """Llama a un proveedor registrando latencia y resultado en su breaker."""
+        nombre = estado.proveedor.nombre
+        if not estado.breaker.permite():
+            estado.rechazos += 1
+            raise LLMGatewayError(f"{nombre}: circuit breaker abierto")
+
+        inicio = time.monotonic()
+        try:
+            texto = await asyncio.wait_for(llamada(estado.proveedor), politica.timeout_segundos)
+        except (asyncio.CancelledError, AdmisionRechazada):
+            # Sin turno en el control de admisión no es un fallo del proveedor
+            estado.breaker.liberar()
+            raise
+        except Exception as e:
+            estado.breaker.registrar_fallo()
+            estado.fallos += 1
+            if isinstance(e, asyncio.TimeoutError):
+                e = TimeoutError(f"sin respuesta en {politica.timeout_segundos:.1f}s")
+            logger.warning(f"⚠️ Proveedor '{nombre}' falló ({time.monotonic() - inicio:.2f}s): {e}")
+            raise LLMGatewayError(f"{nombre}: {e}") from e
+
+        latencia = time.monotonic() - inicio
+        estado.breaker.registrar_exito()
+        estado.latencias.registrar(latencia)
+        estado.exitos += 1
+        return RespuestaGateway(texto=texto, proveedor=nombre, modelo=estado.proveedor.modelo, latencia=latencia)
+
+    def _candidatos(self, politica: PoliticaRuteo) -> List[_EstadoProveedor]:
+        """Proveedores de la política configurados y con el breaker cerrado (en orden)."""
+        candidatos = []
+        for nombre in politica.proveedores:
+            estado = self._proveedores.get(nombre)
+            if estado is None or not estado.proveedor.disponible:
+                continue
+            if estado.breaker.rechaza:
+                estado.rechazos += 1
+                logger.info(f"🔌 Circuit breaker de '{nombre}' abierto, se omite")
+                continue
+            candidatos.append(estado)
+        return candidatos
+
+    async def generar(self, endpoint: str, **kwargs) -> RespuestaGateway:
+        """
+        Genera una respuesta según la política del endpoint.
+
+        Args:
+            endpoint: Nombre de la política ("anthropic", "openrouter"...)
+            **kwargs: system_context, user_context, pregunta, entidades, intencion
+
+        Returns:
+            RespuestaGateway con el texto y el proveedor que respondió
+
+        Raises:
+            LLMGatewayError: Si ningún proveedor pudo responder
+            AdmisionRechazada: Si la llamada no obtuvo turno en el control
+                de admisión (no se intenta otro proveedor: comparten el cupo)
+        """
+        return await self._rutear(endpoint, lambda proveedor: proveedor.generar(**kwargs))
+
+    async def generar_mensajes(
+        self,
+        endpoint: str,
+        system: str,
+        messages: List[dict],
+        max_tokens: int,
+        temperature: float
+    ) -> RespuestaGateway:
+        """
+        Igual que `generar`, para un prompt ya armado (system y mensajes).
+
+        Raises:
+            LLMGatewayError: Si ningún proveedor pudo responder
+            AdmisionRechazada: Si la llamada no obtuvo turno en el control de admisión
+        """
+        return await self._rutear(endpoint, lambda proveedor: proveedor.generar_mensajes(
+            system=system,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature
+        ))
+
+    async def _rutear(self, endpoint: str, llamada: _Llamada) -> RespuestaGateway:
+        """Aplica la política del endpoint (hedging y failover) a la llamada."""
+        politica = self.politica(endpoint)
+        candidatos = self._candidatos(politica)
+        if not candidatos:
+            raise LLMGatewayError(f"Ningún proveedor disponible para '{endpoint}' ({politica.proveedores})")
+
+        errores: List[str] = []
+        intentos: List[str] = []
+
+        # Con llamadas esperando turno, un hedge solo añadiría carga
+        if politica.hedging and len(candidatos) >= 2 and not get_admission_controller().saturado:
+            respuesta = await self._generar_con_hedging(candidatos[0], candidatos[1], politica, llamada, errores, intentos)
+            if respuesta is not None:
+                return respuesta
+            restantes = candidatos[2:]
+        else:
+            restantes = candidatos
+
+        # Failover secuencial
+        for estado in restantes:
+            intentos.append(estado.proveedor.nombre)
+            try:
+                respuesta = await self._llamar(estado, politica, llamada)
+                respuesta.intentos = intentos
+                return respuesta
+            except LLMGatewayError as e:
+                errores.append(str(e))
+
+        raise LLMGatewayError(f"Todos los proveedores fallaron para '{endpoint}': {'; '.join(errores)}")
+
+    async def _generar_con_hedging(
+        self,
+        primario: _EstadoProveedor,
+        secundario: _EstadoProveedor,
+        politica: PoliticaRuteo,
+        llamada: _Llamada,
+        errores: List[str],
+        intentos: List[str]
+    ) -> Optional[RespuestaGateway]:
+        """
+        Carrera primario/secundario.
+
+        Returns:
+            Primera respuesta exitosa o None si ambos fallaron
+        """
+        intentos.append(primario.proveedor.nombre)
+        tarea_primario = asyncio.create_task(self._llamar(primario, politica, llamada))
+        hechas, _ = await asyncio.wait({tarea_primario}, timeout=self._retardo_hedge(primario, politica))
+
+        if hechas and tarea_primario.exception() is None:
+            respuesta = tarea_primario.result()
+            respuesta.intentos = intentos
+            return respuesta
+        if hechas and isinstance(tarea_primario.exception(), AdmisionRechazada):
+            raise tarea_primario.exception()
+
+        pendientes = set() if hechas else {tarea_primario}
+        if hechas:
+            errores.append(str(tarea_primario.exception()))
+        else:
+            self.hedges_lanzados += 1
+            logger.info(f"🏁 '{primario.proveedor.nombre}' superó su p95, lanzando hedge a '{secundario.proveedor.nombre}'")
+
+        intentos.append(secundario.proveedor.nombre)
+        tarea_secundario = asyncio.create_task(self._llamar(secundario, politica, llamada))
+        pendientes.add(tarea_secundario)
+
+        try:
+            while pendientes:
+                hechas, pendientes = await asyncio.wait(pendientes, return_when=asyncio.FIRST_COMPLETED)
+                for tarea in hechas:
+                    if tarea.exception() is not None:
+                        errores.append(str(tarea.exception()))
+                        continue
+                    respuesta = tarea.result()
+                    respuesta.hedged = tarea is tarea_secundario and tarea_primario in pendientes
+                    if respuesta.hedged:
+                        self.hedges_ganados += 1
+                    respuesta.intentos = intentos
+                    return respuesta
+        finally:
+            for tarea in pendientes:
+                tarea.cancel()
+
+        return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retorna estadísticas por proveedor y de hedging.
+
+        Returns:
+            Dict con estado del breaker, latencias p50/p95 y contadores
+        """
+        proveedores = {}
+        for nombre, estado in self._proveedores.items():
+            p50 = estado.latencias.percentil(50)
+            p95 = estado.latencias.percentil(95)
+            proveedores[nombre] = {
+                "disponible": estado.proveedor.disponible,
+                "modelo": estado.proveedor.modelo,
+                "circuit_breaker": estado.breaker.estado,
+                "fallos_consecutivos": estado.breaker.fallos_consecutivos,
+                "exitos": estado.exitos,
+                "fallos": estado.fallos,
+                "rechazados_por_breaker": estado.rechazos,
+                "latencia_p50": round(p50, 3) if p50 is not None else None,
+                "latencia_p95": round(p95, 3) if p95 is not None else None,
+                "muestras": estado.latencias.muestras
+            }
+
+        return {
+            "proveedores": proveedores,
+            "politicas": {
+                endpoint: {
+                    "proveedores": politica.proveedores,
+                    "hedging": politica.hedging,
+                    "timeout_segundos": politica.timeout_segundos
+                }
+                for endpoint, politica in self.politicas.items()
+            },
+            "hedges_lanzados": self.hedges_lanzados,
+            "hedges_ganados": self.hedges_ganados
+        }
@@ -1,45 +1,81 @@
 import os
 import logging
-from typing import List, Dict, Optional
-from anthropic import Anthropic
+from typing import List, Dict, Optional, AsyncIterator
+from app.core.config import settings
+from app.core.concurrency import run_blocking
+from app.core.admission import AdmisionRechazada, get_admission_controller, marcar_respuesta_degradada
+from app.services.conversation_memory import ConversationMemory
+from app.services.context_builder import ContextBuilder
+from app.services.extractive_answer import ExtractiveAnswerEngine
+from app.services.llm_gateway import LLMGateway
 from app.utils.promps import PROMPT_TEMPLATE_QUERY, system_prompt
 
 logger = logging.getLogger(__name__)
 
+# Política de LLM_ROUTING_POLICIES para las respuestas de /query
+POLITICA_QUERY = "query"
+
 
 class LLMService:
     """Servicio para generar respuestas naturales usando Claude de Anthropic."""
 
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        memoria: Optional[ConversationMemory] = None,
+        extractor: Optional[ExtractiveAnswerEngine] = None,
+        gateway: Optional[LLMGateway] = None
+    ):
         """
         Inicializa el servicio LLM.
 
         Args:
             api_key: Clave API de Anthropic. Si no se proporciona, se busca en variables de entorno.
+            memoria: Memoria de conversación por sender_id. Sin ella, cada
+                consulta se responde sin historial.
+            extractor: Motor de respuestas extractivas. Responde sin Claude
+                cuando la confianza de la recuperación es muy alta y arma la
+                respuesta básica (sin API key, errores o modo degradado).
+            gateway: Gateway de LLM. Con él, las respuestas sin streaming
+                siguen la política "query" (failover y circuit breakers);
+                sin él, se llama directo a Claude.
         """
-        self.historial = []
+        self.memoria = memoria
+        self.extractor = extractor
+        self.gateway = gateway
+        self.context_builder = ContextBuilder(settings.LLM_CONTEXT_BUDGET_TOKENS)
         self.api_key = api_key or os.getenv('ANTHROPIC_API_KEY',"")
 
         if not self.api_key:
             logger.warning("⚠️ No se encontró ANTHROPIC_API_KEY. Usando respuestas básicas.")
             self.client = None
+            self.async_client = None
         else:
             try:
+                from anthropic import Anthropic, AsyncAnthropic
+
                 logger.info("🔑 Inicializando cliente Claude de Anthropic")
-                logger.info(self.api_key)
-                self.client = Anthropic(api_key='sk-ant-REDACTED')
+                self.client = Anthropic(api_key=self.api_key)
+                self.async_client = AsyncAnthropic(
+                    api_key=self.api_key,
+                    timeout=settings.LLM_TIMEOUT_SECONDS
+                )
             except Exception as e:
                 logger.error(f"❌ Error inicializando Claude: {e}")
                 self.client = None
+                self.async_client = None
     
-    def limpiar_historial(self):
-        self.historial = []
+    def limpiar_historial(self, sender_id: str) -> None:
+        """Elimina el historial de conversación de un usuario."""
+        if self.memoria is not None:
+            self.memoria.limpiar(sender_id)
 
     def generar_respuesta_natural(
         self,
         consulta: str,
         articulos_relevantes: List[Dict],
-        confianza_promedio: float
+        confianza_promedio: float,
+        sender_id: Optional[str] = None
     ) -> str:
         """
         Genera una respuesta natural y conversacional basada en los artículos encontrados.
@@ -48,6 +84,7 @@ class LLMService:
             consulta: Pregunta original del usuario
             articulos_relevantes: Lista de artículos encontrados en ChromaDB
             confianza_promedio: Nivel de confianza promedio de la búsqueda
+            sender_id: Usuario cuya conversación se usa como historial (opcional)
 
         Returns:
             str: Respuesta natural y conversacional
@@ -61,29 +98,18 @@ class LLMService:
         if not articulos_relevantes or confianza_promedio < 0.3:
             return self._generar_respuesta_sin_resultados(consulta)
 
+        respuesta_rapida = self._generar_respuesta_rapida(consulta, articulos_relevantes, confianza_promedio, sender_id)
+        if respuesta_rapida:
+            return respuesta_rapida
+
         try:
-            # Preparar contexto para Claude
-            contexto_articulos = self._preparar_contexto_articulos(articulos_relevantes)
-            # Prompt optimizado para respuestas sobre tránsito
-            prompt = self._construir_prompt(consulta, contexto_articulos, confianza_promedio)
-            logger.info(f"✅ PROMP : { prompt})")
-            logger.info(f"✅ PROMP : { prompt})")
-            
+            # Prompt con los artículos y el historial dentro del presupuesto de tokens
             response = self.client.messages.create(
-                model="claude-haiku-4-5",
-                max_tokens=300,
-                temperature=0.2,
-                system=consulta,  
-                messages=[
-                    *self.historial[-3:],
-                    {"role": "user", "content": prompt}
-                ]
+                **self._parametros_respuesta_natural(consulta, articulos_relevantes, confianza_promedio, sender_id)
             )
 
             respuesta_natural = response.content[0].text.strip()
-            # Actualiza historial
-            self.historial.append({"role": "user", "content":  prompt})
-            self.historial.append({"role": "assistant", "content":  respuesta_natural})
+            self._actualizar_historial(sender_id, consulta, respuesta_natural)
             logger.info(f"////////////////////////  respuesta_natural { respuesta_natural}")
             logger.info(f"✅ Respuesta generada con Claude (confianza: {confianza_promedio:.2f})")
 
@@ -92,22 +118,215 @@ class LLMService:
         except Exception as e:
             logger.error(f"❌ Error generando respuesta con Claude: {e}")
             return self._generar_respuesta_basica(consulta, articulos_relevantes, confianza_promedio)
+
+    async def generar_respuesta_natural_async(
+        self,
+        consulta: str,
+        articulos_relevantes: List[Dict],
+        confianza_promedio: float,
+        sender_id: Optional[str] = None
+    ) -> str:
+        """
+        Versión asíncrona de `generar_respuesta_natural`.
+
+        Las llamadas pasan por el gateway de LLM (política "query") y por el
+        control de admisión con prioridad interactiva: si no obtienen turno
+        antes del deadline se responde en modo degradado (respuesta básica
+        sin LLM).
+        """
+        if not self._llm_disponible():
+            marcar_respuesta_degradada()
+            return await run_blocking(self._generar_respuesta_basica, consulta, articulos_relevantes, confianza_promedio)
+
+        if not articulos_relevantes or confianza_promedio < 0.3:
+            return await self._generar_respuesta_sin_resultados_async(consulta)
+
+        respuesta_rapida = await run_blocking(
+            self._generar_respuesta_rapida, consulta, articulos_relevantes, confianza_promedio, sender_id
+        )
+        if respuesta_rapida:
+            return respuesta_rapida
+
+        try:
+            respuesta_natural = (await self._crear_mensaje_async(
+                self._parametros_respuesta_natural(consulta, articulos_relevantes, confianza_promedio, sender_id)
+            )).strip()
+            self._actualizar_historial(sender_id, consulta, respuesta_natural)
+            logger.info(f"✅ Respuesta generada con LLM (confianza: {confianza_promedio:.2f})")
+
+            return respuesta_natural
+
+        except AdmisionRechazada as e:
+            logger.warning(f"🚦 {e}. Respondiendo en modo degradado")
+            marcar_respuesta_degradada()
+            return await run_blocking(
+                self._generar_respuesta_basica, consulta, articulos_relevantes, confianza_promedio, "degradado"
+            )
+        except Exception as e:
+            logger.error(f"❌ Error generando respuesta con Claude: {e}")
+            marcar_respuesta_degradada()
+            return await run_blocking(self._generar_respuesta_basica, consulta, articulos_relevantes, confianza_promedio)
+
+    async def generar_respuesta_natural_stream(
+        self,
+        consulta: str,
+        articulos_relevantes: List[Dict],
+        confianza_promedio: float,
+        sender_id: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Versión en streaming de `generar_respuesta_natural_async`.
+
+        Emite los fragmentos de texto a medida que Claude los genera. Si la
+        llamada falla antes del primer fragmento, emite la respuesta básica.
+        No pasa por el gateway: un stream ya emitido no puede continuar en
+        otro proveedor, así que siempre usa Claude directamente.
+
+        Yields:
+            Fragmentos de texto de la respuesta
+        """
+        if not self.async_client:
+            marcar_respuesta_degradada()
+            yield await run_blocking(self._generar_respuesta_basica, consulta, articulos_relevantes, confianza_promedio)
+            return
+
+        if not articulos_relevantes or confianza_promedio < 0.3:
+            yield await self._generar_respuesta_sin_resultados_async(consulta)
+            return
+
+        respuesta_rapida = await run_blocking(
+            self._generar_respuesta_rapida, consulta, articulos_relevantes, confianza_promedio, sender_id
+        )
+        if respuesta_rapida:
+            yield respuesta_rapida
+            return
+
+        partes = []
+        try:
+            async with get_admission_controller().admitir():
+                async with self.async_client.messages.stream(
+                    **self._parametros_respuesta_natural(consulta, articulos_relevantes, confianza_promedio, sender_id)
+                ) as stream:
+                    async for texto in stream.text_stream:
+                        partes.append(texto)
+                        yield texto
+
+            self._actualizar_historial(sender_id, consulta, "".join(partes).strip())
+            logger.info(f"✅ Respuesta generada con Claude en streaming (confianza: {confianza_promedio:.2f})")
+
+        except AdmisionRechazada as e:
+            logger.warning(f"🚦 {e}. Respondiendo en modo degradado")
+            marcar_respuesta_degradada()
+            yield await run_blocking(
+                self._generar_respuesta_basica, consulta, articulos_relevantes, confianza_promedio, "degradado"
+            )
+        except Exception as e:
+            logger.error(f"❌ Error generando respuesta con Claude en streaming: {e}")
+            # Respuesta básica o cortada: no se cachea
+            marcar_respuesta_degradada()
+            if not partes:
+                yield await run_blocking(self._generar_respuesta_basica, consulta, articulos_relevantes, confianza_promedio)
+
+    def _parametros_respuesta_natural(
+        self,
+        consulta: str,
+        articulos: List[Dict],
+        confianza: float,
+        sender_id: Optional[str] = None
+    ) -> Dict:
+        """
+        Parámetros de messages.create para la respuesta natural.
+
+        El prompt se ensambla con el ContextBuilder: instrucciones y consulta,
+        luego los artículos en orden de relevancia y por último el historial
+        del usuario, recortando lo que exceda LLM_CONTEXT_BUDGET_TOKENS.
+        """
+        historial = []
+        if sender_id and self.memoria is not None:
+            historial = self.memoria.obtener(sender_id)
+
+        contexto = self.context_builder.construir(
+            system=consulta,
+            pregunta=self._construir_prompt(consulta, "", confianza),
+            fragmentos=self._preparar_contexto_articulos(articulos),
+            turnos=historial
+        )
+        prompt = self._construir_prompt(consulta, "".join(contexto.fragmentos), confianza)
+
+        return {
+            "model": "claude-haiku-4-5",
+            "max_tokens": 300,
+            "temperature": 0.2,
+            "system": contexto.system,
+            "messages": [
+                *contexto.turnos,
+                {"role": "user", "content": prompt}
+            ]
+        }
+
+    def _llm_disponible(self) -> bool:
+        """True si hay Claude directo o algún proveedor de la política "query"."""
+        if self.gateway is not None and self.gateway.disponible(POLITICA_QUERY):
+            return True
+        return self.async_client is not None
+
+    async def _crear_mensaje_async(self, parametros: Dict) -> str:
+        """
+        Genera el texto para parámetros de messages.create.
+
+        Con gateway, la llamada sigue la política "query" de
+        LLM_ROUTING_POLICIES y el modelo lo decide cada proveedor; sin él,
+        va directo a Claude. En ambos casos pasa por el control de admisión.
+
+        Raises:
+            AdmisionRechazada: Si la llamada no obtuvo turno a tiempo
+            LLMGatewayError: Si ningún proveedor pudo responder
+        """
+        if self.gateway is not None and self.gateway.disponible(POLITICA_QUERY):
+            respuesta = await self.gateway.generar_mensajes(
+                POLITICA_QUERY,
+                system=parametros.get("system", ""),
+                messages=parametros["messages"],
+                max_tokens=parametros["max_tokens"],
+                temperature=parametros["temperature"]
+            )
+            logger.info(f"   Proveedor: {respuesta.proveedor} (intentos: {respuesta.intentos}, hedged: {respuesta.hedged})")
+            return respuesta.texto
+
+        async with get_admission_controller().admitir():
+            response = await self.async_client.messages.create(**parametros)
+        return response.content[0].text
+
+    def _actualizar_historial(self, sender_id: Optional[str], consulta: str, respuesta: str) -> None:
+        """
+        Agrega el intercambio a la conversación del usuario.
+
+        Se guarda la pregunta original, no el prompt con los artículos, para
+        no reenviar contexto ya obsoleto en los siguientes turnos.
+        """
+        if sender_id and self.memoria is not None:
+            self.memoria.registrar_intercambio(sender_id, consulta, respuesta)
     
-    def _preparar_contexto_articulos(self, articulos: List[Dict]) -> str:
-        """Prepara el contexto de artículos para el prompt."""
-        contexto = ""
+    def _preparar_contexto_articulos(self, articulos: List[Dict]) -> List[str]:
+        """
+        Prepara un bloque de contexto por artículo, en orden de relevancia.
+        El recorte lo decide el ContextBuilder según el presupuesto.
+        """
+        bloques = []
 
-        for i, articulo in enumerate(articulos[:3], 1):
+        for i, articulo in enumerate(articulos, 1):
             metadata = articulo['metadata']
             contenido = articulo['documento']
             similitud = articulo['similitud']
+            etiqueta = "Contenido (extractos)" if 'fragmentos' in articulo else "Contenido"
 
-            contexto += f"\n--- ARTÍCULO {i} (Relevancia: {similitud:.0%}) ---\n"
-            contexto += f"Número: {metadata['numero_articulo']}\n"
-            contexto += f"Título: {metadata.get('titulo', 'Sin título')}\n"
-            contexto += f"Contenido: {contenido[:500]}...\n"
+            bloque = f"\n--- ARTÍCULO {i} (Relevancia: {similitud:.0%}) ---\n"
+            bloque += f"Número: {metadata['numero_articulo']}\n"
+            bloque += f"Título: {metadata.get('titulo', 'Sin título')}\n"
+            bloque += f"{etiqueta}: {contenido}\n"
+            bloques.append(bloque)
 
-        return contexto
+        return bloques
 
     def _construir_prompt(self, consulta: str, contexto: str, confianza: float) -> str:
         """Construye el prompt optimizado para Claude."""
@@ -117,14 +336,10 @@ class LLMService:
         return prompt
 
     
-    def _generar_respuesta_sin_resultados(self, consulta: str) -> str:
-        """Genera una respuesta amable cuando no se encuentran resultados relevantes."""
-
-        if not self.client:
-            return self._respuesta_sin_resultados_basica()
-
-        try:
-            prompt = f"""Eres TránsitoBot, un asistente virtual especializado en normas de tránsito de Colombia.
+    @staticmethod
+    def _prompt_sin_resultados(consulta: str) -> str:
+        """Prompt para responder cuando no hay artículos relevantes."""
+        return f"""Eres TránsitoBot, un asistente virtual especializado en normas de tránsito de Colombia.
 
 Un usuario preguntó: "{consulta}"
 
@@ -139,6 +354,15 @@ Responde de manera amable y profesional:
 
 Máximo 150 palabras."""
 
+    def _generar_respuesta_sin_resultados(self, consulta: str) -> str:
+        """Genera una respuesta amable cuando no se encuentran resultados relevantes."""
+
+        if not self.client:
+            return self._respuesta_sin_resultados_basica()
+
+        try:
+            prompt = self._prompt_sin_resultados(consulta)
+
             response = self.client.messages.create(
                 model="claude-haiku-4-5",
                 max_tokens=200,
@@ -152,12 +376,104 @@ Máximo 150 palabras."""
             logger.error(f"Error generando respuesta sin resultados: {e}")
             return self._respuesta_sin_resultados_basica()
 
-    def _generar_respuesta_basica(self, consulta: str, articulos: List[Dict], confianza: float) -> str:
-        """Genera respuesta básica mejorada sin LLM."""
+    async def _generar_respuesta_sin_resultados_async(self, consulta: str) -> str:
+        """Versión asíncrona de `_generar_respuesta_sin_resultados` (gateway y control de admisión)."""
+
+        if not self._llm_disponible():
+            marcar_respuesta_degradada()
+            return self._respuesta_sin_resultados_basica()
+
+        try:
+            respuesta = await self._crear_mensaje_async({
+                "model": "claude-haiku-4-5",
+                "max_tokens": 200,
+                "temperature": 0.4,
+                "messages": [{"role": "user", "content": self._prompt_sin_resultados(consulta)}]
+            })
+
+            return respuesta.strip()
+
+        except AdmisionRechazada as e:
+            logger.warning(f"🚦 {e}. Respondiendo en modo degradado")
+            marcar_respuesta_degradada()
+            return self._respuesta_sin_resultados_basica()
+        except Exception as e:
+            logger.error(f"Error generando respuesta sin resultados: {e}")
+            marcar_respuesta_degradada()
+            return self._respuesta_sin_resultados_basica()
+
+    def _generar_respuesta_rapida(
+        self,
+        consulta: str,
+        articulos: List[Dict],
+        confianza: float,
+        sender_id: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Camino rápido sin LLM para consultas con recuperación muy confiable.
+
+        Solo aplica con confianza >= EXTRACTIVE_FASTPATH_CONFIDENCE y sin
+        historial (una pregunta de seguimiento necesita el contexto que solo
+        resuelve Claude).
+
+        Returns:
+            Respuesta extractiva o None si se debe llamar a Claude
+        """
+        if (
+            self.extractor is None
+            or not settings.EXTRACTIVE_FASTPATH_ENABLED
+            or confianza < settings.EXTRACTIVE_FASTPATH_CONFIDENCE
+        ):
+            return None
+
+        if sender_id and self.memoria is not None and self.memoria.obtener(sender_id):
+            return None
+
+        try:
+            respuesta = self.extractor.responder(consulta, articulos, modo="rapido")
+        except Exception as e:
+            logger.error(f"❌ Error generando respuesta extractiva: {e}")
+            return None
+
+        if respuesta is None:
+            return None
+
+        self._actualizar_historial(sender_id, consulta, respuesta.texto)
+        logger.info(f"⚡ Respuesta extractiva sin LLM (confianza: {confianza:.2f}, puntaje: {respuesta.puntaje:.2f})")
+        return respuesta.texto
+
+    def _generar_respuesta_basica(
+        self,
+        consulta: str,
+        articulos: List[Dict],
+        confianza: float,
+        modo: str = "basico"
+    ) -> str:
+        """
+        Genera respuesta básica sin LLM.
+
+        Usa el motor extractivo si está disponible; si no, o si ninguna
+        oración es suficientemente relevante, el inicio del artículo
+        principal.
+
+        Args:
+            consulta: Pregunta del usuario
+            articulos: Artículos relevantes
+            confianza: Confianza promedio de la búsqueda
+            modo: "basico" o "degradado" (métricas del motor extractivo)
+        """
 
         if not articulos or confianza < 0.3:
             return self._respuesta_sin_resultados_basica()
 
+        if self.extractor is not None:
+            try:
+                respuesta = self.extractor.responder(consulta, articulos, modo=modo)
+                if respuesta is not None:
+                    return respuesta.texto + "\n\n¿Te gustaría que profundice en algún aspecto específico?"
+            except Exception as e:
+                logger.error(f"❌ Error generando respuesta extractiva: {e}")
+
         # Tomar el artículo más relevante
         articulo_principal = articulos[0]
         metadata = articulo_principal['metadata']
@@ -1,8 +1,8 @@
 import os
 import logging
 from typing import Dict, Optional, List
-import openai
 from app.core.config import settings
+from app.core.admission import AdmisionRechazada, get_admission_controller
 
 logger = logging.getLogger(__name__)
 
@@ -22,17 +22,47 @@ class OpenRouterService:
         if not self.api_key:
             logger.warning("⚠️ No se encontró OPENROUTER_API_KEY. El servicio no estará disponible.")
             self.client = None
+            self.async_client = None
         else:
             try:
+                import openai
+
                 logger.info("🔑 Inicializando cliente OpenRouter")
                 self.client = openai.OpenAI(
                     base_url=settings.OPENROUTER_BASE_URL,
                     api_key=self.api_key
                 )
+                self.async_client = openai.AsyncOpenAI(
+                    base_url=settings.OPENROUTER_BASE_URL,
+                    api_key=self.api_key,
+                    timeout=settings.LLM_TIMEOUT_SECONDS
+                )
                 logger.info(f"✅ Cliente OpenRouter inicializado con modelo: {settings.OPENROUTER_MODEL}")
             except Exception as e:
                 logger.error(f"❌ Error inicializando OpenRouter: {e}")
                 self.client = None
+                self.async_client = None
+
+    @staticmethod
+    def _construir_mensajes(
+        system_context: str,
+        user_context: str,
+        pregunta: str,
+        entidades: List[dict],
+        intencion: str
+    ) -> List[Dict[str, str]]:
+        """Construye los mensajes system/user en formato OpenAI."""
+        system_message = f"{system_context}\n\nContexto del usuario: {user_context}"
+
+        user_message = f"Pregunta: {pregunta}\n"
+        if entidades:
+            user_message += f"Entidades detectadas: {entidades}\n"
+        user_message += f"Intención: {intencion}"
+
+        return [
+            {"role": "system", "content": system_message},
+            {"role": "user", "content": user_message}
+        ]
 
     def chat_with_context(
         self,
@@ -70,21 +100,14 @@ class OpenRouterService:
             logger.info(f"   Pregunta: {pregunta[:100]}...")
             logger.info(f"   Entidades: {len(entidades)} detectadas")
 
-            # Construir mensaje del sistema completo
-            system_message = f"{system_context}\n\nContexto del usuario: {user_context}"
-
-            # Construir mensaje del usuario con metadatos
-            user_message = f"Pregunta: {pregunta}\n"
-            if entidades:
-                user_message += f"Entidades detectadas: {entidades}\n"
-            user_message += f"Intención: {intencion}"
+            # Construir mensajes del sistema y del usuario con metadatos
+            messages = self._construir_mensajes(
+                system_context, user_context, pregunta, entidades, intencion
+            )
 
             response = self.client.chat.completions.create(
                 model=settings.OPENROUTER_MODEL,
-                messages=[
-                    {"role": "system", "content": system_message},
-                    {"role": "user", "content": user_message}
-                ],
+                messages=messages,
                 max_tokens=settings.OPENROUTER_MAX_TOKENS,
                 temperature=settings.OPENROUTER_TEMPERATURE
             )
@@ -99,6 +122,97 @@ class OpenRouterService:
             logger.error(f"❌ Error generando respuesta con OpenRouter: {e}")
             raise Exception(f"Error al procesar la solicitud: {str(e)}")
 
+    async def chat_with_context_async(
+        self,
+        system_context: str,
+        user_context: str,
+        pregunta: str,
+        entidades: List[dict],
+        intencion: str
+    ) -> str:
+        """
+        Versión asíncrona de `chat_with_context` usando AsyncOpenAI.
+
+        Raises:
+            ValueError: Si el servicio no está disponible
+            AdmisionRechazada: Si la llamada no obtuvo turno a tiempo
+            Exception: Si hay un error en la generación
+        """
+        if not self.async_client:
+            raise ValueError("El servicio OpenRouter no está disponible. Verifica la configuración de la API key.")
+
+        try:
+            logger.info(f"📤 Enviando consulta a OpenRouter (async)")
+            logger.info(f"   Intención: {intencion}")
+            logger.info(f"   Pregunta: {pregunta[:100]}...")
+
+            messages = self._construir_mensajes(
+                system_context, user_context, pregunta, entidades, intencion
+            )
+
+            async with get_admission_controller().admitir():
+                response = await self.async_client.chat.completions.create(
+                    model=settings.OPENROUTER_MODEL,
+                    messages=messages,
+                    max_tokens=settings.OPENROUTER_MAX_TOKENS,
+                    temperature=settings.OPENROUTER_TEMPERATURE
+                )
+
+            answer = response.choices[0].message.content
+            logger.info(f"✅ Respuesta generada exitosamente: {len(answer)} caracteres")
+
+            return answer
+
+        except AdmisionRechazada:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Error generando respuesta con OpenRouter: {e}")
+            raise Exception(f"Error al procesar la solicitud: {str(e)}")
+
+    async def chat_with_messages_async(
+        self,
+        system: str,
+        messages: List[dict],
+        max_tokens: int,
+        temperature: float
+    ) -> str:
+        """
+        Genera una respuesta para un prompt ya armado (usado por /query a
+        través del gateway). Pasa por el control de admisión.
+
+        Args:
+            system: Instrucciones del sistema (puede ser vacío)
+            messages: Mensajes user/assistant (el formato coincide con el de OpenAI)
+            max_tokens: Tokens máximos de la respuesta
+            temperature: Temperatura de generación
+
+        Raises:
+            ValueError: Si el servicio no está disponible
+            AdmisionRechazada: Si la llamada no obtuvo turno a tiempo
+            Exception: Si hay un error en la generación
+        """
+        if not self.async_client:
+            raise ValueError("El servicio OpenRouter no está disponible. Verifica la configuración de la API key.")
+
+        mensajes = ([{"role": "system", "content": system}] if system else []) + list(messages)
+
+        try:
+            async with get_admission_controller().admitir():
+                response = await self.async_client.chat.completions.create(
+                    model=settings.OPENROUTER_MODEL,
+                    messages=mensajes,
+                    max_tokens=max_tokens,
+                    temperature=temperature
+                )
+
+            return response.choices[0].message.content
+
+        except AdmisionRechazada:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Error generando respuesta con OpenRouter: {e}")
+            raise Exception(f"Error al procesar la solicitud: {str(e)}")
+
     def verificar_disponibilidad(self) -> Dict[str, any]:
         """
         Verifica si el servicio OpenRouter está disponible.
@@ -0,0 +1,205 @@
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import List, Dict, Optional, Tuple
+from app.utils.text_normalization import normalizar_texto
+
+logger = logging.getLogger(__name__)
+
+
+class CrossEncoderReranker:
+    """
+    Etapa de reordenamiento con un cross-encoder multilingüe en CPU.
+
+    Puntúa cada par (consulta, artículo) de los mejores candidatos de la
+    búsqueda híbrida. Los puntajes se cachean por par, de modo que solo se
+    evalúan los pares nuevos. Si la evaluación supera el presupuesto de
+    latencia se devuelve el orden original; el cálculo termina en segundo
+    plano y alimenta la caché para las siguientes consultas.
+
+    Hay como máximo un trabajo en el hilo del reranker: mientras esté
+    ocupado (o cargando el modelo) las consultas nuevas no encolan trabajo
+    y se devuelven en el orden híbrido.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        max_candidatos: int = 10,
+        presupuesto_ms: float = 300,
+        cache_size: int = 10000
+    ):
+        """
+        Inicializa el reranker (el modelo se carga en el primer uso).
+
+        Args:
+            model_name: Modelo de CrossEncoder de sentence-transformers
+            max_candidatos: Número de candidatos a reordenar
+            presupuesto_ms: Latencia máxima antes de devolver el orden original
+            cache_size: Número máximo de pares (consulta, artículo) cacheados
+        """
+        self.model_name = model_name
+        self.max_candidatos = max_candidatos
+        self.presupuesto = presupuesto_ms / 1000.0
+        self.cache_size = cache_size
+
+        self._modelo = None
+        self._cache: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pendiente: Optional[Future] = None
+
+        # Métricas
+        self.invocaciones = 0
+        self.pares_cacheados = 0
+        self.pares_evaluados = 0
+        self.agotamientos = 0
+        self.omitidas = 0
+        self._latencia_total = 0.0
+
+    def _get_modelo(self):
+        if self._modelo is None:
+            from sentence_transformers import CrossEncoder
+
+            logger.info(f"Cargando cross-encoder: {self.model_name}")
+            self._modelo = CrossEncoder(self.model_name, max_length=512)
+        return self._modelo
+
+    def precargar(self) -> None:
+        """Carga el modelo sin crear el hilo de puntuación (seguro antes de un fork)."""
+        self._get_modelo()
+
+    def _enviar(self, funcion, *args) -> Optional[Future]:
+        """
+        Envía un trabajo al hilo del reranker si no hay otro en curso.
+
+        Returns:
+            Future del trabajo o None si el hilo está ocupado
+        """
+        with self._lock:
+            if self._pendiente is not None and not self._pendiente.done():
+                return None
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="reranker")
+            self._pendiente = self._executor.submit(funcion, *args)
+            return self._pendiente
+
+    @staticmethod
+    def _clave_articulo(articulo: Dict) -> str:
+        return articulo.get('id') or str(articulo['metadata'].get('numero_articulo'))
+
+    def _puntuar(self, consulta: str, pendientes: List[Dict]) -> Dict[str, float]:
+        """Evalúa con el cross-encoder los pares no cacheados y los guarda."""
+        pares = [(consulta, articulo['documento']) for articulo in pendientes]
+        logits = self._get_modelo().predict(pares, show_progress_bar=False)
+
+        puntajes = {}
+        clave_consulta = normalizar_texto(consulta)
+        with self._lock:
+            for articulo, logit in zip(pendientes, logits):
+                clave = self._clave_articulo(articulo)
+                puntaje = 1.0 / (1.0 + math.exp(-float(logit)))
+                puntajes[clave] = puntaje
+                self._cache[(clave_consulta, clave)] = puntaje
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            self.pares_evaluados += len(pendientes)
+
+        return puntajes
+
+    def reordenar(self, consulta: str, candidatos: List[Dict]) -> List[Dict]:
+        """
+        Reordena los mejores candidatos según el cross-encoder.
+
+        Args:
+            consulta: Query del usuario
+            candidatos: Resultados de la búsqueda híbrida ordenados
+
+        Returns:
+            Lista con los primeros `max_candidatos` reordenados (con
+            'puntaje_rerank') seguidos del resto en su orden original
+        """
+        if len(candidatos) < 2:
+            return candidatos
+
+        inicio = time.perf_counter()
+        cabeza = candidatos[:self.max_candidatos]
+        cola = candidatos[self.max_candidatos:]
+        clave_consulta = normalizar_texto(consulta)
+
+        puntajes = {}
+        pendientes = []
+        with self._lock:
+            self.invocaciones += 1
+            for articulo in cabeza:
+                clave = self._clave_articulo(articulo)
+                puntaje = self._cache.get((clave_consulta, clave))
+                if puntaje is None:
+                    pendientes.append(articulo)
+                else:
+                    self._cache.move_to_end((clave_consulta, clave))
+                    puntajes[clave] = puntaje
+            self.pares_cacheados += len(cabeza) - len(pendientes)
+
+        if pendientes:
+            if self._modelo is None:
+                # La carga del modelo excede cualquier presupuesto: se hace en
+                # segundo plano y esta consulta conserva el orden híbrido
+                self._enviar(self._get_modelo)
+                futuro = None
+            else:
+                futuro = self._enviar(self._puntuar, consulta, pendientes)
+            if futuro is None:
+                with self._lock:
+                    self.omitidas += 1
+                return candidatos
+
+            restante = max(self.presupuesto - (time.perf_counter() - inicio), 0)
+            try:
+                puntajes.update(futuro.result(timeout=restante))
+            except FutureTimeoutError:
+                # Si aún no empezó se descarta; si ya corre, termina y llena la caché
+                futuro.cancel()
+                with self._lock:
+                    self.agotamientos += 1
+                logger.warning("⏱️ Reranking excedió el presupuesto, usando orden híbrido")
+                return candidatos
+            except Exception as e:
+                logger.error(f"❌ Error en reranking: {e}")
+                return candidatos
+
+        reordenados = []
+        for articulo in cabeza:
+            reordenado = dict(articulo)
+            reordenado['puntaje_rerank'] = puntajes[self._clave_articulo(articulo)]
+            reordenados.append(reordenado)
+        reordenados.sort(key=lambda a: a['puntaje_rerank'], reverse=True)
+
+        with self._lock:
+            self._latencia_total += time.perf_counter() - inicio
+
+        return reordenados + cola
+
+    def get_stats(self) -> Dict:
+        """
+        Obtiene métricas del reranker.
+
+        Returns:
+            Diccionario con invocaciones, aciertos de caché y agotamientos de presupuesto
+        """
+        with self._lock:
+            completadas = self.invocaciones - self.agotamientos - self.omitidas
+            return {
+                'modelo': self.model_name,
+                'max_candidatos': self.max_candidatos,
+                'presupuesto_ms': self.presupuesto * 1000,
+                'invocaciones': self.invocaciones,
+                'pares_cacheados': self.pares_cacheados,
+                'pares_evaluados': self.pares_evaluados,
+                'agotamientos_presupuesto': self.agotamientos,
+                'omitidas_por_ocupacion': self.omitidas,
+                'latencia_promedio_ms': (self._latencia_total / completadas * 1000) if completadas else 0.0
+            }
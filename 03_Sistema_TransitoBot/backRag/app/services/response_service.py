@@ -1,6 +1,7 @@
 import logging
-from typing import List, Dict
+from typing import List, Dict, Optional, AsyncIterator
 from app.models import Source
+from app.core.admission import marcar_respuesta_degradada
 
 logger = logging.getLogger(__name__)
 
@@ -21,7 +22,8 @@ class ResponseService:
         self,
         consulta: str,
         articulos: List[Dict],
-        confianza_promedio: float
+        confianza_promedio: float,
+        sender_id: Optional[str] = None
     ) -> str:
         """
         Genera respuesta usando LLM o respuesta básica como fallback.
@@ -30,6 +32,7 @@ class ResponseService:
             consulta: Pregunta del usuario
             articulos: Artículos relevantes encontrados
             confianza_promedio: Nivel de confianza promedio
+            sender_id: Usuario de la conversación (opcional)
 
         Returns:
             Respuesta generada
@@ -46,7 +49,8 @@ class ResponseService:
             respuesta_llm = self.llm_service.generar_respuesta_natural(
                 consulta=consulta,
                 articulos_relevantes=articulos,
-                confianza_promedio=confianza_promedio
+                confianza_promedio=confianza_promedio,
+                sender_id=sender_id
             )
 
             # Si LLM genera respuesta más completa, usarla
@@ -59,6 +63,79 @@ class ResponseService:
 
         return respuesta_basica
 
+    async def generate_response_async(
+        self,
+        consulta: str,
+        articulos: List[Dict],
+        confianza_promedio: float,
+        sender_id: Optional[str] = None
+    ) -> str:
+        """
+        Versión asíncrona de `generate_response` (no bloquea el event loop).
+
+        Args:
+            consulta: Pregunta del usuario
+            articulos: Artículos relevantes encontrados
+            confianza_promedio: Nivel de confianza promedio
+            sender_id: Usuario de la conversación (opcional)
+
+        Returns:
+            Respuesta generada
+        """
+        if not articulos:
+            return "Lo siento, no encontré información específica sobre tu consulta en el código de tránsito. ¿Podrías reformular tu pregunta?"
+
+        respuesta_basica = "mensaje de prueba"
+
+        try:
+            respuesta_llm = await self.llm_service.generar_respuesta_natural_async(
+                consulta=consulta,
+                articulos_relevantes=articulos,
+                confianza_promedio=confianza_promedio,
+                sender_id=sender_id
+            )
+
+            if respuesta_llm and len(respuesta_llm) > len(respuesta_basica):
+                logger.info("✅ Respuesta generada con Claude LLM")
+                return respuesta_llm
+
+        except Exception as e:
+            logger.warning(f"⚠️ LLM falló, usando respuesta básica: {e}")
+
+        marcar_respuesta_degradada()
+        return respuesta_basica
+
+    async def generate_response_stream(
+        self,
+        consulta: str,
+        articulos: List[Dict],
+        confianza_promedio: float,
+        sender_id: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Versión en streaming de `generate_response_async`.
+
+        Args:
+            consulta: Pregunta del usuario
+            articulos: Artículos relevantes encontrados
+            confianza_promedio: Nivel de confianza promedio
+            sender_id: Usuario de la conversación (opcional)
+
+        Yields:
+            Fragmentos de texto de la respuesta
+        """
+        if not articulos:
+            yield "Lo siento, no encontré información específica sobre tu consulta en el código de tránsito. ¿Podrías reformular tu pregunta?"
+            return
+
+        async for texto in self.llm_service.generar_respuesta_natural_stream(
+            consulta=consulta,
+            articulos_relevantes=articulos,
+            confianza_promedio=confianza_promedio,
+            sender_id=sender_id
+        ):
+            yield texto
+
     def _generar_respuesta_contextual(self, consulta: str, articulos: List[Dict]) -> str:
         """
         Genera una respuesta contextual básica basada en los artículos encontrados.
@@ -1,5 +1,10 @@
 import logging
 from typing import List, Dict, Optional
+from app.services.keyword_index import KeywordIndex
+from app.services.reranker import CrossEncoderReranker
+from app.services.article_lookup import ArticleLookup
+from app.utils.text_normalization import tokenizar
+from app.utils.fragments import agrupar_fragmentos
 
 logger = logging.getLogger(__name__)
 
@@ -7,15 +12,46 @@ logger = logging.getLogger(__name__)
 class SearchService:
     """Servicio para realizar búsquedas híbridas (vectorial + keywords)."""
 
-    def __init__(self, db_manager):
+    # Peso relativo de los términos que provienen de sinónimos
+    PESO_SINONIMO = 0.5
+
+    GRANULARIDAD_ARTICULO = "articulo"
+    GRANULARIDAD_FRAGMENTO = "fragmento"
+
+    def __init__(
+        self,
+        db_manager,
+        keyword_index: Optional[KeywordIndex] = None,
+        reranker: Optional[CrossEncoderReranker] = None,
+        article_lookup: Optional[ArticleLookup] = None,
+        granularidad: str = GRANULARIDAD_ARTICULO,
+        max_fragmentos_por_articulo: int = 2
+    ):
         """
         Inicializa el servicio de búsqueda.
 
         Args:
             db_manager: Instancia de ChromaDBManager
+            keyword_index: Índice BM25 compartido. Si no se proporciona, se
+                construye a partir de la colección en la primera búsqueda.
+            reranker: Cross-encoder opcional para reordenar los candidatos
+            article_lookup: Índice por número de artículo para resolver
+                referencias explícitas ("artículo 131") sin búsqueda semántica
+            granularidad: "articulo" o "fragmento". Con fragmentos, cada
+                artículo retornado contiene solo los párrafos coincidentes.
+            max_fragmentos_por_articulo: Fragmentos por artículo (granularidad fragmento)
         """
         self.db_manager = db_manager
+        self.keyword_index = keyword_index
+        self.reranker = reranker
+        self.article_lookup = article_lookup
+        self.granularidad = granularidad
+        self.max_fragmentos_por_articulo = max_fragmentos_por_articulo
         self.synonyms = self._load_synonyms()
+        self._synonyms_tokenizados = {
+            tuple(tokenizar(clave)): [t for sinonimo in valores for t in tokenizar(sinonimo)]
+            for clave, valores in self.synonyms.items()
+        }
 
     def _load_synonyms(self) -> Dict[str, List[str]]:
         """Carga el diccionario de sinónimos para búsqueda mejorada."""
@@ -40,6 +76,10 @@ class SearchService:
         """
         Realiza búsqueda híbrida combinando vectorial y palabras clave.
 
+        Las referencias explícitas a artículos se resuelven primero por
+        número (similitud 1.0); la búsqueda semántica solo se ejecuta para
+        el resto de la consulta.
+
         Args:
             consulta: Query del usuario
             n_resultados: Número máximo de resultados a retornar
@@ -48,15 +88,74 @@ class SearchService:
         Returns:
             Dict con resultados encontrados
         """
+        directos = []
+        consulta_semantica = consulta
+
+        if self.article_lookup is not None:
+            numeros, resto = self.article_lookup.analizar(consulta)
+            directos = self.article_lookup.resolver(numeros)
+            if directos:
+                logger.info(f"🔢 Referencia directa a artículos: {[d['metadata'].get('numero_articulo') for d in directos]}")
+                consulta_semantica = resto if self.article_lookup.tiene_tema(resto) else None
+
+        # Los artículos nombrados se devuelven siempre, aunque superen n_resultados
+        articulos = list(directos)
+        restantes = n_resultados - len(articulos)
+
+        if consulta_semantica is not None and restantes > 0:
+            vistos = {a['metadata'].get('numero_articulo') for a in articulos}
+            for resultado in self._busqueda_semantica(consulta_semantica, restantes + len(articulos), umbral_confianza):
+                if len(articulos) >= n_resultados:
+                    break
+                if resultado['metadata'].get('numero_articulo') not in vistos:
+                    articulos.append(resultado)
+
+        return {
+            'consulta': consulta,
+            'total_encontrados': len(articulos),
+            'articulos': articulos,
+            'tiempo_busqueda': 0.1
+        }
+
+    def _busqueda_semantica(
+        self,
+        consulta: str,
+        n_resultados: int,
+        umbral_confianza: float
+    ) -> List[Dict]:
+        """
+        Combina búsqueda vectorial y por palabras clave (con reranking opcional).
+
+        Args:
+            consulta: Query del usuario
+            n_resultados: Número máximo de resultados a retornar
+            umbral_confianza: Umbral mínimo de similitud
+
+        Returns:
+            Lista de artículos ordenados por relevancia
+        """
+        # Con reranker se recuperan al menos tantos candidatos como reordena
+        n_candidatos = n_resultados
+        if self.reranker is not None:
+            n_candidatos = max(n_resultados, (self.reranker.max_candidatos + 1) // 2)
+
         # 1. Búsqueda vectorial con umbral más bajo
-        resultados_vectoriales = self.db_manager.buscar_articulos(
-            consulta=consulta,
-            n_resultados=n_resultados * 2,
-            umbral_confianza=max(0.2, umbral_confianza - 0.2)
-        )
+        if self.granularidad == self.GRANULARIDAD_FRAGMENTO:
+            resultados_vectoriales = self.db_manager.buscar_fragmentos(
+                consulta=consulta,
+                n_resultados=n_candidatos * 2,
+                umbral_confianza=max(0.2, umbral_confianza - 0.2),
+                max_fragmentos_por_articulo=self.max_fragmentos_por_articulo
+            )
+        else:
+            resultados_vectoriales = self.db_manager.buscar_articulos(
+                consulta=consulta,
+                n_resultados=n_candidatos * 2,
+                umbral_confianza=max(0.2, umbral_confianza - 0.2)
+            )
 
         # 2. Búsqueda por palabras clave
-        resultados_keywords = self._keyword_search(consulta, n_resultados)
+        resultados_keywords = self._keyword_search(consulta, n_candidatos)
 
         # 3. Combinar y eliminar duplicados
         resultados_combinados = self._merge_results(
@@ -64,12 +163,18 @@ class SearchService:
             resultados_keywords
         )
 
-        # 4. Ordenar por similitud y filtrar
+        # 4. Ordenar por similitud
         resultados_finales = sorted(
             resultados_combinados,
             key=lambda x: x['similitud'],
             reverse=True
         )
+
+        # 5. Reordenar los mejores candidatos con el cross-encoder
+        if self.reranker is not None:
+            resultados_finales = self.reranker.reordenar(consulta, resultados_finales)
+
+        # 6. Filtrar por umbral conservando el orden
         resultados_filtrados = [r for r in resultados_finales if r['similitud'] >= umbral_confianza]
 
         # Si no hay resultados con el umbral, aplicar lógica de fallback
@@ -79,63 +184,58 @@ class SearchService:
             if not resultados_filtrados:
                 resultados_filtrados = resultados_finales[:1]
 
-        return {
-            'consulta': consulta,
-            'total_encontrados': len(resultados_filtrados[:n_resultados]),
-            'articulos': resultados_filtrados[:n_resultados],
-            'tiempo_busqueda': 0.1
-        }
+        return resultados_filtrados[:n_resultados]
+
+    def _expandir_terminos(self, consulta: str) -> Dict[str, float]:
+        """
+        Tokeniza la consulta y la expande con sinónimos.
+
+        Args:
+            consulta: Query del usuario
+
+        Returns:
+            Diccionario término -> peso
+        """
+        terminos = {token: 1.0 for token in tokenizar(consulta)}
+
+        for clave, sinonimos in self._synonyms_tokenizados.items():
+            if clave and all(t in terminos for t in clave):
+                for sinonimo in sinonimos:
+                    terminos.setdefault(sinonimo, self.PESO_SINONIMO)
+
+        return terminos
+
+    def _get_keyword_index(self) -> Optional[KeywordIndex]:
+        """Retorna el índice BM25, construyéndolo si aún no existe."""
+        if self.keyword_index is None:
+            try:
+                self.keyword_index = KeywordIndex.desde_coleccion(self.db_manager.collection)
+            except Exception as e:
+                logger.error(f"Error construyendo índice de palabras clave: {e}")
+                return None
+        return self.keyword_index
 
     def _keyword_search(self, consulta: str, n_resultados: int) -> List[Dict]:
         """
-        Realiza búsqueda por palabras clave con sinónimos.
+        Realiza búsqueda por palabras clave (BM25) con sinónimos.
 
         Args:
             consulta: Query del usuario
             n_resultados: Número de resultados
 
         Returns:
-            Lista de artículos encontrados
+            Lista de artículos encontrados con similitud en [0, 1]. Si el
+            índice es de fragmentos, se agrupan por artículo padre.
         """
-        palabras_clave = consulta.lower().split()
-
-        # Expandir con sinónimos
-        for palabra in palabras_clave.copy():
-            if palabra in self.synonyms:
-                palabras_clave.extend(self.synonyms[palabra])
-
-        # Obtener todos los documentos
-        try:
-            todos_docs = self.db_manager.collection.get(include=['documents', 'metadatas'])
-        except Exception as e:
-            logger.error(f"Error obteniendo documentos: {e}")
+        indice = self._get_keyword_index()
+        if indice is None:
             return []
 
-        resultados_keywords = []
-        for doc, metadata in zip(todos_docs['documents'], todos_docs['metadatas']):
-            doc_lower = doc.lower()
-            score = 0
-
-            # Contar coincidencias con pesos
-            for palabra in palabras_clave:
-                if palabra in doc_lower:
-                    # Peso mayor si aparece en el título o al inicio
-                    if palabra in doc_lower[:200]:
-                        score += 2
-                    else:
-                        score += 1
-
-            if score > 0:
-                similitud_normalizada = min(score / (len(palabras_clave) * 2), 1.0)
-                resultados_keywords.append({
-                    'documento': doc,
-                    'metadata': metadata,
-                    'similitud': similitud_normalizada,
-                    'tipo': 'keyword',
-                    'ranking': 0
-                })
-
-        return resultados_keywords
+        resultados = indice.buscar(
+            self._expandir_terminos(consulta),
+            n_resultados * 2 * self.max_fragmentos_por_articulo
+        )
+        return agrupar_fragmentos(resultados, self.max_fragmentos_por_articulo)[:n_resultados * 2]
 
     def _merge_results(
         self,
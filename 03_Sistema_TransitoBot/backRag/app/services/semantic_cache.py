@@ -0,0 +1,156 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Dict, Optional
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticCache:
+    """
+    Caché semántica de respuestas del pipeline de consultas.
+
+    Cada entrada guarda el embedding normalizado de la consulta, el conjunto
+    de artículos recuperados y la respuesta generada. Una consulta nueva
+    reutiliza una respuesta si su similitud coseno con la consulta cacheada
+    supera el umbral y los artículos recuperados son los mismos. Las
+    entradas expiran por TTL y se desalojan por LRU al superar la capacidad.
+    """
+
+    def __init__(
+        self,
+        umbral_similitud: float = 0.95,
+        ttl_segundos: float = 3600,
+        max_entradas: int = 1000
+    ):
+        """
+        Inicializa la caché semántica.
+
+        Args:
+            umbral_similitud: Similitud coseno mínima para considerar un acierto
+            ttl_segundos: Tiempo de vida de cada entrada
+            max_entradas: Número máximo de entradas (LRU)
+        """
+        self.umbral_similitud = umbral_similitud
+        self.ttl_segundos = ttl_segundos
+        self.max_entradas = max_entradas
+
+        self._entradas: "OrderedDict[int, Dict]" = OrderedDict()
+        self._siguiente_id = 0
+        self._matriz: Optional[np.ndarray] = None
+        self._ids_matriz: List[int] = []
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _normalizar(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norma = np.linalg.norm(vector)
+        return vector / norma if norma > 0 else vector
+
+    def _purgar_expiradas(self, ahora: float) -> None:
+        """Elimina las entradas cuyo TTL venció (debe llamarse con el lock)."""
+        expiradas = [
+            id_entrada for id_entrada, entrada in self._entradas.items()
+            if ahora - entrada['creado'] > self.ttl_segundos
+        ]
+        for id_entrada in expiradas:
+            del self._entradas[id_entrada]
+        if expiradas:
+            self._matriz = None
+
+    def _obtener_matriz(self) -> Optional[np.ndarray]:
+        """Reconstruye la matriz de embeddings si cambió (debe llamarse con el lock)."""
+        if self._matriz is None and self._entradas:
+            self._ids_matriz = list(self._entradas.keys())
+            self._matriz = np.vstack([self._entradas[i]['embedding'] for i in self._ids_matriz])
+        return self._matriz
+
+    def buscar(self, embedding, articulos: List[str]) -> Optional[Dict]:
+        """
+        Busca una respuesta cacheada para una consulta.
+
+        Args:
+            embedding: Embedding de la consulta
+            articulos: Números de los artículos recuperados para la consulta
+
+        Returns:
+            Respuesta cacheada (dict de QueryResponse) o None
+        """
+        consulta = self._normalizar(embedding)
+        conjunto = frozenset(articulos)
+
+        with self._lock:
+            self._purgar_expiradas(time.time())
+            matriz = self._obtener_matriz()
+
+            if matriz is None:
+                self.misses += 1
+                return None
+
+            similitudes = matriz @ consulta
+            for posicion in np.argsort(-similitudes):
+                if similitudes[posicion] < self.umbral_similitud:
+                    break
+
+                id_entrada = self._ids_matriz[posicion]
+                entrada = self._entradas[id_entrada]
+                if entrada['articulos'] == conjunto:
+                    self._entradas.move_to_end(id_entrada)
+                    self.hits += 1
+                    logger.info(f"⚡ Acierto en caché semántica (similitud: {similitudes[posicion]:.3f})")
+                    return dict(entrada['respuesta'])
+
+            self.misses += 1
+            return None
+
+    def guardar(self, embedding, articulos: List[str], respuesta: Dict) -> None:
+        """
+        Guarda la respuesta generada para una consulta.
+
+        Args:
+            embedding: Embedding de la consulta
+            articulos: Números de los artículos recuperados
+            respuesta: Respuesta serializada (dict de QueryResponse)
+        """
+        with self._lock:
+            self._entradas[self._siguiente_id] = {
+                'embedding': self._normalizar(embedding),
+                'articulos': frozenset(articulos),
+                'respuesta': respuesta,
+                'creado': time.time()
+            }
+            self._siguiente_id += 1
+
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+
+            self._matriz = None
+
+    def limpiar(self) -> None:
+        """Vacía la caché."""
+        with self._lock:
+            self._entradas.clear()
+            self._matriz = None
+
+    def get_stats(self) -> Dict:
+        """
+        Obtiene estadísticas de uso de la caché.
+
+        Returns:
+            Diccionario con entradas, hits, misses y tasa de aciertos
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entradas': len(self._entradas),
+                'capacidad': self.max_entradas,
+                'umbral_similitud': self.umbral_similitud,
+                'ttl_segundos': self.ttl_segundos,
+                'hits': self.hits,
+                'misses': self.misses,
+                'tasa_aciertos': (self.hits / total) if total else 0.0
+            }
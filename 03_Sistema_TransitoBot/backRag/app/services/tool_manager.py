@@ -1,9 +1,72 @@
 import logging
-from typing import List, Dict, Any, Optional
+import threading
+import time
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from typing import List, Dict, Any, Optional, Tuple
+from app.core.concurrency import get_tool_executor
 from app.services.tools import AVAILABLE_TOOLS
 
 logger = logging.getLogger(__name__)
 
+# Límite de llamadas simultáneas por tool, compartido por todo el proceso:
+# cada request crea su propio ToolManager y un semáforo por instancia no
+# acotaría nada entre requests concurrentes
+_semaforos_tools: Dict[str, threading.BoundedSemaphore] = {}
+_semaforos_tools_lock = threading.Lock()
+
+
+def get_semaforo_tool(tool_name: str, limite: int) -> threading.BoundedSemaphore:
+    """
+    Retorna el semáforo del proceso para un tool, creándolo la primera vez.
+
+    Args:
+        tool_name: Nombre del tool
+        limite: Llamadas simultáneas permitidas (solo se usa al crearlo)
+
+    Returns:
+        Semáforo compartido por todos los ToolManager del proceso
+    """
+    with _semaforos_tools_lock:
+        semaforo = _semaforos_tools.get(tool_name)
+        if semaforo is None:
+            semaforo = threading.BoundedSemaphore(limite)
+            _semaforos_tools[tool_name] = semaforo
+        return semaforo
+
+
+# Llamadas que excedieron su timeout y siguen corriendo: un future no se
+# puede interrumpir, así que conservan su hilo del pool y su cupo del
+# semáforo hasta terminar. Si todos los cupos de un tool están colgados, no
+# se le envían más llamadas para no agotar el pool con hilos en espera.
+_colgadas_tools: Dict[str, int] = {}
+
+
+def registrar_llamada_colgada(tool_name: str, future) -> None:
+    """
+    Cuenta una llamada que excedió el timeout hasta que su future termine.
+
+    Args:
+        tool_name: Nombre del tool
+        future: Future de la llamada (o de la cadena de llamadas)
+    """
+    with _semaforos_tools_lock:
+        _colgadas_tools[tool_name] = _colgadas_tools.get(tool_name, 0) + 1
+
+    def _liberar(_):
+        with _semaforos_tools_lock:
+            _colgadas_tools[tool_name] -= 1
+            if not _colgadas_tools[tool_name]:
+                del _colgadas_tools[tool_name]
+        logger.info(f"🔓 Llamada colgada de '{tool_name}' terminó")
+
+    future.add_done_callback(_liberar)
+
+
+def get_llamadas_colgadas(tool_name: str) -> int:
+    """Llamadas de un tool que excedieron el timeout y siguen ejecutándose."""
+    with _semaforos_tools_lock:
+        return _colgadas_tools.get(tool_name, 0)
+
 
 class ToolManager:
     """
@@ -13,19 +76,43 @@ class ToolManager:
     - Registrar y mantener las tools disponibles
     - Proporcionar definiciones de tools en formato Anthropic
     - Ejecutar tools con los parámetros proporcionados por el LLM
+    - Ejecutar en paralelo las llamadas independientes de un mismo turno
+    - Reutilizar resultados de tools idempotentes
+
+    Se crea una instancia por request, por lo que la caché local
+    (`_cache_request`) vive lo que dura el loop agentic de ese request; la
+    caché compartida (`result_cache`) y los límites de concurrencia por tool
+    (`get_semaforo_tool`, `registrar_llamada_colgada`) persisten entre
+    requests.
     """
 
-    def __init__(self, db_repository=None, search_service=None):
+    def __init__(
+        self,
+        db_repository=None,
+        search_service=None,
+        result_cache=None,
+        email_outbox=None,
+        infraction_index=None
+    ):
         """
         Inicializa el ToolManager con las dependencias necesarias.
 
         Args:
             db_repository: Repositorio de base de datos (ChromaDB)
             search_service: Servicio de búsqueda híbrida
+            result_cache: ToolResultCache compartida (None desactiva la caché entre requests)
+            email_outbox: EmailOutbox para envío asíncrono (None envía de forma síncrona)
+            infraction_index: InfractionIndex de la tabla de infracciones
+                (None desactiva el tool consultar_infraccion)
         """
         self.db_repository = db_repository
         self.search_service = search_service
+        self.result_cache = result_cache
+        self.email_outbox = email_outbox
+        self.infraction_index = infraction_index
         self._tool_instances = {}
+        self._cache_request: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._cache_request_lock = threading.Lock()
         self._initialize_tools()
 
     def _initialize_tools(self):
@@ -44,9 +131,17 @@ class ToolManager:
             # Inicializar EmailSenderTool
             if "enviar_email" in AVAILABLE_TOOLS:
                 tool_class = AVAILABLE_TOOLS["enviar_email"]
-                self._tool_instances["enviar_email"] = tool_class()
+                self._tool_instances["enviar_email"] = tool_class(outbox=self.email_outbox)
                 logger.info("✅ Tool 'enviar_email' inicializado")
 
+            # Inicializar InfractionLookupTool si el índice de infracciones está cargado
+            if self.infraction_index is not None and "consultar_infraccion" in AVAILABLE_TOOLS:
+                tool_class = AVAILABLE_TOOLS["consultar_infraccion"]
+                self._tool_instances["consultar_infraccion"] = tool_class(
+                    infraction_index=self.infraction_index
+                )
+                logger.info("✅ Tool 'consultar_infraccion' inicializado")
+
             # Aquí se pueden agregar más tools en el futuro
 
             logger.info(f"🔧 ToolManager inicializado con {len(self._tool_instances)} tool(s)")
@@ -131,6 +226,13 @@ class ToolManager:
             # Obtener instancia del tool
             tool_instance = self._tool_instances[tool_name]
 
+            # Reutilizar el resultado si el tool es idempotente
+            clave = tool_instance.clave_cache(**tool_input) if tool_instance.idempotente else None
+            if clave is not None:
+                cacheado = self._buscar_en_cache(tool_instance, clave)
+                if cacheado is not None:
+                    return cacheado
+
             logger.info(f"🔧 Ejecutando tool '{tool_name}' con input: {tool_input}")
 
             # Ejecutar tool
@@ -138,6 +240,10 @@ class ToolManager:
 
             logger.info(f"✅ Tool '{tool_name}' ejecutado exitosamente")
 
+            if clave is not None:
+                self._guardar_en_cache(tool_instance, clave, result)
+                result = {**result, "cache": {"hit": False}}
+
             return result
 
         except Exception as e:
@@ -147,6 +253,160 @@ class ToolManager:
                 "error": f"Error al ejecutar el tool: {str(e)}"
             }
 
+    def _buscar_en_cache(self, tool_instance, clave: str) -> Optional[Dict[str, Any]]:
+        """
+        Busca un resultado en la caché del request y luego en la compartida.
+
+        Returns:
+            Resultado con metadata {"cache": {"hit": True, "nivel": ...}} o None
+        """
+        tool_name = tool_instance.name
+
+        with self._cache_request_lock:
+            resultado = self._cache_request.get((tool_name, clave))
+
+        nivel = "request"
+        if resultado is not None:
+            if self.result_cache is not None:
+                self.result_cache.registrar_hit_request(tool_name)
+        elif self.result_cache is not None:
+            resultado = self.result_cache.obtener(tool_name, clave, tool_instance.cache_ttl_segundos)
+            nivel = "global"
+            if resultado is not None:
+                with self._cache_request_lock:
+                    self._cache_request[(tool_name, clave)] = resultado
+
+        if resultado is None:
+            return None
+
+        logger.info(f"♻️ Resultado de '{tool_name}' reutilizado desde caché ({nivel})")
+        return {**resultado, "cache": {"hit": True, "nivel": nivel}}
+
+    def _guardar_en_cache(self, tool_instance, clave: str, resultado: Dict[str, Any]) -> None:
+        """Guarda un resultado exitoso en la caché del request y en la compartida."""
+        if not isinstance(resultado, dict) or resultado.get("success") is False:
+            return
+
+        with self._cache_request_lock:
+            self._cache_request[(tool_instance.name, clave)] = resultado
+
+        if self.result_cache is not None:
+            self.result_cache.guardar(
+                tool_instance.name, clave, resultado, tool_instance.cache_max_entradas
+            )
+
+    def execute_tools(self, llamadas: List[Tuple[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Ejecuta las llamadas a tools de un turno de forma concurrente.
+
+        Las llamadas independientes se lanzan a la vez en el pool de tools,
+        así un turno tarda lo que su tool más lento y no la suma de todos.
+        Las llamadas a un tool serializado se encadenan en el orden recibido.
+        Cada llamada respeta el timeout y el límite de concurrencia de su tool;
+        si todos los cupos de un tool están ocupados por llamadas colgadas
+        (que excedieron el timeout y siguen corriendo) se responde un error
+        sin enviarla al pool.
+
+        Args:
+            llamadas: Lista de tuplas (tool_name, tool_input)
+
+        Returns:
+            Lista de resultados en el mismo orden que las llamadas
+        """
+        if not llamadas:
+            return []
+
+        executor = get_tool_executor()
+        inicio = time.monotonic()
+        resultados: List[Optional[Dict[str, Any]]] = [None] * len(llamadas)
+
+        # (índices de las llamadas, future, timeout total)
+        pendientes = []
+        cadenas: Dict[str, List[int]] = {}
+
+        for indice, (tool_name, tool_input) in enumerate(llamadas):
+            tool_instance = self._tool_instances.get(tool_name)
+            if self._tool_saturado(tool_name):
+                resultados[indice] = self._resultado_saturado(tool_name)
+            elif tool_instance is not None and tool_instance.serializado:
+                cadenas.setdefault(tool_name, []).append(indice)
+            else:
+                future = executor.submit(self._execute_tools_en_serie, [(tool_name, tool_input)])
+                pendientes.append(([indice], future, self._timeout_tool(tool_name)))
+
+        for tool_name, indices in cadenas.items():
+            future = executor.submit(self._execute_tools_en_serie, [llamadas[i] for i in indices])
+            pendientes.append((indices, future, self._timeout_tool(tool_name) * len(indices)))
+
+        for indices, future, timeout in pendientes:
+            restante = max(0.0, inicio + timeout - time.monotonic())
+            try:
+                salida = future.result(timeout=restante)
+            except FuturesTimeoutError:
+                tool_name = llamadas[indices[0]][0]
+                logger.error(f"⏱️ Tool '{tool_name}' excedió el timeout de {timeout:.1f}s")
+                registrar_llamada_colgada(tool_name, future)
+                salida = [{
+                    "success": False,
+                    "error": f"El tool '{tool_name}' excedió el tiempo máximo de ejecución ({timeout:.1f}s)"
+                }] * len(indices)
+
+            for indice, resultado in zip(indices, salida):
+                resultados[indice] = resultado
+
+        logger.info(f"⚡ {len(llamadas)} tool(s) ejecutado(s) en {time.monotonic() - inicio:.2f}s")
+
+        return resultados
+
+    def _timeout_tool(self, tool_name: str) -> float:
+        """Timeout de un tool (el de BaseTool si el tool no existe)."""
+        tool_instance = self._tool_instances.get(tool_name)
+        return tool_instance.timeout_segundos if tool_instance is not None else 30.0
+
+    def _limite_tool(self, tool_name: str) -> Optional[int]:
+        """Llamadas simultáneas permitidas para un tool (1 si es serializado, None si no existe)."""
+        tool_instance = self._tool_instances.get(tool_name)
+        if tool_instance is None:
+            return None
+        return 1 if tool_instance.serializado else max(1, tool_instance.max_concurrencia)
+
+    def _tool_saturado(self, tool_name: str) -> bool:
+        """Indica si todos los cupos del tool están ocupados por llamadas colgadas."""
+        limite = self._limite_tool(tool_name)
+        return limite is not None and get_llamadas_colgadas(tool_name) >= limite
+
+    def _resultado_saturado(self, tool_name: str) -> Dict[str, Any]:
+        """Error para una llamada que no se envía porque el tool está saturado."""
+        logger.warning(f"🚫 Tool '{tool_name}' saturado por llamadas colgadas, no se ejecuta")
+        return {
+            "success": False,
+            "error": f"El tool '{tool_name}' no está disponible en este momento (llamadas anteriores sin responder)"
+        }
+
+    def _execute_tool_limitado(self, tool_name: str, tool_input: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Ejecuta un tool respetando su límite de concurrencia en el proceso.
+
+        La espera por un cupo está acotada por el timeout del tool, para que
+        una llamada encolada detrás de otras colgadas no retenga su hilo del
+        pool indefinidamente.
+        """
+        limite = self._limite_tool(tool_name)
+        if limite is None:
+            return self.execute_tool(tool_name, tool_input)
+
+        semaforo = get_semaforo_tool(tool_name, limite)
+        if not semaforo.acquire(timeout=self._timeout_tool(tool_name)):
+            return self._resultado_saturado(tool_name)
+        try:
+            return self.execute_tool(tool_name, tool_input)
+        finally:
+            semaforo.release()
+
+    def _execute_tools_en_serie(self, llamadas: List[Tuple[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Ejecuta una o varias llamadas una tras otra."""
+        return [self._execute_tool_limitado(tool_name, tool_input) for tool_name, tool_input in llamadas]
+
     def is_tool_available(self, tool_name: str) -> bool:
         """
         Verifica si un tool está disponible.
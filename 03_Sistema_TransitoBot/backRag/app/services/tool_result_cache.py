@@ -0,0 +1,135 @@
+import copy
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ToolResultCache:
+    """
+    Caché de resultados de tools idempotentes compartida entre requests.
+
+    Cada tool tiene su propio espacio LRU con TTL y capacidad propios, para
+    que un tool muy usado no desaloje los resultados de otro. Las claves son
+    las que produce `BaseTool.clave_cache` a partir del input canonicalizado.
+    """
+
+    def __init__(self, ttl_segundos: float = 600, max_entradas: int = 512):
+        """
+        Inicializa la caché.
+
+        Args:
+            ttl_segundos: TTL por defecto para tools que no definen el suyo
+            max_entradas: Capacidad por defecto de cada tool
+        """
+        self.ttl_segundos = ttl_segundos
+        self.max_entradas = max_entradas
+
+        self._entradas: Dict[str, "OrderedDict[str, Dict[str, Any]]"] = {}
+        self._lock = threading.Lock()
+        self._hits: Dict[str, int] = {}
+        self._misses: Dict[str, int] = {}
+        # Aciertos resueltos por la caché local de cada request
+        self._hits_request: Dict[str, int] = {}
+
+    def obtener(self, tool_name: str, clave: str, ttl_segundos: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Busca un resultado cacheado.
+
+        Args:
+            tool_name: Nombre del tool
+            clave: Clave canónica del input
+            ttl_segundos: TTL del tool (None usa el por defecto)
+
+        Returns:
+            Copia del resultado o None si no existe o expiró
+        """
+        ttl = self.ttl_segundos if ttl_segundos is None else ttl_segundos
+
+        with self._lock:
+            entradas = self._entradas.get(tool_name)
+            entrada = entradas.get(clave) if entradas is not None else None
+
+            if entrada is not None and time.time() - entrada['creado'] > ttl:
+                del entradas[clave]
+                entrada = None
+
+            if entrada is None:
+                self._misses[tool_name] = self._misses.get(tool_name, 0) + 1
+                return None
+
+            entradas.move_to_end(clave)
+            self._hits[tool_name] = self._hits.get(tool_name, 0) + 1
+            return copy.deepcopy(entrada['resultado'])
+
+    def guardar(
+        self,
+        tool_name: str,
+        clave: str,
+        resultado: Dict[str, Any],
+        max_entradas: Optional[int] = None
+    ) -> None:
+        """
+        Guarda el resultado de un tool.
+
+        Args:
+            tool_name: Nombre del tool
+            clave: Clave canónica del input
+            resultado: Resultado a cachear
+            max_entradas: Capacidad del tool (None usa la por defecto)
+        """
+        capacidad = self.max_entradas if max_entradas is None else max_entradas
+        if capacidad <= 0:
+            return
+
+        with self._lock:
+            entradas = self._entradas.setdefault(tool_name, OrderedDict())
+            entradas[clave] = {'resultado': copy.deepcopy(resultado), 'creado': time.time()}
+            entradas.move_to_end(clave)
+            while len(entradas) > capacidad:
+                entradas.popitem(last=False)
+
+    def registrar_hit_request(self, tool_name: str) -> None:
+        """Contabiliza un acierto de la caché local de un request."""
+        with self._lock:
+            self._hits_request[tool_name] = self._hits_request.get(tool_name, 0) + 1
+
+    def limpiar(self) -> None:
+        """Elimina todas las entradas."""
+        with self._lock:
+            self._entradas.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retorna estadísticas de uso por tool.
+
+        Returns:
+            Dict con entradas, aciertos (globales y por request), misses,
+            ejecuciones ahorradas y tasa de aciertos por tool
+        """
+        with self._lock:
+            tools = set(self._entradas) | set(self._hits) | set(self._misses) | set(self._hits_request)
+            por_tool = {}
+            for tool_name in sorted(tools):
+                hits = self._hits.get(tool_name, 0)
+                hits_request = self._hits_request.get(tool_name, 0)
+                misses = self._misses.get(tool_name, 0)
+                ahorradas = hits + hits_request
+                llamadas = ahorradas + misses
+                por_tool[tool_name] = {
+                    "entradas": len(self._entradas.get(tool_name, ())),
+                    "hits": hits,
+                    "hits_request": hits_request,
+                    "misses": misses,
+                    "ejecuciones_ahorradas": ahorradas,
+                    "tasa_aciertos": round(ahorradas / llamadas, 4) if llamadas else 0.0
+                }
+
+        return {
+            "ttl_segundos": self.ttl_segundos,
+            "max_entradas": self.max_entradas,
+            "tools": por_tool
+        }
@@ -1,11 +1,13 @@
 from .base_tool import BaseTool
 from .search_tool import HybridSearchTool
 from .email_tool import EmailSenderTool
+from .infraction_tool import InfractionLookupTool
 
 # Registro de todas las tools disponibles
 AVAILABLE_TOOLS = {
     "buscar_articulos_transito": HybridSearchTool,
-    "enviar_email": EmailSenderTool
+    "enviar_email": EmailSenderTool,
+    "consultar_infraccion": InfractionLookupTool
 }
 
-__all__ = ["BaseTool", "HybridSearchTool", "EmailSenderTool", "AVAILABLE_TOOLS"]
+__all__ = ["BaseTool", "HybridSearchTool", "EmailSenderTool", "InfractionLookupTool", "AVAILABLE_TOOLS"]
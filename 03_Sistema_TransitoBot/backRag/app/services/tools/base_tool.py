@@ -1,5 +1,6 @@
+import json
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 
 class BaseTool(ABC):
@@ -9,8 +10,28 @@ class BaseTool(ABC):
     Cada tool debe implementar:
     - get_definition(): Retorna la definición del tool en formato Anthropic
     - execute(): Ejecuta la lógica del tool
+
+    Atributos de ejecución (pueden sobrescribirse en cada subclase):
+    - serializado: Si es True, las llamadas a este tool nunca se solapan y
+      se ejecutan en el orden en que Claude las pidió
+    - timeout_segundos: Tiempo máximo de espera por llamada
+    - max_concurrencia: Llamadas simultáneas permitidas en todo el proceso
+
+    Atributos de caché de resultados:
+    - idempotente: Si es True, el resultado depende solo del input y puede
+      reutilizarse (ver `clave_cache`)
+    - cache_ttl_segundos / cache_max_entradas: Límites propios del tool en la
+      caché compartida (None usa TOOL_CACHE_TTL_SECONDS / TOOL_CACHE_MAX_ENTRIES)
     """
 
+    serializado: bool = False
+    timeout_segundos: float = 30.0
+    max_concurrencia: int = 4
+
+    idempotente: bool = False
+    cache_ttl_segundos: Optional[float] = None
+    cache_max_entradas: Optional[int] = None
+
     @property
     @abstractmethod
     def name(self) -> str:
@@ -57,3 +78,23 @@ class BaseTool(ABC):
             Exception: Si hay un error en la ejecución
         """
         pass
+
+    def clave_cache(self, **kwargs) -> str:
+        """
+        Retorna la clave de caché para un input (solo tools idempotentes).
+
+        Por defecto es el JSON canónico del input: claves ordenadas y textos
+        sin espacios sobrantes ni diferencias de mayúsculas. Los tools pueden
+        sobrescribirla para que inputs equivalentes compartan clave.
+
+        Args:
+            **kwargs: Parámetros del tool según el input_schema
+
+        Returns:
+            Clave canónica
+        """
+        canonico = {
+            clave: ' '.join(valor.lower().split()) if isinstance(valor, str) else valor
+            for clave, valor in kwargs.items()
+        }
+        return json.dumps(canonico, sort_keys=True, ensure_ascii=False, default=str)
@@ -10,16 +10,28 @@ logger = logging.getLogger(__name__)
 class EmailSenderTool(BaseTool):
     """
     Tool para enviar correos electrónicos a través del servicio de email externo.
+
+    Es serializado: enviar emails tiene efectos externos y no debe
+    solaparse con otros envíos.
+
+    Con una bandeja de salida (EmailOutbox) el email se encola y el tool
+    retorna un ticket de inmediato; la entrega ocurre en segundo plano. Sin
+    ella, el envío es síncrono.
     """
 
-    def __init__(self, email_service_url: str = None):
+    serializado = True
+    timeout_segundos = 15.0
+
+    def __init__(self, email_service_url: str = None, outbox=None):
         """
         Inicializa el tool con la URL del servicio de email.
 
         Args:
             email_service_url: URL del servicio de envío de emails.
                              Si no se proporciona, se obtiene de EMAIL_SERVICE_URL env var.
+            outbox: EmailOutbox para entrega asíncrona (None envía de forma síncrona)
         """
+        self.outbox = outbox
         if email_service_url is None:
             email_service_url = os.getenv(
                 "EMAIL_SERVICE_URL",
@@ -95,6 +107,8 @@ class EmailSenderTool(BaseTool):
                 "success": bool,
                 "mensaje": str,
                 "to_email": str,
+                "ticket": str (con bandeja de salida),
+                "estado": str (con bandeja de salida),
                 "detalle": str (opcional)
             }
         """
@@ -126,6 +140,16 @@ class EmailSenderTool(BaseTool):
                     "to_email": to_email
                 }
 
+            if self.outbox is not None:
+                email = self.outbox.encolar(to_email=to_email, motivo=motivo, mensaje=mensaje)
+                return {
+                    "success": True,
+                    "mensaje": "Email aceptado para envío. Se entregará en los próximos segundos",
+                    "to_email": to_email,
+                    "ticket": email["ticket"],
+                    "estado": email["estado"]
+                }
+
             logger.info(f"📧 Enviando email a '{to_email}' con motivo: '{motivo}'")
 
             # Preparar payload
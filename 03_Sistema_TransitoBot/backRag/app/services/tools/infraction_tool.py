@@ -0,0 +1,155 @@
+import logging
+from typing import Dict, Any, List
+from app.services.infraction_index import normalizar_codigo
+from .base_tool import BaseTool
+
+logger = logging.getLogger(__name__)
+
+
+class InfractionLookupTool(BaseTool):
+    """
+    Tool para consultar infracciones por código en la tabla estructurada del artículo 131.
+    """
+
+    # Códigos que el agente puede pedir en una llamada
+    MAX_CODIGOS = 10
+
+    timeout_segundos = 2.0
+    max_concurrencia = 8
+
+    # La tabla es fija entre ingestas
+    idempotente = True
+
+    def __init__(self, infraction_index):
+        """
+        Inicializa el tool con el índice de infracciones.
+
+        Args:
+            infraction_index: Instancia de InfractionIndex
+        """
+        self.infraction_index = infraction_index
+
+    @property
+    def name(self) -> str:
+        return "consultar_infraccion"
+
+    @property
+    def description(self) -> str:
+        return (
+            "Consulta infracciones de tránsito por su código (artículo 131 del Código Nacional de Tránsito) "
+            "y retorna la descripción, la multa en SMLDV y en pesos, y las sanciones adicionales "
+            "(inmovilización, suspensión o cancelación de la licencia). "
+            "Usa esta herramienta cuando el usuario mencione un código de infracción (C14, C29, D12...) "
+            "o pregunte cuánto cuesta la multa de una infracción codificada. "
+            "Es exacta e inmediata; para preguntas sin código usa buscar_articulos_transito.\n"
+        )
+
+    def get_definition(self) -> Dict[str, Any]:
+        """
+        Retorna la definición del tool en formato Anthropic API.
+        """
+        return {
+            "name": self.name,
+            "description": self.description,
+            "input_schema": {
+                "type": "object",
+                "properties": {
+                    "codigos": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": (
+                            "Códigos de infracción a consultar. Acepta variantes de formato. "
+                            "Ejemplos: ['C29'], ['C.14', 'D 12']"
+                        )
+                    }
+                },
+                "required": ["codigos"]
+            }
+        }
+
+    def _codigos(self, kwargs: Dict[str, Any]) -> List[str]:
+        """Normaliza el input (acepta un solo código como texto)."""
+        codigos = kwargs.get("codigos") or []
+        if isinstance(codigos, str):
+            codigos = [codigos]
+        return [str(c) for c in codigos][:self.MAX_CODIGOS]
+
+    def clave_cache(self, **kwargs) -> str:
+        """Clave por códigos normalizados ("c.29" y "C29" comparten clave)."""
+        return ','.join(sorted({normalizar_codigo(c) or c.strip().upper() for c in self._codigos(kwargs)}))
+
+    def execute(self, **kwargs) -> Dict[str, Any]:
+        """
+        Busca las infracciones en el índice.
+
+        Args:
+            codigos (List[str]): Códigos de infracción
+
+        Returns:
+            Dict con estructura:
+            {
+                "success": bool,
+                "infracciones": [
+                    {
+                        "codigo": str,
+                        "descripcion": str,
+                        "multa_smldv": int,
+                        "multa_pesos": int | None,
+                        "sanciones_adicionales": [str],
+                        "detalle_sanciones": [str],
+                        "articulo": str
+                    }
+                ],
+                "no_encontrados": [str],
+                "valor_smldv": float,
+                "mensaje": str (opcional)
+            }
+        """
+        try:
+            codigos = self._codigos(kwargs)
+
+            if not codigos:
+                return {
+                    "success": False,
+                    "infracciones": [],
+                    "mensaje": "El parámetro 'codigos' es obligatorio"
+                }
+
+            logger.info(f"🚦 Consultando infracciones: {codigos}")
+
+            infracciones = []
+            no_encontrados = []
+            for codigo in codigos:
+                infraccion = self.infraction_index.buscar(codigo)
+                if infraccion is None:
+                    # El agente puede pasar la frase completa ("multa C14 y C29")
+                    encontradas = self.infraction_index.buscar_en_texto(codigo)
+                    if encontradas:
+                        infracciones.extend(encontradas)
+                    else:
+                        no_encontrados.append(codigo)
+                else:
+                    infracciones.append(infraccion)
+
+            result = {
+                "success": bool(infracciones),
+                "infracciones": infracciones,
+                "no_encontrados": no_encontrados,
+                "valor_smldv": self.infraction_index.valor_smldv
+            }
+
+            if no_encontrados:
+                result["mensaje"] = (
+                    f"Códigos no encontrados en el artículo 131: {', '.join(no_encontrados)}. "
+                    "Verifica el código o usa buscar_articulos_transito con la descripción de la infracción."
+                )
+
+            return result
+
+        except Exception as e:
+            logger.error(f"❌ Error consultando infracciones: {e}")
+            return {
+                "success": False,
+                "infracciones": [],
+                "mensaje": f"Error al consultar infracciones: {str(e)}"
+            }
@@ -1,5 +1,6 @@
 import logging
 from typing import Dict, Any
+from app.utils.text_normalization import normalizar_texto
 from .base_tool import BaseTool
 
 logger = logging.getLogger(__name__)
@@ -10,6 +11,15 @@ class HybridSearchTool(BaseTool):
     Tool para realizar búsqueda híbrida (vectorial + keywords) en el Código Nacional de Tránsito.
     """
 
+    # Máximo de artículos que el agente puede pedir en una búsqueda
+    MAX_RESULTADOS = 5
+
+    timeout_segundos = 10.0
+    max_concurrencia = 4
+
+    # La búsqueda solo depende de la consulta y del índice cargado
+    idempotente = True
+
     def __init__(self, search_service):
         """
         Inicializa el tool con el servicio de búsqueda.
@@ -67,6 +77,24 @@ class HybridSearchTool(BaseTool):
             }
         }
 
+    def _parametros(self, kwargs: Dict[str, Any]):
+        """Normaliza los parámetros de búsqueda (límites y valores por defecto)."""
+        n_resultados = max(1, min(int(kwargs.get("n_resultados", 3)), self.MAX_RESULTADOS))
+        umbral_confianza = float(kwargs.get("umbral_confianza", 0.4))
+        return kwargs.get("consulta"), n_resultados, umbral_confianza
+
+    def clave_cache(self, **kwargs) -> str:
+        """
+        Clave de caché insensible a mayúsculas, tildes y espacios.
+
+        Conserva el orden y todas las palabras de la consulta: quitar
+        palabras vacías como "sin", "con" o "no" haría que "conducir sin
+        licencia" y "conducir con licencia" compartieran resultados.
+        """
+        consulta, n_resultados, umbral_confianza = self._parametros(kwargs)
+        terminos = normalizar_texto(consulta or "")
+        return f"{terminos}|{n_resultados}|{round(umbral_confianza, 2)}"
+
     def execute(self, **kwargs) -> Dict[str, Any]:
         """
         Ejecuta la búsqueda híbrida en ChromaDB.
@@ -94,9 +122,7 @@ class HybridSearchTool(BaseTool):
         """
         try:
             # Extraer parámetros
-            consulta = kwargs.get("consulta")
-            n_resultados = kwargs.get("n_resultados", 3)
-            umbral_confianza = kwargs.get("umbral_confianza", 0.4)
+            consulta, n_resultados, umbral_confianza = self._parametros(kwargs)
 
             if not consulta:
                 return {
@@ -111,7 +137,7 @@ class HybridSearchTool(BaseTool):
             # Ejecutar búsqueda híbrida
             resultados = self.search_service.hybrid_search(
                 consulta=consulta,
-                n_resultados=1,
+                n_resultados=n_resultados,
                 umbral_confianza=umbral_confianza
             )
 
@@ -124,6 +150,8 @@ class HybridSearchTool(BaseTool):
                     "contenido": articulo["documento"],
                     "similitud": round(articulo["similitud"], 3)
                 })
+                if "puntaje_rerank" in articulo:
+                    articulos_formateados[-1]["relevancia"] = round(articulo["puntaje_rerank"], 3)
 
             total = len(articulos_formateados)
 
@@ -0,0 +1,72 @@
+"""Extracción de montos de multas (salarios mínimos) del texto de la ley."""
+import re
+from typing import Dict, List
+from app.utils.text_normalization import quitar_tildes
+
+UNIDAD_DIARIOS = "SMLDV"
+UNIDAD_MENSUALES = "SMLMV"
+
+# "quince (15) salarios mínimos legales diarios vigentes", "30 salarios
+# mínimos diarios legales vigentes", "8 salarios mínimos mensuales"
+_PATRON_SALARIOS = re.compile(
+    r'(?:\(\s*(\d{1,4})\s*\)|\b(\d{1,4}))\s*salarios?\s+minimos?\s+'
+    r'(?:legales\s+)?(diarios|mensuales)',
+    re.IGNORECASE
+)
+
+# Siglas: "15 SMLDV", "15 s.m.l.d.v.", "8 smmlv"
+_PATRON_SIGLA = re.compile(
+    r'\b(\d{1,4})\s*(s\.?\s?m\.?\s?l\.?\s?d\.?\s?v|s\.?\s?m\.?\s?d\.?\s?l\.?\s?v|'
+    r's\.?\s?m\.?\s?l\.?\s?m\.?\s?v|s\.?\s?m\.?\s?m\.?\s?l\.?\s?v)\b\.?',
+    re.IGNORECASE
+)
+
+
+def _unidad_sigla(sigla: str) -> str:
+    letras = re.sub(r'[^a-z]', '', sigla.lower())
+    return UNIDAD_DIARIOS if 'd' in letras else UNIDAD_MENSUALES
+
+
+def extraer_multas(texto: str) -> List[Dict]:
+    """
+    Extrae los montos de multa expresados en salarios mínimos.
+
+    Reconoce la forma larga de la ley ("quince (15) salarios mínimos
+    legales diarios vigentes") y las siglas (SMLDV, SMLMV/SMMLV). Los
+    montos repetidos se reportan una sola vez, en orden de aparición.
+
+    Args:
+        texto: Texto de un artículo, fragmento u oración
+
+    Returns:
+        Lista de dicts con 'cantidad' (int), 'unidad' ("SMLDV" o "SMLMV")
+        y 'texto' (fragmento original que contiene el monto)
+    """
+    # quitar_tildes conserva la longitud, así las posiciones valen en el original
+    normalizado = quitar_tildes(texto)
+    if len(normalizado) != len(texto):
+        normalizado = texto
+
+    coincidencias = []
+    for match in _PATRON_SALARIOS.finditer(normalizado):
+        cantidad = match.group(1) or match.group(2)
+        unidad = UNIDAD_DIARIOS if match.group(3).lower() == 'diarios' else UNIDAD_MENSUALES
+        coincidencias.append((match.start(), int(cantidad), unidad, texto[match.start():match.end()]))
+
+    for match in _PATRON_SIGLA.finditer(normalizado):
+        coincidencias.append((match.start(), int(match.group(1)), _unidad_sigla(match.group(2)), texto[match.start():match.end()]))
+
+    multas = []
+    vistas = set()
+    for _, cantidad, unidad, fragmento in sorted(coincidencias):
+        if cantidad <= 0 or (cantidad, unidad) in vistas:
+            continue
+        vistas.add((cantidad, unidad))
+        multas.append({'cantidad': cantidad, 'unidad': unidad, 'texto': fragmento.strip()})
+
+    return multas
+
+
+def formatear_multa(multa: Dict) -> str:
+    """Formatea un monto ("15 SMLDV")."""
+    return f"{multa['cantidad']} {multa['unidad']}"
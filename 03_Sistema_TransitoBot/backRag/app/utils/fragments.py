@@ -0,0 +1,84 @@
+"""Utilidades para agrupar fragmentos (párrafos y parágrafos) por artículo."""
+from typing import List, Dict
+
+# Claves de metadatos propias del fragmento (el resto se hereda del artículo)
+CLAVES_FRAGMENTO = ('id_padre', 'tipo_fragmento', 'indice_fragmento', 'total_fragmentos')
+
+SEPARADOR_CONTIGUO = "\n"
+SEPARADOR_OMISION = "\n[...]\n"
+
+
+def agrupar_fragmentos(resultados: List[Dict], max_fragmentos_por_articulo: int = 2) -> List[Dict]:
+    """
+    Agrupa resultados a nivel de fragmento en su artículo padre.
+
+    Cada artículo conserva la mejor similitud de sus fragmentos y, como
+    documento, solo los fragmentos coincidentes (hasta el máximo indicado)
+    en el orden en que aparecen en el artículo. Los resultados que no son
+    fragmentos se devuelven sin cambios.
+
+    Args:
+        resultados: Resultados ordenados por similitud descendente
+        max_fragmentos_por_articulo: Máximo de fragmentos por artículo
+
+    Returns:
+        Lista de artículos ordenados por su mejor similitud
+    """
+    grupos: Dict[str, Dict] = {}
+    orden = []
+
+    for resultado in resultados:
+        metadata = resultado['metadata']
+        id_padre = metadata.get('id_padre')
+
+        if not id_padre:
+            if resultado.get('id') not in grupos:
+                grupos[resultado.get('id')] = resultado
+                orden.append(resultado.get('id'))
+            continue
+
+        grupo = grupos.get(id_padre)
+        if grupo is None:
+            grupo = {
+                'id': id_padre,
+                'metadata': {k: v for k, v in metadata.items() if k not in CLAVES_FRAGMENTO},
+                'similitud': resultado['similitud'],
+                'tipo': resultado.get('tipo', 'vectorial'),
+                'fragmentos': []
+            }
+            grupos[id_padre] = grupo
+            orden.append(id_padre)
+
+        if len(grupo['fragmentos']) < max_fragmentos_por_articulo:
+            grupo['fragmentos'].append({
+                'indice_fragmento': int(metadata.get('indice_fragmento', 0)),
+                'tipo_fragmento': metadata.get('tipo_fragmento', 'parrafo'),
+                'texto': resultado['documento'],
+                'similitud': resultado['similitud']
+            })
+
+    agrupados = []
+    for posicion, clave in enumerate(orden, 1):
+        grupo = grupos[clave]
+        if 'fragmentos' in grupo:
+            grupo['fragmentos'].sort(key=lambda f: f['indice_fragmento'])
+            grupo['documento'] = _unir_fragmentos(grupo['fragmentos'])
+            grupo['ranking'] = posicion
+        agrupados.append(grupo)
+
+    return agrupados
+
+
+def _unir_fragmentos(fragmentos: List[Dict]) -> str:
+    """Une los fragmentos marcando los saltos entre fragmentos no contiguos."""
+    partes = []
+    anterior = None
+
+    for fragmento in fragmentos:
+        if anterior is not None:
+            contiguo = fragmento['indice_fragmento'] == anterior + 1
+            partes.append(SEPARADOR_CONTIGUO if contiguo else SEPARADOR_OMISION)
+        partes.append(fragmento['texto'])
+        anterior = fragmento['indice_fragmento']
+
+    return ''.join(partes)
@@ -0,0 +1,25 @@
+"""Utilidades para respuestas Server-Sent Events (SSE)."""
+import json
+from typing import Any
+
+# Cabeceras para que proxies (nginx) no acumulen el stream
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",
+}
+
+SSE_MEDIA_TYPE = "text/event-stream"
+
+
+def formatear_evento(evento: str, datos: Any) -> str:
+    """
+    Serializa un evento SSE con datos JSON.
+
+    Args:
+        evento: Nombre del evento (sources, token, done, error...)
+        datos: Datos serializables a JSON
+
+    Returns:
+        Texto del evento terminado en línea en blanco
+    """
+    return f"event: {evento}\ndata: {json.dumps(datos, ensure_ascii=False)}\n\n"
@@ -0,0 +1,60 @@
+"""Utilidades de normalización y tokenización de texto en español."""
+import re
+import unicodedata
+from typing import List
+
+# Palabras vacías frecuentes (ya sin tildes) que no aportan a la búsqueda
+STOPWORDS = frozenset({
+    'a', 'al', 'ante', 'como', 'con', 'cual', 'cuales', 'cuando', 'cuanto',
+    'cuanta', 'cuantos', 'de', 'del', 'desde', 'donde', 'el', 'en', 'entre',
+    'es', 'esta', 'este', 'esto', 'ha', 'hay', 'la', 'las', 'le', 'les', 'lo',
+    'los', 'mas', 'me', 'mi', 'mis', 'muy', 'no', 'o', 'para', 'pero', 'por',
+    'que', 'quien', 'se', 'si', 'sin', 'sobre', 'su', 'sus', 'te', 'tu', 'un',
+    'una', 'uno', 'unos', 'y', 'ya', 'yo'
+})
+
+_PATRON_TOKEN = re.compile(r"[a-z0-9]+")
+_PATRON_ESPACIOS = re.compile(r"\s+")
+
+
+def quitar_tildes(texto: str) -> str:
+    """Elimina tildes y diacríticos (á -> a, ñ -> n, ü -> u)."""
+    descompuesto = unicodedata.normalize('NFKD', texto)
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c))
+
+
+def normalizar_texto(texto: str) -> str:
+    """
+    Normaliza un texto para comparaciones: minúsculas, sin tildes y con
+    espacios colapsados.
+
+    Args:
+        texto: Texto original
+
+    Returns:
+        Texto normalizado
+    """
+    texto = quitar_tildes(texto.lower())
+    return _PATRON_ESPACIOS.sub(' ', texto).strip()
+
+
+def tokenizar(texto: str, eliminar_stopwords: bool = True) -> List[str]:
+    """
+    Tokeniza un texto normalizado en palabras alfanuméricas.
+
+    Se descartan tokens de una sola letra (salvo dígitos) y, opcionalmente,
+    las palabras vacías.
+
+    Args:
+        texto: Texto original
+        eliminar_stopwords: Si True, descarta palabras vacías
+
+    Returns:
+        Lista de tokens
+    """
+    tokens = _PATRON_TOKEN.findall(normalizar_texto(texto))
+    return [
+        t for t in tokens
+        if (len(t) > 1 or t.isdigit())
+        and not (eliminar_stopwords and t in STOPWORDS)
+    ]
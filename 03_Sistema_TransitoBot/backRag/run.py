@@ -1,13 +1,34 @@
 #!/usr/bin/env python3
 """
 Punto de entrada principal para ejecutar la aplicación TránsitoBot API.
+
+Sin argumentos arranca el servidor de desarrollo con recarga automática.
+Con --preload el proceso maestro carga el modelo y los índices una sola vez,
+ejecuta las consultas de calentamiento y crea los workers con fork, que
+comparten esa memoria copy-on-write.
 """
+import argparse
 import uvicorn
+from app.core.config import settings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor de TránsitoBot API")
+    parser.add_argument("--preload", action="store_true",
+                        help="Precargar modelo e índices en el maestro y crear los workers con fork")
+    parser.add_argument("--workers", type=int, default=settings.SERVER_WORKERS,
+                        help="Número de workers en modo --preload")
+    parser.add_argument("--host", default=settings.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT)
+    args = parser.parse_args()
+
+    if args.preload:
+        from app.core.prefork import servir
+
+        servir(args.host, args.port, max(1, args.workers))
+    else:
+        uvicorn.run("app.main:app", host=args.host, port=args.port, reload=True)
+
 
 if __name__ == "__main__":
-    uvicorn.run(
-        "app.main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True
-    )
+    main()
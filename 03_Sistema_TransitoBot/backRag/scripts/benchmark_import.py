@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Script para medir el tiempo de importación de la aplicación por perfil.
+
+Importa `app.main` en un proceso nuevo para cada perfil (APP_PROFILE) y
+varias repeticiones, y falla (código de salida 1) si:
+
+- Algún perfil importa al arrancar una dependencia pesada (torch,
+  sentence-transformers, chromadb, onnxruntime, anthropic, openai): deben
+  importarse en el primer uso.
+- Un perfil sin recuperación carga el stack de embeddings durante el
+  arranque completo (lifespan).
+- La mediana supera la línea base (por defecto data/benchmarks/import.json)
+  más la tolerancia y un margen fijo que absorbe el ruido de fases de pocos
+  ms.
+- La importación supera el límite absoluto --max-ms (por defecto 3000 ms,
+  muy por debajo de lo que tarda importar torch o chromadb).
+
+Los tiempos dependen de la máquina: registra la línea base en la misma
+máquina donde se compara (--guardar-baseline).
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+# Agregar el directorio padre al path para poder importar app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app.core.profiles import ROUTERS_POR_PERFIL, PERFILES_CON_RECUPERACION
+
+BACKRAG_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Línea base versionada y límite absoluto que se aplican sin argumentos
+BASELINE_POR_DEFECTO = os.path.join(BACKRAG_DIR, "data", "benchmarks", "import.json")
+MAX_MS_POR_DEFECTO = 3000.0
+
+# Nunca deben importarse al cargar la aplicación
+MODULOS_PESADOS = ("torch", "sentence_transformers", "transformers", "chromadb", "onnxruntime", "anthropic", "openai")
+
+# Nunca deben importarse en el arranque de un perfil sin recuperación
+MODULOS_EMBEDDINGS = ("torch", "sentence_transformers", "transformers", "chromadb", "onnxruntime")
+
+# Se ejecuta en el proceso hijo; imprime el resultado como última línea
+CODIGO_MEDICION = """
+import json, sys, time
+inicio = time.perf_counter()
+from app.main import app
+import_ms = (time.perf_counter() - inicio) * 1000
+lifespan_ms = None
+if {lifespan}:
+    import asyncio
+
+    async def _arrancar():
+        async with app.router.lifespan_context(app):
+            pass
+
+    inicio = time.perf_counter()
+    asyncio.run(_arrancar())
+    lifespan_ms = (time.perf_counter() - inicio) * 1000
+pesados = sorted({{m.split('.')[0] for m in sys.modules}} & set({pesados!r}))
+print(json.dumps({{"import_ms": import_ms, "lifespan_ms": lifespan_ms, "modulos_pesados": pesados}}))
+"""
+
+
+def medir_una_vez(perfil: str, lifespan: bool) -> dict:
+    """Importa la aplicación en un proceso nuevo y retorna sus mediciones."""
+    with tempfile.TemporaryDirectory() as temporal:
+        # La bandeja de emails del arranque se crea fuera de data/
+        entorno = {
+            **os.environ,
+            "APP_PROFILE": perfil,
+            "PYTHONDONTWRITEBYTECODE": "1",
+            "EMAIL_OUTBOX_PATH": os.path.join(temporal, "emails.db")
+        }
+        resultado = subprocess.run(
+            [sys.executable, "-c", CODIGO_MEDICION.format(lifespan=lifespan, pesados=MODULOS_PESADOS)],
+            cwd=BACKRAG_DIR,
+            env=entorno,
+            capture_output=True,
+            text=True
+        )
+    if resultado.returncode != 0:
+        raise RuntimeError(f"Perfil '{perfil}': la importación falló\n{resultado.stderr[-2000:]}")
+    return json.loads(resultado.stdout.strip().splitlines()[-1])
+
+
+def medir(perfil: str, repeticiones: int) -> dict:
+    """
+    Mide un perfil varias veces (la primera calienta la caché de bytecode).
+
+    Returns:
+        Dict con la mediana de import_ms y lifespan_ms y los módulos pesados
+        cargados en cada fase
+    """
+    # El arranque completo solo es barato (y verificable aquí) sin recuperación
+    lifespan = perfil not in PERFILES_CON_RECUPERACION
+    medir_una_vez(perfil, lifespan)
+    mediciones = [medir_una_vez(perfil, lifespan) for _ in range(repeticiones)]
+
+    solo_import = medir_una_vez(perfil, False)
+    return {
+        "import_ms": round(statistics.median(m["import_ms"] for m in mediciones), 1),
+        "lifespan_ms": round(statistics.median(m["lifespan_ms"] for m in mediciones), 1) if lifespan else None,
+        "pesados_import": solo_import["modulos_pesados"],
+        "pesados_arranque": mediciones[-1]["modulos_pesados"] if lifespan else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--perfiles", nargs="+", choices=list(ROUTERS_POR_PERFIL), default=list(ROUTERS_POR_PERFIL))
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--baseline", default=BASELINE_POR_DEFECTO,
+                        help="Archivo JSON con la línea base por perfil (vacío la desactiva)")
+    parser.add_argument("--guardar-baseline", action="store_true", help="Escribir las mediciones en --baseline")
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="Regresión permitida sobre la línea base (0.25 = 25%%)")
+    parser.add_argument("--margen-ms", type=float, default=50.0, help="Margen fijo sobre la línea base en ms")
+    parser.add_argument("--max-ms", type=float, default=MAX_MS_POR_DEFECTO, help="Límite absoluto de importación en ms (0 lo desactiva)")
+    args = parser.parse_args()
+
+    resultados = {perfil: medir(perfil, args.repeticiones) for perfil in args.perfiles}
+
+    print("\n⏱️  Importación de app.main por perfil\n")
+    print("perfil | import_ms | lifespan_ms | pesados_import | pesados_arranque")
+    for perfil, r in resultados.items():
+        print(f"{perfil} | {r['import_ms']} | {r['lifespan_ms']} | {r['pesados_import']} | {r['pesados_arranque']}")
+
+    errores = []
+    for perfil, r in resultados.items():
+        if r["pesados_import"]:
+            errores.append(f"{perfil}: importa al cargar {', '.join(r['pesados_import'])}")
+        embeddings = set(r["pesados_arranque"] or []) & set(MODULOS_EMBEDDINGS)
+        if embeddings:
+            errores.append(f"{perfil}: carga el stack de embeddings al arrancar ({', '.join(sorted(embeddings))})")
+        if args.max_ms and r["import_ms"] > args.max_ms:
+            errores.append(f"{perfil}: importación de {r['import_ms']} ms supera el límite de {args.max_ms} ms")
+
+    if args.baseline and args.guardar_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({p: {"import_ms": r["import_ms"], "lifespan_ms": r["lifespan_ms"]} for p, r in resultados.items()}, f, indent=2)
+        print(f"\n💾 Línea base guardada en {args.baseline}")
+    elif not args.baseline:
+        pass
+    elif not os.path.exists(args.baseline):
+        errores.append(f"no existe la línea base {args.baseline} (genérala con --guardar-baseline)")
+    else:
+        with open(args.baseline, encoding="utf-8") as f:
+            linea_base = json.load(f)
+        for perfil, r in resultados.items():
+            for clave in ("import_ms", "lifespan_ms"):
+                referencia = (linea_base.get(perfil) or {}).get(clave)
+                if referencia and r[clave] is not None and r[clave] > referencia * (1 + args.tolerancia) + args.margen_ms:
+                    errores.append(f"{perfil}: {clave} {r[clave]} ms supera la línea base de {referencia} ms (+{args.tolerancia:.0%})")
+
+    if errores:
+        print("\n❌ Regresiones de arranque:")
+        for error in errores:
+            print(f"   - {error}")
+        sys.exit(1)
+
+    print("\n✅ Sin regresiones de arranque")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Script para medir el arranque del servidor con y sin precarga.
+
+Lanza la API en cada modo ("uvicorn": `uvicorn --workers N`, cada worker
+carga todo por su cuenta; "preload": `run.py --preload`, el maestro carga
+una vez y crea los workers con fork), espera a que todos los workers
+respondan 200 en /api/v1/health/ready y lee la memoria de cada proceso en
+/proc/<pid>/smaps_rollup:
+
+- RSS: páginas residentes, incluidas las compartidas
+- PSS: RSS con las páginas compartidas repartidas entre quienes las usan
+  (la suma de PSS es la memoria real del conjunto)
+- USS: páginas privadas del proceso
+
+Solo funciona en Linux. Usa el VECTOR_BACKEND configurado; con "chroma" el
+modo preload no comparte el modelo (ver README).
+"""
+import os
+import sys
+import json
+import time
+import signal
+import argparse
+import subprocess
+import urllib.error
+import urllib.request
+
+BACKRAG_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+MODOS = ("uvicorn", "preload")
+
+
+def comando(modo: str, workers: int, port: int) -> list:
+    """Línea de comandos para lanzar el servidor en el modo indicado."""
+    if modo == "uvicorn":
+        return [sys.executable, "-m", "uvicorn", "app.main:app",
+                "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers)]
+    return [sys.executable, "run.py", "--preload",
+            "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers)]
+
+
+def memoria(pid: int) -> dict:
+    """RSS, PSS y USS del proceso en MB (desde /proc/<pid>/smaps_rollup)."""
+    valores = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for linea in f:
+            partes = linea.split()
+            if len(partes) == 3 and partes[2] == "kB":
+                valores[partes[0].rstrip(":")] = int(partes[1]) / 1024
+    return {
+        "rss_mb": round(valores.get("Rss", 0.0), 1),
+        "pss_mb": round(valores.get("Pss", 0.0), 1),
+        "uss_mb": round(valores.get("Private_Clean", 0.0) + valores.get("Private_Dirty", 0.0), 1),
+    }
+
+
+def descendientes(pid: int) -> list:
+    """PIDs de todos los procesos descendientes de `pid`."""
+    resultado = []
+    pendientes = [pid]
+    while pendientes:
+        actual = pendientes.pop()
+        try:
+            with open(f"/proc/{actual}/task/{actual}/children") as f:
+                hijos = [int(h) for h in f.read().split()]
+        except OSError:
+            continue
+        resultado.extend(hijos)
+        pendientes.extend(hijos)
+    return resultado
+
+
+def esperar_workers(url: str, workers: int, proceso: subprocess.Popen, timeout: float) -> dict:
+    """
+    Consulta /health/ready hasta ver `workers` PIDs distintos listos.
+
+    Returns:
+        Dict pid → segundos hasta su primer 200
+    """
+    inicio = time.perf_counter()
+    listos = {}
+    while len(listos) < workers:
+        if proceso.poll() is not None:
+            raise RuntimeError(f"El servidor terminó con código {proceso.returncode}")
+        if time.perf_counter() - inicio > timeout:
+            raise TimeoutError(f"Solo {len(listos)}/{workers} workers listos tras {timeout:.0f}s")
+        try:
+            with urllib.request.urlopen(url, timeout=2) as respuesta:
+                pid = json.loads(respuesta.read())["pid"]
+                listos.setdefault(pid, time.perf_counter() - inicio)
+        except (urllib.error.URLError, ConnectionError, TimeoutError):
+            time.sleep(0.2)
+    return listos
+
+
+def detener(proceso: subprocess.Popen) -> None:
+    """Cierra el servidor y todos sus workers."""
+    pids = descendientes(proceso.pid)
+    proceso.send_signal(signal.SIGTERM)
+    try:
+        proceso.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        proceso.kill()
+        proceso.wait()
+    for pid in pids:
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+
+def medir(modo: str, workers: int, port: int, timeout: float) -> dict:
+    """
+    Arranca el servidor en un modo y mide tiempo hasta listo y memoria.
+
+    Returns:
+        Dict con tiempos (s) y memoria por worker y total (MB)
+    """
+    url = f"http://127.0.0.1:{port}/api/v1/health/ready"
+    print(f"\n▶️  {modo}: {' '.join(comando(modo, workers, port))}")
+    proceso = subprocess.Popen(
+        comando(modo, workers, port),
+        cwd=BACKRAG_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    try:
+        listos = esperar_workers(url, workers, proceso, timeout)
+        # Memoria con los workers ya calentados
+        por_worker = {pid: memoria(pid) for pid in listos}
+        otros = [pid for pid in descendientes(proceso.pid) if pid not in listos]
+        procesos = [memoria(proceso.pid)] + [memoria(pid) for pid in otros] + list(por_worker.values())
+    finally:
+        detener(proceso)
+
+    def promedio(clave: str) -> float:
+        return round(sum(m[clave] for m in por_worker.values()) / len(por_worker), 1)
+
+    return {
+        "modo": modo,
+        "workers": workers,
+        "primer_worker_listo_s": round(min(listos.values()), 2),
+        "todos_listos_s": round(max(listos.values()), 2),
+        "rss_por_worker_mb": promedio("rss_mb"),
+        "pss_por_worker_mb": promedio("pss_mb"),
+        "uss_por_worker_mb": promedio("uss_mb"),
+        "pss_total_mb": round(sum(m["pss_mb"] for m in procesos), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8100, help="Puerto base (uno por modo)")
+    parser.add_argument("--modos", nargs="+", choices=MODOS, default=list(MODOS))
+    parser.add_argument("--timeout", type=float, default=600.0, help="Espera máxima por modo (s)")
+    parser.add_argument("--json", help="Guardar los resultados en este archivo")
+    args = parser.parse_args()
+
+    if not os.path.exists("/proc/self/smaps_rollup"):
+        print("❌ Se requiere Linux con /proc/<pid>/smaps_rollup")
+        sys.exit(1)
+
+    resultados = [
+        medir(modo, args.workers, args.port + i, args.timeout)
+        for i, modo in enumerate(args.modos)
+    ]
+
+    columnas = ["modo", "primer_worker_listo_s", "todos_listos_s",
+                "rss_por_worker_mb", "pss_por_worker_mb", "uss_por_worker_mb", "pss_total_mb"]
+    print("\n📊 Arranque y memoria\n")
+    print(" | ".join(columnas))
+    for resultado in resultados:
+        print(" | ".join(str(resultado[c]) for c in columnas))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=2)
+        print(f"\n💾 Resultados guardados en {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Script para exportar el modelo de embeddings a ONNX cuantizado (int8).
+
+Genera el directorio configurado en ONNX_MODEL_DIR con el modelo y el
+tokenizer, y verifica que los vectores cuantizados se mantengan dentro de
+la tolerancia de similitud coseno respecto al modelo original en PyTorch.
+"""
+import os
+import sys
+import argparse
+
+# Agregar el directorio padre al path para poder importar app
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app.core.config import settings
+from app.repositories.embedding_provider import (
+    OnnxEmbeddingProvider,
+    SentenceTransformerProvider,
+    verificar_paridad
+)
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Consultas representativas para la verificación de paridad
+TEXTOS_PARIDAD = [
+    "¿Cuánto es la multa por pico y placa?",
+    "¿Cuál es el límite de velocidad en zona urbana?",
+    "¿Puedo usar el celular mientras conduzco?",
+    "Documentos obligatorios para conducir un vehículo",
+    "Sanción por conducir en estado de embriaguez",
+    "Artículo 131. Multas. Los infractores de las normas de tránsito serán sancionados con multas.",
+    "¿Qué pasa si no pago una fotomulta?",
+    "Inmovilización del vehículo por no portar el SOAT",
+]
+
+
+def exportar(model_name: str, output_dir: str, opset: int = 14) -> None:
+    """Exporta el transformer base a ONNX (fp32) y lo cuantiza a int8."""
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    os.makedirs(output_dir, exist_ok=True)
+
+    # SentenceTransformer descarga el modelo con el prefijo del organismo
+    nombre_hf = model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+
+    logger.info(f"Cargando {nombre_hf}...")
+    tokenizer = AutoTokenizer.from_pretrained(nombre_hf)
+    model = AutoModel.from_pretrained(nombre_hf)
+    model.eval()
+
+    ejemplo = tokenizer(["texto de ejemplo"], return_tensors="pt")
+    ruta_fp32 = os.path.join(output_dir, "model_fp32.onnx")
+
+    logger.info(f"Exportando a ONNX (opset {opset})...")
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (ejemplo["input_ids"], ejemplo["attention_mask"]),
+            ruta_fp32,
+            input_names=["input_ids", "attention_mask"],
+            output_names=["last_hidden_state"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "secuencia"},
+                "attention_mask": {0: "batch", 1: "secuencia"},
+                "last_hidden_state": {0: "batch", 1: "secuencia"},
+            },
+            opset_version=opset,
+        )
+
+    logger.info("Cuantizando pesos a int8...")
+    quantize_dynamic(
+        ruta_fp32,
+        os.path.join(output_dir, OnnxEmbeddingProvider.MODEL_FILENAME),
+        weight_type=QuantType.QInt8,
+    )
+    os.remove(ruta_fp32)
+
+    tokenizer.save_pretrained(output_dir)
+    logger.info(f"✅ Modelo ONNX int8 guardado en {output_dir}")
+
+
+def main():
+    """Función principal: exporta y verifica paridad."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", default=settings.EMBEDDING_MODEL)
+    parser.add_argument("--output-dir", default=settings.ONNX_MODEL_DIR)
+    parser.add_argument("--tolerance", type=float, default=settings.ONNX_PARITY_TOLERANCE)
+    parser.add_argument("--skip-export", action="store_true", help="Solo verificar paridad")
+    args = parser.parse_args()
+
+    if not args.skip_export:
+        exportar(args.model, args.output_dir)
+
+    logger.info("\n=== VERIFICACIÓN DE PARIDAD ===")
+    resultado = verificar_paridad(
+        SentenceTransformerProvider(args.model),
+        OnnxEmbeddingProvider(args.model, args.output_dir),
+        TEXTOS_PARIDAD,
+        tolerancia=args.tolerance
+    )
+    for key, value in resultado.items():
+        logger.info(f"{key}: {value}")
+
+    if not resultado['cumple']:
+        logger.error("❌ Los vectores cuantizados no cumplen la tolerancia")
+        sys.exit(1)
+
+    logger.info("✅ Paridad verificada")
+
+
+if __name__ == "__main__":
+    main()
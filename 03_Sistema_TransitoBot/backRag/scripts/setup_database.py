@@ -7,7 +7,10 @@ import sys
 
 # Agregar el directorio padre al path para poder importar app
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app.core.config import settings
 from app.repositories.chroma_repository import ChromaRepository
+from app.repositories.embedding_provider import crear_proveedor_embeddings
+from app.services.infraction_index import InfractionIndex
 from scripts.transit_processor import ProcesadorCodigoTransito
 import logging
 
@@ -18,6 +21,21 @@ logger = logging.getLogger(__name__)
 # Ruta base del proyecto (sube desde scripts/ al directorio raíz)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
+
+def limpiar_metadatos(metadata: dict) -> dict:
+    """Adapta los metadatos a ChromaDB, que no acepta valores None."""
+    metadata_limpio = {}
+    for key, value in metadata.items():
+        if value is not None:
+            if isinstance(value, bool):
+                metadata_limpio[key] = str(value)
+            else:
+                metadata_limpio[key] = value
+        else:
+            metadata_limpio[key] = ""
+    return metadata_limpio
+
+
 def main():
     """Función principal para configurar ChromaDB."""
 
@@ -25,7 +43,19 @@ def main():
     logger.info("Inicializando ChromaRepository...")
     # Inicializar repositorio con ruta correcta
     db_path = os.path.join(BASE_DIR, "data", "chroma_db")
-    db_repository = ChromaRepository(db_path=db_path)
+    # Mismo proveedor de embeddings que usará la API para las consultas
+    embedding_provider = crear_proveedor_embeddings(
+        backend=settings.EMBEDDING_BACKEND,
+        model_name=settings.EMBEDDING_MODEL,
+        onnx_model_dir=settings.ONNX_MODEL_DIR,
+        onnx_num_threads=settings.ONNX_NUM_THREADS
+    )
+    db_repository = ChromaRepository(
+        db_path=db_path,
+        model_name=settings.EMBEDDING_MODEL,
+        embedding_provider=embedding_provider,
+        mmap_store_path=settings.MMAP_STORE_PATH
+    )
 
     # Crear colección (recrear=True para empezar limpio)
     if not db_repository.create_collection(recreate=True):
@@ -55,6 +85,15 @@ def main():
 
     logger.info(f"Procesados {len(articulos)} artículos")
 
+    # Tabla estructurada de infracciones (código → multa → sanciones)
+    infracciones = procesador.extraer_infracciones()
+    if infracciones:
+        InfractionIndex.desde_registros(
+            [vars(infraccion) for infraccion in infracciones]
+        ).guardar(settings.INFRACTION_INDEX_PATH)
+    else:
+        logger.warning("⚠️ No se extrajeron infracciones: el tool consultar_infraccion quedará deshabilitado")
+
     # Preparar documentos para vectorización
     documentos = procesador.exportar_para_vectorizacion()
 
@@ -76,23 +115,34 @@ def main():
     ids = [doc['id'] for doc in documentos]
 
     # Limpiar metadatos - ChromaDB no acepta valores None
-    metadatos = []
-    for doc in documentos:
-        metadata_limpio = {}
-        for key, value in doc['metadata'].items():
-            if value is not None:
-                if isinstance(value, bool):
-                    metadata_limpio[key] = str(value)
-                else:
-                    metadata_limpio[key] = value
-            else:
-                metadata_limpio[key] = ""
-        metadatos.append(metadata_limpio)
+    metadatos = [limpiar_metadatos(doc['metadata']) for doc in documentos]
+
+    # Fragmentos (párrafos y parágrafos) enlazados al ID final de su artículo
+    fragmentos = procesador.exportar_fragmentos_para_vectorizacion(ids_padre=ids)
+    logger.info(f"Generados {len(fragmentos)} fragmentos a partir de {len(ids)} artículos")
+
+    if not db_repository.create_fragment_collection(recreate=True):
+        logger.error("❌ Error creando colección de fragmentos")
+        return
+
+    fragmentos_ok = db_repository.add_documents(
+        [fragmento['texto'] for fragmento in fragmentos],
+        [limpiar_metadatos(fragmento['metadata']) for fragmento in fragmentos],
+        [fragmento['id'] for fragmento in fragmentos],
+        embedding_texts=[fragmento['texto_embedding'] for fragmento in fragmentos],
+        fragmentos=True
+    )
+    if not fragmentos_ok:
+        logger.error("❌ Error almacenando fragmentos")
+        return
 
     # Almacenar en ChromaDB
     if db_repository.add_documents(textos, metadatos, ids):
         logger.info("✅ Base de datos creada exitosamente!")
 
+        # Almacén en disco mapeado en memoria (VECTOR_BACKEND=mmap)
+        db_repository.export_mmap_store(dtype=settings.MMAP_STORE_DTYPE)
+
         # Mostrar estadísticas
         stats = db_repository.get_stats()
         logger.info("\n=== ESTADÍSTICAS DE LA BASE DE DATOS ===")
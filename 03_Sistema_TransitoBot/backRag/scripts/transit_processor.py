@@ -18,11 +18,36 @@ class ArticuloTransito:
     seccion: Optional[str] = None
     metadata: Optional[Dict] = None
 
+@dataclass
+class InfraccionTransito:
+    """Fila de la tabla de infracciones del artículo 131 (código → multa → sanciones)."""
+    codigo: str
+    descripcion: str
+    multa_smldv: int
+    sanciones: List[str]
+    articulo: str
+    articulo_remision: Optional[str] = None
+
 class ProcesadorCodigoTransito:
     """Procesador avanzado para el código de tránsito colombiano."""
-    
+
+    # Límites de tamaño de los fragmentos (párrafos y parágrafos)
+    MIN_CARACTERES_FRAGMENTO = 150
+    MAX_CARACTERES_FRAGMENTO = 800
+    PATRON_PARAGRAFO = re.compile(r'^\s*PAR[ÁA]GRAFO\b', re.IGNORECASE)
+
+    # Tabla de infracciones: el artículo 131 agrupa los códigos por literal
+    # ("C. Será sancionado con multa equivalente a quince (15) smldv ...")
+    # y numera cada infracción ("C.14", "C. 29", "C.12 A.")
+    ARTICULO_INFRACCIONES = "131"
+    PATRON_LITERAL = re.compile(r'(?<![\w.])(?<!\d )([A-F])\.\s+(?=[A-ZÁÉÍÓÚ])')
+    PATRON_CODIGO = re.compile(r'(?<![\w.])([A-E])\.\s?(\d{1,2})(?:\s([A-Z])\.)?\.?(?=\s)')
+    PATRON_SANCION = re.compile(r'inmoviliza|suspen|cancela|retendr|retenci', re.IGNORECASE)
+    PATRON_REMISION = re.compile(r'art[íi]culo\s+(\d+)', re.IGNORECASE)
+
     def __init__(self):
         self.articulos: List[ArticuloTransito] = []
+        self.texto_completo = ""
         
     def procesar_codigo_transito(self, nombre_archivo: str) -> List[ArticuloTransito]:
         """
@@ -51,6 +76,7 @@ class ProcesadorCodigoTransito:
                 texto_completo.append(parrafo.text.strip())
 
         texto_unido = "\n".join(texto_completo)
+        self.texto_completo = texto_unido
         
         # Procesar artículos con regex más robusto
         articulos_raw = self._segmentar_por_articulos(texto_unido)
@@ -241,6 +267,187 @@ class ProcesadorCodigoTransito:
         
         return documentos
 
+    def extraer_infracciones(self) -> List[InfraccionTransito]:
+        """
+        Extrae la tabla estructurada de infracciones del artículo 131.
+
+        Se lee del texto completo del documento y no del artículo segmentado,
+        porque la segmentación también corta en referencias internas
+        ("artículo 77"). La multa de cada literal se hereda a sus códigos;
+        un literal sin códigos (F, embriaguez) es una infracción en sí misma
+        y su multa se remite a otro artículo.
+
+        Returns:
+            List[InfraccionTransito]: Infracciones en el orden de la ley
+        """
+        from app.utils.fines import UNIDAD_DIARIOS, extraer_multas
+
+        match = re.search(
+            rf'^Art[íi]culo\s+{self.ARTICULO_INFRACCIONES}\b[^\n]*\n(.*?)(?=^Art[íi]culo\s+\d+|\Z)',
+            self.texto_completo,
+            re.MULTILINE | re.DOTALL | re.IGNORECASE
+        )
+        if not match:
+            logger.warning(f"No se encontró el artículo {self.ARTICULO_INFRACCIONES} para extraer infracciones")
+            return []
+        texto = match.group(1)
+
+        marcas = [(m.start(), m.end(), 'literal', m.group(1)) for m in self.PATRON_LITERAL.finditer(texto)]
+        marcas += [
+            (m.start(), m.end(), 'codigo', f"{m.group(1)}{int(m.group(2))}{m.group(3) or ''}")
+            for m in self.PATRON_CODIGO.finditer(texto)
+        ]
+        marcas.sort()
+
+        infracciones = []
+        literal = None
+        for i, (inicio, fin, tipo, clave) in enumerate(marcas):
+            siguiente = marcas[i + 1][0] if i + 1 < len(marcas) else len(texto)
+            segmento = ' '.join(texto[fin:siguiente].split())
+
+            if tipo == 'literal':
+                multas = [m for m in extraer_multas(segmento) if m['unidad'] == UNIDAD_DIARIOS]
+                literal = {'letra': clave, 'multa': multas[0]['cantidad'] if multas else 0}
+                # Literal sin códigos propios: la infracción es el literal
+                if i + 1 == len(marcas) or marcas[i + 1][2] == 'literal':
+                    infraccion = self._construir_infraccion(clave, segmento, literal['multa'])
+                    if infraccion:
+                        infracciones.append(infraccion)
+                continue
+
+            if literal is None or not clave.startswith(literal['letra']):
+                continue
+            infraccion = self._construir_infraccion(clave, segmento, literal['multa'])
+            if infraccion:
+                infracciones.append(infraccion)
+
+        logger.info(f"Extraídas {len(infracciones)} infracciones del artículo {self.ARTICULO_INFRACCIONES}")
+        return infracciones
+
+    def _construir_infraccion(self, codigo: str, texto: str, multa_smldv: int) -> Optional[InfraccionTransito]:
+        """Separa la descripción de una infracción de sus sanciones adicionales."""
+        oraciones = [o for o in re.split(r'(?<=\.)\s+', texto) if o.strip()]
+        if not oraciones:
+            # Código derogado (p. ej. "E.3." sin texto)
+            return None
+
+        descripcion = oraciones[0]
+        sanciones = [o for o in oraciones[1:] if self.PATRON_SANCION.search(o)]
+
+        # "..., además el vehículo será inmovilizado." dentro de la misma oración
+        partes = re.split(r',?\s+(?=(?:además|lo cual)\b)', descripcion, maxsplit=1, flags=re.IGNORECASE)
+        if len(partes) == 2 and self.PATRON_SANCION.search(partes[1]):
+            descripcion = partes[0].rstrip(',') + '.'
+            sanciones.insert(0, partes[1][0].upper() + partes[1][1:])
+
+        remision = None
+        if not multa_smldv:
+            match = self.PATRON_REMISION.search(texto)
+            remision = match.group(1) if match else None
+
+        return InfraccionTransito(
+            codigo=codigo,
+            descripcion=descripcion,
+            multa_smldv=multa_smldv,
+            sanciones=sanciones,
+            articulo=self.ARTICULO_INFRACCIONES,
+            articulo_remision=remision
+        )
+
+    def _fragmentar_contenido(self, contenido: str) -> List[Dict]:
+        """
+        Divide el contenido de un artículo en párrafos y parágrafos.
+
+        Los párrafos cortos consecutivos se agrupan hasta alcanzar
+        MIN_CARACTERES_FRAGMENTO; cada parágrafo inicia su propio fragmento,
+        y los bloques mayores a MAX_CARACTERES_FRAGMENTO se dividen por
+        oraciones.
+        """
+        bloques = []
+        for linea in contenido.split('\n'):
+            linea = linea.strip()
+            if not linea:
+                continue
+
+            if self.PATRON_PARAGRAFO.match(linea):
+                bloques.append({'tipo': 'paragrafo', 'lineas': [linea]})
+            elif bloques and (
+                bloques[-1]['tipo'] == 'paragrafo'
+                or len('\n'.join(bloques[-1]['lineas'])) < self.MIN_CARACTERES_FRAGMENTO
+            ):
+                bloques[-1]['lineas'].append(linea)
+            else:
+                bloques.append({'tipo': 'parrafo', 'lineas': [linea]})
+
+        fragmentos = []
+        for bloque in bloques:
+            texto = '\n'.join(bloque['lineas'])
+            for parte in self._dividir_por_oraciones(texto):
+                fragmentos.append({'tipo': bloque['tipo'], 'texto': parte})
+
+        return fragmentos
+
+    def _dividir_por_oraciones(self, texto: str) -> List[str]:
+        """Divide un texto largo en partes de hasta MAX_CARACTERES_FRAGMENTO."""
+        if len(texto) <= self.MAX_CARACTERES_FRAGMENTO:
+            return [texto]
+
+        partes = []
+        actual = ""
+        for oracion in re.split(r'(?<=[.;:])\s+', texto):
+            if actual and len(actual) + len(oracion) + 1 > self.MAX_CARACTERES_FRAGMENTO:
+                partes.append(actual)
+                actual = oracion
+            else:
+                actual = f"{actual} {oracion}" if actual else oracion
+        if actual:
+            partes.append(actual)
+
+        return partes
+
+    def exportar_fragmentos_para_vectorizacion(self, ids_padre: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Exporta los fragmentos de cada artículo enlazados a su artículo padre.
+
+        Args:
+            ids_padre: IDs finales de los artículos, alineados con
+                self.articulos (por defecto articulo_{numero})
+
+        Returns:
+            Lista de documentos con 'id', 'texto' (el fragmento), 'texto_embedding'
+            (fragmento precedido del encabezado del artículo) y 'metadata'
+        """
+        documentos = []
+
+        for posicion, articulo in enumerate(self.articulos):
+            id_padre = ids_padre[posicion] if ids_padre else f"articulo_{articulo.numero}"
+            encabezado = f"Artículo {articulo.numero}"
+            if articulo.titulo:
+                encabezado += f": {articulo.titulo}"
+
+            fragmentos = self._fragmentar_contenido(articulo.contenido)
+            for indice, fragmento in enumerate(fragmentos):
+                documentos.append({
+                    'id': f"{id_padre}_f{indice}",
+                    'texto': fragmento['texto'],
+                    'texto_embedding': f"{encabezado}\n\n{fragmento['texto']}",
+                    'metadata': {
+                        'numero_articulo': articulo.numero,
+                        'titulo': articulo.titulo,
+                        'capitulo': articulo.capitulo,
+                        'seccion': articulo.seccion,
+                        'tipo_documento': 'fragmento_codigo_transito',
+                        'fuente': 'Código Nacional de Tránsito Terrestre - Ley 769 de 2002',
+                        'contiene_multa': articulo.metadata.get('contiene_multa', False),
+                        'id_padre': id_padre,
+                        'tipo_fragmento': fragmento['tipo'],
+                        'indice_fragmento': indice,
+                        'total_fragmentos': len(fragmentos)
+                    }
+                })
+
+        return documentos
+
 # Función de uso principal (compatible con tu código actual)
 def procesar_codigo_transito(nombre_archivo: str) -> List[str]:
     """
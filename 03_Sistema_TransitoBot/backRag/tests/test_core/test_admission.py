@@ -0,0 +1,86 @@
+import asyncio
+import pytest
+from app.core.admission import (
+    MOTIVO_COLA_LLENA,
+    MOTIVO_DEADLINE,
+    MOTIVO_DESPLAZADA,
+    PRIORIDAD_FONDO,
+    PRIORIDAD_INTERACTIVA,
+    AdmisionRechazada,
+    AdmissionController
+)
+
+
+async def ocupar(controlador: AdmissionController, liberar: asyncio.Event) -> None:
+    """Mantiene un turno hasta que se active `liberar`."""
+    async with controlador.admitir():
+        await liberar.wait()
+
+
+@pytest.mark.asyncio
+async def test_deadline_rechaza_la_llamada_en_cola():
+    controlador = AdmissionController(max_concurrencia=1, deadlines={PRIORIDAD_INTERACTIVA: 0.02})
+    liberar = asyncio.Event()
+    ocupante = asyncio.create_task(ocupar(controlador, liberar))
+    await asyncio.sleep(0)
+
+    with pytest.raises(AdmisionRechazada) as error:
+        async with controlador.admitir():
+            pass
+
+    assert error.value.motivo == MOTIVO_DEADLINE
+    liberar.set()
+    await ocupante
+
+
+@pytest.mark.asyncio
+async def test_interactiva_pasa_delante_de_fondo():
+    controlador = AdmissionController(max_concurrencia=1)
+    liberar = asyncio.Event()
+    orden = []
+
+    async def llamar(nombre: str, prioridad: int) -> None:
+        async with controlador.admitir(prioridad):
+            orden.append(nombre)
+
+    ocupante = asyncio.create_task(ocupar(controlador, liberar))
+    await asyncio.sleep(0)
+    fondo = asyncio.create_task(llamar("fondo", PRIORIDAD_FONDO))
+    await asyncio.sleep(0)
+    interactiva = asyncio.create_task(llamar("interactiva", PRIORIDAD_INTERACTIVA))
+    await asyncio.sleep(0)
+
+    liberar.set()
+    await asyncio.gather(ocupante, fondo, interactiva)
+
+    assert orden == ["interactiva", "fondo"]
+
+
+@pytest.mark.asyncio
+async def test_cola_llena_rechaza_y_la_interactiva_desplaza_a_fondo():
+    controlador = AdmissionController(max_concurrencia=1, max_cola=1)
+    liberar = asyncio.Event()
+    ocupante = asyncio.create_task(ocupar(controlador, liberar))
+    await asyncio.sleep(0)
+
+    async def llamar(prioridad: int) -> None:
+        async with controlador.admitir(prioridad):
+            pass
+
+    fondo = asyncio.create_task(llamar(PRIORIDAD_FONDO))
+    await asyncio.sleep(0)
+
+    # Otra de fondo no cabe
+    with pytest.raises(AdmisionRechazada) as error:
+        await llamar(PRIORIDAD_FONDO)
+    assert error.value.motivo == MOTIVO_COLA_LLENA
+
+    # Una interactiva ocupa el lugar de la de fondo
+    interactiva = asyncio.create_task(llamar(PRIORIDAD_INTERACTIVA))
+    await asyncio.sleep(0)
+    with pytest.raises(AdmisionRechazada) as error:
+        await fondo
+    assert error.value.motivo == MOTIVO_DESPLAZADA
+
+    liberar.set()
+    await asyncio.gather(ocupante, interactiva)
@@ -0,0 +1,62 @@
+import asyncio
+import pytest
+from app.core.singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_llamadas_concurrentes_comparten_un_computo():
+    single_flight = SingleFlight()
+    llamadas = 0
+
+    async def computar():
+        nonlocal llamadas
+        llamadas += 1
+        await asyncio.sleep(0.02)
+        return "resultado"
+
+    resultados = await asyncio.gather(*(single_flight.ejecutar("clave", computar) for _ in range(3)))
+
+    assert llamadas == 1
+    assert [resultado for resultado, _ in resultados] == ["resultado"] * 3
+    assert sorted(compartido for _, compartido in resultados) == [False, True, True]
+    assert single_flight.lideres == 1
+    assert single_flight.coalescidas == 2
+
+
+@pytest.mark.asyncio
+async def test_la_excepcion_llega_a_todos_y_libera_la_clave():
+    single_flight = SingleFlight()
+
+    async def fallar():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("fallo")
+
+    resultados = await asyncio.gather(
+        single_flight.ejecutar("clave", fallar),
+        single_flight.ejecutar("clave", fallar),
+        return_exceptions=True
+    )
+    assert all(isinstance(resultado, RuntimeError) for resultado in resultados)
+
+    async def computar():
+        return "nuevo"
+
+    # No es una caché: la siguiente llamada vuelve a computar
+    assert await single_flight.ejecutar("clave", computar) == ("nuevo", False)
+
+
+@pytest.mark.asyncio
+async def test_la_cancelacion_de_un_llamador_no_cancela_el_computo():
+    single_flight = SingleFlight()
+
+    async def computar():
+        await asyncio.sleep(0.02)
+        return "resultado"
+
+    primero = asyncio.create_task(single_flight.ejecutar("clave", computar))
+    await asyncio.sleep(0)
+    segundo = asyncio.create_task(single_flight.ejecutar("clave", computar))
+    await asyncio.sleep(0)
+    primero.cancel()
+
+    assert await segundo == ("resultado", True)
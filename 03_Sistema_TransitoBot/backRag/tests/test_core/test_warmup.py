@@ -0,0 +1,71 @@
+import asyncio
+import threading
+import pytest
+import app.main as main
+from app.core import warmup
+from app.core.config import settings
+
+
+@pytest.fixture
+def arranque(monkeypatch):
+    """Lifespan con recuperación y calentamiento, sin ChromaDB ni worker de emails."""
+    monkeypatch.setitem(warmup._estado, "listo", False)
+    monkeypatch.setitem(warmup._estado, "precargado", False)
+    monkeypatch.setattr(settings, "WARMUP_ENABLED", True)
+    monkeypatch.setattr(main, "usa_recuperacion", lambda: True)
+    monkeypatch.setattr(main, "get_db_repository", lambda: None)
+    monkeypatch.setattr(main, "get_infraction_index", lambda: None)
+    monkeypatch.setattr(main, "get_email_outbox", lambda: None)
+    llamadas = []
+    liberar = threading.Event()
+
+    def calentar_lento():
+        llamadas.append(1)
+        liberar.wait(5)
+        return 1
+
+    monkeypatch.setattr(main, "calentar", calentar_lento)
+    return llamadas, liberar
+
+
+async def esperar_listo(timeout: float = 5.0) -> bool:
+    for _ in range(int(timeout / 0.01)):
+        if warmup.esta_listo():
+            return True
+        await asyncio.sleep(0.01)
+    return False
+
+
+@pytest.mark.asyncio
+async def test_no_esta_listo_hasta_terminar_el_calentamiento(arranque):
+    llamadas, liberar = arranque
+
+    async with main.lifespan(main.app):
+        # El arranque terminó y el servidor ya aceptaría conexiones
+        assert not warmup.esta_listo()
+        liberar.set()
+        assert await esperar_listo()
+
+    assert llamadas == [1]
+
+
+@pytest.mark.asyncio
+async def test_worker_precargado_no_repite_el_calentamiento(arranque):
+    llamadas, _ = arranque
+    warmup.marcar_precargado()
+
+    async with main.lifespan(main.app):
+        assert warmup.esta_listo()
+
+    assert llamadas == []
+
+
+@pytest.mark.asyncio
+async def test_error_en_el_calentamiento_igual_marca_listo(arranque, monkeypatch):
+    def calentar_con_error():
+        raise RuntimeError("modelo no disponible")
+
+    monkeypatch.setattr(main, "calentar", calentar_con_error)
+
+    async with main.lifespan(main.app):
+        assert await esperar_listo()
@@ -0,0 +1,50 @@
+import pytest
+
+pytest.importorskip("docx")
+
+from scripts.transit_processor import ProcesadorCodigoTransito  # noqa: E402
+
+TEXTO_ARTICULO_131 = """Artículo 131. Multas.
+Los infractores de las normas de tránsito serán sancionados con multas.
+A. Será sancionado con multa equivalente a cuatro (4) salarios mínimos legales diarios vigentes (smldv) el conductor de un vehículo no automotor que incurra en cualquiera de las siguientes infracciones:
+A.1. No transitar por la derecha de la vía.
+C. Será sancionado con multa equivalente a quince (15) salarios mínimos legales diarios vigentes (smldv) el conductor que incurra en cualquiera de las siguientes infracciones:
+C.14. Transitar por sitios restringidos, además el vehículo será inmovilizado.
+C. 29. Conducir a velocidad superior a la máxima permitida. Se suspenderá la licencia de conducción a 1 año.
+F. Conducir bajo el influjo del alcohol. El conductor será sancionado de conformidad con el artículo 152 de este código.
+Artículo 132. Reincidencia.
+"""
+
+
+def extraer(texto: str):
+    procesador = ProcesadorCodigoTransito()
+    procesador.texto_completo = texto
+    return {i.codigo: i for i in procesador.extraer_infracciones()}
+
+
+def test_extrae_codigos_con_la_multa_del_literal():
+    infracciones = extraer(TEXTO_ARTICULO_131)
+
+    assert list(infracciones) == ["A1", "C14", "C29", "F"]
+    assert infracciones["A1"].multa_smldv == 4
+    assert infracciones["C14"].multa_smldv == 15
+    assert infracciones["C29"].multa_smldv == 15
+
+
+def test_separa_las_sanciones_adicionales():
+    infracciones = extraer(TEXTO_ARTICULO_131)
+
+    assert infracciones["C14"].descripcion == "Transitar por sitios restringidos."
+    assert infracciones["C14"].sanciones == ["Además el vehículo será inmovilizado."]
+    assert infracciones["C29"].sanciones == ["Se suspenderá la licencia de conducción a 1 año."]
+
+
+def test_literal_sin_codigos_remite_a_otro_articulo():
+    infraccion = extraer(TEXTO_ARTICULO_131)["F"]
+
+    assert infraccion.multa_smldv == 0
+    assert infraccion.articulo_remision == "152"
+
+
+def test_sin_articulo_131():
+    assert extraer("Artículo 1. Ámbito de aplicación.\nTexto.\n") == {}
@@ -0,0 +1,142 @@
+import time
+import requests
+from app.services.email_outbox import ESTADO_ENVIADO, ESTADO_FALLIDO, ESTADO_PENDIENTE, EmailOutbox
+
+
+class RespuestaStub:
+    def __init__(self, status_code: int, datos=None):
+        self.status_code = status_code
+        self._datos = datos if datos is not None else {"success": True}
+        self.text = str(self._datos)
+
+    def json(self):
+        return self._datos
+
+
+class SessionStub:
+    """Reemplazo de requests.Session que responde en orden las respuestas dadas."""
+
+    def __init__(self, *respuestas):
+        self.respuestas = list(respuestas)
+        self.llamadas = []
+
+    def post(self, url, json=None, headers=None, timeout=None):
+        self.llamadas.append(headers["Idempotency-Key"])
+        respuesta = self.respuestas.pop(0)
+        if isinstance(respuesta, Exception):
+            raise respuesta
+        return respuesta
+
+    def close(self):
+        pass
+
+
+def crear_outbox(tmp_path, session, **kwargs) -> EmailOutbox:
+    kwargs.setdefault("backoff_segundos", 0.0)
+    outbox = EmailOutbox(str(tmp_path / "outbox.db"), "http://email.test/send", **kwargs)
+    outbox._session = session
+    return outbox
+
+
+def entregar_siguiente(outbox: EmailOutbox) -> bool:
+    """Un paso del worker sin hilo: reclama y entrega el próximo email."""
+    fila = outbox._reclamar_siguiente()
+    if fila is None:
+        return False
+    outbox._entregar(fila)
+    return True
+
+
+def test_reintenta_hasta_entregar(tmp_path):
+    session = SessionStub(
+        RespuestaStub(503),
+        requests.ConnectionError("sin conexión"),
+        RespuestaStub(200, {"success": False, "message": "SMTP caído"}),
+        RespuestaStub(200)
+    )
+    outbox = crear_outbox(tmp_path, session)
+    ticket = outbox.encolar("a@b.co", "Consulta", "Hola")["ticket"]
+
+    while entregar_siguiente(outbox):
+        pass
+
+    email = outbox.obtener(ticket)
+    assert email["estado"] == ESTADO_ENVIADO
+    assert email["intentos"] == 4
+    assert email["ultimo_error"] is None
+    # Todos los intentos usan el ticket como clave de idempotencia
+    assert session.llamadas == [ticket] * 4
+    assert (outbox.reintentos, outbox.entregados, outbox.fallidos) == (3, 1, 0)
+
+
+def test_4xx_no_reintentable_falla_sin_reintentar(tmp_path):
+    session = SessionStub(RespuestaStub(400, {"detail": "email inválido"}))
+    outbox = crear_outbox(tmp_path, session)
+    ticket = outbox.encolar("no-es-email", "Consulta", "Hola")["ticket"]
+
+    while entregar_siguiente(outbox):
+        pass
+
+    email = outbox.obtener(ticket)
+    assert email["estado"] == ESTADO_FALLIDO
+    assert email["intentos"] == 1
+    assert "400" in email["ultimo_error"]
+    assert len(session.llamadas) == 1
+
+
+def test_429_se_reintenta(tmp_path):
+    outbox = crear_outbox(tmp_path, SessionStub(RespuestaStub(429), RespuestaStub(200)))
+    ticket = outbox.encolar("a@b.co", "Consulta", "Hola")["ticket"]
+
+    entregar_siguiente(outbox)
+    assert outbox.obtener(ticket)["estado"] == ESTADO_PENDIENTE
+
+    entregar_siguiente(outbox)
+    assert outbox.obtener(ticket)["estado"] == ESTADO_ENVIADO
+
+
+def test_agota_los_intentos(tmp_path):
+    outbox = crear_outbox(tmp_path, SessionStub(RespuestaStub(500), RespuestaStub(500)), max_intentos=2)
+    ticket = outbox.encolar("a@b.co", "Consulta", "Hola")["ticket"]
+
+    while entregar_siguiente(outbox):
+        pass
+
+    assert outbox.obtener(ticket)["estado"] == ESTADO_FALLIDO
+    assert outbox.obtener(ticket)["intentos"] == 2
+
+
+def test_recupera_email_con_lease_vencido(tmp_path):
+    # La instancia caída reclamó el email y murió antes de registrar el resultado
+    caida = crear_outbox(tmp_path, SessionStub(), lease_segundos=0.05)
+    ticket = caida.encolar("a@b.co", "Consulta", "Hola")["ticket"]
+    assert caida._reclamar_siguiente()["ticket"] == ticket
+
+    viva = crear_outbox(tmp_path, SessionStub(RespuestaStub(200)), lease_segundos=0.05)
+    assert viva._reclamar_siguiente() is None, "el lease vigente protege el email"
+
+    time.sleep(0.1)
+    assert entregar_siguiente(viva)
+    assert viva.obtener(ticket)["estado"] == ESTADO_ENVIADO
+
+    # El resultado tardío de la instancia caída se descarta
+    assert not caida._actualizar(ticket, estado=ESTADO_FALLIDO)
+    assert viva.obtener(ticket)["estado"] == ESTADO_ENVIADO
+
+
+def test_worker_entrega_en_segundo_plano(tmp_path, monkeypatch):
+    session = SessionStub(RespuestaStub(200))
+    outbox = crear_outbox(tmp_path, session, intervalo_sondeo=0.01)
+    monkeypatch.setattr(outbox, "_crear_sesion", lambda: session)
+
+    outbox.iniciar()
+    try:
+        ticket = outbox.encolar("a@b.co", "Consulta", "Hola")["ticket"]
+        limite = time.time() + 2
+        while outbox.obtener(ticket)["estado"] != ESTADO_ENVIADO and time.time() < limite:
+            time.sleep(0.01)
+    finally:
+        outbox.detener()
+
+    assert outbox.obtener(ticket)["estado"] == ESTADO_ENVIADO
+    assert outbox.get_stats()["por_estado"] == {ESTADO_ENVIADO: 1}
@@ -0,0 +1,81 @@
+import pytest
+from app.services.infraction_index import InfractionIndex, normalizar_codigo
+
+REGISTROS = [
+    {
+        'codigo': 'A1',
+        'descripcion': 'No transitar por la derecha de la vía.',
+        'multa_smldv': 4,
+        'sanciones': [],
+        'articulo': '131'
+    },
+    {
+        'codigo': 'C29',
+        'descripcion': 'Conducir un vehículo a velocidad superior a la máxima permitida.',
+        'multa_smldv': 15,
+        'sanciones': ['Además el vehículo será inmovilizado.'],
+        'articulo': '131'
+    },
+    {
+        'codigo': 'F',
+        'descripcion': 'Conducir bajo el influjo del alcohol.',
+        'multa_smldv': 0,
+        'sanciones': ['Se suspenderá la licencia de conducción.'],
+        'articulo': '131',
+        'articulo_remision': '152'
+    },
+]
+
+
+@pytest.fixture
+def indice() -> InfractionIndex:
+    return InfractionIndex.desde_registros(REGISTROS, valor_smldv=1000.0)
+
+
+@pytest.mark.parametrize("codigo", ["C29", "C.29", "c 29", "C029", "c. 29", "C-29"])
+def test_normalizar_codigo(codigo):
+    assert normalizar_codigo(codigo) == "C29"
+
+
+def test_normalizar_codigo_con_sufijo_y_literal():
+    assert normalizar_codigo("C.12 A") == "C12A"
+    assert normalizar_codigo("f") == "F"
+    assert normalizar_codigo("multa") is None
+    assert normalizar_codigo("G1") is None
+
+
+def test_buscar(indice):
+    infraccion = indice.buscar("c.29")
+
+    assert infraccion['codigo'] == "C29"
+    assert infraccion['multa_smldv'] == 15
+    assert infraccion['multa_pesos'] == 15000
+    assert infraccion['sanciones_adicionales'] == ["inmovilización del vehículo"]
+    assert indice.buscar("C30") is None
+
+
+def test_buscar_en_texto(indice):
+    resultados = indice.buscar_en_texto("¿Cuánto cuesta la C.29? ¿y la c 29 o la A1?")
+
+    assert [r['codigo'] for r in resultados] == ["C29", "A1"]
+
+
+def test_buscar_en_texto_no_confunde_a_1_anio_con_a1(indice):
+    assert indice.buscar_en_texto("me suspendieron la licencia a 1 año") == []
+
+
+def test_guardar_y_cargar_npz(indice, tmp_path):
+    path = tmp_path / "infracciones.npz"
+    indice.guardar(str(path))
+
+    cargado = InfractionIndex.cargar(str(path), valor_smldv=1000.0)
+
+    assert len(cargado) == len(indice)
+    for codigo in ("A1", "C29", "F"):
+        assert cargado.buscar(codigo) == indice.buscar(codigo)
+    assert cargado.buscar("F")['articulo_remision'] == "152"
+    assert cargado.buscar("F")['multa_pesos'] is None
+
+
+def test_cargar_archivo_inexistente(tmp_path):
+    assert InfractionIndex.cargar(str(tmp_path / "no_existe.npz")) is None
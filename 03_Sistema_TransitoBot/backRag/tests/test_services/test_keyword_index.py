@@ -0,0 +1,64 @@
+import pytest
+from app.services.keyword_index import KeywordIndex
+from app.utils.text_normalization import tokenizar
+
+DOCUMENTOS = [
+    "Multa por exceso de velocidad en vía urbana",
+    "Licencia de conducción vencida, multa y retención",
+    "Revisión técnico-mecánica obligatoria del vehículo",
+    "Señales de tránsito y semáforos en intersecciones",
+]
+
+
+def terminos(consulta: str) -> dict:
+    return {token: 1.0 for token in tokenizar(consulta)}
+
+
+def crear_indice(documentos=DOCUMENTOS) -> KeywordIndex:
+    indice = KeywordIndex()
+    indice.construir(documentos, [{"numero_articulo": str(i)} for i in range(len(documentos))])
+    return indice
+
+
+def test_ordena_por_puntaje_bm25():
+    indice = crear_indice()
+
+    resultados = indice.buscar(terminos("multa por exceso de velocidad"), n_resultados=5)
+
+    assert [r["id"] for r in resultados] == ["0", "1"]
+    assert [r["ranking"] for r in resultados] == [1, 2]
+    assert resultados[0]["similitud"] > resultados[1]["similitud"]
+
+
+def test_ignora_tildes_y_mayusculas():
+    indice = crear_indice()
+
+    resultados = indice.buscar(terminos("SEÑALES DE TRANSITO"), n_resultados=5)
+
+    assert resultados[0]["id"] == "3"
+    assert resultados == indice.buscar(terminos("señales de tránsito"), n_resultados=5)
+
+
+def test_documento_con_cada_termino_una_vez_ronda_1_sobre_k1_mas_1():
+    # Documentos de igual longitud: la normalización por longitud es neutra
+    indice = crear_indice(["casco moto", "chaleco bicicleta", "pase categoria"])
+
+    resultados = indice.buscar(terminos("casco moto"), n_resultados=1)
+
+    assert resultados[0]["similitud"] == pytest.approx(1 / (indice.k1 + 1))
+    assert resultados[0]["similitud"] == pytest.approx(0.4)
+
+
+def test_puntaje_normalizado_en_0_1():
+    indice = crear_indice(["casco casco casco casco casco casco", "chaleco", "pase"])
+
+    resultados = indice.buscar(terminos("casco"), n_resultados=3)
+
+    assert 0.4 < resultados[0]["similitud"] <= 1.0
+
+
+def test_sin_coincidencias_devuelve_lista_vacia():
+    indice = crear_indice()
+
+    assert indice.buscar(terminos("helicóptero"), n_resultados=5) == []
+    assert KeywordIndex().buscar(terminos("multa"), n_resultados=5) == []
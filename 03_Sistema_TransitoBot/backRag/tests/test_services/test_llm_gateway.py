@@ -0,0 +1,161 @@
+import asyncio
+import pytest
+from app.services.llm_gateway import (
+    ESTADO_ABIERTO,
+    ESTADO_CERRADO,
+    ESTADO_SEMIABIERTO,
+    CircuitBreaker,
+    LLMGateway,
+    LLMGatewayError,
+    PoliticaRuteo,
+    StubProvider
+)
+
+CONTEXTO = dict(
+    system_context="Eres un asistente de tránsito",
+    user_context="Usuario de prueba",
+    pregunta="¿Cuál es la multa por exceso de velocidad?",
+    entidades=[],
+    intencion="consultar_multa"
+)
+
+
+def crear_gateway(primario, secundario, hedging=False, **kwargs) -> LLMGateway:
+    """Gateway con una política "prueba" primario → secundario."""
+    return LLMGateway(
+        proveedores=[primario, secundario],
+        politicas={"prueba": PoliticaRuteo(proveedores=[primario.nombre, secundario.nombre], hedging=hedging, timeout_segundos=2.0)},
+        **kwargs
+    )
+
+
+@pytest.mark.asyncio
+async def test_failover_al_secundario_si_el_primario_falla():
+    gateway = crear_gateway(
+        StubProvider("primario", tasa_fallos=1.0),
+        StubProvider("secundario", respuesta="del secundario")
+    )
+
+    respuesta = await gateway.generar("prueba", **CONTEXTO)
+
+    assert respuesta.texto == "del secundario"
+    assert respuesta.proveedor == "secundario"
+    assert respuesta.intentos == ["primario", "secundario"]
+    assert not respuesta.hedged
+
+
+@pytest.mark.asyncio
+async def test_todos_los_proveedores_fallan():
+    gateway = crear_gateway(StubProvider("primario", tasa_fallos=1.0), StubProvider("secundario", tasa_fallos=1.0))
+
+    with pytest.raises(LLMGatewayError):
+        await gateway.generar("prueba", **CONTEXTO)
+
+
+@pytest.mark.asyncio
+async def test_generar_mensajes_usa_la_misma_politica():
+    gateway = crear_gateway(StubProvider("primario", tasa_fallos=1.0), StubProvider("secundario", respuesta="ok"))
+
+    respuesta = await gateway.generar_mensajes(
+        "prueba",
+        system="",
+        messages=[{"role": "user", "content": "hola"}],
+        max_tokens=50,
+        temperature=0.0
+    )
+
+    assert respuesta.proveedor == "secundario"
+    assert respuesta.intentos == ["primario", "secundario"]
+
+
+@pytest.mark.asyncio
+async def test_breaker_abierto_omite_al_primario_y_semiabierto_lo_cierra():
+    primario = StubProvider("primario", respuesta="del primario", tasa_fallos=1.0)
+    gateway = crear_gateway(primario, StubProvider("secundario"), umbral_fallos=2, enfriamiento_segundos=0.05)
+
+    for _ in range(2):
+        await gateway.generar("prueba", **CONTEXTO)
+    assert gateway.get_stats()["proveedores"]["primario"]["circuit_breaker"] == ESTADO_ABIERTO
+
+    # Abierto: ni siquiera se intenta
+    respuesta = await gateway.generar("prueba", **CONTEXTO)
+    assert respuesta.intentos == ["secundario"]
+    assert gateway.get_stats()["proveedores"]["primario"]["rechazados_por_breaker"] == 1
+
+    # Tras el enfriamiento la llamada de prueba pasa y cierra el circuito
+    primario.tasa_fallos = 0.0
+    await asyncio.sleep(0.06)
+    respuesta = await gateway.generar("prueba", **CONTEXTO)
+    assert respuesta.proveedor == "primario"
+    assert gateway.get_stats()["proveedores"]["primario"]["circuit_breaker"] == ESTADO_CERRADO
+
+
+@pytest.mark.asyncio
+async def test_breaker_semiabierto_se_reabre_si_la_prueba_falla():
+    gateway = crear_gateway(
+        StubProvider("primario", tasa_fallos=1.0),
+        StubProvider("secundario"),
+        umbral_fallos=1,
+        enfriamiento_segundos=0.05
+    )
+
+    await gateway.generar("prueba", **CONTEXTO)
+    await asyncio.sleep(0.06)
+    respuesta = await gateway.generar("prueba", **CONTEXTO)
+
+    assert respuesta.intentos == ["primario", "secundario"]
+    assert gateway.get_stats()["proveedores"]["primario"]["circuit_breaker"] == ESTADO_ABIERTO
+
+
+def test_breaker_semiabierto_admite_una_sola_prueba():
+    breaker = CircuitBreaker(umbral_fallos=1, enfriamiento_segundos=0.0)
+    breaker.registrar_fallo()
+    assert breaker.estado == ESTADO_ABIERTO
+
+    assert breaker.permite()
+    assert breaker.estado == ESTADO_SEMIABIERTO
+    assert not breaker.permite()
+
+    # Una prueba cancelada sin resultado libera el turno
+    breaker.liberar()
+    assert breaker.permite()
+    breaker.registrar_exito()
+    assert breaker.estado == ESTADO_CERRADO
+
+
+@pytest.mark.asyncio
+async def test_hedge_ganado_por_el_secundario():
+    gateway = crear_gateway(
+        StubProvider("primario", respuesta="lento", latencia_segundos=1.0),
+        StubProvider("secundario", respuesta="rápido"),
+        hedging=True,
+        hedge_retardo_por_defecto=0.02
+    )
+
+    respuesta = await gateway.generar("prueba", **CONTEXTO)
+
+    assert respuesta.texto == "rápido"
+    assert respuesta.proveedor == "secundario"
+    assert respuesta.hedged
+    assert respuesta.intentos == ["primario", "secundario"]
+    assert gateway.hedges_lanzados == 1
+    assert gateway.hedges_ganados == 1
+
+    # Deja que la llamada cancelada del primario termine antes de cerrar el loop
+    await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_sin_hedge_si_el_primario_responde_a_tiempo():
+    gateway = crear_gateway(
+        StubProvider("primario", respuesta="del primario"),
+        StubProvider("secundario"),
+        hedging=True,
+        hedge_retardo_por_defecto=0.5
+    )
+
+    respuesta = await gateway.generar("prueba", **CONTEXTO)
+
+    assert respuesta.proveedor == "primario"
+    assert not respuesta.hedged
+    assert gateway.hedges_lanzados == 0
@@ -0,0 +1,65 @@
+import pytest
+from app.core.admission import respuesta_degradada
+from app.services.llm_gateway import LLMGateway, PoliticaRuteo, StubProvider
+from app.services.llm_service import POLITICA_QUERY, LLMService
+
+ARTICULOS = [{
+    "metadata": {"numero_articulo": "131", "titulo": "Multas"},
+    "documento": "Los infractores de las normas de tránsito serán sancionados con multas.",
+    "similitud": 0.6
+}]
+
+
+def crear_servicio(monkeypatch, *proveedores) -> LLMService:
+    """LLMService sin Claude directo cuyo gateway tiene la política de /query."""
+    monkeypatch.delenv("ANTHROPIC_API_KEY", raising=False)
+    gateway = LLMGateway(
+        proveedores=list(proveedores),
+        politicas={POLITICA_QUERY: PoliticaRuteo(proveedores=[p.nombre for p in proveedores])}
+    )
+    return LLMService(api_key="", gateway=gateway)
+
+
+@pytest.mark.asyncio
+async def test_query_usa_el_gateway_con_failover(monkeypatch):
+    servicio = crear_servicio(
+        monkeypatch,
+        StubProvider("primario", tasa_fallos=1.0),
+        StubProvider("secundario", respuesta="  Respuesta del secundario  ")
+    )
+
+    respuesta = await servicio.generar_respuesta_natural_async("¿Qué multa hay?", ARTICULOS, 0.6)
+
+    assert respuesta == "Respuesta del secundario"
+    assert not respuesta_degradada()
+
+
+@pytest.mark.asyncio
+async def test_query_sin_resultados_usa_el_gateway(monkeypatch):
+    servicio = crear_servicio(monkeypatch, StubProvider("stub", respuesta="No encontré información"))
+
+    respuesta = await servicio.generar_respuesta_natural_async("¿Cómo cocino arroz?", [], 0.0)
+
+    assert respuesta == "No encontré información"
+
+
+@pytest.mark.asyncio
+async def test_query_responde_basica_si_todos_fallan(monkeypatch):
+    servicio = crear_servicio(monkeypatch, StubProvider("stub", tasa_fallos=1.0))
+
+    respuesta = await servicio.generar_respuesta_natural_async("¿Qué multa hay?", ARTICULOS, 0.6)
+
+    assert "131" in respuesta
+    # La respuesta básica no debe quedar en la caché semántica
+    assert respuesta_degradada()
+
+
+@pytest.mark.asyncio
+async def test_query_sin_llm_marca_respuesta_degradada(monkeypatch):
+    monkeypatch.delenv("ANTHROPIC_API_KEY", raising=False)
+    servicio = LLMService(api_key="")
+
+    respuesta = await servicio.generar_respuesta_natural_async("¿Qué multa hay?", ARTICULOS, 0.6)
+
+    assert "131" in respuesta
+    assert respuesta_degradada()
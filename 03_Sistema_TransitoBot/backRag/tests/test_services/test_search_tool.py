@@ -0,0 +1,25 @@
+from app.services.tools.search_tool import HybridSearchTool
+
+
+def clave(consulta: str, **kwargs) -> str:
+    return HybridSearchTool(search_service=None).clave_cache(consulta=consulta, **kwargs)
+
+
+def test_clave_ignora_mayusculas_tildes_y_espacios():
+    assert clave("Multa por  EXCESO de velocidad") == clave("multa por exceso de velocidad")
+    assert clave("¿Qué es la revisión técnico-mecánica?") == clave("¿que es la revision tecnico-mecanica?")
+
+
+def test_clave_distingue_negaciones_y_orden():
+    claves = {
+        clave("conducir sin licencia"),
+        clave("conducir con licencia"),
+        clave("no conducir con licencia"),
+        clave("licencia con conducir"),
+    }
+    assert len(claves) == 4
+
+
+def test_clave_incluye_parametros_normalizados():
+    assert clave("pico y placa", n_resultados=2) != clave("pico y placa", n_resultados=3)
+    assert clave("pico y placa", umbral_confianza=0.401) == clave("pico y placa", umbral_confianza=0.4)
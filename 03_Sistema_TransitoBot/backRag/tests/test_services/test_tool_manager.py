@@ -0,0 +1,96 @@
+import threading
+import time
+import pytest
+from app.services import tool_manager
+from app.services.tool_manager import ToolManager, get_llamadas_colgadas
+from app.services.tools.base_tool import BaseTool
+
+
+class ToolColgado(BaseTool):
+    """Tool que no responde hasta que se libera el evento."""
+
+    timeout_segundos = 0.05
+    max_concurrencia = 2
+
+    def __init__(self, liberar: threading.Event):
+        self.liberar = liberar
+        self.llamadas = 0
+
+    @property
+    def name(self) -> str:
+        return "tool_colgado"
+
+    @property
+    def description(self) -> str:
+        return "Tool de prueba"
+
+    def get_definition(self):
+        return {"name": self.name, "description": self.description, "input_schema": {"type": "object"}}
+
+    def execute(self, **kwargs):
+        self.llamadas += 1
+        self.liberar.wait(5)
+        return {"success": True}
+
+
+def esperar_sin_colgadas(tool_name: str) -> int:
+    limite = time.time() + 2
+    while get_llamadas_colgadas(tool_name) and time.time() < limite:
+        time.sleep(0.01)
+    return get_llamadas_colgadas(tool_name)
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    monkeypatch.setattr(tool_manager, "_semaforos_tools", {})
+    monkeypatch.setattr(tool_manager, "_colgadas_tools", {})
+    liberar = threading.Event()
+    tool = ToolColgado(liberar)
+    manager = ToolManager()
+    manager._tool_instances = {tool.name: tool}
+    yield manager, tool, liberar
+    liberar.set()
+    esperar_sin_colgadas(tool.name)
+
+
+def test_timeout_registra_la_llamada_colgada_hasta_que_termina(manager):
+    manager, tool, liberar = manager
+
+    resultados = manager.execute_tools([("tool_colgado", {})])
+
+    assert resultados[0]["success"] is False
+    assert "tiempo máximo" in resultados[0]["error"]
+    assert get_llamadas_colgadas("tool_colgado") == 1
+
+    liberar.set()
+    assert esperar_sin_colgadas("tool_colgado") == 0
+
+
+def test_tool_saturado_no_se_envia_al_pool(manager):
+    manager, tool, _ = manager
+
+    # Dos llamadas colgadas ocupan los dos cupos del tool
+    manager.execute_tools([("tool_colgado", {}), ("tool_colgado", {})])
+    assert get_llamadas_colgadas("tool_colgado") == 2
+
+    resultados = manager.execute_tools([("tool_colgado", {})])
+
+    assert resultados[0]["success"] is False
+    assert "no está disponible" in resultados[0]["error"]
+    assert tool.llamadas == 2
+
+
+def test_espera_por_cupo_acotada_por_el_timeout(manager):
+    manager, tool, _ = manager
+    semaforo = tool_manager.get_semaforo_tool("tool_colgado", 2)
+    semaforo.acquire()
+    semaforo.acquire()
+
+    inicio = time.monotonic()
+    resultado = manager._execute_tool_limitado("tool_colgado", {})
+
+    assert resultado["success"] is False
+    assert time.monotonic() - inicio < 1
+    assert tool.llamadas == 0
+    semaforo.release()
+    semaforo.release()
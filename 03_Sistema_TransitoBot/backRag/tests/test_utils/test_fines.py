@@ -0,0 +1,35 @@
+from app.utils.fines import UNIDAD_DIARIOS, UNIDAD_MENSUALES, extraer_multas, formatear_multa
+
+
+def test_forma_larga_de_la_ley():
+    multas = extraer_multas(
+        "Será sancionado con multa equivalente a quince (15) salarios mínimos legales diarios vigentes."
+    )
+
+    assert [(m['cantidad'], m['unidad']) for m in multas] == [(15, UNIDAD_DIARIOS)]
+    assert multas[0]['texto'] == "(15) salarios mínimos legales diarios"
+
+
+def test_forma_corta_sin_legales():
+    multas = extraer_multas("multa de 8 salarios mínimos mensuales")
+
+    assert [(m['cantidad'], m['unidad']) for m in multas] == [(8, UNIDAD_MENSUALES)]
+
+
+def test_siglas():
+    multas = extraer_multas("Multa de 15 SMLDV, 30 s.m.l.d.v. o 2 smmlv según el caso; 3 SMLMV.")
+
+    assert [(m['cantidad'], m['unidad']) for m in multas] == [
+        (15, UNIDAD_DIARIOS), (30, UNIDAD_DIARIOS), (2, UNIDAD_MENSUALES), (3, UNIDAD_MENSUALES)
+    ]
+
+
+def test_montos_repetidos_una_sola_vez():
+    multas = extraer_multas("quince (15) salarios mínimos legales diarios vigentes (15 smldv)")
+
+    assert len(multas) == 1
+    assert formatear_multa(multas[0]) == "15 SMLDV"
+
+
+def test_texto_sin_multas():
+    assert extraer_multas("El conductor deberá portar la licencia de conducción.") == []
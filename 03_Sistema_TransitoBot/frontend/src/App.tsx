@@ -4,13 +4,14 @@ import WelcomeScreen from './components/WelcomeScreen';
 import ChatMessage from './components/ChatMessage';
 import ChatInput from './components/ChatInput';
 import LoadingIndicator from './components/LoadingIndicator';
-import { Message } from './types/chat';
-import { apiService } from './services/api';
+import { Message, Source } from './types/chat';
+import { apiService, ChatResponse } from './services/api';
 
 function App() {
   const [messages, setMessages] = useState<Message[]>([]);
   const [showWelcome, setShowWelcome] = useState(true);
   const [isTyping, setIsTyping] = useState(false);
+  const [isStreaming, setIsStreaming] = useState(false);
   const messagesEndRef = useRef<HTMLDivElement>(null);
 
   // Limpiar sessionStorage al cargar la aplicación
@@ -40,6 +41,42 @@ function App() {
     setMessages(prev => [...prev, newMessage]);
   };
 
+  const updateMessage = (id: string, update: (message: Message) => Message) => {
+    setMessages(prev => prev.map(message => (message.id === id ? update(message) : message)));
+  };
+
+  const addBotMessages = (response: ChatResponse) => {
+    // RASA puede devolver múltiples mensajes
+    if (response.messages && response.messages.length > 0) {
+      response.messages.forEach((msg) => {
+        // Extraer texto del mensaje
+        const messageText = msg.text || '';
+
+        // Si hay custom data con sources (del RAG), usarlas
+        const sources = msg.custom?.sources;
+
+        // Agregar el mensaje del bot
+        addMessage(
+          messageText,
+          true,
+          sources,
+          {
+            hasButtons: msg.buttons && msg.buttons.length > 0,
+            buttons: msg.buttons,
+            image: msg.image,
+            custom: msg.custom
+          }
+        );
+      });
+    } else {
+      // Fallback si no hay mensajes
+      addMessage(
+        'No recibí respuesta del servidor.',
+        true
+      );
+    }
+  };
+
   const handleSendMessage = async (text: string) => {
     // Hide welcome screen
     setShowWelcome(false);
@@ -49,40 +86,62 @@ function App() {
 
     // Show typing indicator
     setIsTyping(true);
+    setIsStreaming(true);
+
+    // Mensaje del bot que se completa a medida que llegan los tokens de BackRag
+    const streamingId = generateId();
+    let streamStarted = false;
+    let sources: Source[] | undefined;
+
+    const ensureStreamingMessage = () => {
+      if (streamStarted) return;
+      streamStarted = true;
+      setIsTyping(false);
+      setMessages(prev => [...prev, {
+        id: streamingId,
+        text: '',
+        isBot: true,
+        timestamp: new Date(),
+        sources,
+        metadata: { custom: { source: 'backrag' } }
+      }]);
+    };
 
     try {
-      // Llamar al backend que consume RASA
-      const response = await apiService.queryTransitBot(text);
-
-      // RASA puede devolver múltiples mensajes
-      if (response.messages && response.messages.length > 0) {
-        response.messages.forEach((msg) => {
-          // Extraer texto del mensaje
-          const messageText = msg.text || '';
-
-          // Si hay custom data con sources (del RAG), usarlas
-          const sources = msg.custom?.sources;
-
-          // Agregar el mensaje del bot
-          addMessage(
-            messageText,
-            true,
-            sources,
-            {
-              hasButtons: msg.buttons && msg.buttons.length > 0,
-              buttons: msg.buttons,
-              image: msg.image,
-              custom: msg.custom
+      // Llamar al backend que consume RASA (y BackRag en streaming como fallback)
+      await apiService.streamTransitBot(text, {
+        onMessages: (response) => {
+          setIsTyping(false);
+          addBotMessages(response);
+        },
+        onSources: (receivedSources, confidence) => {
+          sources = receivedSources;
+          if (streamStarted) {
+            updateMessage(streamingId, message => ({ ...message, sources, metadata: { ...message.metadata, confidence } }));
+          }
+        },
+        onToken: (token) => {
+          ensureStreamingMessage();
+          updateMessage(streamingId, message => ({ ...message, text: message.text + token, sources }));
+        },
+        onDone: (event) => {
+          if (!streamStarted) return;
+          updateMessage(streamingId, message => ({
+            ...message,
+            metadata: {
+              ...message.metadata,
+              confidence: event.confidence,
+              processingTime: event.processing_time
             }
-          );
-        });
-      } else {
-        // Fallback si no hay mensajes
-        addMessage(
-          'No recibí respuesta del servidor.',
-          true
-        );
-      }
+          }));
+        },
+        onError: (detail) => {
+          console.error('Error en streaming:', detail);
+          if (!streamStarted) {
+            addMessage('Lo siento, hubo un error al procesar tu consulta.', true);
+          }
+        }
+      });
     } catch (error) {
       console.error('Error querying bot:', error);
       addMessage(
@@ -91,6 +150,7 @@ function App() {
       );
     } finally {
       setIsTyping(false);
+      setIsStreaming(false);
     }
   };
 
@@ -127,7 +187,7 @@ function App() {
         )}
       </div>
 
-      <ChatInput onSendMessage={handleSendMessage} disabled={isTyping} />
+      <ChatInput onSendMessage={handleSendMessage} disabled={isTyping || isStreaming} />
     </div>
   );
 }
@@ -44,6 +44,23 @@ export interface QueryResponse {
   processing_time: number;
 }
 
+// Eventos del endpoint de streaming (Server-Sent Events)
+export interface StreamDoneEvent {
+  confidence?: number;
+  processing_time?: number;
+  time_to_first_token?: number | null;
+  cached?: boolean;
+  source?: string;
+}
+
+export interface StreamHandlers {
+  onMessages?: (response: ChatResponse) => void;
+  onSources?: (sources: QueryResponse['sources'], confidence: number) => void;
+  onToken?: (text: string) => void;
+  onDone?: (event: StreamDoneEvent) => void;
+  onError?: (detail: string) => void;
+}
+
 export interface HealthResponse {
   status: string;
   version: string;
@@ -95,6 +112,96 @@ class ApiService {
     });
   }
 
+  // Igual que queryTransitBot, pero la respuesta de BackRag llega token a token
+  async streamTransitBot(query: string, handlers: StreamHandlers): Promise<void> {
+    const senderId = this.getSenderId();
+
+    const response = await fetch(`${API_BASE_URL}/api/v1/chat/message/stream`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        'Accept': 'text/event-stream',
+      },
+      body: JSON.stringify({
+        sender_id: senderId,
+        message: query,
+        metadata: {
+          channel: 'web',
+          timestamp: new Date().toISOString()
+        }
+      } as ChatRequest),
+    });
+
+    if (!response.ok || !response.body) {
+      throw new Error(`API Error: ${response.status} - ${response.statusText}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+
+      buffer += decoder.decode(value, { stream: true });
+
+      // Los eventos SSE terminan en una línea en blanco
+      let separator = buffer.indexOf('\n\n');
+      while (separator !== -1) {
+        this.dispatchStreamEvent(buffer.slice(0, separator), handlers);
+        buffer = buffer.slice(separator + 2);
+        separator = buffer.indexOf('\n\n');
+      }
+    }
+
+    if (buffer.trim()) {
+      this.dispatchStreamEvent(buffer, handlers);
+    }
+  }
+
+  private dispatchStreamEvent(block: string, handlers: StreamHandlers): void {
+    let event = 'message';
+    const dataLines: string[] = [];
+
+    block.split('\n').forEach((line) => {
+      if (line.startsWith('event:')) {
+        event = line.slice(6).trim();
+      } else if (line.startsWith('data:')) {
+        dataLines.push(line.slice(5).trimStart());
+      }
+    });
+
+    if (dataLines.length === 0) return;
+
+    // Un evento cortado a mitad del stream no se puede interpretar: se descarta
+    let data;
+    try {
+      data = JSON.parse(dataLines.join('\n'));
+    } catch {
+      console.warn(`Evento SSE incompleto descartado: ${event}`);
+      return;
+    }
+
+    switch (event) {
+      case 'messages':
+        handlers.onMessages?.(data as ChatResponse);
+        break;
+      case 'sources':
+        handlers.onSources?.(data.sources, data.confidence);
+        break;
+      case 'token':
+        handlers.onToken?.(data.text);
+        break;
+      case 'done':
+        handlers.onDone?.(data as StreamDoneEvent);
+        break;
+      case 'error':
+        handlers.onError?.(data.detail);
+        break;
+    }
+  }
+
   async checkHealth(): Promise<HealthResponse> {
     return this.makeRequest<HealthResponse>('/api/v1/health');
   }
@@ -24,7 +24,8 @@ from utils import (
     stories_loader,
     template_renderer,
     success_tracker,
-    nlu_loader
+    nlu_loader,
+    fallback_answers
 )
 
 
@@ -201,6 +202,8 @@ class ActionDefaultFallback(Action):
     - Intent tiene baja confianza (nlu_fallback)
 
     Flujo:
+    0. Si la pregunta pertenece a un cluster frecuente de fallback, responde
+       con la respuesta precalculada (ver utils/fallback_answers.py)
     1. Intenta responder con OpenRouter (usa contexto de conversación)
     2. Si OpenRouter falla → retorna vacío para activar BackRag
     """
@@ -218,6 +221,18 @@ class ActionDefaultFallback(Action):
         pregunta = tracker.latest_message.get('text', '')
 
         print(f"[Fallback] Intent: {intent}, Confidence: {confidence:.2f}")
+
+        # Log para el job offline de clusters (scripts/build_fallback_answers.py)
+        fallback_answers.registrar_pregunta(pregunta, intent, confidence)
+
+        # OPCIÓN 0: RESPUESTA PRECALCULADA (cluster frecuente, sin LLM)
+        coincidencia = fallback_answers.buscar_respuesta(pregunta, API_BASE_URL)
+        if coincidencia:
+            print(f"⚡ [Fallback→Precalculada] Cluster {coincidencia['cluster_id']} "
+                  f"(similitud {coincidencia['similitud']:.2f}, v{coincidencia['version']})")
+            dispatcher.utter_message(text=fallback_answers.formatear_respuesta(coincidencia))
+            return []
+
         print(f"[Fallback] Intentando con OpenRouter con template fallback...")
 
         # OPCIÓN 1: INTENTAR CON OPENROUTER CON TEMPLATE FALLBACK
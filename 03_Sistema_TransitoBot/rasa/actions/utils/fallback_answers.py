@@ -0,0 +1,353 @@
+"""
+Respuestas precalculadas para clusters frecuentes de preguntas de fallback.
+
+`scripts/build_fallback_answers.py` agrupa offline las preguntas registradas
+por action_default_fallback, genera con BackRag una respuesta citada por
+cluster y guarda los centroides en un artefacto versionado. En tiempo de
+ejecución la acción compara la pregunta con esos centroides en memoria y,
+por encima del umbral, responde sin llamar al LLM.
+
+El artefacto guarda la huella del corpus de BackRag con la que se generó;
+si el corpus cambia (GET /v1/health/corpus), las respuestas se consideran
+obsoletas y dejan de usarse hasta regenerarlo.
+"""
+import json
+import os
+import re
+import time
+import unicodedata
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+import requests
+
+ARTIFACT_SCHEMA_VERSION = 1
+
+# Mismos vectores que el pipeline NLU (SpacyNLP + SpacyFeaturizer con pooling mean)
+SPACY_MODEL = "es_core_news_lg"
+EMBEDDING_MODEL = f"spacy:{SPACY_MODEL}"
+
+BASE_DIR = Path(__file__).parent.parent.parent
+ARTIFACT_PATH = Path(os.getenv(
+    "FALLBACK_ANSWERS_PATH",
+    str(BASE_DIR / "artifacts" / "fallback_answers" / "fallback_answers.json")
+))
+LOG_PATH = Path(os.getenv(
+    "FALLBACK_LOG_PATH",
+    str(BASE_DIR / "logs" / "fallback_questions.jsonl")
+))
+# Rotación del log: al superar LOG_MAX_BYTES pasa a fallback_questions.1.jsonl
+# (y así hasta LOG_BACKUPS archivos); cada pregunta se recorta a LOG_MAX_CHARS
+LOG_MAX_BYTES = int(os.getenv("FALLBACK_LOG_MAX_BYTES", str(5 * 1024 * 1024)))
+LOG_BACKUPS = int(os.getenv("FALLBACK_LOG_BACKUPS", "3"))
+LOG_MAX_CHARS = 500
+ENABLED = os.getenv("FALLBACK_ANSWERS_ENABLED", "true").lower() in ("1", "true", "yes")
+# Si se define, reemplaza el umbral guardado en el artefacto
+THRESHOLD_OVERRIDE = os.getenv("FALLBACK_ANSWERS_THRESHOLD")
+# Cada cuánto se compara la huella del corpus con la de BackRag
+CORPUS_CHECK_SECONDS = float(os.getenv("FALLBACK_CORPUS_CHECK_SECONDS", "600"))
+# Fracción mínima de términos clave compartidos con alguna pregunta del cluster
+MIN_OVERLAP = float(os.getenv("FALLBACK_ANSWERS_MIN_OVERLAP", "0.5"))
+
+# El promedio de vectores de palabra casi no cambia con estas palabras, pero
+# invierten el sentido ("con licencia" / "sin licencia")
+NEGACIONES = {"no", "sin", "ni", "nunca", "tampoco", "jamas", "ningun", "ninguna", "nada"}
+STOPWORDS = {
+    "a", "al", "ante", "como", "con", "cual", "cuales", "cuando", "cuanto", "cuanta", "cuantos",
+    "de", "del", "donde", "el", "en", "es", "esta", "este", "hay", "la", "las", "le", "lo", "los",
+    "me", "mi", "mis", "para", "pasa", "por", "puedo", "que", "quiero", "se", "si", "son", "su",
+    "sus", "tengo", "un", "una", "uno", "y", "o", "u", "yo", "tu", "usted", "saber", "hacer"
+}
+
+_nlp = None
+_artefacto: Optional[Dict[str, Any]] = None
+_artefacto_mtime: Optional[float] = None
+_centroides: Optional[np.ndarray] = None
+_vigencia = {"verificado": 0.0, "vigente": True, "huella": None}
+
+
+def _get_nlp():
+    """Carga el modelo de spaCy solo con sus vectores (sin componentes del pipeline)."""
+    global _nlp
+
+    if _nlp is None:
+        import spacy
+
+        print(f"🔤 Cargando vectores de {SPACY_MODEL} para respuestas precalculadas...")
+        _nlp = spacy.load(SPACY_MODEL, exclude=["tok2vec", "morphologizer", "parser", "senter",
+                                                "attribute_ruler", "lemmatizer", "ner", "tagger"])
+    return _nlp
+
+
+def embed_texts(textos: List[str]) -> np.ndarray:
+    """
+    Vectoriza textos como promedio normalizado de sus vectores de palabra.
+
+    Lo usan tanto el job offline como el matcher, por lo que centroides y
+    preguntas quedan en el mismo espacio.
+
+    Args:
+        textos: Preguntas a vectorizar
+
+    Returns:
+        Matriz float32 (len(textos), dimensión) con filas de norma 1 (o 0
+        si ninguna palabra tiene vector)
+    """
+    nlp = _get_nlp()
+    vectores = np.array([doc.vector for doc in nlp.pipe([t.lower() for t in textos])], dtype=np.float32)
+    normas = np.linalg.norm(vectores, axis=1, keepdims=True)
+    return vectores / np.maximum(normas, 1e-12)
+
+
+def _normalizar(texto: str) -> str:
+    """Minúsculas y sin tildes."""
+    descompuesto = unicodedata.normalize("NFD", texto.lower())
+    return "".join(c for c in descompuesto if unicodedata.category(c) != "Mn")
+
+
+def _terminos(texto: str) -> Tuple[Set[str], Set[str]]:
+    """
+    Separa una pregunta en negaciones y términos clave.
+
+    Los términos clave son las palabras de contenido recortadas a 5 letras,
+    así "multas"/"multa" o "conducir"/"conduciendo" coinciden.
+
+    Returns:
+        Tupla (negaciones, términos clave) como conjuntos
+    """
+    palabras = re.findall(r"\w+", _normalizar(texto))
+    negaciones = {p for p in palabras if p in NEGACIONES}
+    clave = {p[:5] for p in palabras if p not in NEGACIONES and p not in STOPWORDS and len(p) > 2}
+    return negaciones, clave
+
+
+def coincide_terminos(pregunta: str, referencia: str, min_overlap: float = MIN_OVERLAP) -> bool:
+    """
+    Verifica que la pregunta diga lo mismo que una pregunta del cluster.
+
+    La similitud del vector promedio no distingue negaciones ni cambios de
+    una palabra clave ("multa por conducir sin licencia" frente a "con
+    licencia vencida"): se exige que ambas tengan las mismas negaciones y
+    que compartan al menos `min_overlap` de los términos clave de la más
+    corta.
+
+    Args:
+        pregunta: Texto del usuario
+        referencia: Pregunta canónica o de ejemplo del cluster
+        min_overlap: Fracción mínima de términos clave compartidos
+
+    Returns:
+        True si la respuesta del cluster aplica a la pregunta
+    """
+    negaciones, clave = _terminos(pregunta)
+    negaciones_ref, clave_ref = _terminos(referencia)
+    if negaciones != negaciones_ref:
+        return False
+    if not clave or not clave_ref:
+        return clave == clave_ref
+    return len(clave & clave_ref) / min(len(clave), len(clave_ref)) >= min_overlap
+
+
+def rutas_log() -> List[Path]:
+    """Log de preguntas actual y sus rotaciones, del más reciente al más antiguo."""
+    return [LOG_PATH] + [
+        LOG_PATH.with_name(f"{LOG_PATH.stem}.{i}{LOG_PATH.suffix}") for i in range(1, LOG_BACKUPS + 1)
+    ]
+
+
+def _rotar_log() -> None:
+    """Rota el log si superó LOG_MAX_BYTES, descartando el respaldo más antiguo."""
+    try:
+        if LOG_PATH.stat().st_size < LOG_MAX_BYTES:
+            return
+    except FileNotFoundError:
+        return
+
+    rutas = rutas_log()
+    if len(rutas) == 1:
+        LOG_PATH.unlink(missing_ok=True)
+        return
+    for origen, destino in zip(reversed(rutas[:-1]), reversed(rutas[1:])):
+        if origen.exists():
+            os.replace(origen, destino)
+
+
+def registrar_pregunta(pregunta: str, intent: Optional[str], confidence: float) -> None:
+    """
+    Agrega una pregunta de fallback al log que alimenta el job de clusters.
+
+    El log rota al superar LOG_MAX_BYTES y conserva LOG_BACKUPS archivos
+    anteriores. Nunca lanza excepciones: el log no debe interrumpir la
+    conversación.
+    """
+    if not pregunta or not pregunta.strip():
+        return
+
+    try:
+        LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
+        _rotar_log()
+        registro = {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "pregunta": pregunta.strip()[:LOG_MAX_CHARS],
+            "intent": intent,
+            "confidence": round(float(confidence or 0.0), 4)
+        }
+        with open(LOG_PATH, "a", encoding="utf-8") as f:
+            f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+    except Exception as e:
+        print(f"⚠️ No se pudo registrar la pregunta de fallback: {e}")
+
+
+def cargar_artefacto(path: Optional[Path] = None) -> Optional[Dict[str, Any]]:
+    """
+    Carga el artefacto de respuestas precalculadas (recarga si el archivo cambió).
+
+    Returns:
+        Dict del artefacto o None si no existe o no es compatible
+    """
+    global _artefacto, _artefacto_mtime, _centroides
+
+    path = Path(path or ARTIFACT_PATH)
+    try:
+        mtime = path.stat().st_mtime
+    except FileNotFoundError:
+        _artefacto, _artefacto_mtime, _centroides = None, None, None
+        return None
+
+    if _artefacto is not None and mtime == _artefacto_mtime:
+        return _artefacto
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            artefacto = json.load(f)
+    except Exception as e:
+        print(f"❌ Error al cargar respuestas precalculadas ({path}): {e}")
+        return None
+
+    if artefacto.get("schema_version") != ARTIFACT_SCHEMA_VERSION or artefacto.get("embedding_model") != EMBEDDING_MODEL:
+        print(f"⚠️ Artefacto de respuestas precalculadas incompatible: "
+              f"schema {artefacto.get('schema_version')}, modelo {artefacto.get('embedding_model')}")
+        return None
+
+    clusters = artefacto.get("clusters", [])
+    _artefacto = artefacto
+    _artefacto_mtime = mtime
+    _centroides = np.array([c["centroide"] for c in clusters], dtype=np.float32) if clusters else None
+    _vigencia.update(verificado=0.0, vigente=True, huella=None)
+
+    print(f"📦 Respuestas precalculadas v{artefacto.get('version')} cargadas: {len(clusters)} clusters")
+    return _artefacto
+
+
+def obtener_huella_corpus(api_base_url: str, timeout: float = 2.0) -> Optional[str]:
+    """
+    Consulta la huella del corpus indexado en BackRag.
+
+    Returns:
+        Huella hexadecimal o None si BackRag no responde
+    """
+    try:
+        response = requests.get(f"{api_base_url}/v1/health/corpus", timeout=timeout)
+        if response.status_code == 200:
+            return response.json().get("fingerprint")
+        print(f"⚠️ [Precalculadas] Huella del corpus no disponible: HTTP {response.status_code}")
+    except requests.exceptions.RequestException as e:
+        print(f"⚠️ [Precalculadas] No se pudo consultar la huella del corpus: {e}")
+    return None
+
+
+def verificar_vigencia(artefacto: Dict[str, Any], api_base_url: str) -> bool:
+    """
+    Compara (como máximo cada CORPUS_CHECK_SECONDS) la huella del corpus del
+    artefacto con la actual de BackRag.
+
+    Si BackRag no responde se conserva el último resultado: en ese caso las
+    respuestas precalculadas son justamente las que se pueden seguir dando.
+
+    Returns:
+        True si el artefacto corresponde al corpus actual
+    """
+    ahora = time.time()
+    if ahora - _vigencia["verificado"] < CORPUS_CHECK_SECONDS:
+        return _vigencia["vigente"]
+
+    _vigencia["verificado"] = ahora
+    huella = obtener_huella_corpus(api_base_url)
+    if huella is None:
+        return _vigencia["vigente"]
+
+    vigente = huella == artefacto.get("corpus_fingerprint")
+    if not vigente and _vigencia["vigente"]:
+        print(f"⚠️ [Precalculadas] El corpus cambió desde la versión {artefacto.get('version')}: "
+              f"respuestas desactivadas hasta ejecutar scripts/build_fallback_answers.py")
+    _vigencia.update(vigente=vigente, huella=huella)
+    return vigente
+
+
+def buscar_respuesta(pregunta: str, api_base_url: str) -> Optional[Dict[str, Any]]:
+    """
+    Busca el cluster más similar a la pregunta.
+
+    Además del umbral de similitud, la pregunta debe coincidir en negaciones
+    y términos clave con la pregunta canónica o algún ejemplo del cluster
+    (ver `coincide_terminos`).
+
+    Args:
+        pregunta: Texto del usuario
+        api_base_url: URL base de BackRag (para verificar la huella del corpus)
+
+    Returns:
+        Dict con cluster_id, similitud, respuesta y fuentes, o None si no hay
+        artefacto vigente, ningún cluster supera el umbral o el más similar
+        no coincide en términos clave
+    """
+    if not ENABLED or not pregunta or not pregunta.strip():
+        return None
+
+    artefacto = cargar_artefacto()
+    if artefacto is None or _centroides is None:
+        return None
+
+    if not verificar_vigencia(artefacto, api_base_url):
+        return None
+
+    try:
+        vector = embed_texts([pregunta])[0]
+    except Exception as e:
+        print(f"⚠️ [Precalculadas] No se pudo vectorizar la pregunta: {e}")
+        return None
+
+    similitudes = _centroides @ vector
+    mejor = int(np.argmax(similitudes))
+    similitud = float(similitudes[mejor])
+    umbral = float(THRESHOLD_OVERRIDE) if THRESHOLD_OVERRIDE else float(artefacto.get("umbral_similitud", 0.85))
+
+    if similitud < umbral:
+        return None
+
+    cluster = artefacto["clusters"][mejor]
+    referencias = [cluster["pregunta_canonica"]] + cluster.get("ejemplos", [])
+    if not any(coincide_terminos(pregunta, referencia) for referencia in referencias):
+        print(f"⚠️ [Precalculadas] Cluster {cluster['id']} similar ({similitud:.2f}) pero con otros "
+              f"términos clave o negaciones: se descarta")
+        return None
+
+    return {
+        "cluster_id": cluster["id"],
+        "similitud": similitud,
+        "pregunta_canonica": cluster["pregunta_canonica"],
+        "respuesta": cluster["respuesta"],
+        "fuentes": cluster.get("fuentes", []),
+        "version": artefacto.get("version")
+    }
+
+
+def formatear_respuesta(coincidencia: Dict[str, Any]) -> str:
+    """Respuesta precalculada con sus citas al Código Nacional de Tránsito."""
+    texto = coincidencia["respuesta"].strip()
+    articulos = [fuente["article"] for fuente in coincidencia.get("fuentes", []) if fuente.get("article")]
+    if articulos:
+        texto += f"\n\n📋 Fuentes: {', '.join(articulos)} (Ley 769 de 2002)"
+    return texto
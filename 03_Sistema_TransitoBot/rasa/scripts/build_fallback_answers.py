@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Genera las respuestas precalculadas para los clusters frecuentes de fallback.
+
+1. Lee las preguntas registradas por action_default_fallback
+   (logs/fallback_questions.jsonl; también acepta .txt con una por línea).
+2. Las vectoriza con los mismos vectores de spaCy que usa el action server
+   y las agrupa por similitud coseno.
+3. Para cada cluster con suficientes preguntas consulta BackRag (/v1/query)
+   con su pregunta canónica (la más cercana al centroide) y guarda la
+   respuesta con sus artículos citados. Los clusters cuya respuesta no
+   queda bien fundamentada (confianza baja o sin fuentes) se descartan.
+4. Escribe un artefacto versionado con los centroides y la huella del
+   corpus de BackRag (artifacts/fallback_answers/).
+
+Uso:
+    python scripts/build_fallback_answers.py --backrag-url http://localhost:8000/api
+    python scripts/build_fallback_answers.py --check   # solo verifica vigencia (exit 1 si obsoleto)
+"""
+import argparse
+import json
+import sys
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+import requests
+
+sys.path.append(str(Path(__file__).parent.parent / "actions"))
+
+from utils import fallback_answers  # noqa: E402
+
+MIN_PALABRAS_PREGUNTA = 3
+
+
+def cargar_preguntas(rutas: List[Path]) -> Counter:
+    """
+    Lee las preguntas de los logs y cuenta sus repeticiones.
+
+    Las preguntas se comparan en minúsculas y con espacios colapsados.
+    """
+    conteo: Counter = Counter()
+    for ruta in rutas:
+        if not ruta.exists():
+            print(f"⚠️ Log no encontrado: {ruta}")
+            continue
+
+        with open(ruta, "r", encoding="utf-8") as f:
+            for linea in f:
+                linea = linea.strip()
+                if not linea:
+                    continue
+                if ruta.suffix == ".jsonl":
+                    try:
+                        pregunta = json.loads(linea).get("pregunta", "")
+                    except json.JSONDecodeError:
+                        continue
+                else:
+                    pregunta = linea
+
+                pregunta = " ".join(pregunta.split())
+                if len(pregunta.split()) >= MIN_PALABRAS_PREGUNTA:
+                    conteo[pregunta.lower()] += 1
+
+    return conteo
+
+
+def agrupar(vectores: np.ndarray, pesos: np.ndarray, umbral: float, iteraciones: int = 5) -> np.ndarray:
+    """
+    Agrupa vectores normalizados por similitud coseno.
+
+    Primera pasada "líder": cada pregunta (de la más frecuente a la menos)
+    se une al centroide más similar si supera el umbral o abre un cluster.
+    Luego se refinan los centroides reasignando al más cercano, como en
+    k-means, sin dejar que una pregunta quede por debajo del umbral.
+
+    Returns:
+        Índice de cluster por vector (-1 si quedó aislado tras el refinamiento)
+    """
+    orden = np.argsort(-pesos, kind="stable")
+    centroides: List[np.ndarray] = []
+    sumas: List[np.ndarray] = []
+    asignacion = np.full(len(vectores), -1)
+
+    for i in orden:
+        if centroides:
+            similitudes = np.array(centroides) @ vectores[i]
+            mejor = int(np.argmax(similitudes))
+            if similitudes[mejor] >= umbral:
+                asignacion[i] = mejor
+                sumas[mejor] += pesos[i] * vectores[i]
+                centroides[mejor] = sumas[mejor] / max(np.linalg.norm(sumas[mejor]), 1e-12)
+                continue
+        asignacion[i] = len(centroides)
+        sumas.append(pesos[i] * vectores[i].copy())
+        centroides.append(vectores[i].copy())
+
+    matriz = np.array(centroides)
+    for _ in range(iteraciones):
+        similitudes = vectores @ matriz.T
+        nueva = np.where(similitudes.max(axis=1) >= umbral, similitudes.argmax(axis=1), -1)
+        if np.array_equal(nueva, asignacion):
+            break
+        asignacion = nueva
+        for k in range(len(matriz)):
+            miembros = asignacion == k
+            if miembros.any():
+                suma = (pesos[miembros, None] * vectores[miembros]).sum(axis=0)
+                matriz[k] = suma / max(np.linalg.norm(suma), 1e-12)
+
+    return asignacion
+
+
+def consultar_backrag(backrag_url: str, pregunta: str, timeout: float) -> Dict:
+    """Genera la respuesta fundamentada de un cluster con el RAG de BackRag."""
+    response = requests.post(
+        f"{backrag_url}/v1/query",
+        json={"query": pregunta, "bypass_cache": True},
+        timeout=timeout
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+def construir_clusters(
+    conteo: Counter,
+    args: argparse.Namespace
+) -> Tuple[List[Dict], Dict[str, int]]:
+    """Agrupa las preguntas y genera la respuesta de cada cluster frecuente."""
+    preguntas = list(conteo)
+    pesos = np.array([conteo[p] for p in preguntas], dtype=np.float32)
+    print(f"🔤 Vectorizando {len(preguntas)} preguntas únicas ({int(pesos.sum())} registros)...")
+    vectores = fallback_answers.embed_texts(preguntas)
+
+    # Preguntas sin ninguna palabra con vector no se pueden agrupar
+    validas = np.linalg.norm(vectores, axis=1) > 0
+    preguntas = [p for p, valida in zip(preguntas, validas) if valida]
+    vectores, pesos = vectores[validas], pesos[validas]
+
+    asignacion = agrupar(vectores, pesos, args.umbral_cluster)
+
+    grupos = []
+    for k in sorted(set(asignacion.tolist()) - {-1}):
+        miembros = np.where(asignacion == k)[0]
+        tamano = int(pesos[miembros].sum())
+        if tamano >= args.min_tamano:
+            grupos.append((tamano, miembros))
+    grupos.sort(key=lambda g: g[0], reverse=True)
+    grupos = grupos[:args.max_clusters]
+    print(f"🧩 {len(grupos)} clusters con al menos {args.min_tamano} preguntas")
+
+    clusters = []
+    descartes = {"sin_fundamento": 0, "error_backrag": 0}
+    for tamano, miembros in grupos:
+        suma = (pesos[miembros, None] * vectores[miembros]).sum(axis=0)
+        centroide = suma / max(np.linalg.norm(suma), 1e-12)
+        # Pregunta canónica: la más cercana al centroide
+        canonica = preguntas[miembros[int(np.argmax(vectores[miembros] @ centroide))]]
+
+        try:
+            resultado = consultar_backrag(args.backrag_url, canonica, args.timeout)
+        except requests.exceptions.RequestException as e:
+            print(f"   ❌ '{canonica}': error consultando BackRag ({e})")
+            descartes["error_backrag"] += 1
+            continue
+
+        fuentes = resultado.get("sources", [])
+        confianza = float(resultado.get("confidence", 0.0))
+        if not fuentes or confianza < args.min_confianza:
+            print(f"   ⚠️ '{canonica}': respuesta sin fundamento suficiente (confianza {confianza:.2f}), se descarta")
+            descartes["sin_fundamento"] += 1
+            continue
+
+        ejemplos = sorted((preguntas[i] for i in miembros), key=lambda p: -conteo[p])[:args.ejemplos]
+        clusters.append({
+            "id": f"c{len(clusters) + 1:03d}",
+            "tamano": tamano,
+            "pregunta_canonica": canonica,
+            "ejemplos": ejemplos,
+            "respuesta": resultado.get("answer", ""),
+            "confianza": round(confianza, 4),
+            "fuentes": [
+                {
+                    "article": fuente.get("article"),
+                    "description": fuente.get("description"),
+                    "similarity_score": fuente.get("similarity_score")
+                }
+                for fuente in fuentes
+            ],
+            "centroide": [round(float(x), 6) for x in centroide]
+        })
+        print(f"   ✅ {clusters[-1]['id']} ({tamano} preguntas): '{canonica}' → "
+              f"{', '.join(f['article'] for f in clusters[-1]['fuentes'])}")
+
+    return clusters, descartes
+
+
+def escribir_artefacto(artefacto: Dict, directorio: Path, conservar: int) -> Path:
+    """Escribe la versión nueva y actualiza fallback_answers.json de forma atómica."""
+    directorio.mkdir(parents=True, exist_ok=True)
+    contenido = json.dumps(artefacto, ensure_ascii=False, indent=1)
+
+    versionado = directorio / f"fallback_answers-{artefacto['version']}.json"
+    versionado.write_text(contenido, encoding="utf-8")
+
+    actual = directorio / "fallback_answers.json"
+    temporal = directorio / "fallback_answers.json.tmp"
+    temporal.write_text(contenido, encoding="utf-8")
+    temporal.replace(actual)
+
+    anteriores = sorted(directorio.glob("fallback_answers-*.json"))
+    for viejo in anteriores[:-conservar] if conservar > 0 else []:
+        viejo.unlink()
+
+    return actual
+
+
+def verificar(args: argparse.Namespace) -> int:
+    """Compara la huella del artefacto actual con la del corpus de BackRag."""
+    artefacto = fallback_answers.cargar_artefacto(args.output_dir / "fallback_answers.json")
+    if artefacto is None:
+        print("❌ No hay artefacto de respuestas precalculadas")
+        return 1
+
+    huella = fallback_answers.obtener_huella_corpus(args.backrag_url, timeout=args.timeout)
+    if huella is None:
+        print("❌ No se pudo obtener la huella del corpus de BackRag")
+        return 2
+
+    if huella != artefacto.get("corpus_fingerprint"):
+        print(f"⚠️ Artefacto v{artefacto['version']} obsoleto: el corpus cambió. Regenera las respuestas.")
+        return 1
+
+    print(f"✅ Artefacto v{artefacto['version']} vigente ({len(artefacto['clusters'])} clusters)")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Genera respuestas precalculadas para clusters de fallback")
+    parser.add_argument("--log", type=Path, action="append",
+                        help=f"Log de preguntas (.jsonl o .txt). Por defecto {fallback_answers.LOG_PATH} y sus rotaciones")
+    parser.add_argument("--backrag-url", default="http://localhost:8000/api", help="URL base de la API de BackRag")
+    parser.add_argument("--output-dir", type=Path, default=fallback_answers.ARTIFACT_PATH.parent)
+    parser.add_argument("--umbral-cluster", type=float, default=0.82,
+                        help="Similitud mínima para unir una pregunta a un cluster")
+    parser.add_argument("--umbral-respuesta", type=float, default=0.85,
+                        help="Similitud mínima para responder con la respuesta precalculada")
+    parser.add_argument("--min-tamano", type=int, default=3, help="Preguntas mínimas por cluster")
+    parser.add_argument("--max-clusters", type=int, default=50)
+    parser.add_argument("--min-confianza", type=float, default=0.5,
+                        help="Confianza mínima de la recuperación en BackRag para aceptar la respuesta")
+    parser.add_argument("--ejemplos", type=int, default=5, help="Preguntas de ejemplo guardadas por cluster")
+    parser.add_argument("--conservar", type=int, default=5, help="Versiones anteriores a conservar")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--check", action="store_true", help="Solo verificar si el artefacto actual está vigente")
+    args = parser.parse_args()
+
+    if args.check:
+        return verificar(args)
+
+    huella = fallback_answers.obtener_huella_corpus(args.backrag_url, timeout=args.timeout)
+    if huella is None:
+        print("❌ BackRag no disponible: se necesita la huella del corpus para versionar el artefacto")
+        return 2
+
+    conteo = cargar_preguntas(args.log or [ruta for ruta in fallback_answers.rutas_log() if ruta.exists()])
+    if not conteo:
+        print("❌ No hay preguntas de fallback registradas")
+        return 1
+
+    clusters, descartes = construir_clusters(conteo, args)
+
+    generado = datetime.now(timezone.utc)
+    artefacto = {
+        "schema_version": fallback_answers.ARTIFACT_SCHEMA_VERSION,
+        "version": generado.strftime("%Y%m%d%H%M%S"),
+        "generado": generado.isoformat(timespec="seconds"),
+        "embedding_model": fallback_answers.EMBEDDING_MODEL,
+        "corpus_fingerprint": huella,
+        "umbral_similitud": args.umbral_respuesta,
+        "parametros": {
+            "umbral_cluster": args.umbral_cluster,
+            "min_tamano": args.min_tamano,
+            "min_confianza": args.min_confianza,
+            "preguntas_unicas": len(conteo),
+            "registros": sum(conteo.values()),
+            "descartes": descartes
+        },
+        "clusters": clusters
+    }
+
+    ruta = escribir_artefacto(artefacto, args.output_dir, args.conservar)
+    print(f"\n📦 Artefacto v{artefacto['version']} con {len(clusters)} clusters escrito en {ruta}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
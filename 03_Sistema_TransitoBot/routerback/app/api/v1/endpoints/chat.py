@@ -2,11 +2,15 @@
 Endpoints para chat
 """
 from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import StreamingResponse
+from typing import Any, Optional, Tuple
+from datetime import datetime
+import json
 import logging
 
-from app.models.chat import UserMessage, BotResponse
+from app.models.chat import UserMessage, BotResponse, BotMessageItem
 from app.core.rasa_client import rasa_client
-from app.core.backrag_client import backrag_client
+from app.core.backrag_client import backrag_client, BackRagStreamError
 from app.core.message_transformer import message_transformer
 
 logger = logging.getLogger(__name__)
@@ -14,6 +18,77 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
+def _evaluar_fallback(rasa_responses) -> Tuple[bool, Optional[str]]:
+    """
+    Decide si la consulta debe ir a BackRag según la respuesta de RASA
+
+    Args:
+        rasa_responses: Respuestas de RASA (puede ser None o vacía)
+
+    Returns:
+        Tupla (usar BackRag, razón del fallback)
+    """
+    if not rasa_responses:
+        # RASA no respondió nada
+        logger.warning(f"[Chat] ✗ RASA no respondió (lista vacía)")
+        return True, "empty_response_list"
+
+    logger.info(f"[Chat] ✓ RASA respondió con {len(rasa_responses)} mensaje(s)")
+    logger.debug(f"[Chat] Respuestas RASA: {rasa_responses}")
+
+    should_use_rag = False
+    fallback_reason = None
+
+    # Evaluar criterios de fallback más inteligentes
+    first_response = rasa_responses[0]
+
+    # Criterio 1: Mensaje vacío o solo espacios
+    if not first_response.text or first_response.text.strip() == "":
+        should_use_rag = True
+        fallback_reason = "empty_text"
+        logger.info(f"[Chat] Criterio 1: Texto vacío detectado")
+
+    # Criterio 2: Custom metadata indica fallback
+    elif first_response.custom and first_response.custom.get("fallback") == True:
+        should_use_rag = True
+        fallback_reason = first_response.custom.get("reason", "custom_fallback")
+        logger.info(f"[Chat] Criterio 2: Metadata de fallback detectada - Razón: {fallback_reason}")
+
+    # Criterio 3: Confianza baja en custom metadata
+    elif first_response.custom and first_response.custom.get("confidence", 1.0) < 0.6:
+        should_use_rag = True
+        confidence = first_response.custom.get("confidence", 0)
+        fallback_reason = f"low_confidence_{confidence:.2f}"
+        logger.info(f"[Chat] Criterio 3: Baja confianza detectada ({confidence:.2f})")
+
+    # Criterio 4: Intent específico que debe ir a RAG
+    elif first_response.custom:
+        intent = first_response.custom.get("intent", "")
+        if intent in ["out_of_scope", "consulta_codigo_transito", "nlu_fallback"]:
+            should_use_rag = True
+            fallback_reason = f"intent_{intent}"
+            logger.info(f"[Chat] Criterio 4: Intent {intent} debe usar RAG")
+
+    if should_use_rag:
+        logger.warning(f"[Chat] ✗ RASA activó fallback - Razón: {fallback_reason}")
+
+    return should_use_rag, fallback_reason
+
+
+def _respuesta_error(sender_id: str) -> BotResponse:
+    """Respuesta genérica cuando ni RASA ni BackRag pueden responder"""
+    return BotResponse(
+        sender_id=sender_id,
+        messages=[
+            BotMessageItem(
+                text="Lo siento, en este momento no puedo procesar tu consulta. Por favor, intenta de nuevo más tarde.",
+                custom={"source": "fallback_error"}
+            )
+        ],
+        timestamp=datetime.utcnow()
+    )
+
+
 @router.post("/message", response_model=BotResponse, status_code=status.HTTP_200_OK)
 async def send_message(user_message: UserMessage):
     """
@@ -43,66 +118,25 @@ async def send_message(user_message: UserMessage):
         logger.info(f"[Chat] Respuestas recibidas de RASA: {len(rasa_responses) if rasa_responses else 0}")
         logger.info(f"===================================")
         # PASO 2: Evaluar si RASA pudo responder
-        should_use_rag = False
-        fallback_reason = None
-
-        if rasa_responses and len(rasa_responses) > 0:
-            logger.info(f"[Chat] ✓ RASA respondió con {len(rasa_responses)} mensaje(s)")
-            logger.debug(f"[Chat] Respuestas RASA: {rasa_responses}")
-
-            # Evaluar criterios de fallback más inteligentes
-            first_response = rasa_responses[0]
-
-            # Criterio 1: Mensaje vacío o solo espacios
-            if not first_response.text or first_response.text.strip() == "":
-                should_use_rag = True
-                fallback_reason = "empty_text"
-                logger.info(f"[Chat] Criterio 1: Texto vacío detectado")
-
-            # Criterio 2: Custom metadata indica fallback
-            elif first_response.custom and first_response.custom.get("fallback") == True:
-                should_use_rag = True
-                fallback_reason = first_response.custom.get("reason", "custom_fallback")
-                logger.info(f"[Chat] Criterio 2: Metadata de fallback detectada - Razón: {fallback_reason}")
-
-            # Criterio 3: Confianza baja en custom metadata
-            elif first_response.custom and first_response.custom.get("confidence", 1.0) < 0.6:
-                should_use_rag = True
-                confidence = first_response.custom.get("confidence", 0)
-                fallback_reason = f"low_confidence_{confidence:.2f}"
-                logger.info(f"[Chat] Criterio 3: Baja confianza detectada ({confidence:.2f})")
-
-            # Criterio 4: Intent específico que debe ir a RAG
-            elif first_response.custom:
-                intent = first_response.custom.get("intent", "")
-                if intent in ["out_of_scope", "consulta_codigo_transito", "nlu_fallback"]:
-                    should_use_rag = True
-                    fallback_reason = f"intent_{intent}"
-                    logger.info(f"[Chat] Criterio 4: Intent {intent} debe usar RAG")
-
-            # Si NO debe usar RAG, retornar respuesta de RASA
-            if not should_use_rag:
-                logger.info(f"[Chat] ✓ RASA manejó la consulta exitosamente")
-                bot_response = message_transformer.rasa_to_ui(
-                    sender_id=user_message.sender_id,
-                    rasa_responses=rasa_responses
-                )
-                logger.info(f"[Chat] Respuesta final enviada (origen: RASA) - {len(bot_response.messages)} mensaje(s)")
-                logger.info(f"========== FIN PROCESAMIENTO ==========")
-                return bot_response
-            else:
-                logger.warning(f"[Chat] ✗ RASA activó fallback - Razón: {fallback_reason}")
-        else:
-            # RASA no respondió nada
-            should_use_rag = True
-            fallback_reason = "empty_response_list"
-            logger.warning(f"[Chat] ✗ RASA no respondió (lista vacía)")
+        should_use_rag, fallback_reason = _evaluar_fallback(rasa_responses)
+
+        # Si NO debe usar RAG, retornar respuesta de RASA
+        if not should_use_rag:
+            logger.info(f"[Chat] ✓ RASA manejó la consulta exitosamente")
+            bot_response = message_transformer.rasa_to_ui(
+                sender_id=user_message.sender_id,
+                rasa_responses=rasa_responses
+            )
+            logger.info(f"[Chat] Respuesta final enviada (origen: RASA) - {len(bot_response.messages)} mensaje(s)")
+            logger.info(f"========== FIN PROCESAMIENTO ==========")
+            return bot_response
 
         # PASO 3: Activar fallback a BackRag
         logger.info(f"[Chat] PASO 3: Activando fallback a BackRag (Razón: {fallback_reason})...")
 
         rag_response = await backrag_client.query(
-            message=user_message.message
+            message=user_message.message,
+            sender_id=user_message.sender_id
         )
 
         # PASO 4: Evaluar respuesta de BackRag
@@ -123,19 +157,7 @@ async def send_message(user_message: UserMessage):
         logger.info(f"[Chat] Enviando respuesta genérica de fallback")
 
         # Respuesta genérica cuando ambos servicios fallan
-        from app.models.chat import BotMessageItem
-        from datetime import datetime
-
-        fallback_response = BotResponse(
-            sender_id=user_message.sender_id,
-            messages=[
-                BotMessageItem(
-                    text="Lo siento, en este momento no puedo procesar tu consulta. Por favor, intenta de nuevo más tarde.",
-                    custom={"source": "fallback_error"}
-                )
-            ],
-            timestamp=datetime.utcnow()
-        )
+        fallback_response = _respuesta_error(user_message.sender_id)
 
         logger.info(f"[Chat] Respuesta genérica enviada")
         logger.info(f"========== FIN PROCESAMIENTO ==========")
@@ -149,6 +171,83 @@ async def send_message(user_message: UserMessage):
         )
 
 
+def _evento_sse(evento: str, datos: Any) -> str:
+    """Serializa un evento Server-Sent Events con datos JSON"""
+    return f"event: {evento}\ndata: {json.dumps(datos, ensure_ascii=False)}\n\n"
+
+
+@router.post("/message/stream", status_code=status.HTTP_200_OK)
+async def send_message_stream(user_message: UserMessage):
+    """
+    Versión en streaming (Server-Sent Events) de /message
+
+    Aplica el mismo flujo de fallback. Si RASA responde, se emite un único
+    evento `messages` con la BotResponse seguido de `done`. Si se usa
+    BackRag, sus eventos (`sources`, `token`, `done`, `error`) se reenvían
+    tal cual a medida que llegan; si el stream se corta a la mitad se emite
+    `error` seguido de `done`.
+
+    - **sender_id**: ID único del usuario
+    - **message**: Mensaje del usuario
+    - **metadata**: Metadata adicional (opcional)
+    """
+    logger.info(f"========== NUEVO MENSAJE (STREAM) ==========")
+    logger.info(f"[Chat] Recibido de sender_id={user_message.sender_id}: '{user_message.message}'")
+
+    async def eventos():
+        try:
+            rasa_responses = await rasa_client.send_message(
+                sender_id=user_message.sender_id,
+                message=user_message.message,
+                metadata=user_message.metadata
+            )
+            should_use_rag, fallback_reason = _evaluar_fallback(rasa_responses)
+
+            if not should_use_rag:
+                bot_response = message_transformer.rasa_to_ui(
+                    sender_id=user_message.sender_id,
+                    rasa_responses=rasa_responses
+                )
+                logger.info(f"[Chat] Respuesta final enviada (origen: RASA) - {len(bot_response.messages)} mensaje(s)")
+                yield _evento_sse("messages", bot_response.model_dump(mode="json"))
+                yield _evento_sse("done", {"source": "rasa"})
+                return
+
+            logger.info(f"[Chat] Activando fallback a BackRag en streaming (Razón: {fallback_reason})...")
+            recibido = False
+            try:
+                async for chunk in backrag_client.query_stream(
+                    message=user_message.message,
+                    sender_id=user_message.sender_id
+                ):
+                    recibido = True
+                    yield chunk
+            except BackRagStreamError as e:
+                # Ya se reenviaron eventos: no se puede cambiar a la respuesta de error
+                logger.error(f"[Chat] ✗ Stream de BackRag interrumpido: {e}")
+                yield _evento_sse("error", {"detail": "La respuesta se interrumpió. Intenta de nuevo."})
+                yield _evento_sse("done", {"source": "backrag_error"})
+                return
+
+            if recibido:
+                logger.info(f"[Chat] Stream de BackRag finalizado")
+                return
+
+            logger.error(f"[Chat] ✗ Ni RASA ni BackRag pudieron responder")
+
+        except Exception as e:
+            logger.error(f"[Chat] ✗✗✗ Error crítico al procesar mensaje en streaming: {e}", exc_info=True)
+
+        yield _evento_sse("messages", _respuesta_error(user_message.sender_id).model_dump(mode="json"))
+        yield _evento_sse("done", {"source": "fallback_error"})
+
+    return StreamingResponse(
+        eventos(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.post("/reset/{sender_id}", status_code=status.HTTP_200_OK)
 async def reset_conversation(sender_id: str):
     """
@@ -23,6 +23,7 @@ class Settings(BaseSettings):
     # BackRag (Fallback RAG service)
     backrag_url: str = "http://localhost:8001"
     backrag_query_path: str = "/api/v1/query"
+    backrag_query_stream_path: str = "/api/v1/query/stream"
     backrag_timeout: int = 30
 
     # CORS
@@ -2,13 +2,20 @@
 Cliente HTTP para comunicarse con BackRag (servicio RAG de fallback)
 """
 import httpx
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, AsyncIterator
 import logging
 
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Eventos con los que BackRag cierra un stream
+EVENTOS_FINALES = (b"done", b"error")
+
+
+class BackRagStreamError(Exception):
+    """El stream de BackRag se cortó después de reenviar algún evento"""
+
 
 class BackRagClient:
     """Cliente para comunicarse con el servicio BackRag"""
@@ -16,6 +23,7 @@ class BackRagClient:
     def __init__(self):
         self.base_url = settings.backrag_url
         self.query_url = f"{self.base_url}{settings.backrag_query_path}"
+        self.query_stream_url = f"{self.base_url}{settings.backrag_query_stream_path}"
         self.timeout = settings.backrag_timeout
         logger.info(f"BackRagClient inicializado - URL: {self.query_url}, Timeout: {self.timeout}s")
 
@@ -23,7 +31,8 @@ class BackRagClient:
         self,
         message: str,
         max_results: int = 3,
-        confidence_threshold: float = 0.4
+        confidence_threshold: float = 0.4,
+        sender_id: Optional[str] = None
     ) -> Optional[Dict[str, Any]]:
         """
         Envía una consulta a BackRag y obtiene la respuesta RAG
@@ -32,6 +41,7 @@ class BackRagClient:
             message: Mensaje/pregunta del usuario
             max_results: Número máximo de resultados a buscar
             confidence_threshold: Umbral de confianza para resultados
+            sender_id: ID del usuario, para que BackRag mantenga su historial
 
         Returns:
             Respuesta de BackRag en formato dict o None si hay error
@@ -42,7 +52,8 @@ class BackRagClient:
             backrag_request = {
                 "query": message,
                 "max_results": max_results,
-                "confidence_threshold": confidence_threshold
+                "confidence_threshold": confidence_threshold,
+                "sender_id": sender_id
             }
 
             logger.info(f"[BackRag] Enviando consulta: '{message[:50]}...' (max_results={max_results}, threshold={confidence_threshold})")
@@ -83,6 +94,87 @@ class BackRagClient:
             logger.error(f"[BackRag] Error inesperado en BackRagClient: {e}", exc_info=True)
             return None
 
+    async def query_stream(
+        self,
+        message: str,
+        max_results: int = 3,
+        confidence_threshold: float = 0.4,
+        sender_id: Optional[str] = None
+    ) -> AsyncIterator[bytes]:
+        """
+        Envía una consulta al endpoint SSE de BackRag y reenvía los bytes recibidos
+
+        Los eventos (sources, token, done, error) se reenvían sin parsear para
+        no agregar latencia, pero solo completos: un evento a medio recibir
+        nunca se reenvía. El timeout aplica a la conexión y al intervalo
+        entre fragmentos, no a la duración total del stream.
+
+        Args:
+            message: Mensaje/pregunta del usuario
+            max_results: Número máximo de resultados a buscar
+            confidence_threshold: Umbral de confianza para resultados
+            sender_id: ID del usuario, para que BackRag mantenga su historial
+
+        Yields:
+            Eventos SSE completos; no produce nada si BackRag no está disponible
+
+        Raises:
+            BackRagStreamError: Si el stream falla o termina sin `done`/`error`
+                después de haber reenviado algún evento
+        """
+        backrag_request = {
+            "query": message,
+            "max_results": max_results,
+            "confidence_threshold": confidence_threshold,
+            "sender_id": sender_id
+        }
+
+        logger.info(f"[BackRag] Enviando consulta en streaming: '{message[:50]}...'")
+
+        reenviado = False
+        finalizado = False
+        try:
+            async with httpx.AsyncClient(timeout=self.timeout) as client:
+                async with client.stream("POST", self.query_stream_url, json=backrag_request) as response:
+                    response.raise_for_status()
+                    buffer = b""
+                    async for chunk in response.aiter_bytes():
+                        buffer += chunk.replace(b"\r\n", b"\n")
+                        # Los eventos SSE terminan en una línea en blanco
+                        while b"\n\n" in buffer:
+                            evento, buffer = buffer.split(b"\n\n", 1)
+                            if not evento.strip():
+                                continue
+                            finalizado = finalizado or self._es_evento_final(evento)
+                            reenviado = True
+                            yield evento + b"\n\n"
+
+        except httpx.TimeoutException as e:
+            logger.error(f"[BackRag] Timeout en streaming después de {self.timeout}s: {e}")
+            if reenviado:
+                raise BackRagStreamError(f"Timeout a mitad del stream: {e}") from e
+            return
+        except httpx.HTTPStatusError as e:
+            logger.error(f"[BackRag] Error HTTP {e.response.status_code} en streaming: {e}")
+            return
+        except httpx.HTTPError as e:
+            logger.error(f"[BackRag] Error de conexión en streaming: {e}")
+            if reenviado:
+                raise BackRagStreamError(f"Conexión cortada a mitad del stream: {e}") from e
+            return
+
+        if reenviado and not finalizado:
+            logger.error("[BackRag] El stream terminó sin evento done")
+            raise BackRagStreamError("El stream terminó sin evento done")
+
+    @staticmethod
+    def _es_evento_final(evento: bytes) -> bool:
+        """Indica si el evento SSE es `done` o `error`"""
+        for linea in evento.split(b"\n"):
+            if linea.startswith(b"event:"):
+                return linea[6:].strip() in EVENTOS_FINALES
+        return False
+
     async def health_check(self) -> bool:
         """
         Verifica si BackRag está disponible